@@ -4,20 +4,57 @@ Main entry point for the F1 Discord Bot.
 
 import os
 import logging
+import time
 import discord
 from discord.ext import commands
 import fastf1
 from config import Config
 from utils.logging_setup import setup_logging
 from utils.error_handler import ErrorHandler
+from services.http_archive import configure_fastf1_http
+from utils.tracing import event, new_request_id, request_id_var
+from utils.memory_profiler import memory_profiler
+from utils.loop_watchdog import loop_watchdog
 
-# Setup logging
-logger = setup_logging()
+def get_shard_config():
+    """
+    Read the shard settings from the environment.
+    
+    Returns:
+        tuple: (shard_count, shard_ids) - None for either lets Discord decide
+    """
+    shard_count = os.environ.get(Config.SHARD_COUNT_ENV_VAR)
+    shard_ids = os.environ.get(Config.SHARD_IDS_ENV_VAR)
+    
+    shard_count = int(shard_count) if shard_count else None
+    shard_ids = [int(shard_id) for shard_id in shard_ids.split(',')] if shard_ids else None
+    
+    if shard_ids and shard_count is None:
+        raise ValueError(f"{Config.SHARD_IDS_ENV_VAR} requires {Config.SHARD_COUNT_ENV_VAR} to be set")
+    
+    return shard_count, shard_ids
+
+shard_count, shard_ids = get_shard_config()
+
+# Setup logging, with a log file per shard range so processes don't rotate each other's files
+logger = setup_logging(log_name=Config.LOG_NAME + ''.join(f"_{shard_id}" for shard_id in shard_ids or []))
+
+# Trace allocations from the start, so +memstats can attribute the memory loaded later
+if Config.MEMORY_PROFILING:
+    memory_profiler.start()
 
 # Initialize Discord bot
+# AutoShardedBot runs every shard in this process unless SHARD_IDS assigns it a range,
+# so several processes can split the shards while sharing the on-disk caches
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix=Config.COMMAND_PREFIX, intents=intents, help_command=None)
+bot = commands.AutoShardedBot(
+    command_prefix=Config.COMMAND_PREFIX,
+    intents=intents,
+    help_command=None,
+    shard_count=shard_count,
+    shard_ids=shard_ids
+)
 
 # Enable FastF1 cache and setup
 # Create cache directory if it doesn't exist
@@ -26,7 +63,7 @@ if not os.path.exists(Config.CACHE_DIR):
     logger.info(f"Created FastF1 cache directory: {Config.CACHE_DIR}")
 
 fastf1.Cache.enable_cache(Config.CACHE_DIR)
-#fastf1.plotting.setup_mpl(misc_mpl_mods=False)
+configure_fastf1_http()
 
 # Setup hook for loading extensions
 @bot.event
@@ -38,7 +75,51 @@ async def setup_hook():
     await bot.load_extension('commands.telemetry')
     await bot.load_extension('commands.race_analysis')
     await bot.load_extension('commands.info')
+    await bot.load_extension('commands.admin')
     logger.info('All extensions loaded')
+    
+    # Watch for handlers that block the event loop (and with it the gateway heartbeat)
+    if Config.LOOP_WATCHDOG_ENABLED:
+        loop_watchdog.start()
+
+# Request tracing
+@bot.before_invoke
+async def start_request(ctx):
+    """
+    Give each command invocation a request ID.
+    
+    The ID is set in the invocation's task context, so log lines and trace
+    events from the command, the job it schedules and the workers running
+    it carry it.
+    
+    Args:
+        ctx: The command context
+    """
+    ctx.request_id = new_request_id()
+    ctx.request_started = time.perf_counter()
+    ctx.memory_started = memory_profiler.begin_command()
+    request_id_var.set(ctx.request_id)
+
+@bot.after_invoke
+async def finish_request(ctx):
+    """
+    Write the trace event for a finished command invocation and record the
+    memory it retained (when memory tracing is on).
+    
+    Args:
+        ctx: The command context
+    """
+    event(
+        'command',
+        command=ctx.command.qualified_name,
+        message=ctx.message.content[:200],
+        user_id=ctx.author.id,
+        guild_id=ctx.guild.id if ctx.guild else None,
+        shard_id=ctx.guild.shard_id if ctx.guild else None,
+        status='error' if ctx.command_failed else 'ok',
+        duration_ms=round((time.perf_counter() - ctx.request_started) * 1000, 2)
+    )
+    memory_profiler.end_command(ctx.command.qualified_name, ctx.memory_started)
 
 # Global error handler
 @bot.event
@@ -58,7 +139,8 @@ async def on_ready():
     Event handler for when the bot is ready.
     """
     logger.info(f'Bot is ready. Logged in as {bot.user}')
-    logger.info(f'Bot is in {len(bot.guilds)} guilds')
+    logger.info(f'Bot is in {len(bot.guilds)} guilds across shards {sorted(bot.shards)} '
+                f'of {bot.shard_count}')
     
     # Set bot status
     await bot.change_presence(
@@ -68,6 +150,27 @@ async def on_ready():
         )
     )
 
+@bot.event
+async def on_shard_ready(shard_id):
+    """
+    Event handler for when a shard is ready.
+    
+    Args:
+        shard_id: The ID of the shard
+    """
+    guild_count = sum(1 for guild in bot.guilds if guild.shard_id == shard_id)
+    logger.info(f'Shard {shard_id} is ready with {guild_count} guilds')
+
+@bot.event
+async def on_shard_disconnect(shard_id):
+    """
+    Event handler for when a shard loses its gateway connection.
+    
+    Args:
+        shard_id: The ID of the shard
+    """
+    logger.warning(f'Shard {shard_id} disconnected')
+
 @bot.event
 async def on_guild_join(guild):
     """
@@ -76,7 +179,7 @@ async def on_guild_join(guild):
     Args:
         guild: The guild the bot joined
     """
-    logger.info(f'Bot joined guild: {guild.name} (ID: {guild.id})')
+    logger.info(f'Bot joined guild: {guild.name} (ID: {guild.id}, shard {guild.shard_id})')
 
 def main():
     """
@@ -0,0 +1,297 @@
+"""
+Administrative commands for the F1 Discord Bot.
+"""
+
+import logging
+import discord
+from discord.ext import commands, tasks
+from config import Config
+from services.cache_manager import cache_manager
+from utils.render_profiles import render_profiles, ALL_COMMANDS
+from utils.figure_manager import figure_manager
+from utils.memory_profiler import memory_profiler, format_bytes, rss_bytes
+from utils.metrics import metrics
+from utils.tracing import run_in_executor
+
+logger = logging.getLogger('f1bot')
+
+class AdminCog(commands.Cog):
+    """
+    Commands for configuring and operating the bot.
+    """
+
+    def __init__(self, bot):
+        """
+        Initialize the admin commands.
+
+        Args:
+            bot: The Discord bot instance
+        """
+        self.bot = bot
+
+    async def cog_load(self):
+        """Start the FastF1 cache budget checks."""
+        self.cache_maintenance.start()
+
+    async def cog_unload(self):
+        """Stop the FastF1 cache budget checks."""
+        self.cache_maintenance.cancel()
+
+    @tasks.loop(seconds=Config.CACHE_CHECK_INTERVAL)
+    async def cache_maintenance(self):
+        """
+        Keep the FastF1 cache under its size budget.
+        """
+        try:
+            await run_in_executor(cache_manager.enforce_budget)
+        except Exception as e:
+            logger.error(f"Error enforcing the FastF1 cache budget: {e}")
+
+    @commands.command(name="renderprofile")
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def renderprofile(self, ctx, profile_name=None, command_name=None):
+        """
+        Show or set the image render profile for this server.
+
+        Args:
+            ctx: The command context
+            profile_name: Profile to use, or 'reset' to clear the override
+            command_name: Optional command to apply the profile to (default: all commands)
+        """
+        if profile_name is None:
+            overrides = render_profiles.get_guild_overrides(ctx.guild.id)
+            current = [f"Default: `{render_profiles.resolve(None, ctx.guild.id).name}`"]
+            current += [f"`{command}`: `{name}`" for command, name in sorted(overrides.items())
+                        if command != ALL_COMMANDS]
+            embed = discord.Embed(title="Render Profiles", color=discord.Color.blue())
+            embed.add_field(
+                name="Available",
+                value="\n".join(f"`{name}` - {profile.fmt.upper()} @ {profile.dpi} dpi"
+                                for name, profile in render_profiles.profiles.items()),
+                inline=False
+            )
+            embed.add_field(
+                name="This Server",
+                value="\n".join(current),
+                inline=False
+            )
+            await ctx.send(embed=embed)
+            return
+
+        if command_name and command_name not in self.bot.all_commands:
+            await ctx.send(f"Unknown command `{command_name}`.")
+            return
+
+        try:
+            if profile_name.lower() == 'reset':
+                render_profiles.set_guild_profile(ctx.guild.id, None, command_name)
+                await ctx.send(f"Render profile override cleared for `{command_name or 'all commands'}`.")
+            else:
+                render_profiles.set_guild_profile(ctx.guild.id, profile_name, command_name)
+                await ctx.send(f"Render profile for `{command_name or 'all commands'}` set to `{profile_name}`.")
+        except KeyError:
+            await ctx.send(f"Unknown profile `{profile_name}`. "
+                           f"Available: {', '.join(render_profiles.profiles)}")
+
+    @commands.command(name="shards")
+    async def shards(self, ctx):
+        """
+        Show gateway latency and guild count for each shard run by this process.
+
+        Args:
+            ctx: The command context
+        """
+        guild_counts = {}
+        for guild in self.bot.guilds:
+            guild_counts[guild.shard_id] = guild_counts.get(guild.shard_id, 0) + 1
+
+        shard_count = self.bot.shard_count or 1
+        embed = discord.Embed(
+            title="Shards",
+            description=f"This process runs {len(self.bot.latencies)} of {shard_count} shards.",
+            color=discord.Color.blue()
+        )
+
+        # Embeds hold at most 25 fields
+        for shard_id, latency in sorted(self.bot.latencies)[:25]:
+            current = " (this server)" if ctx.guild and ctx.guild.shard_id == shard_id else ""
+            embed.add_field(
+                name=f"Shard {shard_id}{current}",
+                value=f"Latency: {latency * 1000:.0f} ms\n"
+                      f"Guilds: {guild_counts.get(shard_id, 0)}",
+                inline=True
+            )
+
+        await ctx.send(embed=embed)
+
+    @commands.command(name="metrics")
+    @commands.is_owner()
+    async def metrics_command(self, ctx):
+        """
+        Show the bot's counters and cache/queue stats.
+
+        Args:
+            ctx: The command context
+        """
+        embed = discord.Embed(title="Metrics", color=discord.Color.blue())
+
+        # Embeds hold at most 25 fields
+        for group, values in sorted(metrics.snapshot().items())[:25]:
+            embed.add_field(
+                name=group,
+                value="\n".join(f"{name}: {value}" for name, value in sorted(values.items())) or "-",
+                inline=True
+            )
+
+        await ctx.send(embed=embed)
+
+    @commands.command(name="cache")
+    @commands.is_owner()
+    async def cache(self, ctx, action=None):
+        """
+        Show the FastF1 cache size, or evict sessions down to the budget.
+
+        Args:
+            ctx: The command context
+            action: 'prune' to enforce the size budget now
+        """
+        evicted = None
+        if action == 'prune':
+            evicted = await run_in_executor(cache_manager.enforce_budget)
+        elif action is not None:
+            await ctx.send("Usage: `+cache [prune]`")
+            return
+
+        usage = await run_in_executor(cache_manager.usage)
+        embed = discord.Embed(title="FastF1 Cache", color=discord.Color.blue())
+        embed.add_field(
+            name="Size",
+            value=f"{usage['total_bytes'] / 1024 ** 2:.0f} MB of {usage['max_bytes'] / 1024 ** 2:.0f} MB\n"
+                  f"Sessions: {usage['sessions']} ({usage['session_bytes'] / 1024 ** 2:.0f} MB)\n"
+                  f"HTTP cache: {usage['http_cache_bytes'] / 1024 ** 2:.0f} MB",
+            inline=False
+        )
+        embed.add_field(
+            name="Pinned Seasons",
+            value=f"{', '.join(map(str, cache_manager.pinned()))} ({usage['pinned_bytes'] / 1024 ** 2:.0f} MB)",
+            inline=False
+        )
+        if evicted is not None:
+            embed.add_field(name="Evicted", value=f"{len(evicted)} sessions", inline=False)
+
+        await ctx.send(embed=embed)
+
+    @commands.command(name="memstats")
+    @commands.is_owner()
+    async def memstats(self, ctx, action=None):
+        """
+        Show memory use by cache and top allocating code, or manage tracemalloc snapshots.
+
+        Args:
+            ctx: The command context
+            action: 'start' or 'stop' tracing, 'snapshot' to keep a snapshot,
+                or 'diff' to compare the last two snapshots
+        """
+        if action in ('start', 'stop'):
+            getattr(memory_profiler, action)()
+            await ctx.send(f"Memory tracing {'started' if action == 'start' else 'stopped'}.")
+            return
+        if action not in (None, 'snapshot', 'diff'):
+            await ctx.send("Usage: `+memstats [start|stop|snapshot|diff]`")
+            return
+        if action is not None and not memory_profiler.tracing:
+            await ctx.send("Memory tracing is off. Start it with `+memstats start`.")
+            return
+
+        if action == 'snapshot':
+            label = await run_in_executor(memory_profiler.take_snapshot)
+            await ctx.send(f"Kept snapshot `{label}` "
+                           f"({len(memory_profiler.snapshot_labels())} of {memory_profiler.max_snapshots}).")
+            return
+
+        if action == 'diff':
+            labels = memory_profiler.snapshot_labels()
+            if not labels:
+                await ctx.send("Take a snapshot first with `+memstats snapshot`.")
+                return
+            if len(labels) == 1:
+                labels.append(await run_in_executor(memory_profiler.take_snapshot))
+            old, new = labels[-2:]
+            rows = await run_in_executor(memory_profiler.diff, old, new)
+            path = await run_in_executor(memory_profiler.dump_diff, old, new)
+            embed = discord.Embed(title=f"Memory Growth {old} to {new}", color=discord.Color.blue())
+            embed.add_field(
+                name="Largest Growth",
+                value="\n".join(f"`{location}` {format_bytes(size_diff)}"
+                                for location, size_diff, _, _ in rows[:10]) or "-",
+                inline=False
+            )
+            await ctx.send(embed=embed, file=discord.File(path))
+            return
+
+        footprints = await run_in_executor(memory_profiler.cache_footprints)
+        embed = discord.Embed(title="Memory", color=discord.Color.blue())
+        embed.add_field(
+            name="Process",
+            value=f"RSS: {format_bytes(rss_bytes())}\n"
+                  f"Live figures: {figure_manager.stats()['live']}",
+            inline=False
+        )
+        embed.add_field(
+            name="Caches",
+            value="\n".join(f"{name}: {format_bytes(size)}" for name, size in sorted(footprints.items())) or "-",
+            inline=False
+        )
+
+        if memory_profiler.tracing:
+            top = await run_in_executor(memory_profiler.top_allocators)
+            embed.add_field(
+                name="Top Allocators",
+                value="\n".join(f"`{location}` {format_bytes(size)}" for location, size, _ in top) or "-",
+                inline=False
+            )
+            retained = sorted(memory_profiler.command_stats().items(), key=lambda item: -item[1]['retained'])
+            embed.add_field(
+                name="Retained by Command",
+                value="\n".join(f"{name}: {format_bytes(stats['retained'] / stats['runs'])} avg over "
+                                f"{stats['runs']} runs, max {format_bytes(stats['max_retained'])}"
+                                for name, stats in retained[:8]) or "-",
+                inline=False
+            )
+        else:
+            embed.set_footer(text="Allocation tracing is off; +memstats start turns it on.")
+
+        await ctx.send(embed=embed)
+
+    @renderprofile.error
+    @metrics_command.error
+    @cache.error
+    @memstats.error
+    async def admin_error(self, ctx, error):
+        """
+        Error handler for admin commands.
+
+        Args:
+            ctx: The command context
+            error: The error that occurred
+        """
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.send("You need the Manage Server permission to use this command.")
+        elif isinstance(error, commands.NotOwner):
+            await ctx.send("Only the bot owner can use this command.")
+        elif isinstance(error, commands.NoPrivateMessage):
+            await ctx.send("This command can only be used in a server.")
+        else:
+            logger.error(f"Unhandled error in {ctx.command.name}: {error}")
+            await ctx.send(f"An error occurred: {str(error)}")
+
+
+async def setup(bot):
+    """
+    Set up the admin cog.
+
+    Args:
+        bot: The Discord bot instance
+    """
+    await bot.add_cog(AdminCog(bot))
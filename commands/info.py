@@ -25,10 +25,14 @@ class InfoCog(commands.Cog):
             bot: The Discord bot instance
         """
         self.bot = bot
-        self.standings_service = StandingsService()
         self.schedule_service = ScheduleService()
+        self.standings_service = StandingsService(schedule_service=self.schedule_service)
         self.embed_builder = EmbedBuilder()
     
+    async def cog_unload(self):
+        """Release the pooled HTTP connections when the cog is unloaded."""
+        await self.standings_service.close()
+    
     @commands.command(name="f1")
     async def f1(self, ctx):
         """
@@ -38,12 +42,9 @@ class InfoCog(commands.Cog):
             ctx: The command context
         """
         try:
-            # Load schedule and country flags
-            self.schedule_service.load_schedule()
-            country_flags = self.schedule_service.load_country_flags()
-            
-            # Get the next event
+            # Get the next event (schedule and flags are reloaded only if their files changed)
             next_event = self.schedule_service.get_next_event()
+            country_flags = self.schedule_service.get_country_flags()
             
             if not next_event:
                 await ctx.send("No upcoming F1 events found.")
@@ -68,7 +69,7 @@ class InfoCog(commands.Cog):
         """
         try:
             # Get driver standings
-            standings = self.standings_service.get_driver_standings(year)
+            standings = await self.standings_service.get_driver_standings(year)
             
             if not standings:
                 await ctx.send("Could not retrieve driver standings.")
@@ -78,6 +79,9 @@ class InfoCog(commands.Cog):
             embed = self.embed_builder.build_driver_standings_embed(standings)
             await ctx.send(embed=embed)
             
+        except ValueError as e:
+            # Invalid year
+            await ctx.send(str(e))
         except Exception as e:
             logger.error(f"Error in drivers command: {e}")
             await ctx.send(f"An error occurred: {str(e)}")
@@ -93,7 +97,7 @@ class InfoCog(commands.Cog):
         """
         try:
             # Get constructor standings
-            standings = self.standings_service.get_constructor_standings(year)
+            standings = await self.standings_service.get_constructor_standings(year)
             
             if not standings:
                 await ctx.send("Could not retrieve constructor standings.")
@@ -103,6 +107,9 @@ class InfoCog(commands.Cog):
             embed = self.embed_builder.build_constructor_standings_embed(standings)
             await ctx.send(embed=embed)
             
+        except ValueError as e:
+            # Invalid year
+            await ctx.send(str(e))
         except Exception as e:
             logger.error(f"Error in constructors command: {e}")
             await ctx.send(f"An error occurred: {str(e)}")
@@ -129,6 +136,7 @@ class InfoCog(commands.Cog):
                 name="Telemetry Commands",
                 value="`speedtrace` - Compare speed traces between two drivers\n"
                       "`gearshifts` - Show gear shifts on a track map\n"
+                      "`speedmap` - Show speed or braking from every lap on a track map\n"
                       "`trackdominance` - Show which driver is fastest in each mini-sector",
                 inline=False
             )
@@ -138,7 +146,11 @@ class InfoCog(commands.Cog):
                 name="Race Analysis Commands",
                 value="`racepace` - Show race pace comparison\n"
                       "`teampace` - Show team pace comparison\n"
-                      "`lapsections` - Analyze different sections of laps",
+                      "`positions` - Show running positions lap by lap\n"
+                      "`strategy` - Show every driver's tyre stints\n"
+                      "`lapsections` - Analyze different sections of laps\n"
+                      "`laptimes` - Query lap times by driver, laps, tyres and track status\n"
+                      "`quali` - Analyze Q1, Q2 and Q3 for every driver",
                 inline=False
             )
             
@@ -151,6 +163,17 @@ class InfoCog(commands.Cog):
                 inline=False
             )
             
+            # Admin commands
+            embed.add_field(
+                name="Admin Commands",
+                value="`renderprofile` - Choose image quality/format for this server\n"
+                      "`shards` - Show shard latency and guild counts\n"
+                      "`metrics` - Show bot counters and cache stats (owner only)\n"
+                      "`cache` - Show or prune the FastF1 cache (owner only)\n"
+                      "`memstats` - Show memory use and allocation snapshots (owner only)",
+                inline=False
+            )
+            
             # Help command
             embed.add_field(
                 name="Help",
@@ -180,6 +203,19 @@ class InfoCog(commands.Cog):
                     ["+gearshifts 2023 Monaco Q VER"]
                 )
                 
+            elif command_name == "speedmap":
+                embed = self.embed_builder.build_help_embed(
+                    "speedmap",
+                    "Show the telemetry of every valid lap of every driver on the track map. "
+                    "Metrics: `speed` (average speed, default), `braking` (how often drivers brake) "
+                    "and `variance` (how much the speed varies).",
+                    "+speedmap [year] [race] [session] [metric]",
+                    [
+                        "+speedmap 2024 Monza R",
+                        "+speedmap 2024 Monza Q braking"
+                    ]
+                )
+                
             elif command_name == "trackdominance":
                 embed = self.embed_builder.build_help_embed(
                     "trackdominance",
@@ -207,6 +243,28 @@ class InfoCog(commands.Cog):
                     ["+teampace 2023 Monaco"]
                 )
                 
+            elif command_name == "positions":
+                embed = self.embed_builder.build_help_embed(
+                    "positions",
+                    "Show every driver's running position lap by lap, with pit stops marked.",
+                    "+positions [year] [race] [session]",
+                    [
+                        "+positions 2024 Monza",
+                        "+positions 2024 Miami S"
+                    ]
+                )
+                
+            elif command_name == "strategy":
+                embed = self.embed_builder.build_help_embed(
+                    "strategy",
+                    "Show every driver's tyre stints as a timeline, coloured by compound.",
+                    "+strategy [year] [race] [session]",
+                    [
+                        "+strategy 2024 Monza",
+                        "+strategy 2024 Miami S"
+                    ]
+                )
+                
             elif command_name == "lapsections":
                 embed = self.embed_builder.build_help_embed(
                     "lapsections",
@@ -218,6 +276,32 @@ class InfoCog(commands.Cog):
                     ]
                 )
                 
+            elif command_name == "laptimes":
+                embed = self.embed_builder.build_help_embed(
+                    "laptimes",
+                    "Show lap times matching filters, as a table (add `plot` for a chart). "
+                    "Filters: driver codes, a lap range (`20-35`), compounds (`soft`, `m`, `compound=hard`), "
+                    "stints (`stint=2`), track status (`green`, `sc`, `vsc`, `yellow`, `red`) and `quick` "
+                    "(laps within 107% of the fastest).",
+                    "+laptimes [year] [race] [session] [filters...] [plot]",
+                    [
+                        "+laptimes 2024 Monza R VER NOR 20-35 medium",
+                        "+laptimes 2024 Monza R LEC stint=2 green quick plot"
+                    ]
+                )
+                
+            elif command_name == "quali":
+                embed = self.embed_builder.build_help_embed(
+                    "quali",
+                    "Analyze Q1, Q2 and Q3 for every driver: best times, improvement between segments, "
+                    "ideal lap from best sectors and gap to the cut-off.",
+                    "+quali [year] [race] [session]",
+                    [
+                        "+quali 2024 Monza",
+                        "+quali 2024 Miami SQ"
+                    ]
+                )
+                
             elif command_name == "f1":
                 embed = self.embed_builder.build_help_embed(
                     "f1",
@@ -242,6 +326,55 @@ class InfoCog(commands.Cog):
                     ["+constructors", "+constructors 2023"]
                 )
                 
+            elif command_name == "renderprofile":
+                embed = self.embed_builder.build_help_embed(
+                    "renderprofile",
+                    "Show or set the image render profile (preview, standard, full, webp, palette) "
+                    "for this server. Requires the Manage Server permission.",
+                    "+renderprofile [profile|reset] [command]",
+                    ["+renderprofile", "+renderprofile webp", "+renderprofile full speedtrace",
+                     "+renderprofile reset"]
+                )
+                
+            elif command_name == "metrics":
+                embed = self.embed_builder.build_help_embed(
+                    "metrics",
+                    "Show the bot's counters (jobs, deduplicated requests) and cache and queue stats. "
+                    "Only the bot owner can use this command.",
+                    "+metrics",
+                    ["+metrics"]
+                )
+                
+            elif command_name == "cache":
+                embed = self.embed_builder.build_help_embed(
+                    "cache",
+                    "Show the size of the FastF1 data cache against its budget. With `prune`, evict "
+                    "the least recently used sessions (outside pinned seasons) until it fits. "
+                    "Only the bot owner can use this command.",
+                    "+cache [prune]",
+                    ["+cache", "+cache prune"]
+                )
+                
+            elif command_name == "memstats":
+                embed = self.embed_builder.build_help_embed(
+                    "memstats",
+                    "Show the process memory, the memory held by each cache and, while allocation "
+                    "tracing is on, the code holding the most memory and what each command retained. "
+                    "`snapshot` keeps a snapshot and `diff` compares the last two, attaching the full "
+                    "comparison. `start` and `stop` turn tracing on and off. "
+                    "Only the bot owner can use this command.",
+                    "+memstats [start|stop|snapshot|diff]",
+                    ["+memstats", "+memstats start", "+memstats snapshot", "+memstats diff"]
+                )
+                
+            elif command_name == "shards":
+                embed = self.embed_builder.build_help_embed(
+                    "shards",
+                    "Show gateway latency and guild count for each shard run by this bot process.",
+                    "+shards",
+                    ["+shards"]
+                )
+                
             else:
                 embed = discord.Embed(
                     title="Command Not Found",
@@ -0,0 +1,98 @@
+"""
+Shared base for cogs whose commands run as rendering jobs.
+"""
+
+import functools
+import io
+import logging
+import discord
+from discord.ext import commands
+from services.job_broker import JobSpec
+from services.job_executor import job_executor
+from services.session_repository import session_repository
+from utils.render_profiles import render_profiles
+from utils.job_scheduler import job_scheduler, QueueFullError, PRIORITY_CACHED, PRIORITY_NORMAL
+
+logger = logging.getLogger('f1bot')
+
+class JobCog(commands.Cog):
+    """
+    Base cog running commands through the job scheduler.
+    """
+    
+    def __init__(self, bot):
+        """
+        Initialize the cog.
+        
+        Args:
+            bot: The Discord bot instance
+        """
+        self.bot = bot
+    
+    def _priority(self, year, race, session='R'):
+        """
+        Get the scheduling priority for a command on a session.
+        
+        Args:
+            year: The year of the session
+            race: The race name or round number
+            session: The session type (default: 'R' for race)
+        
+        Returns:
+            int: PRIORITY_CACHED if the session is already loaded, else PRIORITY_NORMAL
+        """
+        if session_repository.is_loaded(year, race, session):
+            return PRIORITY_CACHED
+        return PRIORITY_NORMAL
+    
+    @staticmethod
+    def _image_file(image, filename):
+        """
+        Wrap a rendered image for sending.
+        
+        Args:
+            image: The PNG bytes
+            filename: The attachment file name
+        
+        Returns:
+            discord.File: The attachment
+        """
+        return discord.File(io.BytesIO(image), filename=filename)
+    
+    async def _run_job(self, ctx, command, args, reply=None):
+        """
+        Run a command's job with the guild's render profile and send the result.
+        
+        Rejections by a full queue are already reported by the scheduler;
+        any other failure is reported to the channel.
+        
+        Args:
+            ctx: The command context
+            command: The job handler name
+            args: The job arguments ('year', 'race' and 'session' set the priority)
+            reply: Optional coroutine function sending the job's result
+                (default: send the image and file name the job returns)
+        """
+        spec = JobSpec(
+            command,
+            args,
+            profile=render_profiles.resolve_for_context(ctx).name,
+            priority=self._priority(args['year'], args['race'], args.get('session', 'R'))
+        )
+        
+        try:
+            result = await job_scheduler.run_for_context(
+                ctx, functools.partial(job_executor.run, spec), spec.priority, key=spec.key()
+            )
+            
+            if reply is None:
+                image, filename = result[:2]
+                await ctx.send(file=self._image_file(image, filename))
+            else:
+                await reply(result)
+        
+        except QueueFullError as e:
+            logger.info(f"Rejected {command} command: {e}")
+        except Exception as e:
+            logger.error(f"Error in {command} command: {e}")
+            await ctx.send(f"An error occurred: {str(e)}")
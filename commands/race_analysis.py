@@ -3,28 +3,18 @@ Race analysis commands for the F1 Discord Bot.
 """
 
 import logging
-import discord
 from discord.ext import commands
-from services.race_analysis_service import RaceAnalysisService
-from config import Config
+from commands.job_cog import JobCog
+from services.lap_query import LapQuery
+from utils.embed_builder import EmbedBuilder
 
 logger = logging.getLogger('f1bot')
 
-class RaceAnalysisCog(commands.Cog):
+class RaceAnalysisCog(JobCog):
     """
     Commands for F1 race analysis.
     """
     
-    def __init__(self, bot):
-        """
-        Initialize the race analysis commands.
-        
-        Args:
-            bot: The Discord bot instance
-        """
-        self.bot = bot
-        self.race_analysis_service = RaceAnalysisService()
-    
     @commands.command(name="racepace")
     async def racepace(self, ctx, year, race):
         """
@@ -35,22 +25,7 @@ class RaceAnalysisCog(commands.Cog):
             year: The year of the race
             race: The race name or round number
         """
-        await ctx.send(Config.LOADING_MESSAGE)
-        
-        try:
-            # Load session data
-            session = self.race_analysis_service.get_session(year, race)
-            
-            # Create the plot
-            _, filename = self.race_analysis_service.create_race_pace_plot(session)
-            
-            # Send the image
-            image = discord.File(filename)
-            await ctx.send(file=image)
-            
-        except Exception as e:
-            logger.error(f"Error in racepace command: {e}")
-            await ctx.send(f"An error occurred: {str(e)}")
+        await self._run_job(ctx, 'racepace', {'year': year, 'race': race})
     
     @commands.command(name="teampace")
     async def teampace(self, ctx, year, race):
@@ -62,22 +37,33 @@ class RaceAnalysisCog(commands.Cog):
             year: The year of the race
             race: The race name or round number
         """
-        await ctx.send(Config.LOADING_MESSAGE)
+        await self._run_job(ctx, 'teampace', {'year': year, 'race': race})
+    
+    @commands.command(name="positions")
+    async def positions(self, ctx, year, race, session_name='R'):
+        """
+        Show every driver's running position lap by lap, with their pit stops.
         
-        try:
-            # Load session data
-            session = self.race_analysis_service.get_session(year, race)
-            
-            # Create the plot
-            _, filename = self.race_analysis_service.create_team_pace_plot(session)
-            
-            # Send the image
-            image = discord.File(filename)
-            await ctx.send(file=image)
-            
-        except Exception as e:
-            logger.error(f"Error in teampace command: {e}")
-            await ctx.send(f"An error occurred: {str(e)}")
+        Args:
+            ctx: The command context
+            year: The year of the race
+            race: The race name or round number
+            session_name: The session type (default: 'R', or 'S' for the sprint)
+        """
+        await self._run_job(ctx, 'positions', {'year': year, 'race': race, 'session': session_name})
+    
+    @commands.command(name="strategy")
+    async def strategy(self, ctx, year, race, session_name='R'):
+        """
+        Show every driver's tyre stints as a timeline.
+        
+        Args:
+            ctx: The command context
+            year: The year of the race
+            race: The race name or round number
+            session_name: The session type (default: 'R', or 'S' for the sprint)
+        """
+        await self._run_job(ctx, 'strategy', {'year': year, 'race': race, 'session': session_name})
     
     @commands.command(name="lapsections")
     async def lapsections(self, ctx, year, grand_prix, session_name, *drivers):
@@ -91,26 +77,75 @@ class RaceAnalysisCog(commands.Cog):
             session_name: The session type (e.g., 'R', 'Q', 'FP1')
             drivers: Optional list of driver codes (up to 5)
         """
-        await ctx.send(Config.LOADING_MESSAGE)
+        await self._run_job(
+            ctx, 'lapsections',
+            {'year': year, 'race': grand_prix, 'session': session_name, 'drivers': list(drivers)}
+        )
+    
+    @commands.command(name="quali")
+    async def quali(self, ctx, year, grand_prix, session_name='Q'):
+        """
+        Analyze the Q1, Q2 and Q3 segments of a qualifying session.
         
+        Args:
+            ctx: The command context
+            year: The year of the session
+            grand_prix: The race name
+            session_name: The session type (default: 'Q', or 'SQ' for sprint qualifying)
+        """
+        async def reply(result):
+            image, filename, analysis = result
+            # Send the plot with the segment summary
+            await ctx.send(file=self._image_file(image, filename),
+                           embed=EmbedBuilder.build_qualifying_embed(analysis))
+        
+        await self._run_job(
+            ctx, 'quali',
+            {'year': year, 'race': grand_prix, 'session': session_name},
+            reply=reply
+        )
+    
+    @commands.command(name="laptimes")
+    async def laptimes(self, ctx, year, grand_prix, session_name, *filters):
+        """
+        Show the lap times matching a set of filters, as a table or a plot.
+        
+        Args:
+            ctx: The command context
+            year: The year of the session
+            grand_prix: The race name
+            session_name: The session type (e.g., 'R', 'Q', 'FP1')
+            filters: Driver codes, lap range, compounds, stints, track statuses,
+                'quick' and 'plot' (see LapQuery.parse)
+        """
+        plot = any(token.lower() == 'plot' for token in filters)
         try:
-            # Load session data
-            session = self.race_analysis_service.get_session(year, grand_prix, session_name)
-            
-            # Create the plot
-            _, filename = self.race_analysis_service.create_lap_sections_plot(session, drivers)
-            
-            # Send the image
-            image = discord.File(filename)
-            await ctx.send(file=image)
-            
-        except Exception as e:
-            logger.error(f"Error in lapsections command: {e}")
-            await ctx.send(f"An error occurred: {str(e)}")
+            query = LapQuery.parse([token for token in filters if token.lower() != 'plot'])
+        except ValueError as e:
+            await ctx.send(f"{e}. See `+bhelp laptimes` for the filters.")
+            return
+        
+        async def reply(result):
+            image, filename, table = result
+            if image is None:
+                await ctx.send(table)
+            else:
+                await ctx.send(table, file=self._image_file(image, filename))
+        
+        # Equivalent queries share a job key, so they are answered once
+        await self._run_job(
+            ctx, 'laptimes',
+            {'year': year, 'race': grand_prix, 'session': session_name, 'query': query.to_dict(), 'plot': plot},
+            reply=reply
+        )
     
     @racepace.error
     @teampace.error
+    @positions.error
+    @strategy.error
     @lapsections.error
+    @quali.error
+    @laptimes.error
     async def race_analysis_error(self, ctx, error):
         """
         Error handler for race analysis commands.
@@ -126,10 +161,22 @@ class RaceAnalysisCog(commands.Cog):
             elif ctx.command.name == "teampace":
                 await ctx.send("Usage: `+teampace [year] [race]`\n"
                               "Example: `+teampace 2023 Monaco`")
+            elif ctx.command.name == "positions":
+                await ctx.send("Usage: `+positions [year] [race] [session]`\n"
+                              "Example: `+positions 2024 Monza` (session defaults to R, use S for the sprint)")
+            elif ctx.command.name == "strategy":
+                await ctx.send("Usage: `+strategy [year] [race] [session]`\n"
+                              "Example: `+strategy 2024 Monza` (session defaults to R, use S for the sprint)")
             elif ctx.command.name == "lapsections":
                 await ctx.send("Usage: `+lapsections [year] [race] [session] [driver1] [driver2] ...`\n"
                               "Example: `+lapsections 2023 Monaco Q VER HAM PER`\n"
                               "Note: Drivers are optional. If not provided, the top 5 fastest drivers will be used.")
+            elif ctx.command.name == "quali":
+                await ctx.send("Usage: `+quali [year] [race] [session]`\n"
+                              "Example: `+quali 2024 Monza` (session defaults to Q, use SQ for sprint qualifying)")
+            elif ctx.command.name == "laptimes":
+                await ctx.send("Usage: `+laptimes [year] [race] [session] [filters...] [plot]`\n"
+                              "Example: `+laptimes 2024 Monza R VER NOR 20-35 medium`")
         else:
             logger.error(f"Unhandled error in {ctx.command.name}: {error}")
             await ctx.send(f"An error occurred: {str(error)}")
@@ -5,26 +5,16 @@ Telemetry-related commands for the F1 Discord Bot.
 import logging
 import discord
 from discord.ext import commands
-from services.telemetry_service import TelemetryService
-from config import Config
+from commands.job_cog import JobCog
+from services.speed_map import METRICS
 
 logger = logging.getLogger('f1bot')
 
-class TelemetryCog(commands.Cog):
+class TelemetryCog(JobCog):
     """
     Commands for F1 telemetry data visualization.
     """
     
-    def __init__(self, bot):
-        """
-        Initialize the telemetry commands.
-        
-        Args:
-            bot: The Discord bot instance
-        """
-        self.bot = bot
-        self.telemetry_service = TelemetryService()
-    
     @commands.command(name="speedtrace")
     async def speedtrace(self, ctx, year, race, session, driver1, driver2):
         """
@@ -38,24 +28,10 @@ class TelemetryCog(commands.Cog):
             driver1: The first driver code
             driver2: The second driver code
         """
-        await ctx.send(Config.LOADING_MESSAGE)
-        
-        try:
-            # Load session data
-            session_obj = self.telemetry_service.get_session(year, race, session)
-            
-            # Create the plot
-            _, filename = self.telemetry_service.create_speed_trace_plot(
-                session_obj, driver1, driver2
-            )
-            
-            # Send the image
-            image = discord.File(filename)
-            await ctx.send(file=image)
-            
-        except Exception as e:
-            logger.error(f"Error in speedtrace command: {e}")
-            await ctx.send(f"An error occurred: {str(e)}")
+        await self._run_job(
+            ctx, 'speedtrace',
+            {'year': year, 'race': race, 'session': session, 'driver1': driver1, 'driver2': driver2}
+        )
     
     @commands.command(name="gearshifts")
     async def gearshifts(self, ctx, year, race, session, driver):
@@ -69,22 +45,26 @@ class TelemetryCog(commands.Cog):
             session: The session type (e.g., 'R', 'Q', 'FP1')
             driver: The driver code
         """
-        try:
-            # Load session data
-            session_obj = self.telemetry_service.get_session(year, race, session)
-            
-            # Create the plot
-            _, filename = self.telemetry_service.create_gear_shifts_plot(
-                session_obj, driver
-            )
-            
-            # Send the image
-            image = discord.File(filename)
-            await ctx.send(file=image)
-            
-        except Exception as e:
-            logger.error(f"Error in gearshifts command: {e}")
-            await ctx.send(f"An error occurred: {str(e)}")
+        await self._run_job(ctx, 'gearshifts', {'year': year, 'race': race, 'session': session, 'driver': driver})
+    
+    @commands.command(name="speedmap")
+    async def speedmap(self, ctx, year, race, session, metric='speed'):
+        """
+        Show the telemetry of every valid lap of a session on the track map.
+        
+        Args:
+            ctx: The command context
+            year: The year of the session
+            race: The race name or round number
+            session: The session type (e.g., 'R', 'Q', 'FP1')
+            metric: 'speed' (average speed), 'braking' (braking frequency) or 'variance' (speed variance)
+        """
+        metric = metric.lower()
+        if metric not in METRICS:
+            await ctx.send(f"Unknown metric '{metric}'. Use one of: {', '.join(METRICS)}.")
+            return
+        
+        await self._run_job(ctx, 'speedmap', {'year': year, 'race': race, 'session': session, 'metric': metric})
     
     @commands.command(name="trackdominance")
     async def trackdominance(self, ctx, year, grand_prix, session_name, *drivers):
@@ -98,18 +78,9 @@ class TelemetryCog(commands.Cog):
             session_name: The session type (e.g., 'R', 'Q', 'FP1')
             drivers: Optional list of driver codes (up to 3)
         """
-        try:
-            # Load session data
-            session_obj = self.telemetry_service.get_session(year, grand_prix, session_name)
-            
-            # Create the plot
-            _, filename, driver_info = self.telemetry_service.create_track_dominance_plot(
-                session_obj, drivers
-            )
-            
-            # Send the image
-            image = discord.File(filename)
-            await ctx.send(file=image)
+        async def reply(result):
+            image, filename, driver_info = result
+            await ctx.send(file=self._image_file(image, filename))
             
             # Send driver info as a follow-up message
             if driver_info:
@@ -128,13 +99,16 @@ class TelemetryCog(commands.Cog):
                     )
                 
                 await ctx.send(embed=embed)
-            
-        except Exception as e:
-            logger.error(f"Error in trackdominance command: {e}")
-            await ctx.send(f"An error occurred: {str(e)}")
+        
+        await self._run_job(
+            ctx, 'trackdominance',
+            {'year': year, 'race': grand_prix, 'session': session_name, 'drivers': list(drivers)},
+            reply=reply
+        )
     
     @speedtrace.error
     @gearshifts.error
+    @speedmap.error
     @trackdominance.error
     async def telemetry_error(self, ctx, error):
         """
@@ -151,6 +125,9 @@ class TelemetryCog(commands.Cog):
             elif ctx.command.name == "gearshifts":
                 await ctx.send("Usage: `+gearshifts [year] [race] [session] [driver]`\n"
                               "Example: `+gearshifts 2023 Monaco Q VER`")
+            elif ctx.command.name == "speedmap":
+                await ctx.send("Usage: `+speedmap [year] [race] [session] [metric]`\n"
+                              "Example: `+speedmap 2024 Monza R braking` (metric: speed, braking or variance)")
             elif ctx.command.name == "trackdominance":
                 await ctx.send("Usage: `+trackdominance [year] [race] [session] [driver1] [driver2] [driver3]`\n"
                               "Example: `+trackdominance 2023 Monaco Q VER HAM PER`\n"
@@ -7,16 +7,139 @@ class Config:
     TOKEN_ENV_VAR = 'token'
     COMMAND_PREFIX = '+'
     
+    # Sharding: total shards across all processes (unset lets Discord decide) and the
+    # comma-separated shard IDs this process runs (unset runs all of them)
+    SHARD_COUNT_ENV_VAR = 'SHARD_COUNT'
+    SHARD_IDS_ENV_VAR = 'SHARD_IDS'
+    
     # File paths
     DATA_DIR = 'data'
     SCHEDULE_FILE = f'{DATA_DIR}/sched.csv'
     FLAGS_FILE = f'{DATA_DIR}/country_flags.json'
     
+    # Logging (see utils/logging_setup.py)
+    LOG_DIR = 'logs'
+    LOG_NAME = 'f1bot'
+    LOG_MAX_BYTES = 10 * 1024 * 1024  # Rotate when the log file reaches this size
+    LOG_ROTATE_WHEN = 'midnight'  # ...or at this interval
+    LOG_BACKUP_COUNT = 14  # Rotated files kept
+    LOG_MAX_AGE_DAYS = 30  # Rotated files older than this are deleted
+    TRACE_ENABLED = True  # Write per-request trace events to logs/<name>.trace.jsonl
+    MEMORY_PROFILING = False  # Trace allocations with tracemalloc from startup (slower; see +memstats)
+    MEMORY_TRACE_FRAMES = 10  # Stack frames kept per traced allocation
+    MEMORY_MAX_SNAPSHOTS = 4  # tracemalloc snapshots kept for +memstats diff
+    LOOP_WATCHDOG_ENABLED = True  # Measure event loop lag and log the stack of blocking code
+    LOOP_LAG_THRESHOLD = 0.25  # Seconds the loop may be blocked before the stack is logged
+    LOOP_LAG_INTERVAL = 0.1  # Seconds between lag samples
+    LOOP_LAG_WINDOW = 3000  # Recent samples used for the lag percentiles in +metrics
+    LOOP_STACK_DEPTH = 25  # Frames of the blocked stack written to the log
+    
+    # HTTP client settings
+    HTTP_TIMEOUT = 10
+    HTTP_RETRIES = 3
+    HTTP_BACKOFF = 0.5
+    HTTP_CACHE_TTL = 300
+    HTTP_STALE_TTL = 3600
+    HTTP_POOL_SIZE = 10
+    HTTP_USER_AGENT = 'f1bot (+https://github.com/vivekpokale-deriv/f1bot)'
+    HTTP_MODE = 'live'  # 'live', 'record' or 'replay' (see services/http_archive.py)
+    HTTP_MODE_ENV_VAR = 'HTTP_MODE'  # Overrides HTTP_MODE when set
+    HTTP_ARCHIVE_DIR = '.http_archive'  # Recorded responses
+    HTTP_REPLAY_URL = 'http://127.0.0.1:8765'  # Stand-in server for replay mode (tools/replay_server.py)
+    
+    # Standings source
+    F1_RESULTS_URL = 'https://www.formula1.com/en/results.html'
+    
+    # Standings source: 'fastf1' computes current-season standings from cached session
+    # results once every published session has been folded in (in the background,
+    # scraping until then), 'scrape' always reads formula1.com. Finished seasons are
+    # always scraped once and stored.
+    STANDINGS_SOURCE = 'fastf1'
+    STANDINGS_RETRY_BACKOFF = 300  # Seconds before retrying a session that failed to fold, doubled per failure
+    STANDINGS_RETRY_MAX = 6 * 3600  # Longest wait between retries of a failing session
+    
+    # Standings store
+    STANDINGS_STORE_DIR = '.standings_store'
+    STANDINGS_SESSIONS = ('Sprint', 'Race')
+    STANDINGS_PUBLISH_DELAY = 3600  # Seconds after a session ends before results are published
+    
+    # Scheduled session lengths in seconds (used to estimate end times)
+    SESSION_DURATIONS = {
+        'Practice 1': 3600,
+        'Practice 2': 3600,
+        'Practice 3': 3600,
+        'Sprint Qualifying': 2700,
+        'Sprint Shootout': 2700,
+        'Sprint': 3600,
+        'Qualifying': 3600,
+        'Race': 7200,
+    }
+    DEFAULT_SESSION_DURATION = 3600
+    
     # FastF1 configuration
     CACHE_DIR = '.fastf1_cache'
+    SESSION_CACHE_SIZE = 4  # Loaded sessions kept in memory
+    CACHE_MAX_BYTES = 5 * 1024 ** 3  # Size budget for CACHE_DIR (see services/cache_manager.py)
+    CACHE_PINNED_SEASONS = []  # Seasons never evicted, besides the current one
+    CACHE_CHECK_INTERVAL = 600  # Seconds between size budget checks
+    CACHE_INDEX_FILE = 'f1bot_cache_index.json'  # Last-access times of cached sessions
+    
+    # Where sessions are loaded from (see services/session_repository.py): 'live' (FastF1),
+    # 'columnar' (Parquet store, filled from FastF1 on a miss), 'remote' (a worker exports
+    # the session to the shared store) or 'synthetic' (generated, for benchmarks)
+    SESSION_BACKEND = 'live'
+    SESSION_STORE_DIR = '.session_store'
+    TELEMETRY_CACHE_SIZE = 64  # Lap telemetry frames kept in memory
+    LAP_QUERY_CACHE_SIZE = 32  # +laptimes results kept in memory
+    LAPTIMES_MAX_ROWS = 25  # Laps listed in a +laptimes reply
+    SPEED_MAP_BINS = 160  # Grid cells along the longer side of a +speedmap track
+    SPEED_MAP_CHUNK_LAPS = 20  # Laps per driver binned at once when building a speed map
+    SPEED_MAP_CACHE_SIZE = 8  # Session speed maps kept in memory
+    
+    # Job scheduling for heavy commands (see utils/job_scheduler.py)
+    JOB_WORKERS = 4  # Heavy commands running at once
+    JOB_QUEUE_SIZE = 20  # Jobs allowed to wait before new ones are rejected
+    JOB_USER_CONCURRENCY = 1  # Running jobs per user
+    JOB_GUILD_CONCURRENCY = 2  # Running jobs per guild
+    JOB_USER_PENDING = 3  # Queued plus running jobs per user
+    QUEUE_POSITION_MESSAGE = "Your request is queued at position {position}."
+    QUEUE_FULL_MESSAGE = "The bot is busy right now. Please try again in a minute."
+    DEDUP_RESULT_TTL = 30  # Seconds a finished result is reused for identical requests
+    DEDUP_MAX_RESULTS = 16
+    
+    # Where heavy commands run: 'local' (render pool in the bot process) or 'broker'
+    # (worker.py processes pulling from a SQLite queue, see services/job_broker.py)
+    JOB_EXECUTOR = 'local'
+    BROKER_DB = '.jobs/broker.sqlite3'
+    BROKER_POLL_INTERVAL = 0.1  # Seconds between queue/result checks
+    BROKER_RESULT_TIMEOUT = 300  # Seconds the bot waits for a worker; older jobs are dropped
+    BROKER_JOB_TIMEOUT = 150  # Seconds before a running job is assumed lost and requeued (< BROKER_RESULT_TIMEOUT)
+    BROKER_MAX_ATTEMPTS = 2
+    BROKER_RESULT_TTL = 3600  # Seconds uncollected results are kept
+    BROKER_MAINTENANCE_INTERVAL = 60
+    WORKER_PROCESSES = 2  # Default processes started by worker.py
     
     # Visualization settings
     DEFAULT_FIG_SIZE = (12, 8)
+    DEFAULT_DPI = 100
+    REUSE_CANVASES = False  # Keep released figures for reuse per (size, dpi)
+    CANVAS_POOL_SIZE = 4
+    RENDER_WORKERS = 4  # Threads for session loading and rendering
+    LAYER_CACHE_SIZE = 32  # Pre-rendered static plot layers kept in memory
+    LAYER_CACHE_DIR = '.layer_cache'  # Shared on-disk copy of the layers (None to disable)
+    LAYER_CACHE_MAX_BYTES = 256 * 1024 ** 2  # Size budget for LAYER_CACHE_DIR, least recently used pruned first
+    
+    # Output encoding profiles (see utils/render_profiles.py)
+    RENDER_PROFILES = {
+        'standard': {'fmt': 'png', 'dpi': 100, 'compress_level': 6},
+        'preview': {'fmt': 'png', 'dpi': 72, 'compress_level': 1},
+        'full': {'fmt': 'png', 'dpi': 150, 'compress_level': 9, 'optimize': True},
+        'webp': {'fmt': 'webp', 'dpi': 100, 'quality': 85},
+        'palette': {'fmt': 'png', 'dpi': 100, 'compress_level': 9, 'optimize': True, 'palette_colors': 256},
+    }
+    DEFAULT_RENDER_PROFILE = 'standard'
+    COMMAND_RENDER_PROFILES = {}  # e.g. {'trackdominance': 'palette'}
+    GUILD_PROFILES_FILE = '.render_profiles.json'
     DEFAULT_MINI_SECTORS = 20
     
     # Discord message settings
@@ -4,15 +4,71 @@ Service modules for the F1 Discord Bot.
 
 from .telemetry_service import TelemetryService, MiniSectorAnalyzer
 from .race_analysis_service import RaceAnalysisService
+from .qualifying_service import QualifyingService, QualifyingAnalysis
 from .standings_service import StandingsService, DriverTeamDetails
 from .schedule_service import ScheduleService, F1Event
+from .http_client import HttpClient, CachedResponse
+from .http_archive import HttpArchive, configure_fastf1_http
+from .standings_parser import DriverRow, ConstructorRow
+from .standings_store import StandingsStore, StoredStandings
+from .standings_engine import StandingsEngine
+from .session_cache import SessionCache, session_cache
+from .session_store import SessionStore, StoredSession, session_store
+from .session_repository import (
+    SessionRepository, SessionInfo, FastF1Backend, ColumnarBackend, SyntheticBackend, RemoteBackend,
+    create_backend, session_repository
+)
+from .lap_query import LapQuery, LapQueryEngine, lap_query_engine
+from .lap_pivot import LapPivot
+from .speed_map import SpeedGrid, SpeedMapEngine, speed_map_engine
+from .cache_manager import CacheManager, cache_manager
+from .job_broker import JobBroker, JobSpec, JobFailedError
+from .job_executor import LocalExecutor, BrokerExecutor
 
 __all__ = [
     'TelemetryService', 
     'MiniSectorAnalyzer',
     'RaceAnalysisService',
+    'QualifyingService',
+    'QualifyingAnalysis',
     'StandingsService',
     'DriverTeamDetails',
     'ScheduleService',
-    'F1Event'
+    'F1Event',
+    'HttpClient',
+    'CachedResponse',
+    'HttpArchive',
+    'configure_fastf1_http',
+    'DriverRow',
+    'ConstructorRow',
+    'StandingsStore',
+    'StoredStandings',
+    'StandingsEngine',
+    'SessionCache',
+    'session_cache',
+    'SessionStore',
+    'StoredSession',
+    'session_store',
+    'SessionRepository',
+    'SessionInfo',
+    'FastF1Backend',
+    'ColumnarBackend',
+    'SyntheticBackend',
+    'RemoteBackend',
+    'create_backend',
+    'session_repository',
+    'LapQuery',
+    'LapQueryEngine',
+    'lap_query_engine',
+    'LapPivot',
+    'SpeedGrid',
+    'SpeedMapEngine',
+    'speed_map_engine',
+    'CacheManager',
+    'cache_manager',
+    'JobBroker',
+    'JobSpec',
+    'JobFailedError',
+    'LocalExecutor',
+    'BrokerExecutor'
 ]
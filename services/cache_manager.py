@@ -0,0 +1,329 @@
+"""
+Size-limited management of the FastF1 cache directory.
+"""
+
+import datetime
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+import threading
+import time
+from config import Config
+from utils.metrics import metrics
+
+logger = logging.getLogger('f1bot')
+
+# FastF1's HTTP cache (schedules, Ergast results) at the top of the cache directory
+HTTP_CACHE_FILE = 'fastf1_http_cache.sqlite'
+
+
+class CachedSession:
+    """
+    Class to store the on-disk footprint of one cached session.
+    """
+    def __init__(self, path, size, last_access, pinned):
+        """
+        Initialize a cached session.
+
+        Args:
+            path: Session directory relative to the cache directory ('<year>/<event>/<session>')
+            size: Size of the session's files in bytes
+            last_access: Time the session was last used (seconds since the epoch)
+            pinned: Whether the session is never evicted
+        """
+        self.path = path
+        self.size = size
+        self.last_access = last_access
+        self.pinned = pinned
+
+    @property
+    def season(self):
+        """The session's year."""
+        return int(self.path.split('/')[0])
+
+
+class CacheManager:
+    """
+    Keeps the FastF1 cache directory under a size budget.
+
+    FastF1 stores each session's parsed data in its own directory
+    ('<cache>/<year>/<event>/<session>/'). The manager records when each
+    session was last used in an index file shared by every process using
+    the directory, and evicts the least recently used sessions when the
+    total size goes over the budget. Sessions of pinned seasons (always
+    including the current one) are never evicted.
+
+    Seed bundles are compressed archives of cached sessions, so a new node
+    can start with a warm cache instead of downloading everything.
+    """
+
+    def __init__(self, cache_dir=Config.CACHE_DIR, max_bytes=Config.CACHE_MAX_BYTES,
+                 pinned_seasons=Config.CACHE_PINNED_SEASONS):
+        """
+        Initialize the cache manager.
+
+        Args:
+            cache_dir: The FastF1 cache directory
+            max_bytes: Size budget for the directory in bytes
+            pinned_seasons: Seasons that are never evicted, besides the current one
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.pinned_seasons = set(pinned_seasons)
+        self._accessed = {}
+        self._lock = threading.Lock()
+
+    @property
+    def index_path(self):
+        """Path of the last-access index file."""
+        return os.path.join(self.cache_dir, Config.CACHE_INDEX_FILE)
+
+    def pinned(self):
+        """
+        Get the pinned seasons.
+
+        Returns:
+            list: Sorted years, including the current season
+        """
+        return sorted(self.pinned_seasons | {datetime.date.today().year})
+
+    def is_pinned(self, season):
+        """
+        Check whether a season is pinned.
+
+        Args:
+            season: The year
+
+        Returns:
+            bool: True for pinned seasons and the current season
+        """
+        return season in self.pinned_seasons or season == datetime.date.today().year
+
+    def touch(self, session):
+        """
+        Record that a loaded session was used.
+
+        Args:
+            session: A FastF1 session
+        """
+        api_path = getattr(session, 'api_path', None)
+        if not api_path:
+            return
+        # api_path is '/static/<year>/<event>/<session>/', mirrored by the cache directory
+        path = api_path.strip('/').split('/', 1)[-1]
+        with self._lock:
+            self._accessed[path] = time.time()
+
+    def _read_index(self):
+        """Read the shared last-access index."""
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Could not read cache index, rebuilding it: {e}")
+            return {}
+
+    def _write_index(self, index):
+        """Write the last-access index atomically."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def flush(self):
+        """
+        Merge this process's recorded accesses into the shared index.
+
+        Returns:
+            dict: The merged index (session path -> last access time)
+        """
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+        index = self._read_index()
+        if accessed:
+            for path, accessed_at in accessed.items():
+                index[path] = max(accessed_at, index.get(path, 0))
+            self._write_index(index)
+        return index
+
+    def sessions(self, index=None):
+        """
+        List the cached sessions.
+
+        Args:
+            index: Optional last-access index (default: the shared index)
+
+        Returns:
+            list: CachedSession objects
+        """
+        if index is None:
+            index = self._read_index()
+
+        sessions = []
+        if not os.path.isdir(self.cache_dir):
+            return sessions
+
+        for season in os.listdir(self.cache_dir):
+            season_dir = os.path.join(self.cache_dir, season)
+            if not season.isdigit() or not os.path.isdir(season_dir):
+                continue
+            for event in os.listdir(season_dir):
+                event_dir = os.path.join(season_dir, event)
+                if not os.path.isdir(event_dir):
+                    continue
+                for session in os.listdir(event_dir):
+                    session_dir = os.path.join(event_dir, session)
+                    if not os.path.isdir(session_dir):
+                        continue
+                    size = 0
+                    modified = 0
+                    for entry in os.scandir(session_dir):
+                        if entry.is_file():
+                            stat = entry.stat()
+                            size += stat.st_size
+                            modified = max(modified, stat.st_mtime)
+                    path = f"{season}/{event}/{session}"
+                    # Sessions cached before the index existed count from their last write
+                    sessions.append(CachedSession(path, size, index.get(path, modified),
+                                                  self.is_pinned(int(season))))
+        return sessions
+
+    def usage(self):
+        """
+        Get the size of the cache directory.
+
+        Returns:
+            dict: Total bytes, budget, session bytes and counts, pinned bytes and HTTP cache bytes
+        """
+        sessions = self.sessions()
+        http_cache = os.path.join(self.cache_dir, HTTP_CACHE_FILE)
+        http_bytes = os.path.getsize(http_cache) if os.path.exists(http_cache) else 0
+        session_bytes = sum(session.size for session in sessions)
+        return {
+            'total_bytes': session_bytes + http_bytes,
+            'max_bytes': self.max_bytes,
+            'sessions': len(sessions),
+            'session_bytes': session_bytes,
+            'pinned_bytes': sum(session.size for session in sessions if session.pinned),
+            'http_cache_bytes': http_bytes
+        }
+
+    def enforce_budget(self):
+        """
+        Evict least recently used unpinned sessions until the cache fits its budget.
+
+        Returns:
+            list: Paths of the evicted sessions
+        """
+        index = self.flush()
+        sessions = self.sessions(index)
+        http_cache = os.path.join(self.cache_dir, HTTP_CACHE_FILE)
+        total = sum(session.size for session in sessions)
+        total += os.path.getsize(http_cache) if os.path.exists(http_cache) else 0
+
+        evicted = []
+        for session in sorted(sessions, key=lambda session: session.last_access):
+            if total <= self.max_bytes:
+                break
+            if session.pinned:
+                continue
+            # Another process may be evicting at the same time
+            shutil.rmtree(os.path.join(self.cache_dir, session.path), ignore_errors=True)
+            total -= session.size
+            evicted.append(session.path)
+            index.pop(session.path, None)
+
+        if evicted:
+            self._write_index(index)
+            metrics.increment('fastf1_cache.evicted', len(evicted))
+            logger.info(f"Evicted {len(evicted)} sessions from the FastF1 cache: {', '.join(evicted)}")
+        if total > self.max_bytes:
+            logger.warning(f"FastF1 cache is {total / 1e6:.0f} MB, over its {self.max_bytes / 1e6:.0f} MB "
+                           f"budget, but the remaining sessions are pinned")
+        return evicted
+
+    def export_bundle(self, path, seasons=None):
+        """
+        Write cached sessions and the HTTP cache to a compressed seed bundle.
+
+        Args:
+            path: Path of the .tar.gz bundle to write
+            seasons: Optional list of years to include (default: all)
+
+        Returns:
+            int: Number of sessions exported
+        """
+        sessions = [session for session in self.sessions()
+                    if seasons is None or session.season in seasons]
+
+        with tarfile.open(path, 'w:gz') as bundle:
+            for session in sessions:
+                bundle.add(os.path.join(self.cache_dir, session.path), arcname=session.path)
+
+            http_cache = os.path.join(self.cache_dir, HTTP_CACHE_FILE)
+            if os.path.exists(http_cache):
+                # Copy through SQLite so a bot writing to it doesn't corrupt the copy
+                with tempfile.TemporaryDirectory() as directory:
+                    snapshot = os.path.join(directory, HTTP_CACHE_FILE)
+                    source = sqlite3.connect(http_cache)
+                    target = sqlite3.connect(snapshot)
+                    try:
+                        source.backup(target)
+                    finally:
+                        target.close()
+                        source.close()
+                    bundle.add(snapshot, arcname=HTTP_CACHE_FILE)
+
+        logger.info(f"Exported {len(sessions)} sessions to {path}")
+        return len(sessions)
+
+    def import_bundle(self, path):
+        """
+        Add the sessions from a seed bundle to the cache.
+
+        Files already in the cache are kept, so importing never replaces
+        newer data. Imported sessions count as used now.
+
+        Args:
+            path: Path of the .tar.gz bundle
+
+        Returns:
+            int: Number of sessions imported
+        """
+        cache_root = os.path.realpath(self.cache_dir)
+        imported = set()
+
+        with tarfile.open(path, 'r:gz') as bundle:
+            for member in bundle:
+                target = os.path.realpath(os.path.join(cache_root, member.name))
+                # Only plain files inside the cache directory
+                if not member.isfile() or not target.startswith(cache_root + os.sep):
+                    continue
+                if os.path.exists(target):
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with bundle.extractfile(member) as source, open(target, 'wb') as f:
+                    shutil.copyfileobj(source, f)
+                parts = member.name.split('/')
+                if len(parts) == 4:
+                    imported.add('/'.join(parts[:3]))
+
+        now = time.time()
+        with self._lock:
+            for session in imported:
+                self._accessed[session] = now
+        self.flush()
+
+        logger.info(f"Imported {len(imported)} sessions from {path}")
+        return len(imported)
+
+
+# Shared instance used by the session cache and the admin commands
+cache_manager = CacheManager()
@@ -0,0 +1,254 @@
+"""
+Record/replay of the HTTP calls made by FastF1 and the standings service.
+
+In 'record' mode, responses fetched from the real servers are saved to an
+archive directory. In 'replay' mode, requests are sent to a local stand-in
+server (tools/replay_server.py) that answers from the archive, so the full
+load path (HTTP, FastF1's request cache, parsing) runs without network
+access and with the same responses every time.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from urllib.parse import urlsplit
+import requests
+from config import Config
+
+logger = logging.getLogger('f1bot')
+
+MODES = ('live', 'record', 'replay')
+
+# Headers that describe the stored body rather than the original transfer
+DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+
+class HttpArchive:
+    """
+    Directory of recorded responses, one metadata file and one body file
+    per request, keyed by method, URL and request body.
+    """
+
+    def __init__(self, path=Config.HTTP_ARCHIVE_DIR):
+        """
+        Initialize the archive.
+
+        Args:
+            path: Archive directory
+        """
+        self.path = path
+
+    @staticmethod
+    def key(method, url, body=None):
+        """
+        Get the archive key of a request.
+
+        Args:
+            method: HTTP method
+            url: Full request URL including the query
+            body: Optional request body (bytes or str)
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        digest = hashlib.sha1(f"{method.upper()} {url}".encode('utf-8'))
+        if body:
+            digest.update(body if isinstance(body, bytes) else str(body).encode('utf-8'))
+        return digest.hexdigest()
+
+    def save(self, method, url, status, headers, body, request_body=None):
+        """
+        Store a response, replacing an earlier recording of the same request.
+
+        Args:
+            method: HTTP method
+            url: Full request URL
+            status: Response status code
+            headers: Response headers
+            body: Decoded response body as bytes
+            request_body: Optional request body
+        """
+        os.makedirs(self.path, exist_ok=True)
+        key = self.key(method, url, request_body)
+        meta = {
+            'method': method.upper(),
+            'url': url,
+            'status': status,
+            'headers': {name: value for name, value in headers.items()
+                        if name.lower() not in DROPPED_HEADERS}
+        }
+        # Body first, so a metadata file never points at a missing body
+        for suffix, data in (('.body', body), ('.json', json.dumps(meta, indent=1).encode('utf-8'))):
+            fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, os.path.join(self.path, key + suffix))
+
+    def load(self, method, url, request_body=None):
+        """
+        Get a recorded response.
+
+        Args:
+            method: HTTP method
+            url: Full request URL
+            request_body: Optional request body
+
+        Returns:
+            tuple: (status, headers, body), or None if the request was not recorded
+        """
+        base = os.path.join(self.path, self.key(method, url, request_body))
+        try:
+            with open(base + '.json', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(base + '.body', 'rb') as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        return meta['status'], meta['headers'], body
+
+    def entries(self):
+        """
+        List the recorded requests.
+
+        Returns:
+            list: Metadata dicts (method, url, status, headers)
+        """
+        if not os.path.isdir(self.path):
+            return []
+        entries = []
+        for name in sorted(os.listdir(self.path)):
+            if name.endswith('.json'):
+                with open(os.path.join(self.path, name), encoding='utf-8') as f:
+                    entries.append(json.load(f))
+        return entries
+
+
+def get_http_mode():
+    """
+    Get the configured HTTP mode.
+
+    Returns:
+        str: The mode from the environment, or Config.HTTP_MODE
+    """
+    mode = os.environ.get(Config.HTTP_MODE_ENV_VAR) or Config.HTTP_MODE
+    if mode not in MODES:
+        raise ValueError(f"Unknown HTTP mode '{mode}', expected one of {', '.join(MODES)}")
+    return mode
+
+
+def replay_url(url, base=Config.HTTP_REPLAY_URL):
+    """
+    Map a URL onto the replay server.
+
+    'https://host/path?q' becomes '<base>/https/host/path?q'.
+
+    Args:
+        url: The original URL
+        base: Base URL of the replay server
+
+    Returns:
+        str: The URL to request from the replay server
+    """
+    parts = urlsplit(url)
+    mapped = f"{base.rstrip('/')}/{parts.scheme}/{parts.netloc}{parts.path or '/'}"
+    return f"{mapped}?{parts.query}" if parts.query else mapped
+
+
+class RecordReplayAdapter(requests.adapters.HTTPAdapter):
+    """
+    requests transport adapter that records responses to an archive, or
+    sends requests to the replay server instead of the real host.
+    """
+
+    def __init__(self, mode, archive=None, replay_base=Config.HTTP_REPLAY_URL):
+        """
+        Initialize the adapter.
+
+        Args:
+            mode: 'record' or 'replay'
+            archive: HttpArchive to record to (record mode)
+            replay_base: Base URL of the replay server (replay mode)
+        """
+        super().__init__()
+        self.mode = mode
+        self.archive = archive or HttpArchive()
+        self.replay_base = replay_base
+
+    def send(self, request, **kwargs):
+        if self.mode == 'replay':
+            request.url = replay_url(request.url, self.replay_base)
+            return super().send(request, **kwargs)
+
+        response = super().send(request, **kwargs)
+        # Reading the content here still leaves it available to the caller
+        self.archive.save(request.method, request.url, response.status_code, response.headers,
+                          response.content, request.body)
+        return response
+
+
+def configure_fastf1_http(mode=None, archive=None):
+    """
+    Route FastF1's HTTP requests through the record/replay adapter.
+
+    Call after fastf1.Cache.enable_cache, which creates FastF1's cached
+    requests session. In record mode, only requests that miss FastF1's own
+    HTTP cache reach the network and get recorded, so record with an empty
+    cache directory.
+
+    Args:
+        mode: 'live', 'record' or 'replay' (default: get_http_mode())
+        archive: Optional HttpArchive (default: Config.HTTP_ARCHIVE_DIR)
+    """
+    mode = mode or get_http_mode()
+    if mode == 'live':
+        return
+
+    from fastf1.req import Cache
+
+    adapter = RecordReplayAdapter(mode, archive)
+    for session in (Cache._requests_session, Cache._requests_session_cached):
+        if session is not None:
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+    logger.info(f"FastF1 HTTP requests in {mode} mode")
+
+
+def create_replay_app(archive=None, latency=0.0):
+    """
+    Create the stand-in server answering replayed requests from an archive.
+
+    Args:
+        archive: Optional HttpArchive (default: Config.HTTP_ARCHIVE_DIR)
+        latency: Seconds to wait before each response, to imitate the network
+
+    Returns:
+        aiohttp.web.Application: The server application
+    """
+    from aiohttp import web
+
+    archive = archive or HttpArchive()
+
+    async def handle(request):
+        # Rebuild the original URL from the raw (still percent-encoded) path
+        _, scheme, host, path = request.rel_url.raw_path.split('/', 3)
+        url = f"{scheme}://{host}/{path}"
+        if request.rel_url.raw_query_string:
+            url = f"{url}?{request.rel_url.raw_query_string}"
+        request_body = await request.read()
+
+        recorded = archive.load(request.method, url, request_body or None)
+        if latency:
+            await asyncio.sleep(latency)
+        if recorded is None:
+            logger.warning(f"No recording for {request.method} {url}")
+            return web.Response(status=404, text=f"No recording for {request.method} {url}")
+
+        status, headers, body = recorded
+        return web.Response(status=status, headers=headers, body=body)
+
+    app = web.Application()
+    app.router.add_route('*', '/{scheme}/{host}/{path:.*}', handle)
+    return app
@@ -0,0 +1,230 @@
+"""
+Async HTTP client with connection pooling and response caching.
+"""
+
+import asyncio
+import logging
+import time
+import aiohttp
+from config import Config
+from services.http_archive import HttpArchive, get_http_mode, replay_url
+
+logger = logging.getLogger('f1bot')
+
+# Status codes that are worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CachedResponse:
+    """
+    Class to store a cached HTTP response.
+    """
+    def __init__(self, url, body, etag=None, last_modified=None):
+        """
+        Initialize a cached response.
+
+        Args:
+            url: The requested URL
+            body: The response body as bytes
+            etag: The ETag header of the response, if any
+            last_modified: The Last-Modified header of the response, if any
+        """
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = time.monotonic()
+
+    def age(self):
+        """
+        Get the age of the cached response.
+
+        Returns:
+            float: Seconds since the response was fetched or revalidated
+        """
+        return time.monotonic() - self.fetched_at
+
+    def touch(self):
+        """Mark the response as freshly revalidated."""
+        self.fetched_at = time.monotonic()
+
+
+class HttpClient:
+    """
+    Pooled keep-alive HTTP client with retries and a per-URL TTL cache.
+
+    Fresh cache entries are served directly. Expired entries that are still
+    inside the stale window are served immediately while a background task
+    revalidates them with If-None-Match/If-Modified-Since.
+    """
+
+    def __init__(self, timeout=Config.HTTP_TIMEOUT, retries=Config.HTTP_RETRIES,
+                 backoff=Config.HTTP_BACKOFF, cache_ttl=Config.HTTP_CACHE_TTL,
+                 stale_ttl=Config.HTTP_STALE_TTL, pool_size=Config.HTTP_POOL_SIZE,
+                 mode=None, archive=None):
+        """
+        Initialize the HTTP client.
+
+        Args:
+            timeout: Total timeout per request attempt in seconds
+            retries: Number of retries after the first failed attempt
+            backoff: Base delay in seconds for exponential backoff
+            cache_ttl: Seconds a cached response is considered fresh
+            stale_ttl: Seconds after expiry a response may still be served while refreshing
+            pool_size: Maximum number of pooled connections
+            mode: 'live', 'record' or 'replay' (default: the configured HTTP mode)
+            archive: Optional HttpArchive for record mode
+        """
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_ttl = cache_ttl
+        self.stale_ttl = stale_ttl
+        self.pool_size = pool_size
+        self.mode = mode or get_http_mode()
+        self.archive = archive or HttpArchive()
+        self._session = None
+        self._cache = {}
+        self._inflight = {}
+
+    def _get_session(self):
+        """
+        Get the shared client session, creating it on first use.
+
+        Returns:
+            aiohttp.ClientSession: The pooled client session
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'User-Agent': Config.HTTP_USER_AGENT}
+            )
+        return self._session
+
+    async def close(self):
+        """Close the underlying session and cancel pending refreshes."""
+        for task in list(self._inflight.values()):
+            task.cancel()
+        self._inflight.clear()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def invalidate(self, url=None):
+        """
+        Drop cached responses.
+
+        Args:
+            url: The URL to drop (default: None, drops everything)
+        """
+        if url is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(url, None)
+
+    async def get(self, url):
+        """
+        Get the body of a URL, using the cache where possible.
+
+        Args:
+            url: The URL to fetch
+
+        Returns:
+            bytes: The response body
+        """
+        entry = self._cache.get(url)
+
+        if entry is not None:
+            age = entry.age()
+            if age < self.cache_ttl:
+                return entry.body
+            if age < self.cache_ttl + self.stale_ttl:
+                # Serve stale and revalidate in the background
+                self._refresh(url)
+                return entry.body
+
+        entry = await self._refresh(url)
+        return entry.body
+
+    def _refresh(self, url):
+        """
+        Start (or join) a fetch for a URL so concurrent callers share one request.
+
+        Args:
+            url: The URL to fetch
+
+        Returns:
+            asyncio.Task: The task resolving to a CachedResponse
+        """
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(url))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+            # Avoid "exception was never retrieved" for background refreshes
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def _fetch(self, url):
+        """
+        Fetch a URL with conditional headers, retrying with exponential backoff.
+
+        Args:
+            url: The URL to fetch
+
+        Returns:
+            CachedResponse: The new or revalidated cache entry
+        """
+        entry = self._cache.get(url)
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+
+        session = self._get_session()
+        request_url = replay_url(url) if self.mode == 'replay' else url
+        last_error = None
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                delay = self.backoff * (2 ** (attempt - 1))
+                logger.warning(f"Retrying {url} in {delay:.1f}s (attempt {attempt + 1}): {last_error}")
+                await asyncio.sleep(delay)
+
+            try:
+                async with session.get(request_url, headers=headers) as response:
+                    if response.status == 304 and entry is not None:
+                        logger.debug(f"Revalidated {url} (304 Not Modified)")
+                        entry.touch()
+                        return entry
+
+                    if response.status in RETRY_STATUSES:
+                        last_error = f"HTTP {response.status}"
+                        continue
+
+                    response.raise_for_status()
+                    body = await response.read()
+                    if self.mode == 'record':
+                        self.archive.save('GET', url, response.status, response.headers, body)
+
+                    entry = CachedResponse(
+                        url,
+                        body,
+                        etag=response.headers.get('ETag'),
+                        last_modified=response.headers.get('Last-Modified')
+                    )
+                    self._cache[url] = entry
+                    return entry
+
+            except (aiohttp.ClientConnectionError, aiohttp.ServerTimeoutError, asyncio.TimeoutError) as e:
+                last_error = e
+
+        if entry is not None:
+            logger.warning(f"Serving stale response for {url} after failed refresh: {last_error}")
+            return entry
+
+        raise aiohttp.ClientError(f"Failed to fetch {url}: {last_error}")
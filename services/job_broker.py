@@ -0,0 +1,353 @@
+"""
+SQLite-backed job broker between the Discord front-end and render workers.
+"""
+
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from config import Config
+from utils.tracing import current_request_id
+
+logger = logging.getLogger('f1bot')
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+EXPIRED_MESSAGE = "Job expired before a worker finished it"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    command TEXT NOT NULL,
+    spec TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 1,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result BLOB,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority, id);
+"""
+
+
+class JobFailedError(Exception):
+    """Raised when a worker reports that a job failed."""
+
+
+def _normalize(value):
+    """Normalize job arguments for comparison."""
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if value is None:
+        return None
+    return str(value).strip().upper()
+
+
+class JobSpec:
+    """
+    Class to store a serializable description of a command job.
+    """
+    def __init__(self, command, args=None, profile=None, priority=1, request_id=None):
+        """
+        Initialize a job spec.
+
+        Args:
+            command: Name of the job handler (see services/job_handlers.py)
+            args: Dict of JSON-serializable handler arguments
+            profile: Optional render profile name
+            priority: Scheduling priority (lower runs first)
+            request_id: ID of the request the job belongs to (default: the current request)
+        """
+        self.command = command
+        self.args = args or {}
+        self.profile = profile
+        self.priority = priority
+        self.request_id = request_id or current_request_id()
+
+    def to_json(self):
+        """
+        Serialize the spec.
+
+        Returns:
+            str: The spec as JSON
+        """
+        return json.dumps({'command': self.command, 'args': self.args, 'profile': self.profile,
+                           'priority': self.priority, 'request_id': self.request_id})
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        Deserialize a spec.
+
+        Args:
+            data: The spec as JSON
+
+        Returns:
+            JobSpec: The spec
+        """
+        return cls(**json.loads(data))
+
+    def key(self):
+        """
+        Get a key identifying equivalent jobs.
+
+        Arguments are normalized (case, whitespace, numbers as text), so
+        '+trackdominance 2025 monza q' and '+trackdominance 2025 Monza Q'
+        share a key. The priority and request ID are not part of it.
+
+        Returns:
+            tuple: (command, normalized args, profile)
+        """
+        return (self.command, json.dumps(_normalize(self.args), sort_keys=True), self.profile)
+
+    def __repr__(self):
+        return f"JobSpec({self.command!r}, {self.args!r}, profile={self.profile!r})"
+
+
+class JobBroker:
+    """
+    Durable job queue in a SQLite database shared by the bot and its workers.
+
+    Jobs are claimed atomically, so any number of worker processes on the
+    same machine can pull from one queue. Results are stored until the
+    submitter collects them. Jobs older than the result timeout are never
+    started or requeued, because the submitter has stopped waiting for them.
+
+    Results are pickled, so the database is trusted like code: anyone who
+    can write to it can run code in the bot when a result is collected. The
+    database directory is created readable by its owner only, and the bot
+    and its workers must run as the same user.
+    """
+
+    def __init__(self, path=Config.BROKER_DB, job_timeout=Config.BROKER_JOB_TIMEOUT,
+                 max_attempts=Config.BROKER_MAX_ATTEMPTS, result_timeout=Config.BROKER_RESULT_TIMEOUT):
+        """
+        Initialize the broker.
+
+        Args:
+            path: Path of the SQLite database
+            job_timeout: Seconds after which a running job is assumed lost and requeued
+            max_attempts: Maximum times a job is started before it is failed
+            result_timeout: Seconds after submission that nobody collects a job's result anymore
+        """
+        self.path = path
+        self.job_timeout = job_timeout
+        self.max_attempts = max_attempts
+        self.result_timeout = result_timeout
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """Open the database on first use."""
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            # Pickled results are loaded from here, so keep other users out
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                         check_same_thread=False)
+            os.chmod(self.path, 0o600)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def enqueue(self, spec):
+        """
+        Add a job to the queue.
+
+        Args:
+            spec: The JobSpec
+
+        Returns:
+            int: The job ID
+        """
+        with self._lock:
+            cursor = self._connect().execute(
+                "INSERT INTO jobs (command, spec, priority, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (spec.command, spec.to_json(), spec.priority, QUEUED, time.time())
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker_id):
+        """
+        Claim the next queued job.
+
+        Args:
+            worker_id: Name of the claiming worker
+
+        Returns:
+            tuple: (job_id, JobSpec), or None if the queue is empty
+        """
+        with self._lock:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute(
+                    "SELECT id, spec FROM jobs WHERE status = ? AND created_at >= ? "
+                    "ORDER BY priority, id LIMIT 1",
+                    (QUEUED, time.time() - self.result_timeout)
+                ).fetchone()
+                if row is None:
+                    conn.execute('COMMIT')
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, started_at = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    (RUNNING, worker_id, time.time(), row[0])
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return row[0], JobSpec.from_json(row[1])
+
+    def complete(self, job_id, result):
+        """
+        Store a job's result.
+
+        Args:
+            job_id: The job ID
+            result: The handler's return value (pickled, see the class docstring)
+        """
+        with self._lock:
+            self._connect().execute(
+                "UPDATE jobs SET status = ?, result = ?, finished_at = ? WHERE id = ?",
+                (DONE, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL), time.time(), job_id)
+            )
+
+    def fail(self, job_id, error):
+        """
+        Mark a job as failed.
+
+        Args:
+            job_id: The job ID
+            error: Message describing the failure
+        """
+        with self._lock:
+            self._connect().execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (FAILED, str(error), time.time(), job_id)
+            )
+
+    def cancel(self, job_id):
+        """
+        Remove a job that has not started yet.
+
+        Args:
+            job_id: The job ID
+
+        Returns:
+            bool: True if the job was removed
+        """
+        with self._lock:
+            cursor = self._connect().execute(
+                "DELETE FROM jobs WHERE id = ? AND status = ?", (job_id, QUEUED)
+            )
+            return cursor.rowcount > 0
+
+    def pop_result(self, job_id):
+        """
+        Collect a finished job's result and delete the job.
+
+        Args:
+            job_id: The job ID
+
+        Returns:
+            tuple: (finished, result) - finished is False while the job is queued or running
+
+        Raises:
+            JobFailedError: If the job failed
+            KeyError: If the job does not exist
+        """
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT status, result, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                raise KeyError(job_id)
+            status, result, error = row
+            if status in (QUEUED, RUNNING):
+                return False, None
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+        if status == FAILED:
+            raise JobFailedError(error)
+        return True, pickle.loads(result)
+
+    def requeue_stale(self):
+        """
+        Requeue running jobs whose worker has not finished them in time.
+
+        Jobs that already used all their attempts are failed instead, and
+        queued or running jobs past the result timeout are failed as expired.
+
+        Returns:
+            int: Number of jobs requeued or failed
+        """
+        now = time.time()
+        cutoff = now - self.job_timeout
+        with self._lock:
+            conn = self._connect()
+            failed = conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                "WHERE status IN (?, ?) AND created_at < ?",
+                (FAILED, EXPIRED_MESSAGE, now, QUEUED, RUNNING, now - self.result_timeout)
+            ).rowcount
+            failed += conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                "WHERE status = ? AND started_at < ? AND attempts >= ?",
+                (FAILED, "Job timed out", now, RUNNING, cutoff, self.max_attempts)
+            ).rowcount
+            requeued = conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL WHERE status = ? AND started_at < ?",
+                (QUEUED, RUNNING, cutoff)
+            ).rowcount
+        if failed or requeued:
+            logger.warning(f"Requeued {requeued} and failed {failed} stale jobs")
+        return failed + requeued
+
+    def purge(self, max_age=Config.BROKER_RESULT_TTL):
+        """
+        Delete finished jobs whose results were never collected.
+
+        Args:
+            max_age: Seconds a finished job is kept
+
+        Returns:
+            int: Number of jobs deleted
+        """
+        with self._lock:
+            return self._connect().execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (DONE, FAILED, time.time() - max_age)
+            ).rowcount
+
+    def stats(self):
+        """
+        Get job counts by state.
+
+        Returns:
+            dict: Mapping of state to number of jobs
+        """
+        with self._lock:
+            rows = self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
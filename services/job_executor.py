@@ -0,0 +1,116 @@
+"""
+Executors that run command jobs locally or through the job broker.
+"""
+
+import asyncio
+import logging
+from config import Config
+from services.job_broker import JobBroker
+from utils.rendering import render_pool
+from utils.tracing import run_in_executor, span
+
+logger = logging.getLogger('f1bot')
+
+
+class LocalExecutor:
+    """
+    Runs jobs in the bot process on the render thread pool.
+    """
+
+    def __init__(self, pool=None):
+        """
+        Initialize the local executor.
+
+        Args:
+            pool: Optional RenderPool (default: the shared pool)
+        """
+        self.pool = pool or render_pool
+
+    async def run(self, spec):
+        """
+        Run a job.
+
+        Args:
+            spec: The JobSpec
+
+        Returns:
+            The handler's result
+        """
+        # Imported here so the bot only loads the services when it runs jobs itself
+        from services.job_handlers import run_job
+
+        return await self.pool.run(run_job, spec)
+
+
+class BrokerExecutor:
+    """
+    Sends jobs to worker processes through the job broker and waits for
+    their results.
+    """
+
+    def __init__(self, broker=None, poll_interval=Config.BROKER_POLL_INTERVAL,
+                 timeout=Config.BROKER_RESULT_TIMEOUT):
+        """
+        Initialize the broker executor.
+
+        Args:
+            broker: Optional JobBroker (default: one on Config.BROKER_DB)
+            poll_interval: Seconds between checks for a result
+            timeout: Seconds to wait for a worker before giving up
+        """
+        self.broker = broker or JobBroker()
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    async def run(self, spec):
+        """
+        Run a job on a worker.
+
+        Args:
+            spec: The JobSpec
+
+        Returns:
+            The handler's result
+
+        Raises:
+            JobFailedError: If the worker failed the job
+            asyncio.TimeoutError: If no worker finished the job in time
+        """
+        loop = asyncio.get_running_loop()
+        job_id = await run_in_executor(self.broker.enqueue, spec)
+        deadline = loop.time() + self.timeout
+
+        with span('broker.wait', job_id=job_id, command=spec.command):
+            try:
+                while True:
+                    finished, result = await run_in_executor(self.broker.pop_result, job_id)
+                    if finished:
+                        return result
+                    if loop.time() > deadline:
+                        raise asyncio.TimeoutError("Timed out waiting for a render worker")
+                    await asyncio.sleep(self.poll_interval)
+            except (asyncio.CancelledError, asyncio.TimeoutError):
+                # Don't leave work behind that nobody will collect
+                await run_in_executor(self.broker.cancel, job_id)
+                raise
+
+
+def create_executor(kind=Config.JOB_EXECUTOR):
+    """
+    Create the configured job executor.
+
+    Args:
+        kind: 'local' or 'broker'
+
+    Returns:
+        LocalExecutor or BrokerExecutor: The executor
+    """
+    if kind == 'broker':
+        return BrokerExecutor()
+    if kind != 'local':
+        logger.warning(f"Unknown job executor '{kind}', running jobs locally")
+    return LocalExecutor()
+
+
+# Shared instance used by the cogs
+job_executor = create_executor()
@@ -0,0 +1,194 @@
+"""
+Handlers that execute command jobs, in the bot process or in a worker.
+"""
+
+import logging
+from services.telemetry_service import TelemetryService
+from services.race_analysis_service import RaceAnalysisService
+from services.qualifying_service import QualifyingService
+from services.lap_query import LapQuery, lap_query_engine
+from services.session_repository import session_repository
+from services.session_store import session_store
+from services.speed_map import speed_map_engine
+from utils.render_profiles import render_profiles
+from utils.tracing import span
+
+logger = logging.getLogger('f1bot')
+
+# Mapping of job command name to handler
+HANDLERS = {}
+
+_services = {}
+
+
+def job_handler(command):
+    """
+    Register a function as the handler for a job command.
+
+    Handlers receive the spec's args as keyword arguments plus the
+    resolved render profile, and return the command's result.
+
+    Args:
+        command: The job command name
+
+    Returns:
+        function: Decorator registering the handler
+    """
+    def register(func):
+        HANDLERS[command] = func
+        return func
+    return register
+
+
+def get_telemetry_service():
+    """Get this process's telemetry service."""
+    if 'telemetry' not in _services:
+        _services['telemetry'] = TelemetryService()
+    return _services['telemetry']
+
+
+def get_race_analysis_service():
+    """Get this process's race analysis service."""
+    if 'race_analysis' not in _services:
+        _services['race_analysis'] = RaceAnalysisService()
+    return _services['race_analysis']
+
+
+def get_qualifying_service():
+    """Get this process's qualifying service."""
+    if 'qualifying' not in _services:
+        _services['qualifying'] = QualifyingService()
+    return _services['qualifying']
+
+
+def run_job(spec):
+    """
+    Execute a job spec.
+
+    Args:
+        spec: The JobSpec
+
+    Returns:
+        The handler's result
+
+    Raises:
+        KeyError: If no handler is registered for the command
+    """
+    handler = HANDLERS.get(spec.command)
+    if handler is None:
+        raise KeyError(f"No handler registered for job '{spec.command}'")
+
+    profile = render_profiles.profiles.get(spec.profile) if spec.profile else None
+    with span('job.run', command=spec.command) as trace:
+        result = handler(profile=profile, **spec.args)
+        if isinstance(result, tuple) and isinstance(result[0], bytes):
+            trace['bytes'] = len(result[0])
+    return result
+
+
+@job_handler('speedtrace')
+def speedtrace(year, race, session, driver1, driver2, profile=None):
+    """Render a speed trace comparison."""
+    service = get_telemetry_service()
+    session_obj = service.get_session(year, race, session)
+    return service.create_speed_trace_plot(session_obj, driver1, driver2, profile=profile)
+
+
+@job_handler('gearshifts')
+def gearshifts(year, race, session, driver, profile=None):
+    """Render a gear shift map."""
+    service = get_telemetry_service()
+    session_obj = service.get_session(year, race, session)
+    return service.create_gear_shifts_plot(session_obj, driver, profile=profile)
+
+
+@job_handler('speedmap')
+def speedmap(year, race, session, metric='speed', profile=None):
+    """Render a session-wide speed map."""
+    service = get_telemetry_service()
+    session_obj = service.get_session(year, race, session)
+    grid = speed_map_engine.get(session_obj)
+    return service.create_speed_map_plot(session_obj, grid, metric, profile=profile)
+
+
+@job_handler('trackdominance')
+def trackdominance(year, race, session, drivers, profile=None):
+    """Render a track dominance map."""
+    service = get_telemetry_service()
+    session_obj = service.get_session(year, race, session)
+    return service.create_track_dominance_plot(session_obj, drivers, profile=profile)
+
+
+@job_handler('racepace')
+def racepace(year, race, profile=None):
+    """Render a race pace comparison."""
+    service = get_race_analysis_service()
+    session = service.get_session(year, race)
+    return service.create_race_pace_plot(session, profile=profile)
+
+
+@job_handler('teampace')
+def teampace(year, race, profile=None):
+    """Render a team pace comparison."""
+    service = get_race_analysis_service()
+    session = service.get_session(year, race)
+    return service.create_team_pace_plot(session, profile=profile)
+
+
+@job_handler('positions')
+def positions(year, race, session='R', profile=None):
+    """Render the running positions chart."""
+    service = get_race_analysis_service()
+    session_obj = service.get_session(year, race, session)
+    return service.create_positions_plot(session_obj, profile=profile)
+
+
+@job_handler('strategy')
+def strategy(year, race, session='R', profile=None):
+    """Render the tyre strategy timeline."""
+    service = get_race_analysis_service()
+    session_obj = service.get_session(year, race, session)
+    return service.create_strategy_plot(session_obj, profile=profile)
+
+
+@job_handler('lapsections')
+def lapsections(year, race, session, drivers, profile=None):
+    """Render a lap sections analysis."""
+    service = get_race_analysis_service()
+    session_obj = service.get_session(year, race, session)
+    return service.create_lap_sections_plot(session_obj, drivers, profile=profile)
+
+
+@job_handler('laptimes')
+def laptimes(year, race, session, query, plot=False, profile=None):
+    """Run a lap time query, returning a text table and optionally a plot."""
+    service = get_race_analysis_service()
+    session_obj = service.get_session(year, race, session)
+    lap_query = LapQuery.from_dict(query)
+    laps = lap_query_engine.run(session_obj, lap_query)
+    table = lap_query_engine.format_table(laps)
+    if not plot or laps.empty:
+        return None, None, table
+    image, filename = service.create_lap_times_plot(session_obj, laps, lap_query, profile=profile)
+    return image, filename, table
+
+
+@job_handler('quali')
+def quali(year, race, session, profile=None):
+    """Analyze and render the qualifying segments."""
+    service = get_qualifying_service()
+    session_obj = service.get_session(year, race, session)
+    analysis = service.analyze(session_obj)
+    image, filename = service.create_qualifying_plot(session_obj, analysis, profile=profile)
+    return image, filename, analysis
+
+
+@job_handler('session_export')
+def session_export(year, race, session_type, profile=None):
+    """Load a session and write it to the shared session store for the bot to read."""
+    if not session_store.contains(year, race, session_type):
+        session = session_repository.get_session(year, race, session_type)
+        # A columnar backend stores the sessions it loads itself
+        if not session_store.contains(year, race, session_type):
+            session_store.save(session, year, race, session_type)
+    return session_store.session_dir(year, race, session_type)
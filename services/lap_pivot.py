@@ -0,0 +1,140 @@
+"""
+Driver by lap grid of a session's laps, shared by the race story charts.
+"""
+
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('f1bot')
+
+
+class LapPivot:
+    """
+    Class to store a session's laps as a grid with one row per driver and one
+    column per lap number.
+
+    Each field is a 2D numpy array, so charts covering every driver read
+    whole rows, columns or masks at once instead of filtering the laps
+    table driver by driver. Laps a driver did not complete are NaN (or
+    False for the pit flags, -1 for the compound).
+    """
+    def __init__(self, drivers, lap_numbers, position, lap_time, stint, compound, compounds, pit_in, pit_out):
+        """
+        Initialize a lap pivot.
+
+        Args:
+            drivers: Driver codes, one per row
+            lap_numbers: Lap numbers, one per column
+            position: Running order at the end of each lap
+            lap_time: Lap times in seconds
+            stint: Stint numbers
+            compound: Compound of each lap as an index into compounds
+            compounds: Compound names
+            pit_in: Whether the driver entered the pits at the end of the lap
+            pit_out: Whether the lap started in the pits
+        """
+        self.drivers = drivers
+        self.lap_numbers = lap_numbers
+        self.position = position
+        self.lap_time = lap_time
+        self.stint = stint
+        self.compound = compound
+        self.compounds = compounds
+        self.pit_in = pit_in
+        self.pit_out = pit_out
+
+    @classmethod
+    def from_laps(cls, laps, drivers=None):
+        """
+        Build the grid from a laps table in one pass.
+
+        Args:
+            laps: The session's Laps
+            drivers: Optional driver codes giving the row order (default: order of
+                appearance); drivers with laps but not listed are added at the end
+
+        Returns:
+            LapPivot: The grid
+        """
+        laps = laps[laps['LapNumber'].notna()]
+        order = list(drivers or [])
+        order += [driver for driver in laps['Driver'].unique() if driver not in order]
+
+        rows = pd.Categorical(laps['Driver'], categories=order).codes
+        lap_count = int(laps['LapNumber'].max()) if len(laps) else 0
+        columns = laps['LapNumber'].to_numpy(dtype=int) - 1
+        shape = (len(order), lap_count)
+
+        def grid(values, fill, dtype):
+            # Scatter every lap into its (driver, lap) cell at once
+            result = np.full(shape, fill, dtype=dtype)
+            result[rows, columns] = values
+            return result
+
+        compound = pd.Categorical(laps['Compound'])
+        return cls(
+            drivers=order,
+            lap_numbers=np.arange(1, lap_count + 1),
+            position=grid(laps['Position'].to_numpy(dtype=float), np.nan, float),
+            lap_time=grid(laps['LapTime'].dt.total_seconds().to_numpy(), np.nan, float),
+            stint=grid(laps['Stint'].to_numpy(dtype=float), np.nan, float),
+            compound=grid(compound.codes, -1, np.int16),
+            compounds=list(compound.categories),
+            pit_in=grid(laps['PitInTime'].notna().to_numpy(), False, bool),
+            pit_out=grid(laps['PitOutTime'].notna().to_numpy(), False, bool)
+        )
+
+    def final_positions(self):
+        """
+        Get each driver's position at the end of their last lap.
+
+        Returns:
+            numpy.ndarray: Position per driver row (NaN if they have none)
+        """
+        positions = pd.DataFrame(self.position).ffill(axis=1)
+        if positions.empty:
+            return np.full(len(self.drivers), np.nan)
+        return positions.iloc[:, -1].to_numpy()
+
+    def stints(self):
+        """
+        Get every driver's stints as runs of consecutive laps.
+
+        A run ends where the stint number changes or a lap is missing.
+
+        Returns:
+            pandas.DataFrame: Row (driver index), Driver, Stint, Compound, FirstLap and Laps per stint,
+                ordered by driver row then lap
+        """
+        stint = self.stint
+        valid = ~np.isnan(stint)
+        padded = np.pad(stint, ((0, 0), (1, 1)), constant_values=np.nan)
+        # NaN never equals NaN, so missing laps also start and end runs
+        starts = valid & (padded[:, 1:-1] != padded[:, :-2])
+        ends = valid & (padded[:, 1:-1] != padded[:, 2:])
+
+        # Row-major order pairs each run's start with its end
+        start_rows, start_columns = np.nonzero(starts)
+        _, end_columns = np.nonzero(ends)
+        codes = self.compound[start_rows, start_columns]
+        compounds = np.array(self.compounds + ['UNKNOWN'], dtype=object)
+
+        return pd.DataFrame({
+            'Row': start_rows,
+            'Driver': np.array(self.drivers, dtype=object)[start_rows],
+            'Stint': stint[start_rows, start_columns],
+            'Compound': compounds[codes],
+            'FirstLap': self.lap_numbers[start_columns],
+            'Laps': end_columns - start_columns + 1
+        })
+
+    def memory_usage(self):
+        """
+        Get the memory held by the grid.
+
+        Returns:
+            int: Bytes in the grid arrays
+        """
+        return sum(array.nbytes for array in (self.position, self.lap_time, self.stint, self.compound,
+                                              self.pit_in, self.pit_out))
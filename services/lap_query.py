@@ -0,0 +1,368 @@
+"""
+Filtering of session lap tables for the lap time queries.
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import fastf1.core
+from config import Config
+from services.session_repository import session_repository
+from utils.embed_builder import format_lap_time
+from utils.memory_profiler import memory_profiler
+
+logger = logging.getLogger('f1bot')
+
+# Compound names and abbreviations accepted in queries
+COMPOUNDS = {
+    's': 'SOFT', 'soft': 'SOFT', 'softs': 'SOFT',
+    'm': 'MEDIUM', 'medium': 'MEDIUM', 'mediums': 'MEDIUM',
+    'h': 'HARD', 'hard': 'HARD', 'hards': 'HARD',
+    'i': 'INTERMEDIATE', 'inter': 'INTERMEDIATE', 'inters': 'INTERMEDIATE', 'intermediate': 'INTERMEDIATE',
+    'w': 'WET', 'wet': 'WET', 'wets': 'WET'
+}
+
+# Track status names and the FastF1 status codes they match. A lap's
+# TrackStatus lists every status code seen during that lap.
+TRACK_STATUSES = {
+    'green': '1',
+    'yellow': '2',
+    'sc': '4',
+    'red': '5',
+    'vsc': '67'
+}
+
+LAP_RANGE_PATTERN = re.compile(r'^(?P<start>\d+)(?:-(?P<end>\d+))?$')
+DRIVER_PATTERN = re.compile(r'^[A-Za-z]{3}$')
+
+
+class LapQuery:
+    """
+    Class to store a normalized set of lap filters.
+    """
+    def __init__(self, drivers=None, lap_range=None, compounds=None, stints=None, statuses=None, quick=False):
+        """
+        Initialize a lap query.
+
+        Args:
+            drivers: Driver codes (default: all drivers)
+            lap_range: (first lap, last lap) tuple, inclusive (default: all laps)
+            compounds: Compound names (default: all compounds)
+            stints: Stint numbers (default: all stints)
+            statuses: Track status names from TRACK_STATUSES (default: any status)
+            quick: Whether to keep only laps within 107% of the session's fastest lap
+        """
+        self.drivers = sorted({driver.upper() for driver in drivers or []})
+        self.lap_range = tuple(int(lap) for lap in lap_range) if lap_range else None
+        self.compounds = sorted({compound.upper() for compound in compounds or []})
+        self.stints = sorted({int(stint) for stint in stints or []})
+        self.statuses = sorted({status.lower() for status in statuses or []})
+        self.quick = bool(quick)
+
+    @classmethod
+    def parse(cls, tokens):
+        """
+        Parse the filter arguments of a command.
+
+        Tokens are driver codes (VER), lap ranges (20-35 or laps=20-35),
+        compounds (medium, m, compound=soft,hard), stints (stint=2), track
+        statuses (green, sc, vsc, status=yellow) and 'quick'.
+
+        Args:
+            tokens: The filter arguments
+
+        Returns:
+            LapQuery: The parsed query
+
+        Raises:
+            ValueError: If a token is not a valid filter
+        """
+        drivers, compounds, stints, statuses = [], [], [], []
+        lap_range = None
+        quick = False
+
+        for token in tokens:
+            name, _, value = token.lower().partition('=')
+            if not value:
+                name, value = None, name
+
+            if name in (None, 'compound') and all(part in COMPOUNDS for part in value.split(',')):
+                compounds.extend(COMPOUNDS[part] for part in value.split(','))
+            elif name in (None, 'status') and all(part in TRACK_STATUSES for part in value.split(',')):
+                statuses.extend(value.split(','))
+            elif name in (None, 'laps') and LAP_RANGE_PATTERN.match(value):
+                match = LAP_RANGE_PATTERN.match(value)
+                start = int(match.group('start'))
+                end = int(match.group('end') or start)
+                if end < start:
+                    raise ValueError(f"Invalid lap range '{value}'")
+                lap_range = (start, end)
+            elif name == 'stint' and all(part.isdigit() for part in value.split(',')):
+                stints.extend(int(part) for part in value.split(','))
+            elif name is None and value == 'quick':
+                quick = True
+            elif name in (None, 'driver') and all(DRIVER_PATTERN.match(part) for part in value.split(',')):
+                drivers.extend(value.split(','))
+            else:
+                raise ValueError(f"Unknown filter '{token}'")
+
+        return cls(drivers, lap_range, compounds, stints, statuses, quick)
+
+    def to_dict(self):
+        """
+        Serialize the query for a job spec.
+
+        Returns:
+            dict: The query as JSON-compatible values
+        """
+        return {
+            'drivers': self.drivers,
+            'laps': list(self.lap_range) if self.lap_range else None,
+            'compounds': self.compounds,
+            'stints': self.stints,
+            'statuses': self.statuses,
+            'quick': self.quick
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Deserialize a query written by to_dict.
+
+        Args:
+            data: The serialized query
+
+        Returns:
+            LapQuery: The query
+        """
+        return cls(data.get('drivers'), data.get('laps'), data.get('compounds'), data.get('stints'),
+                   data.get('statuses'), data.get('quick', False))
+
+    def key(self):
+        """
+        Get a key identifying equivalent queries.
+
+        Filters are normalized on creation, so 'VER NOR m' and 'nor ver medium'
+        share a key.
+
+        Returns:
+            tuple: The normalized filters
+        """
+        return (tuple(self.drivers), self.lap_range, tuple(self.compounds), tuple(self.stints),
+                tuple(self.statuses), self.quick)
+
+    def describe(self):
+        """
+        Describe the filters for titles.
+
+        Returns:
+            str: The filters, or 'all laps' if there are none
+        """
+        parts = []
+        if self.drivers:
+            parts.append(', '.join(self.drivers))
+        if self.lap_range:
+            start, end = self.lap_range
+            parts.append(f"lap {start}" if start == end else f"laps {start}-{end}")
+        if self.compounds:
+            parts.append('/'.join(self.compounds))
+        if self.stints:
+            parts.append('stint ' + '/'.join(str(stint) for stint in self.stints))
+        if self.statuses:
+            parts.append('/'.join(status.upper() if len(status) <= 3 else status for status in self.statuses))
+        if self.quick:
+            parts.append('quick laps')
+        return ' · '.join(parts) or 'all laps'
+
+
+class LapQueryEngine:
+    """
+    Runs lap queries against session lap tables.
+
+    The columns the filters read are extracted once per session into numpy
+    arrays, so a query is a few vectorized comparisons combined into one
+    boolean mask. Query results are cached by session and normalized query
+    as row positions into the session's laps. Neither cache references the
+    session, and both drop a session's entries when the session cache
+    evicts it.
+    """
+
+    def __init__(self, repository=None, max_results=Config.LAP_QUERY_CACHE_SIZE):
+        """
+        Initialize the lap query engine.
+
+        Args:
+            repository: Optional SessionRepository to read laps through (default: the shared repository)
+            max_results: Maximum number of query results cached
+        """
+        self.repository = repository or session_repository
+        self.max_results = max_results
+        self._tables = OrderedDict()
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self.repository.sessions.add_eviction_listener(self.forget)
+
+    def _table(self, session):
+        """
+        Get the filter columns of a session's laps.
+
+        Returns:
+            dict: The session's filter columns as numpy arrays
+        """
+        session_id = self.repository.session_id(session)
+        with self._lock:
+            table = self._tables.get(session_id)
+            if table is not None:
+                self._tables.move_to_end(session_id)
+                return table
+
+        laps = self.repository.laps(session)
+        lap_times = laps['LapTime'].dt.total_seconds().to_numpy()
+        table = {
+            'driver': laps['Driver'].fillna('').to_numpy(dtype=str),
+            'lap_number': laps['LapNumber'].to_numpy(dtype=float),
+            'compound': laps['Compound'].fillna('').astype(str).str.upper().to_numpy(),
+            'stint': laps['Stint'].to_numpy(dtype=float),
+            'status': laps['TrackStatus'].fillna('').astype(str).to_numpy(),
+            'lap_time': lap_times,
+            'quick_limit': np.nanmin(lap_times) * fastf1.core.Laps.QUICKLAP_THRESHOLD
+            if np.isfinite(lap_times).any() else np.nan
+        }
+
+        with self._lock:
+            self._tables[session_id] = table
+            # The lap tables belong to sessions in the session cache, so keep as many
+            while len(self._tables) > Config.SESSION_CACHE_SIZE:
+                self._tables.popitem(last=False)
+        return table
+
+    def _mask(self, table, query):
+        """Build the boolean mask selecting a query's laps."""
+        mask = np.ones(len(table['lap_number']), dtype=bool)
+        if query.drivers:
+            mask &= np.isin(table['driver'], query.drivers)
+        if query.lap_range:
+            start, end = query.lap_range
+            mask &= (table['lap_number'] >= start) & (table['lap_number'] <= end)
+        if query.compounds:
+            mask &= np.isin(table['compound'], query.compounds)
+        if query.stints:
+            mask &= np.isin(table['stint'], query.stints)
+        if query.statuses:
+            status = pd.Series(table['status'])
+            statuses = set(query.statuses)
+            status_mask = np.zeros_like(mask)
+            if 'green' in statuses:
+                # Green laps had no other status at any point
+                status_mask |= table['status'] == TRACK_STATUSES['green']
+                statuses.discard('green')
+            if statuses:
+                codes = ''.join(TRACK_STATUSES[status] for status in sorted(statuses))
+                status_mask |= status.str.contains(f"[{codes}]", regex=True).to_numpy()
+            mask &= status_mask
+        if query.quick:
+            # NaN lap times compare False, like in Laps.pick_quicklaps
+            mask &= table['lap_time'] < table['quick_limit']
+        return mask
+
+    def run(self, session, query):
+        """
+        Get the laps of a session matching a query.
+
+        Args:
+            session: The FastF1 session
+            query: The LapQuery
+
+        Returns:
+            fastf1.core.Laps: The matching laps, in session order
+        """
+        key = (self.repository.session_id(session), query.key())
+        with self._lock:
+            rows = self._results.get(key)
+            if rows is not None:
+                self._results.move_to_end(key)
+
+        if rows is None:
+            table = self._table(session)
+            rows = np.flatnonzero(self._mask(table, query))
+            with self._lock:
+                self._results[key] = rows
+                while len(self._results) > self.max_results:
+                    self._results.popitem(last=False)
+        return self.repository.laps(session).iloc[rows]
+
+    @staticmethod
+    def format_table(laps, max_rows=Config.LAPTIMES_MAX_ROWS):
+        """
+        Format query results as a text table for a Discord message.
+
+        Args:
+            laps: The matching laps
+            max_rows: Maximum number of laps listed after the per-driver summary
+
+        Returns:
+            str: The table in a code block
+        """
+        if laps.empty:
+            return "No laps match this query."
+
+        seconds = laps['LapTime'].dt.total_seconds()
+        lines = [f"{'Drv':<4}{'Laps':>5}{'Best':>10}{'Mean':>10}{'Median':>10}"]
+        summary = seconds.groupby(laps['Driver']).agg(['count', 'min', 'mean', 'median']).sort_values('min')
+        for driver, row in summary.iterrows():
+            lines.append(f"{driver:<4}{int(row['count']):>5}{format_lap_time(row['min']):>10}"
+                         f"{format_lap_time(row['mean']):>10}{format_lap_time(row['median']):>10}")
+
+        lines.append('')
+        lines.append(f"{'Drv':<4}{'Lap':>4}{'Time':>10}  {'Tyre':<6}{'Stint':>5}{'Life':>5}")
+        for (_, lap), value in zip(laps.head(max_rows).iterrows(), seconds.head(max_rows)):
+            compound = lap['Compound'] if isinstance(lap['Compound'], str) else '-'
+            stint = '-' if lap['Stint'] != lap['Stint'] else int(lap['Stint'])
+            life = '-' if lap['TyreLife'] != lap['TyreLife'] else int(lap['TyreLife'])
+            lines.append(f"{lap['Driver']:<4}{int(lap['LapNumber']):>4}{format_lap_time(value):>10}  "
+                         f"{compound[:6]:<6}{stint:>5}{life:>5}")
+        if len(laps) > max_rows:
+            lines.append(f"... {len(laps) - max_rows} more laps")
+
+        return "```\n" + "\n".join(lines) + "\n```"
+
+    def memory_usage(self):
+        """
+        Get the memory held by cached query results.
+
+        Returns:
+            dict: Bytes in cached filter columns and result rows
+        """
+        with self._lock:
+            tables = list(self._tables.values())
+            results = list(self._results.values())
+        columns = sum(column.nbytes for table in tables for column in table.values()
+                      if isinstance(column, np.ndarray))
+        return {'lap_queries': columns + sum(rows.nbytes for rows in results)}
+
+    def forget(self, session):
+        """
+        Drop the cached lap table and query results of a session.
+
+        Args:
+            session: The FastF1 session
+        """
+        session_id = self.repository.session_id(session)
+        with self._lock:
+            self._tables.pop(session_id, None)
+            for key in [key for key in self._results if key[0] == session_id]:
+                del self._results[key]
+
+    def clear(self):
+        """Drop the cached lap tables and query results."""
+        with self._lock:
+            self._tables.clear()
+            self._results.clear()
+
+
+# Shared instance used by the lap time jobs
+lap_query_engine = LapQueryEngine()
+memory_profiler.register_collector('lap_queries', lap_query_engine.memory_usage)
@@ -0,0 +1,297 @@
+"""
+Qualifying segment (Q1/Q2/Q3) analysis for the F1 Discord Bot.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import fastf1.plotting
+from config import Config
+from utils.rendering import Renderer
+from services.session_repository import session_repository
+
+logger = logging.getLogger('f1bot')
+
+SEGMENTS = ('Q1', 'Q2', 'Q3')
+LAST_SEGMENT_SIZE = 10
+
+# Session names with segments; until 2023 'Sprint Qualifying' was the name of the 2021 sprint race
+QUALIFYING_SESSIONS = ('Qualifying', 'Sprint Shootout', 'Sprint Qualifying')
+SPRINT_QUALIFYING_FROM = 2024
+
+
+def is_qualifying(session):
+    """
+    Check whether a session is a qualifying session with segments.
+
+    Args:
+        session: The FastF1 session
+
+    Returns:
+        bool: True for qualifying, sprint shootout and (from 2024) sprint qualifying
+    """
+    if session.name == 'Sprint Qualifying':
+        return session.date.year >= SPRINT_QUALIFYING_FROM
+    return session.name in QUALIFYING_SESSIONS
+
+
+def label_segments(session, laps):
+    """
+    Label every lap of a qualifying session with its segment.
+
+    Segments come from Laps.split_qualifying_sessions, so laps are assigned
+    as FastF1 assigns them: by their start time, with pit out laps that run
+    past the end of a segment counted in the next one.
+
+    Args:
+        session: The FastF1 qualifying session
+        laps: The session's laps
+
+    Returns:
+        numpy.ndarray: Segment number per lap (1-3), or 0 outside any segment
+
+    Raises:
+        ValueError: If the session is not a qualifying session
+    """
+    if not is_qualifying(session):
+        raise ValueError(f"{session.name} is not a qualifying session")
+
+    segment = np.zeros(len(laps), dtype=int)
+    for number, segment_laps in enumerate(laps.split_qualifying_sessions(), start=1):
+        if segment_laps is not None:
+            segment[laps.index.isin(segment_laps.index)] = number
+    return segment
+
+
+def segments_reached(results, segment_count):
+    """
+    Get the furthest segment each driver took part in from the session results.
+
+    A driver reached a segment if the results have a time for them in it,
+    or if their position is inside that segment's field. This also counts
+    drivers who went through but set no time in the next segment.
+
+    Args:
+        results: The session results
+        segment_count: Number of segments that took place
+
+    Returns:
+        pandas.Series: Segment number (1-3) by driver code
+    """
+    field = len(results)
+    # The last segment has ten cars; the rest of the field is split evenly
+    # between the first two eliminations (15 of 20 cars go through, 16 of 22)
+    sizes = (field, field - (field - LAST_SEGMENT_SIZE) // 2, LAST_SEGMENT_SIZE)
+    position = results['Position'].to_numpy()
+
+    reached = np.ones(field, dtype=int)
+    for number in range(2, segment_count + 1):
+        took_part = results[SEGMENTS[number - 1]].notna().to_numpy() | (position <= sizes[number - 1])
+        reached[took_part] = number
+    return pd.Series(reached, index=results['Abbreviation'].to_numpy())
+
+
+class QualifyingAnalysis:
+    """
+    Class to store the segment analysis of a qualifying session.
+    """
+    def __init__(self, year, event_name, session_name, table, cutoffs):
+        """
+        Initialize a qualifying analysis.
+
+        Args:
+            year: The season
+            event_name: The event name
+            session_name: The session name (e.g., 'Qualifying')
+            table: DataFrame indexed by driver code in classification order, with
+                best times per segment, improvements, ideal lap and gaps (seconds)
+            cutoffs: Dict of segment name to the slowest time that advanced from it
+        """
+        self.year = year
+        self.event_name = event_name
+        self.session_name = session_name
+        self.table = table
+        self.cutoffs = cutoffs
+
+
+class QualifyingService:
+    """
+    Service for analyzing qualifying sessions segment by segment.
+    """
+
+    def __init__(self, renderer=None, repository=None, max_sessions=Config.SESSION_CACHE_SIZE):
+        """
+        Initialize the qualifying service.
+
+        Args:
+            renderer: Optional Renderer to draw plots with (default: a new Renderer)
+            repository: Optional SessionRepository to get session data from (default: the shared repository)
+            max_sessions: Maximum number of session analyses kept in memory
+        """
+        self.renderer = renderer or Renderer()
+        self.repository = repository or session_repository
+        self.max_sessions = max_sessions
+        self._analyses = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_session(self, year, race, session_type='Q'):
+        """
+        Get a FastF1 session.
+
+        Args:
+            year: The year of the session
+            race: The race name or round number
+            session_type: The session type (default: 'Q' for qualifying)
+
+        Returns:
+            fastf1.core.Session: The loaded session
+        """
+        return self.repository.get_session(year, race, session_type)
+
+    def analyze(self, session):
+        """
+        Analyze all drivers' qualifying segments.
+
+        Analyses are cached per session.
+
+        Args:
+            session: The FastF1 qualifying session
+
+        Returns:
+            QualifyingAnalysis: The analysis
+
+        Raises:
+            ValueError: If the session is not a qualifying session
+        """
+        key = self.repository.session_id(session)
+        with self._lock:
+            analysis = self._analyses.get(key)
+            if analysis is not None:
+                self._analyses.move_to_end(key)
+                return analysis
+
+        analysis = self._analyze(session)
+        with self._lock:
+            self._analyses[key] = analysis
+            while len(self._analyses) > self.max_sessions:
+                self._analyses.popitem(last=False)
+        return analysis
+
+    def _analyze(self, session):
+        """Compute the analysis of a session."""
+        info = self.repository.metadata(session)
+        laps = self.repository.laps(session)
+        segment = label_segments(session, laps)
+
+        frame = pd.DataFrame({
+            'Driver': laps['Driver'].to_numpy(),
+            'Team': laps['Team'].to_numpy(),
+            'Segment': segment,
+            'LapTime': laps['LapTime'].dt.total_seconds().to_numpy(),
+            'Sector1': laps['Sector1Time'].dt.total_seconds().to_numpy(),
+            'Sector2': laps['Sector2Time'].dt.total_seconds().to_numpy(),
+            'Sector3': laps['Sector3Time'].dt.total_seconds().to_numpy(),
+            # Deleted is True, False or missing
+            'Deleted': laps['Deleted'].eq(True).to_numpy()
+        })
+        frame = frame[frame['Segment'] > 0]
+        timed = frame[~frame['Deleted']]
+
+        # Best time of each driver in each segment, one column per segment
+        best = timed.groupby(['Driver', 'Segment'])['LapTime'].min().unstack()
+        best = best.reindex(columns=range(1, len(SEGMENTS) + 1))
+        best.columns = list(SEGMENTS)
+
+        table = pd.DataFrame(index=frame['Driver'].unique())
+        table['Team'] = frame.groupby('Driver')['Team'].first()
+        # Results know who went through even without a lap in the next segment
+        reached = frame.groupby('Driver')['Segment'].max()
+        results = session.results
+        if not results.empty and results['Position'].notna().any():
+            reached = segments_reached(results, int(reached.max())).combine_first(reached)
+        table['Reached'] = reached.reindex(table.index)
+        table = table.join(best)
+        table['Best'] = table[list(SEGMENTS)].min(axis=1)
+
+        # Negative improvements are time gained from one segment to the next
+        table['Q1->Q2'] = table['Q2'] - table['Q1']
+        table['Q2->Q3'] = table['Q3'] - table['Q2']
+
+        # Ideal lap from each driver's best sectors across the session
+        sectors = timed.groupby('Driver')[['Sector1', 'Sector2', 'Sector3']].min()
+        table['Ideal'] = sectors.sum(axis=1, min_count=3)
+        table['Potential'] = table['Best'] - table['Ideal']
+
+        # The cut-off of a segment is the slowest time that advanced from it
+        cutoffs = {}
+        for index, name in enumerate(SEGMENTS[:-1], start=1):
+            advanced = table.loc[table['Reached'] > index, name]
+            cutoffs[name] = advanced.max() if advanced.notna().any() else np.nan
+
+        # Gap to the cut-off of the segment a driver went out in, or to pole in the last one
+        table['Gap'] = np.nan
+        for index, name in enumerate(SEGMENTS, start=1):
+            out_here = table['Reached'] == index
+            reference = cutoffs.get(name, table[name].min())
+            table.loc[out_here, 'Gap'] = table.loc[out_here, name] - reference
+
+        # Classification: furthest segment reached, then best time in that segment
+        last_time = pd.Series([table.at[driver, SEGMENTS[reached - 1]]
+                               for driver, reached in table['Reached'].items()], index=table.index)
+        table = table.assign(LastTime=last_time).sort_values(['Reached', 'LastTime'], ascending=[False, True],
+                                                             na_position='last')
+        table['Position'] = range(1, len(table) + 1)
+        table = table.drop(columns='LastTime')
+
+        return QualifyingAnalysis(info.year, info.event_name, info.session_name, table, cutoffs)
+
+    def create_qualifying_plot(self, session, analysis, profile=None):
+        """
+        Create a plot of every driver's gap to the fastest time in each segment.
+
+        Args:
+            session: The FastF1 qualifying session
+            analysis: The session's QualifyingAnalysis
+            profile: Optional RenderProfile to encode with
+
+        Returns:
+            tuple: (image, filename) - The encoded image bytes and a filename for it
+        """
+        driver_colors = fastf1.plotting.get_driver_color_mapping(session=session)
+        table = analysis.table
+
+        def draw(fig):
+            axs = fig.subplots(1, len(SEGMENTS), sharex=False)
+
+            for ax, (index, name) in zip(axs, enumerate(SEGMENTS, start=1)):
+                times = table[name].dropna().sort_values()
+                ax.set_title(name)
+                ax.invert_yaxis()
+                if times.empty:
+                    ax.axis('off')
+                    continue
+
+                gaps = times - times.iloc[0]
+                ax.barh(range(len(times)), gaps, color=[driver_colors.get(driver, 'grey') for driver in times.index])
+                ax.set_yticks(range(len(times)))
+                ax.set_yticklabels(times.index)
+                ax.set_xlabel("Gap to fastest (s)")
+
+                # Line between the last driver through and the first driver out
+                advanced = table.loc[times.index, 'Reached'] > index
+                if index < len(SEGMENTS) and advanced.any() and not advanced.all():
+                    ax.axhline(advanced.sum() - 0.5, color='red', linestyle='--', linewidth=1)
+
+            fig.suptitle(f"{analysis.session_name} Segments - {analysis.event_name} {analysis.year}")
+            fig.tight_layout()
+
+        image = self.renderer.render(draw, figsize=(15, 8), profile=profile)
+
+        return image, self.renderer.filename("quali", profile)
+
+    def clear(self):
+        """Drop the cached analyses."""
+        with self._lock:
+            self._analyses.clear()
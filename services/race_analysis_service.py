@@ -7,9 +7,10 @@ import numpy as np
 import pandas as pd
 import fastf1
 import fastf1.plotting
-from matplotlib import pyplot as plt
 import seaborn as sns
-from config import Config
+from matplotlib.patches import Patch
+from utils.rendering import Renderer
+from services.session_repository import session_repository
 
 logger = logging.getLogger('f1bot')
 
@@ -18,9 +19,16 @@ class RaceAnalysisService:
     Service for analyzing F1 race data.
     """
     
-    def __init__(self):
-        """Initialize the race analysis service."""
-        pass
+    def __init__(self, renderer=None, repository=None):
+        """
+        Initialize the race analysis service.
+        
+        Args:
+            renderer: Optional Renderer to draw plots with (default: a new Renderer)
+            repository: Optional SessionRepository to get session data from (default: the shared repository)
+        """
+        self.renderer = renderer or Renderer()
+        self.repository = repository or session_repository
         
     def get_session(self, year, race, session_type='R'):
         """
@@ -34,92 +42,90 @@ class RaceAnalysisService:
         Returns:
             fastf1.core.Session: The loaded session
         """
-        logger.info(f"Loading session data for {year} {race} {session_type}")
-        session = fastf1.get_session(int(year), race, session_type)
-        session.load()
-        return session
+        return self.repository.get_session(year, race, session_type)
         
-    def create_race_pace_plot(self, session, num_drivers=10):
+    def create_race_pace_plot(self, session, num_drivers=10, profile=None):
         """
         Create a race pace comparison plot for the top drivers.
         
         Args:
             session: The FastF1 session
             num_drivers: Number of drivers to include (default: 10)
+            profile: Optional RenderProfile to encode with
             
         Returns:
-            tuple: (figure, filename) - The matplotlib figure and the saved filename
+            tuple: (image, filename) - The encoded image bytes and a filename for it
         """
-        # Setup for timedelta support
-        fastf1.plotting.setup_mpl(mpl_timedelta_support=True, misc_mpl_mods=False, color_scheme='fastf1')
+        info = self.repository.metadata(session)
         
-        # Get the top drivers
-        point_finishers = session.drivers[:num_drivers]
-        driver_laps = session.laps.pick_drivers(point_finishers).pick_quicklaps()
+        # Get the top drivers, in finishing order for the plot
+        finishing_order = info.drivers[:num_drivers]
+        driver_laps = self.repository.laps(session, drivers=finishing_order, quick=True)
         driver_laps = driver_laps.reset_index()
         
-        # Get the finishing order for the plot
-        finishing_order = [session.get_driver(i)["Abbreviation"] for i in point_finishers]
-        
         # Get driver colors
         driver_colors = fastf1.plotting.get_driver_color_mapping(session=session)
         
-        # Create the plot
-        fig, ax = plt.subplots(figsize=Config.DEFAULT_FIG_SIZE)
-        
         # Convert lap times to seconds for plotting
         driver_laps["LapTime(s)"] = driver_laps["LapTime"].dt.total_seconds()
         
-        # Create violin plot
-        sns.violinplot(data=driver_laps,
-                      x="Driver",
-                      y="LapTime(s)",
-                      inner=None,
-                      scale='area',
-                      order=finishing_order,
-                      palette=driver_colors
-                      )
-        
-        # Add swarm plot for tire compounds
-        sns.swarmplot(data=driver_laps,
-                     x="Driver",
-                     y="LapTime(s)",
-                     order=finishing_order,
-                     hue="Compound",
-                     palette=fastf1.plotting.get_compound_mapping(session=session),
-                     hue_order=["SOFT", "MEDIUM", "HARD"],
-                     linewidth=0,
-                     size=5
-                     )
-        
-        # Set labels and title
-        ax.set_xlabel("Driver")
-        ax.set_ylabel("Lap Time (s)")
-        plt.suptitle(f"Race Pace Comparison\n"
-                    f"{session.event['EventName']} {session.event.year}")
-        
-        # Style adjustments
-        sns.despine(left=True, bottom=True)
-        plt.tight_layout()
-        
-        # Save and return
-        filename = "plot.png"
-        plt.savefig(filename)
-        
-        return fig, filename
-        
-    def create_team_pace_plot(self, session):
+        def draw(fig):
+            # Create the plot
+            ax = fig.subplots()
+            
+            # Create violin plot
+            sns.violinplot(data=driver_laps,
+                          x="Driver",
+                          y="LapTime(s)",
+                          inner=None,
+                          scale='area',
+                          order=finishing_order,
+                          palette=driver_colors,
+                          ax=ax
+                          )
+            
+            # Add swarm plot for tire compounds
+            sns.swarmplot(data=driver_laps,
+                         x="Driver",
+                         y="LapTime(s)",
+                         order=finishing_order,
+                         hue="Compound",
+                         palette=fastf1.plotting.get_compound_mapping(session=session),
+                         hue_order=["SOFT", "MEDIUM", "HARD"],
+                         linewidth=0,
+                         size=5,
+                         ax=ax
+                         )
+            
+            # Set labels and title
+            ax.set_xlabel("Driver")
+            ax.set_ylabel("Lap Time (s)")
+            fig.suptitle(f"Race Pace Comparison\n"
+                         f"{info.event_name} {info.year}")
+            
+            # Style adjustments
+            sns.despine(ax=ax, left=True, bottom=True)
+            fig.tight_layout()
+        
+        image = self.renderer.render(draw, profile=profile)
+        
+        return image, self.renderer.filename("plot", profile)
+        
+    def create_team_pace_plot(self, session, profile=None):
         """
         Create a team pace comparison plot.
         
         Args:
             session: The FastF1 session
+            profile: Optional RenderProfile to encode with
             
         Returns:
-            tuple: (figure, filename) - The matplotlib figure and the saved filename
+            tuple: (image, filename) - The encoded image bytes and a filename for it
         """
+        info = self.repository.metadata(session)
+        
         # Get quick laps
-        laps = session.laps.pick_quicklaps()
+        laps = self.repository.laps(session, quick=True)
         
         # Convert lap times to seconds for plotting
         transformed_laps = laps.copy()
@@ -135,99 +141,245 @@ class RaceAnalysisService:
         )
         
         # Get team colors
-        team_palette = fastf1.plotting.get_team_color_mapping(session=session)
-        
-        # Create the plot
-        fig, ax = plt.subplots(figsize=(15, 10))
-        
-        # Create box plot
-        sns.boxplot(
-            data=transformed_laps,
-            x="Team",
-            y="LapTime (s)",
-            order=team_order,
-            palette=team_palette,
-            whiskerprops=dict(color="white"),
-            boxprops=dict(edgecolor="white"),
-            medianprops=dict(color="grey"),
-            capprops=dict(color="white"),
-        )
+        team_palette = {team: fastf1.plotting.get_team_color(team, session=session)
+                        for team in team_order}
         
-        # Set title and style
-        plt.title(f"Race Pace Visualization\n"
-                 f"{session.event['EventName']} {session.event.year}")
-        plt.grid(visible=False)
+        def draw(fig):
+            # Create the plot
+            ax = fig.subplots()
+            
+            # Create box plot
+            sns.boxplot(
+                data=transformed_laps,
+                x="Team",
+                y="LapTime (s)",
+                order=team_order,
+                palette=team_palette,
+                whiskerprops=dict(color="white"),
+                boxprops=dict(edgecolor="white"),
+                medianprops=dict(color="grey"),
+                capprops=dict(color="white"),
+                ax=ax
+            )
+            
+            # Set title and style
+            ax.set_title(f"Race Pace Visualization\n"
+                         f"{info.event_name} {info.year}")
+            ax.grid(visible=False)
+            
+            # Remove redundant x-label
+            ax.set(xlabel=None)
+            fig.tight_layout()
         
-        # Remove redundant x-label
-        ax.set(xlabel=None)
-        plt.tight_layout()
+        image = self.renderer.render(draw, figsize=(15, 10), profile=profile)
         
-        # Save and return
-        filename = "plot.png"
-        plt.savefig(filename)
+        return image, self.renderer.filename("plot", profile)
         
-        return fig, filename
+    def create_lap_times_plot(self, session, laps, query, profile=None):
+        """
+        Create a lap time plot for the laps matching a lap query.
         
-    def create_lap_sections_plot(self, session, drivers=None):
+        Args:
+            session: The FastF1 session
+            laps: The matching laps (see services/lap_query.py)
+            query: The LapQuery the laps were selected with
+            profile: Optional RenderProfile to encode with
+            
+        Returns:
+            tuple: (image, filename) - The encoded image bytes and a filename for it
+        """
+        info = self.repository.metadata(session)
+        driver_colors = fastf1.plotting.get_driver_color_mapping(session=session)
+        compound_colors = fastf1.plotting.get_compound_mapping(session=session)
+        
+        # Convert lap times to seconds for plotting
+        laps = laps.reset_index(drop=True)
+        laps["LapTime(s)"] = laps["LapTime"].dt.total_seconds()
+        
+        def draw(fig):
+            ax = fig.subplots()
+            
+            # One line per driver, with each lap's marker in its compound colour
+            for driver, driver_laps in laps.groupby("Driver", sort=False):
+                ax.plot(driver_laps["LapNumber"], driver_laps["LapTime(s)"],
+                        color=driver_colors.get(driver, 'grey'), linewidth=1.5, label=driver)
+                ax.scatter(driver_laps["LapNumber"], driver_laps["LapTime(s)"],
+                           c=[compound_colors.get(compound, 'white') for compound in driver_laps["Compound"]],
+                           edgecolors=driver_colors.get(driver, 'grey'), s=30, zorder=3)
+            
+            # Set labels and title
+            ax.set_xlabel("Lap")
+            ax.set_ylabel("Lap Time (s)")
+            ax.legend()
+            fig.suptitle(f"Lap Times - {info.event_name} {info.year} {info.session_name}\n"
+                         f"{query.describe()}")
+            
+            sns.despine(ax=ax)
+            fig.tight_layout()
+        
+        image = self.renderer.render(draw, profile=profile)
+        
+        return image, self.renderer.filename("laptimes", profile)
+        
+    def create_positions_plot(self, session, profile=None):
+        """
+        Create a chart of every driver's running position lap by lap.
+        
+        Args:
+            session: The FastF1 session
+            profile: Optional RenderProfile to encode with
+            
+        Returns:
+            tuple: (image, filename) - The encoded image bytes and a filename for it
+        """
+        info = self.repository.metadata(session)
+        pivot = self.repository.lap_pivot(session)
+        driver_colors = fastf1.plotting.get_driver_color_mapping(session=session)
+        colors = [driver_colors.get(driver, 'grey') for driver in pivot.drivers]
+        
+        # The first position each driver held is their grid slot on the chart
+        starts = pd.DataFrame(pivot.position).bfill(axis=1)
+        start_positions = starts.iloc[:, 0].to_numpy() if not starts.empty else np.array([])
+        final_positions = pivot.final_positions()
+        pit_rows, pit_columns = np.nonzero(pivot.pit_in)
+        
+        def draw(fig):
+            ax = fig.subplots()
+            
+            # One line per driver row, drawn in a single call
+            ax.set_prop_cycle(color=colors)
+            ax.plot(pivot.lap_numbers, pivot.position.T, linewidth=2)
+            
+            # Pit stops
+            ax.scatter(pivot.lap_numbers[pit_columns], pivot.position[pit_rows, pit_columns],
+                       color='white', edgecolors='black', s=25, zorder=3, label="Pit stop")
+            
+            ax.set_ylim(len(pivot.drivers) + 0.5, 0.5)
+            ax.set_xlim(1, max(len(pivot.lap_numbers), 1))
+            
+            # Drivers by their first and last position on either side
+            has_start = ~np.isnan(start_positions)
+            ax.set_yticks(start_positions[has_start])
+            ax.set_yticklabels(np.array(pivot.drivers, dtype=object)[has_start])
+            right = ax.twinx()
+            right.set_ylim(ax.get_ylim())
+            has_final = ~np.isnan(final_positions)
+            right.set_yticks(final_positions[has_final])
+            right.set_yticklabels(np.array(pivot.drivers, dtype=object)[has_final])
+            
+            ax.set_xlabel("Lap")
+            ax.legend(loc='lower right')
+            fig.suptitle(f"Positions - {info.event_name} {info.year} {info.session_name}")
+            fig.tight_layout()
+        
+        image = self.renderer.render(draw, figsize=(15, 9), profile=profile)
+        
+        return image, self.renderer.filename("positions", profile)
+        
+    def create_strategy_plot(self, session, profile=None):
+        """
+        Create a tyre strategy timeline with every driver's stints.
+        
+        Args:
+            session: The FastF1 session
+            profile: Optional RenderProfile to encode with
+            
+        Returns:
+            tuple: (image, filename) - The encoded image bytes and a filename for it
+        """
+        info = self.repository.metadata(session)
+        pivot = self.repository.lap_pivot(session)
+        stints = pivot.stints()
+        compound_colors = fastf1.plotting.get_compound_mapping(session=session)
+        colors = stints['Compound'].map(lambda compound: compound_colors.get(compound, 'grey')).tolist()
+        
+        def draw(fig):
+            ax = fig.subplots()
+            
+            # Every stint of every driver as one bar, in a single call
+            ax.barh(stints['Row'], stints['Laps'], left=stints['FirstLap'] - 0.5, color=colors,
+                    edgecolor='black', height=0.7)
+            
+            ax.set_yticks(range(len(pivot.drivers)))
+            ax.set_yticklabels(pivot.drivers)
+            ax.set_ylim(len(pivot.drivers) - 0.5, -0.5)
+            ax.set_xlim(0.5, max(len(pivot.lap_numbers), 1) + 0.5)
+            ax.set_xlabel("Lap")
+            
+            ax.legend(handles=[Patch(color=compound_colors.get(compound, 'grey'), label=compound.capitalize())
+                               for compound in stints['Compound'].unique()], loc='lower right')
+            
+            sns.despine(ax=ax, left=True, bottom=True)
+            fig.suptitle(f"Tyre Strategy - {info.event_name} {info.year} {info.session_name}")
+            fig.tight_layout()
+        
+        image = self.renderer.render(draw, figsize=(15, 9), profile=profile)
+        
+        return image, self.renderer.filename("strategy", profile)
+        
+    def create_lap_sections_plot(self, session, drivers=None, profile=None):
         """
         Create a lap sections analysis plot.
         
         Args:
             session: The FastF1 session
             drivers: List of driver codes (default: None, will use top 5)
+            profile: Optional RenderProfile to encode with
             
         Returns:
-            tuple: (figure, filename) - The matplotlib figure and the saved filename
+            tuple: (image, filename) - The encoded image bytes and a filename for it
         """
+        info = self.repository.metadata(session)
+        
         # If no drivers specified, use the top 5 fastest
         if not drivers:
-            laps = session.laps.pick_quicklaps()
+            laps = self.repository.laps(session, quick=True)
             drivers = laps['Driver'].unique()[:5]
         else:
             drivers = drivers[:5]  # Limit to 5 drivers
         
-        # Create the plot with 4 subplots
-        fig, axs = plt.subplots(2, 2, figsize=Config.DEFAULT_FIG_SIZE)
-        fig.suptitle(f"Lap Sections for {session.event['EventName']} {session.event.year}")
-        
         # Define the section types
         section_types = ['braking', 'cornering', 'acceleration', 'full_throttle']
         
-        # Process each driver
-        for driver in drivers:
-            lap = session.laps.pick_driver(driver).pick_fastest()
-            telemetry = lap.get_telemetry()
-            
-            time = telemetry['Time']
+        def draw(fig):
+            # Create the plot with 4 subplots
+            axs = fig.subplots(2, 2)
+            fig.suptitle(f"Lap Sections for {info.event_name} {info.year}")
             
-            # Define the sections
-            braking_mask = telemetry['Brake'] > 0
-            full_throttle_mask = telemetry['Throttle'] == 100
-            cornering_mask = (telemetry['nGear'] < 5) & (telemetry['Speed'] > 100)  # Simplified cornering detection
-            acceleration_mask = (telemetry['Throttle'] > 80) & (telemetry['Throttle'] < 100)
+            # Process each driver
+            for driver in drivers:
+                lap = self.repository.fastest_lap(session, driver)
+                telemetry = self.repository.lap_telemetry(lap)
+                
+                time = telemetry['Time']
+                
+                # Define the sections
+                braking_mask = telemetry['Brake'] > 0
+                full_throttle_mask = telemetry['Throttle'] == 100
+                cornering_mask = (telemetry['nGear'] < 5) & (telemetry['Speed'] > 100)  # Simplified cornering detection
+                acceleration_mask = (telemetry['Throttle'] > 80) & (telemetry['Throttle'] < 100)
+                
+                masks = {
+                    'braking': braking_mask,
+                    'cornering': cornering_mask,
+                    'acceleration': acceleration_mask,
+                    'full_throttle': full_throttle_mask
+                }
+                
+                # Plot each section
+                for idx, section in enumerate(section_types):
+                    mask = masks[section]
+                    axs[idx // 2, idx % 2].plot(time[mask], telemetry['Speed'][mask], label=driver)
             
-            masks = {
-                'braking': braking_mask,
-                'cornering': cornering_mask,
-                'acceleration': acceleration_mask,
-                'full_throttle': full_throttle_mask
-            }
-            
-            # Plot each section
+            # Add labels and legends
             for idx, section in enumerate(section_types):
-                mask = masks[section]
-                axs[idx // 2, idx % 2].plot(time[mask], telemetry['Speed'][mask], label=driver)
-        
-        # Add labels and legends
-        for idx, section in enumerate(section_types):
-            axs[idx // 2, idx % 2].set_title(section.replace('_', ' ').capitalize())
-            axs[idx // 2, idx % 2].legend()
-            axs[idx // 2, idx % 2].set_xlabel("Time")
-            axs[idx // 2, idx % 2].set_ylabel("Speed (km/h)")
-        
-        # Save and return
-        filename = "lap_sections.png"
-        plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-        plt.savefig(filename)
-        
-        return fig, filename
+                axs[idx // 2, idx % 2].set_title(section.replace('_', ' ').capitalize())
+                axs[idx // 2, idx % 2].legend()
+                axs[idx // 2, idx % 2].set_xlabel("Time")
+                axs[idx // 2, idx % 2].set_ylabel("Speed (km/h)")
+            
+            fig.tight_layout(rect=[0, 0.03, 1, 0.95])
+        
+        image = self.renderer.render(draw, profile=profile)
+        
+        return image, self.renderer.filename("lap_sections", profile)
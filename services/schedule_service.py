@@ -2,15 +2,19 @@
 Service for handling F1 schedule data.
 """
 
+import bisect
 import logging
 import csv
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 import os
 from config import Config
 
 logger = logging.getLogger('f1bot')
 
+# Start times in the schedule file are naive UTC
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
 class F1Event:
     """
     Class to store F1 event details.
@@ -36,6 +40,10 @@ class F1Event:
 class ScheduleService:
     """
     Service for handling F1 schedule data.
+    
+    The schedule and flags are loaded once and kept in memory: events are
+    held in a start-time-sorted list (searched with bisect) and indexed by
+    race and country. Files are re-read only when their mtime changes.
     """
     
     def __init__(self, schedule_file=Config.SCHEDULE_FILE, flags_file=Config.FLAGS_FILE):
@@ -50,15 +58,50 @@ class ScheduleService:
         self.flags_file = flags_file
         self.events = []
         self.country_flags = {}
+        self._start_times = []
+        self._by_race = {}
+        self._by_country = {}
+        self._schedule_mtime = None
+        self._flags_mtime = None
+        self._schedule_loaded = False
+        self._flags_loaded = False
+    
+    @staticmethod
+    def _get_mtime(path):
+        """
+        Get the modification time of a file.
+        
+        Args:
+            path: The file path
+            
+        Returns:
+            float: The mtime, or None if the file cannot be read
+        """
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+    
+    def _ensure_schedule(self):
+        """Load the schedule if it was never loaded or the file has changed."""
+        if not self._schedule_loaded or self._get_mtime(self.schedule_file) != self._schedule_mtime:
+            self.load_schedule()
+    
+    def _ensure_flags(self):
+        """Load the flags if they were never loaded or the file has changed."""
+        if not self._flags_loaded or self._get_mtime(self.flags_file) != self._flags_mtime:
+            self.load_country_flags()
         
     def load_schedule(self):
         """
-        Load the F1 schedule from the CSV file.
+        Load the F1 schedule from the CSV file and rebuild the indexes.
         
         Returns:
-            list: List of F1Event objects
+            list: List of F1Event objects sorted by start time
         """
         events = []
+        self._schedule_loaded = True
+        self._schedule_mtime = self._get_mtime(self.schedule_file)
         
         try:
             with open(self.schedule_file, mode='r') as file:
@@ -68,29 +111,36 @@ class ScheduleService:
                     location = row[1]
                     race_name = row[2]
                     
-                    i = 3
-                    while i <= 12:  # Process up to 5 events per race weekend
-                        if i + 1 >= len(row):
-                            break
-                            
+                    # Process up to 5 (event type, start time) pairs per race weekend
+                    for i in range(3, min(len(row) - 1, 13), 2):
                         event_type = row[i]
                         start_time_str = row[i + 1]
                         
                         try:
-                            start_time = datetime.strptime(start_time_str, '%Y-%m-%d %H:%M:%S')
+                            start_time = datetime.strptime(start_time_str, TIME_FORMAT)
                             events.append(F1Event(race_name, event_type, start_time, location, country))
                         except ValueError as e:
                             logger.error(f"Error parsing date {start_time_str}: {e}")
-                            
-                        i += 2
-            
-            self.events = events
-            logger.info(f"Loaded {len(events)} events from schedule file")
-            return events
             
         except Exception as e:
             logger.error(f"Error loading schedule: {e}")
             return []
+        
+        events.sort(key=lambda event: event.start_time)
+        
+        by_race = {}
+        by_country = {}
+        for event in events:
+            by_race.setdefault(event.race_name.lower(), []).append(event)
+            by_country.setdefault(event.country.lower(), []).append(event)
+        
+        self.events = events
+        self._start_times = [event.start_time for event in events]
+        self._by_race = by_race
+        self._by_country = by_country
+        
+        logger.info(f"Loaded {len(events)} events from schedule file")
+        return events
     
     def load_country_flags(self):
         """
@@ -99,6 +149,9 @@ class ScheduleService:
         Returns:
             dict: Dictionary mapping country names to flag URLs
         """
+        self._flags_loaded = True
+        self._flags_mtime = self._get_mtime(self.flags_file)
+        
         try:
             with open(self.flags_file, 'r') as f:
                 self.country_flags = json.load(f)
@@ -108,6 +161,16 @@ class ScheduleService:
             logger.error(f"Error loading country flags: {e}")
             return {}
     
+    def get_country_flags(self):
+        """
+        Get the country flags, loading them if needed.
+        
+        Returns:
+            dict: Dictionary mapping country names to flag URLs
+        """
+        self._ensure_flags()
+        return self.country_flags
+    
     def get_next_event(self):
         """
         Get the next upcoming F1 event.
@@ -115,21 +178,83 @@ class ScheduleService:
         Returns:
             F1Event: The next upcoming event, or None if no events are found
         """
-        if not self.events:
-            self.load_schedule()
+        self._ensure_schedule()
             
         current_time = datetime.utcnow()
+        index = bisect.bisect_right(self._start_times, current_time)
         
-        # Filter out past events and sort by start time
-        upcoming_events = [event for event in self.events if event.start_time > current_time]
-        upcoming_events.sort(key=lambda x: x.start_time)
-        
-        if upcoming_events:
-            return upcoming_events[0]
+        if index < len(self.events):
+            return self.events[index]
         else:
             logger.warning("No upcoming events found")
             return None
     
+    def get_event_end(self, event):
+        """
+        Estimate when an event ends from its scheduled duration.
+        
+        Args:
+            event: The F1 event object
+            
+        Returns:
+            datetime: Estimated end time (UTC)
+        """
+        duration = Config.SESSION_DURATIONS.get(event.event_type, Config.DEFAULT_SESSION_DURATION)
+        return event.start_time + timedelta(seconds=duration)
+    
+    def get_last_ended_event(self, event_types=None, now=None):
+        """
+        Get the most recent event that has already ended.
+        
+        Args:
+            event_types: Optional collection of event types to consider (default: all)
+            now: Reference time (default: current UTC time)
+            
+        Returns:
+            F1Event: The last ended event, or None if no event has ended yet
+        """
+        self._ensure_schedule()
+            
+        now = now or datetime.utcnow()
+        longest = timedelta(seconds=max(Config.SESSION_DURATIONS.values(), default=0))
+        longest = max(longest, timedelta(seconds=Config.DEFAULT_SESSION_DURATION))
+        
+        # Walk back from the last started event; once starts are earlier than
+        # the best end minus the longest session, nothing later can end after it
+        best, best_end = None, None
+        for index in range(bisect.bisect_right(self._start_times, now) - 1, -1, -1):
+            event = self.events[index]
+            if best_end is not None and event.start_time + longest <= best_end:
+                break
+            if event_types is not None and event.event_type not in event_types:
+                continue
+            end = self.get_event_end(event)
+            if end <= now and (best_end is None or end > best_end):
+                best, best_end = event, end
+        
+        return best
+    
+    def get_completed_rounds(self, year, now=None):
+        """
+        Count the race weekends of a season whose race has ended.
+        
+        Args:
+            year: The season
+            now: Reference time (default: current UTC time)
+            
+        Returns:
+            int: Number of completed rounds
+        """
+        self._ensure_schedule()
+            
+        now = now or datetime.utcnow()
+        return len({
+            event.race_name for event in self.events[:bisect.bisect_right(self._start_times, now)]
+            if event.event_type == 'Race'
+            and event.start_time.year == int(year)
+            and self.get_event_end(event) <= now
+        })
+    
     def get_events_by_race(self, race_name):
         """
         Get all events for a specific race.
@@ -140,10 +265,9 @@ class ScheduleService:
         Returns:
             list: List of F1Event objects for the specified race
         """
-        if not self.events:
-            self.load_schedule()
+        self._ensure_schedule()
             
-        return [event for event in self.events if event.race_name.lower() == race_name.lower()]
+        return list(self._by_race.get(race_name.lower(), []))
     
     def get_events_by_country(self, country):
         """
@@ -155,10 +279,9 @@ class ScheduleService:
         Returns:
             list: List of F1Event objects for the specified country
         """
-        if not self.events:
-            self.load_schedule()
+        self._ensure_schedule()
             
-        return [event for event in self.events if event.country.lower() == country.lower()]
+        return list(self._by_country.get(country.lower(), []))
     
     def get_flag_url(self, country):
         """
@@ -170,7 +293,6 @@ class ScheduleService:
         Returns:
             str: URL of the country flag, or None if not found
         """
-        if not self.country_flags:
-            self.load_country_flags()
+        self._ensure_flags()
             
         return self.country_flags.get(country)
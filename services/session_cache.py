@@ -0,0 +1,183 @@
+"""
+In-memory cache of loaded FastF1 sessions.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+import fastf1
+from config import Config
+from services.cache_manager import cache_manager
+from utils.memory_profiler import memory_profiler
+from utils.tracing import span
+
+logger = logging.getLogger('f1bot')
+
+
+def session_key(year, race, session_type):
+    """
+    Normalize the arguments identifying a session.
+
+    Args:
+        year: The year of the session
+        race: The race name or round number
+        session_type: The session type (e.g., 'R', 'Q', 'FP1')
+
+    Returns:
+        tuple: (year, race, session type) usable as a cache key
+    """
+    return (int(year), str(race).strip().lower(), str(session_type).strip().upper())
+
+
+def load_session(year, race, session_type):
+    """
+    Load a session through FastF1.
+
+    Args:
+        year: The year of the session
+        race: The race name or round number
+        session_type: The session type
+
+    Returns:
+        fastf1.core.Session: The loaded session
+    """
+    session = fastf1.get_session(int(year), race, session_type)
+    session.load()
+    return session
+
+
+class SessionCache:
+    """
+    LRU cache of loaded sessions, so repeated commands for the same session
+    skip FastF1's parse step (its disk cache only saves the download).
+    """
+
+    def __init__(self, max_sessions=Config.SESSION_CACHE_SIZE, loader=load_session):
+        """
+        Initialize the session cache.
+
+        Args:
+            max_sessions: Maximum number of loaded sessions kept in memory
+            loader: Function (year, race, session_type) returning a loaded session
+        """
+        self.max_sessions = max_sessions
+        self.loader = loader
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._eviction_listeners = []
+
+    def add_eviction_listener(self, listener):
+        """
+        Register a function called with each session dropped from memory.
+
+        Caches of data derived from sessions use this to drop their entries
+        together with the session.
+
+        Args:
+            listener: Function taking the evicted session
+        """
+        self._eviction_listeners.append(listener)
+
+    def _notify_evicted(self, sessions):
+        """Tell the eviction listeners which sessions were dropped."""
+        for session in sessions:
+            for listener in self._eviction_listeners:
+                try:
+                    listener(session)
+                except Exception as e:
+                    logger.error(f"Error in session eviction listener: {e}")
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._sessions
+
+    def is_loaded(self, year, race, session_type):
+        """
+        Check whether a session is already loaded.
+
+        Args:
+            year: The year of the session
+            race: The race name or round number
+            session_type: The session type
+
+        Returns:
+            bool: True if the session is in memory
+        """
+        return session_key(year, race, session_type) in self
+
+    def get_session(self, year, race, session_type, loader=None):
+        """
+        Get a loaded session, loading it on a miss.
+
+        Args:
+            year: The year of the session
+            race: The race name or round number
+            session_type: The session type
+            loader: Optional function to load it with on a miss (default: self.loader)
+
+        Returns:
+            fastf1.core.Session: The loaded session
+        """
+        key = session_key(year, race, session_type)
+        with span('session.load', session=key, cache_hit=False) as trace:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is not None:
+                    self._sessions.move_to_end(key)
+                    trace['cache_hit'] = True
+                    cache_manager.touch(session)
+                    return session
+
+            logger.info(f"Loading session data for {year} {race} {session_type}")
+            session = (loader or self.loader)(year, race, session_type)
+        cache_manager.touch(session)
+
+        evicted = []
+        with self._lock:
+            self._sessions[key] = session
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.max_sessions:
+                evicted_key, evicted_session = self._sessions.popitem(last=False)
+                evicted.append(evicted_session)
+                logger.info(f"Evicted session {evicted_key} from memory")
+        self._notify_evicted(evicted)
+
+        return session
+
+    def memory_usage(self):
+        """
+        Get the memory held by the loaded sessions.
+
+        Returns:
+            dict: Bytes in session tables (laps, results, ...) and in telemetry
+        """
+        with self._lock:
+            sessions = list(self._sessions.values())
+
+        tables = telemetry = 0
+        for session in sessions:
+            for name in ('laps', 'results', 'weather_data', 'track_status', 'race_control_messages'):
+                try:
+                    tables += int(getattr(session, name).memory_usage(deep=True).sum())
+                except Exception:
+                    # Not loaded for this session
+                    continue
+            for name in ('car_data', 'pos_data'):
+                try:
+                    frames = getattr(session, name).values()
+                except Exception:
+                    continue
+                telemetry += sum(int(frame.memory_usage(deep=True).sum()) for frame in frames)
+        return {'sessions': tables, 'telemetry': telemetry}
+
+    def clear(self):
+        """Drop all loaded sessions."""
+        with self._lock:
+            evicted = list(self._sessions.values())
+            self._sessions.clear()
+        self._notify_evicted(evicted)
+
+
+# Shared instance used by the services
+session_cache = SessionCache()
+memory_profiler.register_collector('sessions', session_cache.memory_usage)
@@ -0,0 +1,500 @@
+"""
+Session repository: the one place the analysis services get session data from.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+import fastf1
+import pandas as pd
+from config import Config
+from services.job_broker import JobBroker, JobSpec
+from services.lap_pivot import LapPivot
+from services.session_cache import load_session, session_cache
+from services.session_store import session_store
+from utils.memory_profiler import memory_profiler
+from utils.tracing import span
+
+logger = logging.getLogger('f1bot')
+
+
+class SessionInfo:
+    """
+    Class to store the descriptive metadata of a session.
+    """
+    def __init__(self, year, event_name, session_name, round_number, location, country, date, drivers):
+        """
+        Initialize session metadata.
+
+        Args:
+            year: The season
+            event_name: The event name (e.g., 'Italian Grand Prix')
+            session_name: The session name (e.g., 'Qualifying')
+            round_number: The round of the season
+            location: The event location
+            country: The event country
+            date: The session start as a pandas Timestamp
+            drivers: Driver abbreviations in classification order
+        """
+        self.year = year
+        self.event_name = event_name
+        self.session_name = session_name
+        self.round_number = round_number
+        self.location = location
+        self.country = country
+        self.date = date
+        self.drivers = drivers
+
+
+class FastF1Backend:
+    """
+    Loads sessions from the F1 live timing API through FastF1 (and its disk cache).
+    """
+
+    def load(self, year, race, session_type):
+        """
+        Load a session.
+
+        Args:
+            year: The year of the session
+            race: The race name or round number
+            session_type: The session type
+
+        Returns:
+            fastf1.core.Session: The loaded session
+        """
+        return load_session(year, race, session_type)
+
+
+class ColumnarBackend:
+    """
+    Reads sessions from the Parquet session store, loading and storing
+    them through a fallback backend on a miss.
+    """
+
+    def __init__(self, store=None, fallback=None):
+        """
+        Initialize the columnar backend.
+
+        Args:
+            store: Optional SessionStore (default: the shared store)
+            fallback: Backend loading sessions that are not stored, or None to fail on a miss
+        """
+        self.store = store or session_store
+        self.fallback = fallback
+
+    def load(self, year, race, session_type):
+        """
+        Load a session from the store.
+
+        Args:
+            year: The year of the session
+            race: The race name or round number
+            session_type: The session type
+
+        Returns:
+            fastf1.core.Session: The loaded session
+
+        Raises:
+            LookupError: If the session is not stored and there is no fallback
+        """
+        with span('session.store_read', hit=False) as trace:
+            session = self.store.load(year, race, session_type)
+            trace['hit'] = session is not None
+        if session is not None:
+            return session
+        if self.fallback is None:
+            raise LookupError(f"Session {year} {race} {session_type} is not in the session store")
+
+        session = self.fallback.load(year, race, session_type)
+        try:
+            self.store.save(session, year, race, session_type)
+        except Exception as e:
+            # The command can still use the loaded session
+            logger.error(f"Error storing session {year} {race} {session_type}: {e}")
+        return session
+
+
+class SyntheticBackend:
+    """
+    Generates deterministic sessions, for load tests and benchmarks.
+    """
+
+    def load(self, year, race, session_type):
+        """
+        Generate a session.
+
+        Args:
+            year: The year of the session
+            race: The race name or round number
+            session_type: The session type
+
+        Returns:
+            SyntheticSession: The generated session
+        """
+        # Imported here so the bot only loads the generator when it is used
+        from services.synthetic_session import load_synthetic_session
+
+        return load_synthetic_session(year, race, session_type)
+
+
+class RemoteBackend:
+    """
+    Has a worker process load a session and export it to the shared session
+    store, then reads it from there.
+
+    Keeps FastF1's download and parse work out of the bot process. The bot
+    and the workers must share Config.BROKER_DB and Config.SESSION_STORE_DIR.
+    """
+
+    def __init__(self, broker=None, store=None, poll_interval=Config.BROKER_POLL_INTERVAL,
+                 timeout=Config.BROKER_RESULT_TIMEOUT):
+        """
+        Initialize the remote backend.
+
+        Args:
+            broker: Optional JobBroker (default: one on Config.BROKER_DB)
+            store: Optional SessionStore (default: the shared store)
+            poll_interval: Seconds between checks for the export
+            timeout: Seconds to wait for a worker before giving up
+        """
+        self.broker = broker or JobBroker()
+        self.store = store or session_store
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    def load(self, year, race, session_type):
+        """
+        Load a session exported by a worker.
+
+        Called from the render threads, so it waits for the worker synchronously.
+
+        Args:
+            year: The year of the session
+            race: The race name or round number
+            session_type: The session type
+
+        Returns:
+            fastf1.core.Session: The loaded session
+
+        Raises:
+            JobFailedError: If the worker failed to export the session
+            TimeoutError: If no worker exported the session in time
+        """
+        session = self.store.load(year, race, session_type)
+        if session is not None:
+            return session
+
+        # Ahead of render jobs, which wait on the session anyway
+        spec = JobSpec('session_export', {'year': int(year), 'race': race, 'session_type': session_type},
+                       priority=0)
+        job_id = self.broker.enqueue(spec)
+        deadline = time.monotonic() + self.timeout
+        with span('session.remote_load', job_id=job_id):
+            while True:
+                finished, _ = self.broker.pop_result(job_id)
+                if finished:
+                    break
+                if time.monotonic() > deadline:
+                    self.broker.cancel(job_id)
+                    raise TimeoutError(f"Timed out waiting for a worker to export {year} {race} {session_type}")
+                time.sleep(self.poll_interval)
+
+        session = self.store.load(year, race, session_type)
+        if session is None:
+            raise LookupError(f"Worker exported {year} {race} {session_type} but it could not be read")
+        return session
+
+    def worker_backend(self):
+        """
+        Get the backend a worker process loads sessions with.
+
+        Workers read the store the bot reads and fill it from FastF1, rather
+        than sending work to themselves.
+
+        Returns:
+            ColumnarBackend: The worker's backend
+        """
+        return ColumnarBackend(self.store, fallback=FastF1Backend())
+
+
+def create_backend(kind=Config.SESSION_BACKEND):
+    """
+    Create the configured session backend.
+
+    Args:
+        kind: 'live', 'columnar', 'remote' or 'synthetic'
+
+    Returns:
+        The backend
+    """
+    if kind in ('columnar', 'remote') and not session_store.available:
+        logger.warning(f"Session backend '{kind}' needs pyarrow and a supported FastF1 release, "
+                       f"loading sessions from FastF1")
+        return FastF1Backend()
+    if kind == 'columnar':
+        return ColumnarBackend(fallback=FastF1Backend())
+    if kind == 'remote':
+        return RemoteBackend()
+    if kind == 'synthetic':
+        return SyntheticBackend()
+    if kind != 'live':
+        logger.warning(f"Unknown session backend '{kind}', loading sessions from FastF1")
+    return FastF1Backend()
+
+
+class SessionRepository:
+    """
+    Loads sessions through a swappable backend and gives the services typed
+    access to their laps, lap telemetry and metadata.
+
+    Loaded sessions are kept in the session cache, and the lap telemetry,
+    lap pivots and circuit information the plots use are cached here, so
+    every service shares the same caches whatever the backend. Cached
+    entries hold no reference to their session and are dropped when the
+    session cache evicts it, so they never keep an evicted session alive.
+    """
+
+    def __init__(self, backend=None, sessions=None, max_entries=Config.TELEMETRY_CACHE_SIZE):
+        """
+        Initialize the session repository.
+
+        Args:
+            backend: Optional backend to load sessions with (default: the configured backend)
+            sessions: Optional SessionCache to keep loaded sessions in (default: the shared cache)
+            max_entries: Maximum number of lap telemetry frames, lap pivots and circuit infos cached
+        """
+        self.backend = backend or create_backend()
+        self.sessions = sessions or session_cache
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.sessions.add_eviction_listener(self.forget)
+
+    def get_session(self, year, race, session_type):
+        """
+        Get a loaded session.
+
+        Args:
+            year: The year of the session
+            race: The race name or round number
+            session_type: The session type (e.g., 'R', 'Q', 'FP1')
+
+        Returns:
+            fastf1.core.Session: The loaded session
+        """
+        return self.sessions.get_session(year, race, session_type, loader=self.backend.load)
+
+    def is_loaded(self, year, race, session_type):
+        """
+        Check whether a session is already in memory.
+
+        Args:
+            year: The year of the session
+            race: The race name or round number
+            session_type: The session type
+
+        Returns:
+            bool: True if getting the session will not load it
+        """
+        return self.sessions.is_loaded(year, race, session_type)
+
+    @staticmethod
+    def session_id(session):
+        """
+        Identify a loaded session, however it was requested.
+
+        Args:
+            session: The FastF1 session
+
+        Returns:
+            tuple: (year, event name, session name)
+        """
+        return (session.event.year, session.event['EventName'], session.name)
+
+    def metadata(self, session):
+        """
+        Get the descriptive metadata of a session.
+
+        Args:
+            session: The FastF1 session
+
+        Returns:
+            SessionInfo: The session's metadata
+        """
+        try:
+            drivers = session.results.sort_values('Position')['Abbreviation'].tolist()
+        except Exception:
+            drivers = []
+        return SessionInfo(
+            year=session.event.year,
+            event_name=session.event['EventName'],
+            session_name=session.name,
+            round_number=session.event['RoundNumber'],
+            location=session.event['Location'],
+            country=session.event['Country'],
+            date=session.date,
+            drivers=drivers
+        )
+
+    def laps(self, session, drivers=None, quick=False):
+        """
+        Get the laps of a session.
+
+        Args:
+            session: The FastF1 session
+            drivers: Optional driver codes or numbers to select
+            quick: Whether to keep only laps within FastF1's quick lap threshold
+
+        Returns:
+            fastf1.core.Laps: The selected laps
+        """
+        laps = session.laps
+        if drivers is not None:
+            laps = laps.pick_drivers(drivers)
+        if quick:
+            laps = laps.pick_quicklaps()
+        return laps
+
+    def fastest_lap(self, session, driver=None):
+        """
+        Get the fastest lap of a driver, or of the whole session.
+
+        Args:
+            session: The FastF1 session
+            driver: Optional driver code or number
+
+        Returns:
+            fastf1.core.Lap: The fastest lap
+        """
+        laps = session.laps if driver is None else session.laps.pick_drivers(driver)
+        return laps.pick_fastest()
+
+    def lap_pivot(self, session):
+        """
+        Get the driver by lap grid of a session's laps.
+
+        Built once per session and shared by every chart that reads it.
+
+        Args:
+            session: The FastF1 session
+
+        Returns:
+            LapPivot: The grid, with drivers in classification order
+        """
+        return self._cached(('pivot', self.session_id(session)),
+                            lambda: LapPivot.from_laps(session.laps, self.metadata(session).drivers))
+
+    def _cached(self, key, compute):
+        """Get an entry from the cache, computing and storing it on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def lap_telemetry(self, lap, source='merged'):
+        """
+        Get the telemetry of a lap.
+
+        Args:
+            lap: The fastf1.core.Lap
+            source: 'merged' (car and position data), 'car' (car data with a
+                Distance column) or 'pos' (position data)
+
+        Returns:
+            fastf1.core.Telemetry: A copy of the lap's telemetry, safe to modify
+
+        Raises:
+            ValueError: If the source is unknown
+        """
+        loaders = {
+            'merged': lambda: lap.get_telemetry(),
+            'car': lambda: lap.get_car_data().add_distance(),
+            'pos': lambda: lap.get_pos_data()
+        }
+        if source not in loaders:
+            raise ValueError(f"Unknown telemetry source '{source}'")
+
+        key = ('telemetry', self.session_id(lap.session), lap['DriverNumber'], lap['LapNumber'], source)
+        # Cached as a plain DataFrame: Telemetry keeps a reference to its session
+        frame = self._cached(key, lambda: pd.DataFrame(loaders[source]()))
+        return fastf1.core.Telemetry(frame.copy(), session=lap.session, driver=lap['DriverNumber'])
+
+    def driver_telemetry(self, session, driver_number, source='car'):
+        """
+        Get a driver's telemetry for the whole session.
+
+        Args:
+            session: The FastF1 session
+            driver_number: The driver's number, as a string
+            source: 'car' (car data) or 'pos' (position data)
+
+        Returns:
+            fastf1.core.Telemetry: The session's own frame, to be read only
+                (None if the driver has no telemetry)
+
+        Raises:
+            ValueError: If the source is unknown
+        """
+        if source not in ('car', 'pos'):
+            raise ValueError(f"Unknown telemetry source '{source}'")
+        frames = session.car_data if source == 'car' else session.pos_data
+        return frames.get(driver_number)
+
+    def circuit_info(self, session):
+        """
+        Get the circuit information of a session.
+
+        Args:
+            session: The FastF1 session
+
+        Returns:
+            CircuitInfo: The circuit's corners, marshal lights and sectors
+        """
+        return self._cached(('circuit', self.session_id(session)), session.get_circuit_info)
+
+    def memory_usage(self):
+        """
+        Get the memory held by cached lap telemetry and lap pivots.
+
+        Returns:
+            dict: Bytes in cached telemetry frames and in lap pivots
+        """
+        with self._lock:
+            entries = list(self._entries.items())
+        return {
+            'lap_telemetry': sum(int(value.memory_usage(deep=True).sum())
+                                 for key, value in entries if key[0] == 'telemetry'),
+            'lap_pivots': sum(value.memory_usage() for key, value in entries if key[0] == 'pivot')
+        }
+
+    def forget(self, session):
+        """
+        Drop the cached entries of a session.
+
+        Args:
+            session: The FastF1 session
+        """
+        session_id = self.session_id(session)
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == session_id]:
+                del self._entries[key]
+
+    def clear(self):
+        """Drop the cached telemetry, lap pivots and circuit information."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared instance used by the services
+session_repository = SessionRepository()
+memory_profiler.register_collector('session_repository', session_repository.memory_usage)
@@ -0,0 +1,458 @@
+"""
+Columnar on-disk store of loaded FastF1 sessions.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import pandas as pd
+import fastf1
+import fastf1.core
+import fastf1.events
+from fastf1.mvapi.data import CircuitInfo
+from config import Config
+from services.session_cache import session_key
+
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pyarrow = None
+
+logger = logging.getLogger('f1bot')
+
+# Bumped when the layout changes, so stale sessions are reloaded instead of misread
+STORE_VERSION = 1
+
+# FastF1 releases (major, minor) the session rebuild was tested with. It sets
+# private Session attributes and fastf1.plotting's driver-team mappings, which
+# FastF1 has no public API for, so other releases may need changes here.
+TESTED_FASTF1_VERSIONS = ((3, 8),)
+
+# Session tables written to <name>.parquet
+TABLES = ('laps', 'results', 'session_status', 'track_status', 'weather_data', 'race_control_messages')
+
+# Per-driver telemetry written to one <name>.parquet with a DriverNumber column
+TELEMETRY = ('car_data', 'pos_data')
+
+CIRCUIT_TABLES = ('corners', 'marshal_lights', 'marshal_sectors')
+
+
+def _fastf1_version():
+    """Get the installed FastF1 release as (major, minor)."""
+    match = re.match(r'(\d+)\.(\d+)', fastf1.__version__)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def fastf1_supported():
+    """
+    Check that the installed FastF1 has the internals stored sessions are rebuilt with.
+
+    Returns:
+        bool: True if sessions can be rebuilt
+    """
+    try:
+        from fastf1.plotting import _backend, _base, _interface
+    except ImportError:
+        return False
+    internals = (
+        (_interface, '_DRIVER_TEAM_MAPPINGS'), (_backend, 'Constants'), (_backend, '_generate_team'),
+        (_base, 'DriverTeamMapping'), (_base, 'Team'), (_base, 'Driver'), (_base, '_normalize_string')
+    )
+    if not all(hasattr(module, name) for module, name in internals):
+        return False
+    if _fastf1_version() not in TESTED_FASTF1_VERSIONS:
+        logger.warning(f"FastF1 {fastf1.__version__} is not a release the session store was tested with")
+    return True
+
+
+def register_plotting_teams(session, drivers):
+    """
+    Give fastf1.plotting the driver-team mapping of a session loaded without
+    live timing access.
+
+    fastf1.plotting normally downloads the driver list of a session from the
+    live timing API; stored and generated sessions have their drivers already.
+
+    Args:
+        session: The FastF1 session
+        drivers: Iterable of (abbreviation, full name, team name, team colour hex) tuples,
+            ordered by driver number
+    """
+    from fastf1.plotting import _backend, _base, _interface
+
+    year = str(session.event['EventDate'].year)
+    teams = {}
+    if year in _backend.Constants:
+        for normalized_name, constants in _backend.Constants[year].teams.items():
+            teams[normalized_name] = _base.Team(normalized_name=normalized_name,
+                                                short_name=constants.short_name,
+                                                colors=constants.colors.model_copy())
+
+    for abbreviation, full_name, team_name, colour in drivers:
+        normalized_team = _base._normalize_string(team_name).lower()
+        team = next((team for normalized_name, team in teams.items() if normalized_name in normalized_team),
+                    None)
+        if team is None:
+            team = _backend._generate_team(team_name, f"#{(colour or 'ffffff').lower()}")
+            teams[team.normalized_name] = team
+        team.name = team_name
+        if colour:
+            team.colors.official = f"#{colour.lower()}"
+        team.add_driver(_base.Driver(team=team, abbreviation=abbreviation, name=full_name,
+                                     normalized_name=_base._normalize_string(full_name).lower()))
+
+    _interface._DRIVER_TEAM_MAPPINGS[session.api_path] = _base.DriverTeamMapping(
+        year=year, teams=[team for team in teams.values() if team.drivers])
+
+
+def _encode_value(value):
+    """Convert an event field to a JSON-compatible value."""
+    if value is pd.NaT:
+        return {'timestamp': None}
+    if isinstance(value, pd.Timestamp):
+        return {'timestamp': value.isoformat()}
+    if hasattr(value, 'item'):
+        # numpy scalars
+        return value.item()
+    return value
+
+
+def _decode_value(value):
+    """Convert a JSON value written by _encode_value back to an event field."""
+    if isinstance(value, dict) and 'timestamp' in value:
+        return pd.Timestamp(value['timestamp']) if value['timestamp'] else pd.NaT
+    return value
+
+
+def _to_columnar(frame):
+    """
+    Prepare a FastF1 table for writing to Parquet.
+
+    FastF1 keeps some flags (e.g. Deleted) in object columns mixing booleans
+    and missing values, which Parquet cannot store as they are.
+
+    Returns:
+        tuple: (plain DataFrame, names of flag columns to restore on reading)
+    """
+    frame = pd.DataFrame(frame).reset_index(drop=True)
+    flags = []
+    for column in frame.columns:
+        if frame[column].dtype != object:
+            continue
+        values = frame[column].dropna()
+        if len(values) and values.map(lambda value: isinstance(value, bool)).all():
+            frame[column] = frame[column].astype('boolean')
+            flags.append(column)
+    return frame, flags
+
+
+def _from_columnar(frame, flags):
+    """Restore the flag columns of a table written by _to_columnar."""
+    for column in flags:
+        missing = frame[column].isna()
+        frame[column] = frame[column].astype(object).where(~missing, None)
+    return frame
+
+
+class StoredSession(fastf1.core.Session):
+    """
+    A FastF1 session read back from the session store.
+    """
+
+    def __init__(self, event, session_name, f1_api_support, circuit_info=None):
+        """
+        Initialize a stored session.
+
+        Args:
+            event: The fastf1.events.Event of the session
+            session_name: The session name (e.g., 'Qualifying')
+            f1_api_support: Whether the session has F1 live timing data
+            circuit_info: Optional stored CircuitInfo
+        """
+        super().__init__(event, session_name, f1_api_support=f1_api_support)
+        self._circuit_info = circuit_info
+
+    def load(self, *args, **kwargs):
+        """Stored sessions are loaded when read from the store."""
+
+    def get_circuit_info(self):
+        """
+        Get the stored circuit information, downloading it if it was not stored.
+
+        Returns:
+            CircuitInfo: The circuit's corners, marshal lights and sectors
+        """
+        if self._circuit_info is None:
+            self._circuit_info = super().get_circuit_info()
+        return self._circuit_info
+
+
+class SessionStore:
+    """
+    Stores loaded sessions as Parquet tables, one directory per session:
+
+        <store_dir>/<year>/<race>/<session type>/meta.json
+        <store_dir>/<year>/<race>/<session type>/laps.parquet
+        <store_dir>/<year>/<race>/<session type>/car_data.parquet
+        ...
+
+    Reading a stored session skips FastF1's download and parse steps and
+    reads only columnar files. Sessions are keyed by the identifiers they
+    were requested with, so 'monza' and '16' are stored separately.
+    Sessions written by another FastF1 release are reloaded rather than
+    read. Requires pyarrow and a FastF1 release with the internals checked
+    by fastf1_supported().
+    """
+
+    def __init__(self, store_dir=Config.SESSION_STORE_DIR):
+        """
+        Initialize the session store.
+
+        Args:
+            store_dir: Directory the sessions are stored in
+        """
+        self.store_dir = store_dir
+        self._available = None
+
+    @property
+    def available(self):
+        """bool: Whether Parquet support (pyarrow) is installed and FastF1 is supported."""
+        if self._available is None:
+            self._available = pyarrow is not None and fastf1_supported()
+        return self._available
+
+    def session_dir(self, year, race, session_type):
+        """
+        Get the directory a session is stored in.
+
+        Args:
+            year: The year of the session
+            race: The race name or round number
+            session_type: The session type
+
+        Returns:
+            str: The session's directory
+        """
+        year, race, session_type = session_key(year, race, session_type)
+        race = re.sub(r'[^a-z0-9]+', '_', race).strip('_') or 'unknown'
+        return os.path.join(self.store_dir, str(year), race, session_type)
+
+    def contains(self, year, race, session_type):
+        """
+        Check whether a session is stored.
+
+        Args:
+            year: The year of the session
+            race: The race name or round number
+            session_type: The session type
+
+        Returns:
+            bool: True if the session can be read from the store
+        """
+        return os.path.exists(os.path.join(self.session_dir(year, race, session_type), 'meta.json'))
+
+    def save(self, session, year, race, session_type):
+        """
+        Write a loaded session to the store.
+
+        The session is written to a temporary directory first, so readers
+        never see a partially written session.
+
+        Args:
+            session: The loaded FastF1 session
+            year: The year it was requested for
+            race: The race name or round number it was requested for
+            session_type: The session type it was requested for
+
+        Returns:
+            str: The session's directory
+
+        Raises:
+            RuntimeError: If pyarrow is not installed or FastF1 is not supported
+        """
+        if not self.available:
+            raise RuntimeError("The session store needs pyarrow and a supported FastF1 release")
+
+        final_dir = self.session_dir(year, race, session_type)
+        os.makedirs(os.path.dirname(final_dir), exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(final_dir), suffix='.tmp')
+        try:
+            flags = {}
+            for name in TABLES:
+                try:
+                    table = getattr(session, name)
+                except Exception:
+                    # Not loaded for this session
+                    continue
+                if table is None or not len(table.columns):
+                    continue
+                frame, flags[name] = _to_columnar(table)
+                frame.to_parquet(os.path.join(tmp_dir, f"{name}.parquet"), index=False)
+
+            for name in TELEMETRY:
+                try:
+                    frames = getattr(session, name)
+                except Exception:
+                    continue
+                if not frames:
+                    continue
+                frame = pd.concat([pd.DataFrame(telemetry).assign(DriverNumber=number)
+                                   for number, telemetry in frames.items()], ignore_index=True)
+                frame, flags[name] = _to_columnar(frame)
+                frame.to_parquet(os.path.join(tmp_dir, f"{name}.parquet"), index=False)
+
+            rotation = self._save_circuit_info(session, tmp_dir)
+
+            meta = {
+                'version': STORE_VERSION,
+                'fastf1_version': list(_fastf1_version() or ()),
+                'year': int(session.event.year),
+                'session_name': session.name,
+                'f1_api_support': bool(session.f1_api_support),
+                'event': {key: _encode_value(value) for key, value in session.event.items()},
+                't0_date': _encode_value(getattr(session, '_t0_date', None)),
+                'session_start_time': self._seconds(getattr(session, '_session_start_time', None)),
+                'total_laps': getattr(session, '_total_laps', None),
+                'split_times': [self._seconds(split) for split in getattr(session, '_session_split_times', None) or []],
+                'circuit_rotation': rotation,
+                'flags': flags
+            }
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+
+            if os.path.exists(final_dir):
+                shutil.rmtree(final_dir)
+            os.replace(tmp_dir, final_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        logger.info(f"Stored session {year} {race} {session_type} in {final_dir}")
+        return final_dir
+
+    @staticmethod
+    def _seconds(delta):
+        """Convert an optional Timedelta to seconds for JSON."""
+        if delta is None or pd.isna(delta):
+            return None
+        return delta.total_seconds()
+
+    @staticmethod
+    def _save_circuit_info(session, directory):
+        """
+        Write the session's circuit information, if it can be fetched.
+
+        Returns:
+            float: The circuit rotation, or None if there is no circuit information
+        """
+        try:
+            circuit_info = session.get_circuit_info()
+        except Exception as e:
+            logger.warning(f"Storing session without circuit information: {e}")
+            return None
+        if circuit_info is None:
+            return None
+        for name in CIRCUIT_TABLES:
+            pd.DataFrame(getattr(circuit_info, name)).to_parquet(
+                os.path.join(directory, f"circuit_{name}.parquet"), index=False)
+        return float(circuit_info.rotation)
+
+    def load(self, year, race, session_type):
+        """
+        Read a session from the store.
+
+        Args:
+            year: The year of the session
+            race: The race name or round number
+            session_type: The session type
+
+        Returns:
+            StoredSession: The session, or None if it is not stored (or unreadable)
+        """
+        if not self.available:
+            return None
+
+        directory = self.session_dir(year, race, session_type)
+        try:
+            with open(os.path.join(directory, 'meta.json'), 'r') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+
+        if meta.get('version') != STORE_VERSION:
+            logger.info(f"Ignoring stored session {directory} written by an older version")
+            return None
+        if tuple(meta.get('fastf1_version', ())) != _fastf1_version():
+            logger.info(f"Ignoring stored session {directory} written with another FastF1 release")
+            return None
+
+        try:
+            return self._read(directory, meta)
+        except Exception as e:
+            logger.error(f"Error reading stored session {directory}: {e}")
+            return None
+
+    def _read_table(self, directory, name, flags):
+        """Read one table, or None if it was not stored."""
+        path = os.path.join(directory, f"{name}.parquet")
+        if not os.path.exists(path):
+            return None
+        return _from_columnar(pd.read_parquet(path), flags.get(name, []))
+
+    def _read(self, directory, meta):
+        """Rebuild a session from its stored files."""
+        event = fastf1.events.Event({key: _decode_value(value) for key, value in meta['event'].items()},
+                                    year=meta['year'])
+        circuit_info = None
+        if meta.get('circuit_rotation') is not None:
+            tables = {name: pd.read_parquet(os.path.join(directory, f"circuit_{name}.parquet"))
+                      for name in CIRCUIT_TABLES}
+            circuit_info = CircuitInfo(rotation=meta['circuit_rotation'], **tables)
+
+        session = StoredSession(event, meta['session_name'], meta['f1_api_support'], circuit_info=circuit_info)
+        session._t0_date = _decode_value(meta['t0_date'])
+        if meta['session_start_time'] is not None:
+            session._session_start_time = pd.Timedelta(seconds=meta['session_start_time'])
+        else:
+            session._session_start_time = None
+        session._total_laps = meta['total_laps']
+        if meta['split_times']:
+            session._session_split_times = [pd.Timedelta(seconds=seconds) for seconds in meta['split_times']]
+
+        flags = meta.get('flags', {})
+        for name in ('session_status', 'track_status', 'weather_data', 'race_control_messages'):
+            table = self._read_table(directory, name, flags)
+            setattr(session, f"_{name}", table if table is not None else pd.DataFrame())
+
+        results = self._read_table(directory, 'results', flags)
+        results.index = results['DriverNumber']
+        session._results = fastf1.core.SessionResults(results, _force_default_cols=True)
+
+        laps = self._read_table(directory, 'laps', flags)
+        session._laps = fastf1.core.Laps(laps, session=session, _force_default_cols=True)
+
+        for name in TELEMETRY:
+            frame = self._read_table(directory, name, flags)
+            telemetry = {}
+            if frame is not None:
+                for number, rows in frame.groupby('DriverNumber', sort=False):
+                    telemetry[number] = fastf1.core.Telemetry(
+                        rows.drop(columns='DriverNumber').reset_index(drop=True),
+                        session=session, driver=number)
+            setattr(session, f"_{name}", telemetry)
+
+        # The index and a column are both named DriverNumber, as in FastF1, so sort by the values
+        drivers = results.iloc[results['DriverNumber'].astype(int).argsort()]
+        register_plotting_teams(session, [
+            (row['Abbreviation'], row['FullName'], row['TeamName'],
+             row['TeamColor'] if isinstance(row['TeamColor'], str) and row['TeamColor'] else None)
+            for _, row in drivers.iterrows()
+        ])
+        return session
+
+
+# Shared instance used by the session repository and the workers
+session_store = SessionStore()
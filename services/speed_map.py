@@ -0,0 +1,276 @@
+"""
+Session-wide speed maps: telemetry of every valid lap binned onto a grid
+over the track.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+from config import Config
+from services.session_repository import session_repository
+from utils.memory_profiler import memory_profiler
+from utils.tracing import span
+
+logger = logging.getLogger('f1bot')
+
+# Values a speed map can show, and their colorbar labels
+METRICS = {
+    'speed': "Average speed (km/h)",
+    'braking': "Braking frequency (share of samples)",
+    'variance': "Speed variance (km/h²)"
+}
+
+# Cells with fewer samples than this are left blank
+MIN_SAMPLES = 3
+
+
+class SpeedGrid:
+    """
+    Class to store telemetry samples binned onto a grid over the track.
+
+    Keeps per-cell sample counts and sums, so chunks of samples can be added
+    one at a time and the averages computed at the end. Arrays are indexed
+    [row, column] with rows along Y and columns along X.
+    """
+    def __init__(self, x_edges, y_edges):
+        """
+        Initialize an empty grid.
+
+        Args:
+            x_edges: Cell edges along X
+            y_edges: Cell edges along Y
+        """
+        self.x_edges = x_edges
+        self.y_edges = y_edges
+        shape = (len(y_edges) - 1, len(x_edges) - 1)
+        self.count = np.zeros(shape)
+        self.speed_sum = np.zeros(shape)
+        self.speed_squares = np.zeros(shape)
+        self.braking = np.zeros(shape)
+        self.laps = 0
+
+    @classmethod
+    def for_bounds(cls, x_min, x_max, y_min, y_max, bins):
+        """
+        Create a grid of square cells covering an area.
+
+        Args:
+            x_min: Lowest X
+            x_max: Highest X
+            y_min: Lowest Y
+            y_max: Highest Y
+            bins: Number of cells along the longer side
+
+        Returns:
+            SpeedGrid: The empty grid
+        """
+        cell = max(x_max - x_min, y_max - y_min, 1) / bins
+        x_edges = x_min + cell * np.arange(int(np.ceil((x_max - x_min) / cell)) + 2)
+        y_edges = y_min + cell * np.arange(int(np.ceil((y_max - y_min) / cell)) + 2)
+        return cls(x_edges, y_edges)
+
+    def add(self, x, y, speed, brake):
+        """
+        Bin a chunk of samples into the grid.
+
+        Args:
+            x: X positions
+            y: Y positions
+            speed: Speeds in km/h
+            brake: Brake application per sample (0 to 1)
+        """
+        valid = np.isfinite(x) & np.isfinite(y) & np.isfinite(speed)
+        x, y, speed, brake = x[valid], y[valid], speed[valid], brake[valid]
+
+        rows, columns = self.count.shape
+        cell = self.x_edges[1] - self.x_edges[0]
+        column = np.clip(((x - self.x_edges[0]) / cell).astype(int), 0, columns - 1)
+        row = np.clip(((y - self.y_edges[0]) / cell).astype(int), 0, rows - 1)
+
+        # One bincount per value over the flattened cell index
+        cells = row * columns + column
+        size = rows * columns
+        self.count += np.bincount(cells, minlength=size).reshape(rows, columns)
+        self.speed_sum += np.bincount(cells, weights=speed, minlength=size).reshape(rows, columns)
+        self.speed_squares += np.bincount(cells, weights=speed * speed, minlength=size).reshape(rows, columns)
+        self.braking += np.bincount(cells, weights=brake, minlength=size).reshape(rows, columns)
+
+    def values(self, metric='speed'):
+        """
+        Get a metric for every cell.
+
+        Args:
+            metric: One of METRICS
+
+        Returns:
+            numpy.ndarray: The metric per cell, NaN where there are too few samples
+
+        Raises:
+            ValueError: If the metric is unknown
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown speed map metric '{metric}'")
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self.speed_sum / self.count
+            if metric == 'speed':
+                values = mean
+            elif metric == 'braking':
+                values = self.braking / self.count
+            else:
+                values = np.maximum(self.speed_squares / self.count - mean * mean, 0)
+        return np.where(self.count >= MIN_SAMPLES, values, np.nan)
+
+    def extent(self):
+        """
+        Get the area the grid covers, for imshow.
+
+        Returns:
+            tuple: (left, right, bottom, top)
+        """
+        return (self.x_edges[0], self.x_edges[-1], self.y_edges[0], self.y_edges[-1])
+
+    def memory_usage(self):
+        """
+        Get the memory held by the grid.
+
+        Returns:
+            int: Bytes in the grid arrays
+        """
+        return sum(array.nbytes for array in (self.count, self.speed_sum, self.speed_squares, self.braking))
+
+
+class SpeedMapEngine:
+    """
+    Builds and caches the speed map of a session.
+
+    Every driver's car data is read lap chunk by lap chunk, positioned on
+    the track from their position data and added to the grid, so only one
+    chunk of samples is materialized at a time whatever the session length.
+    """
+
+    def __init__(self, repository=None, bins=Config.SPEED_MAP_BINS, chunk_laps=Config.SPEED_MAP_CHUNK_LAPS,
+                 max_sessions=Config.SPEED_MAP_CACHE_SIZE):
+        """
+        Initialize the speed map engine.
+
+        Args:
+            repository: Optional SessionRepository to read telemetry through (default: the shared repository)
+            bins: Number of cells along the longer side of the track
+            chunk_laps: Number of a driver's laps binned at once
+            max_sessions: Maximum number of session grids cached
+        """
+        self.repository = repository or session_repository
+        self.bins = bins
+        self.chunk_laps = chunk_laps
+        self.max_sessions = max_sessions
+        self._grids = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session):
+        """
+        Get the speed map of a session.
+
+        Args:
+            session: The FastF1 session
+
+        Returns:
+            SpeedGrid: The binned telemetry of every valid lap
+
+        Raises:
+            ValueError: If the session has no valid laps with telemetry
+        """
+        key = self.repository.session_id(session)
+        with self._lock:
+            grid = self._grids.get(key)
+            if grid is not None:
+                self._grids.move_to_end(key)
+                return grid
+
+        with span('speedmap.build', session=' '.join(str(part) for part in key)) as trace:
+            grid = self._build(session)
+            trace['laps'] = grid.laps
+            trace['samples'] = int(grid.count.sum())
+        with self._lock:
+            self._grids[key] = grid
+            while len(self._grids) > self.max_sessions:
+                self._grids.popitem(last=False)
+        return grid
+
+    def _valid_laps(self, session):
+        """Get the timed laps, without in and out laps or deleted laps."""
+        laps = self.repository.laps(session)
+        valid = (laps['LapTime'].notna() & laps['LapStartTime'].notna() & laps['PitInTime'].isna()
+                 & laps['PitOutTime'].isna() & ~laps['Deleted'].eq(True))
+        return laps[valid]
+
+    def _build(self, session):
+        """Bin the telemetry of a session's valid laps."""
+        laps = self._valid_laps(session)
+        telemetry = {}
+        for number in laps['DriverNumber'].unique():
+            car = self.repository.driver_telemetry(session, number, 'car')
+            pos = self.repository.driver_telemetry(session, number, 'pos')
+            if car is not None and pos is not None and len(car) and len(pos):
+                telemetry[number] = (car, pos)
+        if not telemetry:
+            raise ValueError("No telemetry available for this session")
+
+        # The grid must cover the whole track before the first chunk is added
+        grid = SpeedGrid.for_bounds(
+            min(np.nanmin(pos['X'].to_numpy()) for _, pos in telemetry.values()),
+            max(np.nanmax(pos['X'].to_numpy()) for _, pos in telemetry.values()),
+            min(np.nanmin(pos['Y'].to_numpy()) for _, pos in telemetry.values()),
+            max(np.nanmax(pos['Y'].to_numpy()) for _, pos in telemetry.values()),
+            self.bins
+        )
+
+        for number, (car, pos) in telemetry.items():
+            driver_laps = laps[laps['DriverNumber'] == number]
+            car_time = car['SessionTime'].to_numpy().astype('int64')
+            pos_time = pos['SessionTime'].to_numpy().astype('int64')
+            pos_x = pos['X'].to_numpy(dtype=float)
+            pos_y = pos['Y'].to_numpy(dtype=float)
+            speed = car['Speed'].to_numpy(dtype=float)
+            brake = car['Brake'].to_numpy(dtype=float)
+
+            starts = np.searchsorted(car_time, driver_laps['LapStartTime'].to_numpy().astype('int64'), side='left')
+            ends = np.searchsorted(car_time, driver_laps['Time'].to_numpy().astype('int64'), side='right')
+            for first in range(0, len(starts), self.chunk_laps):
+                lengths = ends[first:first + self.chunk_laps] - starts[first:first + self.chunk_laps]
+                lengths = np.maximum(lengths, 0)
+                if not lengths.sum():
+                    continue
+                # Sample indices of every lap in the chunk, without a Python loop
+                offsets = np.cumsum(lengths) - lengths
+                index = (np.repeat(starts[first:first + self.chunk_laps] - offsets, lengths)
+                         + np.arange(lengths.sum()))
+
+                # Position data is sampled apart from car data, so interpolate it to the car samples
+                times = car_time[index]
+                grid.add(np.interp(times, pos_time, pos_x), np.interp(times, pos_time, pos_y),
+                         speed[index], brake[index])
+            grid.laps += len(driver_laps)
+        return grid
+
+    def memory_usage(self):
+        """
+        Get the memory held by cached speed maps.
+
+        Returns:
+            dict: Bytes in cached grids
+        """
+        with self._lock:
+            grids = list(self._grids.values())
+        return {'speed_maps': sum(grid.memory_usage() for grid in grids)}
+
+    def clear(self):
+        """Drop the cached speed maps."""
+        with self._lock:
+            self._grids.clear()
+
+
+# Shared instance used by the speed map jobs
+speed_map_engine = SpeedMapEngine()
+memory_profiler.register_collector('speed_maps', speed_map_engine.memory_usage)
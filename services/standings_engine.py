@@ -0,0 +1,267 @@
+"""
+Local standings engine that folds FastF1 session results into championship tables.
+"""
+
+import logging
+import math
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+import pandas as pd
+import fastf1
+from config import Config
+from services.standings_service import DriverTeamDetails, StandingsService
+
+logger = logging.getLogger('f1bot')
+
+# Sessions that award championship points
+POINTS_SESSIONS = ('Sprint', 'Race')
+
+
+class _Tally:
+    """
+    Running championship total for a driver or team.
+    """
+    def __init__(self, name, team):
+        """
+        Initialize a tally.
+
+        Args:
+            name: Driver or team name
+            team: Team name (same as name for constructors)
+        """
+        self.name = name
+        self.team = team
+        self.points = 0.0
+        self.finishes = Counter()  # Grand Prix finishing position -> count
+
+    def countback(self, depth):
+        """
+        Get the tie-break key: most wins, then most second places, and so on.
+
+        Args:
+            depth: Number of positions to compare
+
+        Returns:
+            tuple: Negated finishing counts for ascending sorts
+        """
+        return tuple(-self.finishes[position] for position in range(1, depth + 1))
+
+
+class StandingsEngine:
+    """
+    Builds driver and constructor standings for one season by folding race
+    and sprint results round by round.
+
+    Results are applied incrementally: rounds that were already folded are
+    skipped, so refreshing after a new Grand Prix only loads that weekend.
+    Sessions that fail to load or have no classified points (results not
+    published yet, or a partial load) are not marked applied and are retried
+    with an exponential backoff.
+    Ties are broken by countback over Grand Prix finishing positions
+    (sprints count for points only), then alphabetically.
+    """
+
+    def __init__(self, year):
+        """
+        Initialize the standings engine.
+
+        Args:
+            year: The season to build standings for
+        """
+        self.year = int(year)
+        self.applied = set()
+        self._failures = {}  # (round, session) -> (failure count, time of the next retry)
+        self._drivers = {}
+        self._teams = {}
+        self._lock = threading.Lock()
+
+    def apply_results(self, round_number, session_name, results):
+        """
+        Fold the classified results of one points-scoring session.
+
+        Args:
+            round_number: The round the session belongs to
+            session_name: 'Race' or 'Sprint'
+            results: DataFrame with Abbreviation, FullName, TeamName, Points and Position columns
+
+        Returns:
+            bool: False if the session had already been applied or has no classified points
+        """
+        key = (int(round_number), session_name)
+        if results is None or 'Points' not in results or results['Points'].isna().all():
+            logger.warning(f"No classified points for {self.year} round {round_number} {session_name} yet")
+            return False
+
+        with self._lock:
+            if key in self.applied:
+                return False
+
+            for row in results.itertuples(index=False):
+                points = 0.0 if pd.isna(row.Points) else float(row.Points)
+                team = StandingsService.normalize_team_name(str(row.TeamName))
+
+                driver = self._drivers.get(row.Abbreviation)
+                if driver is None:
+                    driver = self._drivers[row.Abbreviation] = _Tally(row.FullName, team)
+                driver.team = team  # Drivers are listed with their latest team
+                driver.points += points
+
+                constructor = self._teams.get(team)
+                if constructor is None:
+                    constructor = self._teams[team] = _Tally(team, team)
+                constructor.points += points
+
+                if session_name == 'Race' and not pd.isna(row.Position):
+                    position = int(row.Position)
+                    driver.finishes[position] += 1
+                    constructor.finishes[position] += 1
+
+            self.applied.add(key)
+            return True
+
+    def _ordered(self, tallies):
+        """
+        Order tallies by points, countback, then name.
+
+        Args:
+            tallies: Iterable of _Tally objects
+
+        Returns:
+            list: List of DriverTeamDetails objects in championship order
+        """
+        tallies = list(tallies)
+        depth = max((max(t.finishes, default=0) for t in tallies), default=0)
+        tallies.sort(key=lambda t: (-t.points, t.countback(depth), t.name))
+        return [DriverTeamDetails(t.name, t.team, _format_points(t.points)) for t in tallies]
+
+    def driver_standings(self):
+        """
+        Get the current driver standings.
+
+        Returns:
+            list: List of DriverTeamDetails objects for drivers
+        """
+        with self._lock:
+            return self._ordered(self._drivers.values())
+
+    def constructor_standings(self):
+        """
+        Get the current constructor standings.
+
+        Returns:
+            list: List of DriverTeamDetails objects for constructors
+        """
+        with self._lock:
+            return self._ordered(self._teams.values())
+
+    def pending_sessions(self, now=None):
+        """
+        Get the points-scoring sessions whose results should be published
+        but have not been applied yet.
+
+        Only reads the event schedule, so it is cheap compared to update().
+
+        Args:
+            now: Reference time (default: current UTC time)
+
+        Returns:
+            list: (round number, session name) tuples
+        """
+        now = now or datetime.utcnow()
+        schedule = fastf1.get_event_schedule(self.year, include_testing=False)
+        pending = []
+        for _, event in schedule.iterrows():
+            round_number = int(event['RoundNumber'])
+            for session_name, start in _points_sessions(event):
+                if (round_number, session_name) in self.applied:
+                    continue
+                if start is None or _session_published_at(session_name, start) > now:
+                    continue
+                pending.append((round_number, session_name))
+        return pending
+
+    def is_due(self, key, now=None):
+        """
+        Check whether a pending session may be loaded again.
+
+        Args:
+            key: (round number, session name) tuple
+            now: Reference time (default: current UTC time)
+
+        Returns:
+            bool: False while a failed session is backing off
+        """
+        failure = self._failures.get(key)
+        return failure is None or failure[1] <= (now or datetime.utcnow())
+
+    def _record_failure(self, key, now):
+        """Schedule the next retry of a session that failed to fold."""
+        count = self._failures.get(key, (0, None))[0] + 1
+        delay = min(Config.STANDINGS_RETRY_BACKOFF * 2 ** (count - 1), Config.STANDINGS_RETRY_MAX)
+        self._failures[key] = (count, now + timedelta(seconds=delay))
+        logger.info(f"Retrying {self.year} round {key[0]} {key[1]} in {delay} seconds")
+
+    def update(self, now=None):
+        """
+        Load and fold every pending session that is due. Sessions come from
+        the FastF1 cache where available; sessions that fail to load or have
+        no classified points stay pending and back off.
+
+        Args:
+            now: Reference time (default: current UTC time)
+
+        Returns:
+            int: Number of sessions applied
+        """
+        now = now or datetime.utcnow()
+        applied = 0
+        for key in self.pending_sessions(now):
+            if not self.is_due(key, now):
+                continue
+            round_number, session_name = key
+            logger.info(f"Folding {self.year} round {round_number} {session_name} into standings")
+            try:
+                session = fastf1.get_session(self.year, round_number, session_name)
+                session.load(laps=False, telemetry=False, weather=False, messages=False)
+            except Exception as e:
+                logger.error(f"Error loading {self.year} round {round_number} {session_name} results: {e}")
+                self._record_failure(key, now)
+                continue
+            if self.apply_results(round_number, session_name, session.results):
+                self._failures.pop(key, None)
+                applied += 1
+            elif key not in self.applied:
+                self._record_failure(key, now)
+
+        return applied
+
+
+def _points_sessions(event):
+    """
+    Get the points-scoring sessions of an event.
+
+    Args:
+        event: A row of the FastF1 event schedule
+
+    Returns:
+        list: (session name, UTC start time or None) tuples
+    """
+    sessions = []
+    for number in range(1, 6):
+        name = event.get(f'Session{number}')
+        if name in POINTS_SESSIONS:
+            start = event.get(f'Session{number}DateUtc')
+            sessions.append((name, None if pd.isna(start) else pd.Timestamp(start).to_pydatetime()))
+    return sessions
+
+
+def _session_published_at(session_name, start):
+    """Estimate when results of a session are available."""
+    duration = Config.SESSION_DURATIONS.get(session_name, Config.DEFAULT_SESSION_DURATION)
+    return start + timedelta(seconds=duration + Config.STANDINGS_PUBLISH_DELAY)
+
+
+def _format_points(points):
+    """Show whole points as int, keeping half points (e.g. shortened races)."""
+    return int(points) if math.isclose(points, round(points)) else points
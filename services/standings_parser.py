@@ -0,0 +1,255 @@
+"""
+Fast table-only parser for formula1.com standings pages.
+"""
+
+import logging
+from html.parser import HTMLParser
+from typing import NamedTuple, Optional
+
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is optional
+    etree = None
+
+logger = logging.getLogger('f1bot')
+
+# Elements whose text must never end up in a cell
+SKIPPED_TAGS = {'script', 'style'}
+
+
+class DriverRow(NamedTuple):
+    """
+    A row of the drivers' standings table.
+    """
+    position: Optional[int]
+    name: str
+    code: Optional[str]
+    nationality: str
+    team: str
+    points: float
+
+
+class ConstructorRow(NamedTuple):
+    """
+    A row of the constructors' standings table.
+    """
+    position: Optional[int]
+    team: str
+    points: float
+
+
+class _TableComplete(Exception):
+    """Raised by the fallback tokenizer to stop once the first table is read."""
+
+
+class _TableCollector:
+    """
+    Event target that keeps only the cells of the first <table> in a document.
+
+    Each body row is collected as a list of cells, and each cell as a list of
+    its non-empty text chunks (one chunk per text node), so that e.g. the
+    name and abbreviation spans of a driver cell stay separate.
+    """
+
+    def __init__(self):
+        """Initialize the collector."""
+        self.rows = []
+        self.done = False
+        self._depth = 0
+        self._skip = 0
+        self._row = None
+        self._cell = None
+        self._is_header = False
+
+    def start(self, tag, attrs=None):
+        """Handle an opening tag."""
+        if self.done:
+            return
+        tag = tag.lower()
+        if tag in SKIPPED_TAGS:
+            self._skip += 1
+        elif tag == 'table':
+            self._depth += 1
+        elif self._depth == 1:
+            if tag == 'tr':
+                self._row = []
+                self._is_header = False
+            elif tag in ('td', 'th') and self._row is not None:
+                self._cell = []
+                self._is_header = self._is_header or tag == 'th'
+
+    def end(self, tag):
+        """Handle a closing tag."""
+        if self.done:
+            return
+        tag = tag.lower()
+        if tag in SKIPPED_TAGS:
+            self._skip = max(self._skip - 1, 0)
+        elif tag == 'table' and self._depth:
+            self._depth -= 1
+            if not self._depth:
+                self.done = True
+        elif self._depth == 1:
+            if tag in ('td', 'th') and self._cell is not None:
+                self._row.append(self._cell)
+                self._cell = None
+            elif tag == 'tr' and self._row is not None:
+                if self._row and not self._is_header:
+                    self.rows.append(self._row)
+                self._row = None
+
+    def data(self, text):
+        """Handle a text node."""
+        if self._cell is not None and not self._skip:
+            text = text.strip()
+            if text:
+                self._cell.append(text)
+
+    def close(self):
+        """
+        Finish parsing.
+
+        Returns:
+            list: The collected body rows
+        """
+        return self.rows
+
+
+class _FallbackTokenizer(HTMLParser):
+    """
+    Streaming stdlib tokenizer used when lxml is not installed.
+    """
+
+    def __init__(self, collector):
+        """
+        Initialize the tokenizer.
+
+        Args:
+            collector: The _TableCollector receiving events
+        """
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+        if self.collector.done:
+            raise _TableComplete()
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+
+def extract_table_rows(html):
+    """
+    Extract the body rows of the first table in an HTML document.
+
+    Args:
+        html: The page body as bytes or str
+
+    Returns:
+        list: Rows, each a list of cells, each a list of text chunks
+    """
+    collector = _TableCollector()
+
+    if etree is not None:
+        if isinstance(html, str):
+            html = html.encode('utf-8')
+        parser = etree.HTMLParser(target=collector, encoding='utf-8')
+        parser.feed(html)
+        return parser.close()
+
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', errors='replace')
+    tokenizer = _FallbackTokenizer(collector)
+    try:
+        tokenizer.feed(html)
+        tokenizer.close()
+    except _TableComplete:
+        pass
+    return collector.close()
+
+
+def _cell_text(cell):
+    """Join the text chunks of a cell."""
+    return ' '.join(cell)
+
+
+def _parse_position(cell):
+    """Parse a position cell, returning None for non-numeric entries."""
+    text = _cell_text(cell)
+    return int(text) if text.isdigit() else None
+
+
+def _parse_points(cell):
+    """Parse a points cell."""
+    text = _cell_text(cell)
+    return float(text) if text else 0.0
+
+
+def _split_driver(cell):
+    """
+    Split a driver cell into full name and three-letter code.
+
+    Args:
+        cell: The text chunks of the driver cell
+
+    Returns:
+        tuple: (name, code) - code is None when the cell has no abbreviation
+    """
+    words = _cell_text(cell).split()
+    if len(words) > 1 and len(words[-1]) == 3 and words[-1].isalpha() and words[-1].isupper():
+        return ' '.join(words[:-1]), words[-1]
+    return ' '.join(words), None
+
+
+def parse_driver_table(html):
+    """
+    Parse the drivers' standings table of a results page.
+
+    Args:
+        html: The page body as bytes or str
+
+    Returns:
+        list: List of DriverRow objects
+    """
+    standings = []
+    for cells in extract_table_rows(html):
+        if len(cells) < 5:
+            logger.debug(f"Skipping malformed driver standings row: {cells}")
+            continue
+        name, code = _split_driver(cells[1])
+        standings.append(DriverRow(
+            position=_parse_position(cells[0]),
+            name=name,
+            code=code,
+            nationality=_cell_text(cells[2]),
+            team=_cell_text(cells[3]),
+            points=_parse_points(cells[4])
+        ))
+    return standings
+
+
+def parse_constructor_table(html):
+    """
+    Parse the constructors' standings table of a results page.
+
+    Args:
+        html: The page body as bytes or str
+
+    Returns:
+        list: List of ConstructorRow objects
+    """
+    standings = []
+    for cells in extract_table_rows(html):
+        if len(cells) < 3:
+            logger.debug(f"Skipping malformed constructor standings row: {cells}")
+            continue
+        standings.append(ConstructorRow(
+            position=_parse_position(cells[0]),
+            team=_cell_text(cells[1]),
+            points=_parse_points(cells[2])
+        ))
+    return standings
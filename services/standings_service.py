@@ -2,12 +2,21 @@
 Service for handling F1 standings data.
 """
 
+import asyncio
 import logging
-import requests
-from bs4 import BeautifulSoup
+from datetime import datetime, timedelta
+from config import Config
+from services.http_client import HttpClient
+from services.schedule_service import ScheduleService
+from services.standings_parser import parse_driver_table, parse_constructor_table
+from services.standings_store import StandingsStore, StoredStandings
+from utils.tracing import run_in_executor
 
 logger = logging.getLogger('f1bot')
 
+# First season with a World Championship
+FIRST_SEASON = 1950
+
 class DriverTeamDetails:
     """
     Class to store driver or team details.
@@ -31,9 +40,215 @@ class StandingsService:
     Service for fetching and processing F1 standings data.
     """
     
-    def __init__(self):
-        """Initialize the standings service."""
-        pass
+    def __init__(self, http_client=None, base_url=Config.F1_RESULTS_URL,
+                 store=None, schedule_service=None):
+        """
+        Initialize the standings service.
+        
+        Args:
+            http_client: Optional HttpClient to use (default: a new pooled client)
+            base_url: Base URL of the results pages (overridable for local stub servers)
+            store: Optional StandingsStore (default: a store in Config.STANDINGS_STORE_DIR)
+            schedule_service: Optional ScheduleService used to decide when to refresh
+        """
+        self.http_client = http_client or HttpClient()
+        self.base_url = base_url.rstrip('/')
+        self.store = store or StandingsStore()
+        self.schedule_service = schedule_service or ScheduleService()
+        self._engines = {}
+        self._backfills = {}
+    
+    async def close(self):
+        """Close the underlying HTTP client."""
+        await self.http_client.close()
+    
+    async def _fetch_and_parse(self, url, parser):
+        """
+        Fetch a results page and parse it off the event loop.
+        
+        Args:
+            url: The results page URL
+            parser: Callable that turns the page body into standings
+            
+        Returns:
+            list: The parsed standings
+        """
+        html = await self.http_client.get(url)
+        return await run_in_executor(parser, html)
+    
+    @staticmethod
+    def current_season():
+        """
+        Get the current championship season.
+        
+        Returns:
+            int: The current year (UTC)
+        """
+        return datetime.utcnow().year
+    
+    def parse_year(self, year=None):
+        """
+        Validate a season given by a user.
+        
+        Args:
+            year: The season as given, or None for the current season
+            
+        Returns:
+            int: The season
+            
+        Raises:
+            ValueError: If the year is not a championship season
+        """
+        current = self.current_season()
+        if year is None or year == '':
+            return current
+        try:
+            season = int(str(year).strip())
+        except ValueError:
+            season = None
+        if season is None or not FIRST_SEASON <= season <= current:
+            raise ValueError(f"Invalid year '{year}'. Use a season from {FIRST_SEASON} to {current}.")
+        return season
+    
+    def _is_up_to_date(self, stored, now=None):
+        """
+        Check whether stored standings can be served without refetching.
+        
+        Finished seasons never change. Current-season snapshots are only
+        stale once a points-scoring session has ended (plus a publishing
+        delay) after they were fetched.
+        
+        Args:
+            stored: The StoredStandings to check
+            now: Reference time (default: current UTC time)
+            
+        Returns:
+            bool: True if the stored standings are current
+        """
+        if stored.final:
+            return True
+        if stored.year < self.current_season():
+            # Snapshot of a season that has since finished: fetch the final table once
+            return False
+        
+        now = now or datetime.utcnow()
+        last_session = self.schedule_service.get_last_ended_event(Config.STANDINGS_SESSIONS, now)
+        if last_session is None:
+            return True
+        
+        published_at = (self.schedule_service.get_event_end(last_session)
+                        + timedelta(seconds=Config.STANDINGS_PUBLISH_DELAY))
+        return published_at > now or stored.fetched_at >= published_at
+    
+    async def _get_standings(self, year, kind, url, parser):
+        """
+        Get standings from the store, fetching and storing them when needed.
+        
+        Args:
+            year: The season
+            kind: 'drivers' or 'constructors'
+            url: The results page URL
+            parser: Callable that turns the page body into standings
+            
+        Returns:
+            list: List of DriverTeamDetails objects
+        """
+        stored = self.store.get(year, kind)
+        if stored is not None and self._is_up_to_date(stored):
+            logger.info(f"Serving stored {kind} standings for {year}")
+            return stored.standings
+        
+        try:
+            standings = None
+            # Finished seasons are scraped once and stored, so they are never folded locally
+            if Config.STANDINGS_SOURCE == 'fastf1' and year == self.current_season():
+                standings = await self._compute_locally(year, kind)
+            if not standings:
+                logger.info(f"Fetching {kind} standings from {url}")
+                standings = await self._fetch_and_parse(url, parser)
+        except Exception:
+            if stored is not None:
+                logger.warning(f"Refresh of {kind} standings for {year} failed, serving stored copy")
+                return stored.standings
+            raise
+        
+        if standings:
+            now = datetime.utcnow()
+            final = year < self.current_season()
+            round_number = None if final else self.schedule_service.get_completed_rounds(year, now)
+            self.store.save(StoredStandings(year, kind, standings, now, round_number, final))
+        
+        return standings
+    
+    def _get_engine(self, year):
+        """
+        Get the local standings engine for a season.
+        
+        Args:
+            year: The season
+            
+        Returns:
+            StandingsEngine: The engine, shared across calls so updates are incremental
+        """
+        # Imported here because the engine depends on this module (and FastF1)
+        from services.standings_engine import StandingsEngine
+        
+        if year not in self._engines:
+            self._engines[year] = StandingsEngine(year)
+        return self._engines[year]
+    
+    async def _backfill(self, year, engine):
+        """
+        Fold a season's pending sessions into its standings engine.
+        
+        Args:
+            year: The season
+            engine: The season's StandingsEngine
+        """
+        try:
+            applied = await run_in_executor(engine.update)
+            logger.info(f"Folded {applied} sessions into the local {year} standings")
+        except Exception as e:
+            logger.error(f"Error folding {year} session results into standings: {e}")
+    
+    async def _compute_locally(self, year, kind):
+        """
+        Compute standings from FastF1 session results.
+        
+        Loading a season's sessions is slow, so the engine is never updated
+        while a command waits: if any published session is missing from the
+        fold, a background backfill is started (unless every missing session
+        is backing off after failing) and the caller scrapes instead. Partial
+        tables are therefore never served or stored.
+        
+        Args:
+            year: The season
+            kind: 'drivers' or 'constructors'
+            
+        Returns:
+            list: List of DriverTeamDetails objects, empty if the fold is not complete
+        """
+        engine = self._get_engine(year)
+        backfill = self._backfills.get(year)
+        if backfill is not None and not backfill.done():
+            return []
+        
+        try:
+            pending = await run_in_executor(engine.pending_sessions)
+        except Exception as e:
+            logger.error(f"Error checking {kind} standings for {year} against the schedule: {e}")
+            return []
+        
+        if pending:
+            if any(engine.is_due(key) for key in pending):
+                logger.info(f"{len(pending)} sessions missing from the local {year} standings, backfilling")
+                self._backfills[year] = asyncio.ensure_future(self._backfill(year, engine))
+            return []
+        
+        logger.info(f"Computed {kind} standings for {year} locally")
+        if kind == 'drivers':
+            return engine.driver_standings()
+        return engine.constructor_standings()
     
     @staticmethod
     def normalize_team_name(team_name):
@@ -69,7 +284,7 @@ class StandingsService:
         else:
             return team_name
     
-    def get_driver_standings(self, year=None):
+    async def get_driver_standings(self, year=None):
         """
         Get the current F1 driver standings.
         
@@ -78,50 +293,20 @@ class StandingsService:
             
         Returns:
             list: List of DriverTeamDetails objects for drivers
+            
+        Raises:
+            ValueError: If the year is not a championship season
         """
-        # Determine URL based on year
-        if year:
-            url = f"https://www.formula1.com/en/results.html/{year}/drivers.html"
-        else:
-            url = "https://www.formula1.com/en/results.html/2025/drivers.html"
-        
-        logger.info(f"Fetching driver standings from {url}")
+        year = self.parse_year(year)
+        url = f"{self.base_url}/{year}/drivers.html"
         
         try:
-            # Fetch and parse the drivers' standings page
-            response = requests.get(url)
-            response.raise_for_status()  # Raise exception for HTTP errors
-            soup = BeautifulSoup(response.content, "html.parser")
-            
-            # Find the standings table
-            table = soup.find("table")
-            if not table:
-                logger.error("Could not find standings table on the page")
-                return []
-                
-            rows = table.find_all("tr")[1:]  # Skip the header row
-            
-            driver_standings = []
-            
-            for row in rows:
-                columns = row.find_all("td")
-                driver_name = columns[1].get_text().strip()[:-3]
-                
-                team_name = columns[3].get_text().strip()
-                points = int(float(columns[4].get_text().strip()))
-                
-                # Normalize team name
-                team_name = self.normalize_team_name(team_name)
-                
-                driver_standings.append(DriverTeamDetails(driver_name, team_name, points))
-            
-            return driver_standings
-            
+            return await self._get_standings(year, 'drivers', url, self.parse_driver_standings)
         except Exception as e:
             logger.error(f"Error fetching driver standings: {e}")
             return []
     
-    def get_constructor_standings(self, year=None):
+    async def get_constructor_standings(self, year=None):
         """
         Get the current F1 constructor standings.
         
@@ -130,43 +315,55 @@ class StandingsService:
             
         Returns:
             list: List of DriverTeamDetails objects for constructors
+            
+        Raises:
+            ValueError: If the year is not a championship season
         """
-        # Determine URL based on year
-        if year:
-            url = f"https://www.formula1.com/en/results.html/{year}/team.html"
-        else:
-            url = "https://www.formula1.com/en/results.html/2025/team.html"
-        
-        logger.info(f"Fetching constructor standings from {url}")
+        year = self.parse_year(year)
+        url = f"{self.base_url}/{year}/team.html"
         
         try:
-            # Fetch and parse the constructor standings page
-            response = requests.get(url)
-            response.raise_for_status()  # Raise exception for HTTP errors
-            soup = BeautifulSoup(response.content, "html.parser")
-            
-            # Find the standings table
-            table = soup.find("table")
-            if not table:
-                logger.error("Could not find standings table on the page")
-                return []
-                
-            rows = table.find_all("tr")[1:]  # Skip the header row
-            
-            constructor_standings = []
-            
-            for row in rows:
-                columns = row.find_all("td")
-                team_name = columns[1].get_text().strip()
-                points = int(float(columns[2].get_text().strip()))
-                
-                # Normalize team name
-                team_name = self.normalize_team_name(team_name)
-                
-                constructor_standings.append(DriverTeamDetails(team_name, team_name, points))
-            
-            return constructor_standings
-            
+            return await self._get_standings(year, 'constructors', url, self.parse_constructor_standings)
         except Exception as e:
             logger.error(f"Error fetching constructor standings: {e}")
             return []
+    
+    def parse_driver_standings(self, html):
+        """
+        Parse a drivers' standings page.
+        
+        Args:
+            html: The page body
+            
+        Returns:
+            list: List of DriverTeamDetails objects for drivers
+        """
+        rows = parse_driver_table(html)
+        if not rows:
+            logger.error("Could not find standings table on the page")
+        
+        return [
+            DriverTeamDetails(row.name, self.normalize_team_name(row.team), int(row.points))
+            for row in rows
+        ]
+    
+    def parse_constructor_standings(self, html):
+        """
+        Parse a constructors' standings page.
+        
+        Args:
+            html: The page body
+            
+        Returns:
+            list: List of DriverTeamDetails objects for constructors
+        """
+        rows = parse_constructor_table(html)
+        if not rows:
+            logger.error("Could not find standings table on the page")
+        
+        standings = []
+        for row in rows:
+            team_name = self.normalize_team_name(row.team)
+            standings.append(DriverTeamDetails(team_name, team_name, int(row.points)))
+        
+        return standings
@@ -0,0 +1,208 @@
+"""
+Persistent store for F1 standings, keyed by season.
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+from datetime import datetime
+from config import Config
+
+logger = logging.getLogger('f1bot')
+
+SNAPSHOT_PATTERN = re.compile(r'^(?P<kind>\w+)_round_(?P<round>\d+)\.json$')
+
+
+class StoredStandings:
+    """
+    Class to store a standings table together with its provenance.
+    """
+    def __init__(self, year, kind, standings, fetched_at, round_number=None, final=False):
+        """
+        Initialize stored standings.
+
+        Args:
+            year: The season
+            kind: 'drivers' or 'constructors'
+            standings: List of DriverTeamDetails objects
+            fetched_at: UTC datetime the standings were fetched
+            round_number: Number of completed rounds covered (snapshots only)
+            final: Whether these are the final standings of a finished season
+        """
+        self.year = year
+        self.kind = kind
+        self.standings = standings
+        self.fetched_at = fetched_at
+        self.round_number = round_number
+        self.final = final
+
+    def to_dict(self):
+        """
+        Serialize to a JSON-compatible dictionary.
+
+        Returns:
+            dict: The serialized standings
+        """
+        return {
+            'year': self.year,
+            'kind': self.kind,
+            'round': self.round_number,
+            'final': self.final,
+            'fetched_at': self.fetched_at.isoformat(),
+            'standings': [
+                {'name': entry.name, 'team': entry.team, 'points': entry.points}
+                for entry in self.standings
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Deserialize from a dictionary produced by to_dict.
+
+        Args:
+            data: The serialized standings
+
+        Returns:
+            StoredStandings: The deserialized standings
+        """
+        # Imported here because the standings service depends on this module
+        from services.standings_service import DriverTeamDetails
+
+        return cls(
+            data['year'],
+            data['kind'],
+            [DriverTeamDetails(e['name'], e['team'], e['points']) for e in data['standings']],
+            datetime.fromisoformat(data['fetched_at']),
+            round_number=data.get('round'),
+            final=data.get('final', False)
+        )
+
+
+class StandingsStore:
+    """
+    On-disk store of final standings for finished seasons and round-by-round
+    snapshots of the current one, fronted by an in-memory cache.
+
+    Layout::
+
+        <store_dir>/<year>/drivers.json              final standings
+        <store_dir>/<year>/drivers_round_07.json     snapshot after round 7
+    """
+
+    def __init__(self, store_dir=Config.STANDINGS_STORE_DIR):
+        """
+        Initialize the standings store.
+
+        Args:
+            store_dir: Directory the standings are persisted in
+        """
+        self.store_dir = store_dir
+        self._memory = {}
+
+    def _year_dir(self, year):
+        """Get the directory for a season."""
+        return os.path.join(self.store_dir, str(year))
+
+    def get(self, year, kind):
+        """
+        Get the best stored standings for a season.
+
+        Final standings take precedence over snapshots; among snapshots the
+        latest round wins.
+
+        Args:
+            year: The season
+            kind: 'drivers' or 'constructors'
+
+        Returns:
+            StoredStandings: The stored standings, or None if nothing is stored
+        """
+        key = (int(year), kind)
+        if key in self._memory:
+            return self._memory[key]
+
+        stored = self._load_final(year, kind) or self._load_latest_snapshot(year, kind)
+        if stored is not None:
+            self._memory[key] = stored
+        return stored
+
+    def save(self, stored):
+        """
+        Persist standings, as final standings or as a round snapshot.
+
+        Args:
+            stored: The StoredStandings to save
+        """
+        if stored.final:
+            filename = f"{stored.kind}.json"
+        else:
+            filename = f"{stored.kind}_round_{stored.round_number or 0:02d}.json"
+
+        year_dir = self._year_dir(stored.year)
+        os.makedirs(year_dir, exist_ok=True)
+        self._write_atomic(os.path.join(year_dir, filename), stored.to_dict())
+        self._memory[(int(stored.year), stored.kind)] = stored
+        logger.info(f"Stored {stored.kind} standings for {stored.year} ({filename})")
+
+    def _write_atomic(self, path, data):
+        """
+        Write JSON so readers never observe a partially written file.
+
+        Args:
+            path: Destination path
+            data: JSON-compatible data
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _read(self, path):
+        """
+        Read stored standings from a file.
+
+        Args:
+            path: The file to read
+
+        Returns:
+            StoredStandings: The stored standings, or None if unreadable
+        """
+        try:
+            with open(path, 'r') as f:
+                return StoredStandings.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error reading stored standings {path}: {e}")
+            return None
+
+    def _load_final(self, year, kind):
+        """Load the final standings of a season, if stored."""
+        return self._read(os.path.join(self._year_dir(year), f"{kind}.json"))
+
+    def _load_latest_snapshot(self, year, kind):
+        """Load the snapshot with the highest round number, if any."""
+        try:
+            filenames = os.listdir(self._year_dir(year))
+        except FileNotFoundError:
+            return None
+
+        snapshots = []
+        for filename in filenames:
+            match = SNAPSHOT_PATTERN.match(filename)
+            if match and match.group('kind') == kind:
+                snapshots.append((int(match.group('round')), filename))
+
+        if not snapshots:
+            return None
+
+        _, filename = max(snapshots)
+        return self._read(os.path.join(self._year_dir(year), filename))
@@ -0,0 +1,365 @@
+"""
+Deterministic synthetic FastF1 sessions for offline load tests and benchmarks.
+"""
+
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+import fastf1.core
+import fastf1.events
+from fastf1.mvapi.data import CircuitInfo
+from services.session_store import register_plotting_teams
+
+logger = logging.getLogger('f1bot')
+
+# Abbreviation, number, full name, team, team colour
+GRID = [
+    ('VER', '1', 'Max Verstappen', 'Red Bull Racing', '3671C6'),
+    ('PER', '11', 'Sergio Perez', 'Red Bull Racing', '3671C6'),
+    ('LEC', '16', 'Charles Leclerc', 'Ferrari', 'E8002D'),
+    ('SAI', '55', 'Carlos Sainz', 'Ferrari', 'E8002D'),
+    ('NOR', '4', 'Lando Norris', 'McLaren', 'FF8000'),
+    ('PIA', '81', 'Oscar Piastri', 'McLaren', 'FF8000'),
+    ('HAM', '44', 'Lewis Hamilton', 'Mercedes', '27F4D2'),
+    ('RUS', '63', 'George Russell', 'Mercedes', '27F4D2'),
+    ('ALO', '14', 'Fernando Alonso', 'Aston Martin', '229971'),
+    ('STR', '18', 'Lance Stroll', 'Aston Martin', '229971'),
+    ('GAS', '10', 'Pierre Gasly', 'Alpine', 'FF87BC'),
+    ('OCO', '31', 'Esteban Ocon', 'Alpine', 'FF87BC'),
+    ('ALB', '23', 'Alexander Albon', 'Williams', '64C4FF'),
+    ('SAR', '2', 'Logan Sargeant', 'Williams', '64C4FF'),
+    ('TSU', '22', 'Yuki Tsunoda', 'RB', '6692FF'),
+    ('RIC', '3', 'Daniel Ricciardo', 'RB', '6692FF'),
+    ('BOT', '77', 'Valtteri Bottas', 'Kick Sauber', '52E252'),
+    ('ZHO', '24', 'Guanyu Zhou', 'Kick Sauber', '52E252'),
+    ('HUL', '27', 'Nico Hulkenberg', 'Haas F1 Team', 'B6BABD'),
+    ('MAG', '20', 'Kevin Magnussen', 'Haas F1 Team', 'B6BABD'),
+]
+
+SESSION_NAMES = {
+    'FP1': 'Practice 1', 'FP2': 'Practice 2', 'FP3': 'Practice 3',
+    'Q': 'Qualifying', 'SQ': 'Sprint Qualifying', 'S': 'Sprint', 'R': 'Race'
+}
+
+# Telemetry sample interval in seconds (the live feed is roughly 4 Hz)
+SAMPLE_INTERVAL = 0.25
+
+TRACK_POINTS = 2000
+CORNERS = 16
+
+# Car limits in m/s^2 used for the reference speed profile
+LATERAL_GRIP = 30
+ACCELERATION = 9
+BRAKING = 40
+
+
+def _seed(*parts):
+    """Get a stable random seed from the session identifiers."""
+    return int(hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:8], 16)
+
+
+class SyntheticTrack:
+    """
+    Class to store a generated closed circuit and its reference speed profile.
+    """
+    def __init__(self, rng):
+        """
+        Generate a track.
+
+        Args:
+            rng: numpy random Generator
+        """
+        t = np.linspace(0, 2 * np.pi, TRACK_POINTS, endpoint=False)
+        radius = 1 + sum(rng.uniform(0.03, 0.14) * np.sin(k * t + rng.uniform(0, 2 * np.pi))
+                         for k in range(2, 9))
+        self.x = 800 * radius * np.cos(t)
+        self.y = 500 * radius * np.sin(t)
+
+        step = np.hypot(np.diff(self.x, append=self.x[0]), np.diff(self.y, append=self.y[0]))
+        self.distance = np.concatenate([[0], np.cumsum(step)[:-1]])
+        self.length = step.sum()
+
+        # Cornering speed from the curvature, then limited by how hard the
+        # car can accelerate out of and brake into each corner (in m/s)
+        heading = np.unwrap(np.arctan2(np.gradient(self.y), np.gradient(self.x)))
+        curvature = np.abs(np.gradient(heading)) / step
+        curvature = np.convolve(np.concatenate([curvature[-25:], curvature, curvature[:25]]),
+                                np.ones(51) / 51, mode='valid')
+        speed = np.clip(np.sqrt(LATERAL_GRIP / np.maximum(curvature, 1e-6)), 60 / 3.6, 330 / 3.6)
+        for _ in range(2):
+            for index in range(TRACK_POINTS):
+                speed[index] = min(speed[index], np.sqrt(speed[index - 1] ** 2 + 2 * ACCELERATION * step[index - 1]))
+            for index in range(TRACK_POINTS - 1, -1, -1):
+                following = (index + 1) % TRACK_POINTS
+                speed[index] = min(speed[index], np.sqrt(speed[following] ** 2 + 2 * BRAKING * step[index]))
+        self.speed = speed * 3.6
+
+        self.base_time = np.concatenate([[0], np.cumsum(step / speed)[:-1]])
+        self.lap_time = self.base_time[-1] + step[-1] / speed[-1]
+
+        apexes = np.argsort(-curvature)
+        corner_points = []
+        for index in apexes:
+            if all(min(abs(index - other), TRACK_POINTS - abs(index - other)) > TRACK_POINTS // (CORNERS * 2)
+                   for other in corner_points):
+                corner_points.append(index)
+            if len(corner_points) == CORNERS:
+                break
+        self.corner_points = sorted(corner_points)
+
+    def sample(self, elapsed, pace):
+        """
+        Get the track state at times into a lap.
+
+        Args:
+            elapsed: Seconds since the lap started (array)
+            pace: Speed factor of the lap (1.0 is the reference lap)
+
+        Returns:
+            tuple: (distance, x, y, speed) arrays
+        """
+        distance = np.interp(elapsed * pace, self.base_time, self.distance)
+        return (distance,
+                np.interp(distance, self.distance, self.x),
+                np.interp(distance, self.distance, self.y),
+                np.interp(distance, self.distance, self.speed) * pace)
+
+
+class SyntheticSession(fastf1.core.Session):
+    """
+    A FastF1 session filled with generated laps, results and telemetry.
+
+    Generated data has the columns and types FastF1 produces, so the
+    services run their normal code paths on it. The same identifiers
+    always produce the same session.
+    """
+
+    def __init__(self, year, race, session_type):
+        """
+        Generate a session.
+
+        Args:
+            year: The year of the session
+            race: The race name or round number
+            session_type: The session type (e.g., 'R', 'Q', 'FP1')
+        """
+        year = int(year)
+        session_type = str(session_type).upper()
+        name = SESSION_NAMES.get(session_type, session_type)
+        rng = np.random.default_rng(_seed(year, str(race).lower(), session_type))
+        event_name = f"{str(race).title()} Grand Prix" if not str(race).isdigit() else f"Round {race} Grand Prix"
+        round_number = int(race) if str(race).isdigit() else int(rng.integers(1, 24))
+        event_date = pd.Timestamp(year, 1 + round_number % 11, 10 + round_number % 15, 13)
+
+        names = ['Practice 1', 'Practice 2', 'Practice 3', 'Qualifying', 'Race']
+        if name not in names:
+            names = ['Practice 1', 'Sprint Qualifying', 'Sprint', 'Qualifying', 'Race']
+        fields = {
+            'RoundNumber': round_number, 'Country': str(race).title(), 'Location': str(race).title(),
+            'OfficialEventName': event_name, 'EventDate': event_date, 'EventName': event_name,
+            'EventFormat': 'conventional', 'F1ApiSupport': True
+        }
+        for index, session_name in enumerate(names, start=1):
+            date = event_date - pd.Timedelta(days=len(names) - index)
+            fields[f"Session{index}"] = session_name
+            fields[f"Session{index}Date"] = date.tz_localize('UTC')
+            fields[f"Session{index}DateUtc"] = date
+        super().__init__(fastf1.events.Event(fields, year=year), name, f1_api_support=True)
+
+        self.track = SyntheticTrack(rng)
+        self._generate(rng)
+        self._register_plotting_teams()
+
+    def _generate(self, rng):
+        """Generate results, laps and telemetry."""
+        race_like = self.name in self._RACE_LIKE_SESSIONS
+        quali_like = self.name in self._QUALI_LIKE_SESSIONS
+        skill = {abbreviation: 1.0 - index * 0.0015 + rng.normal(0, 0.001)
+                 for index, (abbreviation, *_) in enumerate(GRID)}
+
+        self._t0_date = self.date
+        self._session_start_time = pd.Timedelta(minutes=5)
+        lap_rows = []
+        segment_best = {}
+        car_data = {}
+        pos_data = {}
+
+        if quali_like:
+            # Three segments with a 7 minute break, eliminating 5 drivers after Q1 and Q2
+            starts = [pd.Timedelta(minutes=5), pd.Timedelta(minutes=30), pd.Timedelta(minutes=52)]
+            ranked = sorted(skill, key=lambda abbreviation: -skill[abbreviation])
+            runners = [ranked, ranked[:15], ranked[:10]]
+            self._session_status = pd.DataFrame({
+                'Time': [time for start in starts for time in (start, start + pd.Timedelta(minutes=18))],
+                'Status': ['Started', 'Finished'] * 3
+            })
+            self._session_split_times = list(starts)
+        else:
+            starts = [self._session_start_time]
+            runners = [list(skill)]
+            self._session_status = pd.DataFrame({
+                'Time': [starts[0], starts[0] + pd.Timedelta(hours=1, minutes=40)],
+                'Status': ['Started', 'Finished']
+            })
+
+        for abbreviation, number, full_name, team, colour in GRID:
+            times, channels = [], []
+            lap_number = 0
+            for segment, start in enumerate(starts):
+                if abbreviation not in runners[segment]:
+                    continue
+                lap_count = 55 if race_like else (6 if quali_like else 20)
+                clock = start + pd.Timedelta(seconds=float(rng.uniform(0, 240 if not race_like else 0)))
+                stint, compound, tyre_life = 1, ('MEDIUM' if race_like else 'SOFT'), 1
+                for lap in range(1, lap_count + 1):
+                    lap_number += 1
+                    pit_out = lap == 1 or (quali_like and lap % 3 == 1)
+                    pit_in = (quali_like and lap % 3 == 0) or (race_like and lap == lap_count // 2)
+                    pace = skill[abbreviation] * (1 - tyre_life * 0.0008 if race_like else 1)
+                    pace *= 1 + rng.normal(0, 0.004)
+                    if pit_out or pit_in:
+                        pace *= 0.8
+                    lap_seconds = self.track.lap_time / pace
+
+                    # Samples fall on one session-wide clock for every car, as in
+                    # the live feed, so telemetry of different drivers lines up
+                    start_s = clock.total_seconds()
+                    ticks = np.arange(np.ceil(start_s / SAMPLE_INTERVAL),
+                                      np.ceil((start_s + lap_seconds) / SAMPLE_INTERVAL))
+                    distance, x, y, speed = self.track.sample(ticks * SAMPLE_INTERVAL - start_s, pace)
+                    times.append(pd.to_timedelta(ticks * SAMPLE_INTERVAL * 1000, unit='ms'))
+                    channels.append((x, y, speed))
+
+                    lap_time = pd.Timedelta(seconds=lap_seconds)
+                    sectors = [lap_time * share for share in (0.31, 0.37, 0.32)]
+                    lap_rows.append({
+                        'Time': clock + lap_time, 'Driver': abbreviation, 'DriverNumber': number,
+                        'LapTime': lap_time, 'LapNumber': float(lap_number),
+                        'Stint': float(stint),
+                        'PitOutTime': clock if pit_out else pd.NaT,
+                        'PitInTime': clock + lap_time if pit_in else pd.NaT,
+                        'Sector1Time': sectors[0], 'Sector2Time': sectors[1], 'Sector3Time': sectors[2],
+                        'Sector1SessionTime': clock + sectors[0],
+                        'Sector2SessionTime': clock + sectors[0] + sectors[1],
+                        'Sector3SessionTime': clock + lap_time,
+                        'SpeedI1': float(speed.max() * 0.9), 'SpeedI2': float(speed.max() * 0.85),
+                        'SpeedFL': float(speed[-1]), 'SpeedST': float(speed.max()),
+                        'IsPersonalBest': False, 'Compound': compound, 'TyreLife': float(tyre_life),
+                        'FreshTyre': tyre_life == 1, 'Team': team, 'LapStartTime': clock,
+                        'LapStartDate': self.date + clock, 'TrackStatus': '1', 'Position': np.nan,
+                        'Deleted': False, 'DeletedReason': '', 'FastF1Generated': False,
+                        'IsAccurate': not (pit_out or pit_in)
+                    })
+                    if quali_like and not (pit_out or pit_in):
+                        key = (abbreviation, segment)
+                        segment_best[key] = min(segment_best.get(key, lap_time), lap_time)
+                    clock += lap_time
+                    tyre_life += 1
+                    if pit_in:
+                        stint += 1
+                        tyre_life = 1
+                        if race_like:
+                            compound = 'HARD'
+                            clock += pd.Timedelta(seconds=22)
+                        else:
+                            clock += pd.Timedelta(seconds=float(rng.uniform(60, 150)))
+
+            session_time = pd.TimedeltaIndex(np.concatenate([t.values for t in times]))
+            x, y, speed = (np.concatenate(values) for values in zip(*channels))
+            acceleration = np.gradient(speed)
+            car_data[number] = fastf1.core.Telemetry({
+                'Date': self.date + session_time, 'SessionTime': session_time,
+                'Time': session_time - session_time[0], 'Speed': speed,
+                'RPM': 7000 + 5000 * (speed % 45) / 45,
+                'nGear': np.clip((speed / 42).astype(int) + 1, 1, 8),
+                'Throttle': np.where(acceleration >= -0.5, np.clip(60 + acceleration * 40, 0, 100), 0.0),
+                'Brake': acceleration < -2, 'DRS': 0, 'Source': 'car'
+            }, session=self, driver=number).reset_index(drop=True)
+            pos_data[number] = fastf1.core.Telemetry({
+                'Date': self.date + session_time, 'SessionTime': session_time,
+                'Time': session_time - session_time[0], 'X': x, 'Y': y, 'Z': 0.0,
+                'Status': 'OnTrack', 'Source': 'pos'
+            }, session=self, driver=number).reset_index(drop=True)
+
+        laps = pd.DataFrame(lap_rows)
+        best = laps[laps['IsAccurate']].groupby('Driver')['LapTime'].idxmin()
+        laps.loc[best.values, 'IsPersonalBest'] = True
+        if race_like:
+            # Running order at the end of each lap, as the live feed reports it
+            laps['Position'] = laps.groupby('LapNumber')['Time'].rank(method='first')
+        self._laps = fastf1.core.Laps(laps, session=self, _force_default_cols=True)
+        self._car_data = car_data
+        self._pos_data = pos_data
+        self._total_laps = 55 if race_like else None
+
+        # Race order by total time, qualifying by furthest segment then time in it, other sessions by best lap
+        if race_like:
+            order = laps.groupby('Driver')['LapTime'].sum().sort_values().index
+        elif quali_like:
+            order = sorted(skill, key=lambda abbreviation: max(
+                (segment, -segment_best[abbreviation, segment].total_seconds())
+                for segment in range(len(starts)) if (abbreviation, segment) in segment_best
+            ), reverse=True)
+        else:
+            order = laps.loc[best.values].sort_values('LapTime')['Driver']
+        position = {abbreviation: index for index, abbreviation in enumerate(order, start=1)}
+        results = pd.DataFrame([{
+            'DriverNumber': number, 'BroadcastName': full_name.split()[-1].upper(), 'Abbreviation': abbreviation,
+            'DriverId': full_name.split()[-1].lower(), 'TeamName': team, 'TeamColor': colour,
+            'TeamId': team.split()[0].lower(), 'FirstName': full_name.split()[0],
+            'LastName': full_name.split()[-1], 'FullName': full_name, 'HeadshotUrl': '',
+            'CountryCode': '', 'Position': float(position[abbreviation]),
+            'ClassifiedPosition': str(position[abbreviation]), 'GridPosition': float(position[abbreviation]),
+            'Q1': segment_best.get((abbreviation, 0), pd.NaT), 'Q2': segment_best.get((abbreviation, 1), pd.NaT),
+            'Q3': segment_best.get((abbreviation, 2), pd.NaT), 'Status': 'Finished', 'Points': 0.0
+        } for abbreviation, number, full_name, team, colour in GRID])
+        results = results.sort_values('Position')
+        results.index = results['DriverNumber']
+        self._results = fastf1.core.SessionResults(results, _force_default_cols=True)
+
+        self._session_info = {'Meeting': {'Circuit': {'Key': 0, 'ShortName': self.event['Location']}}}
+        self._weather_data = pd.DataFrame()
+        self._track_status = pd.DataFrame({'Time': [pd.Timedelta(0)], 'Status': ['1'], 'Message': ['AllClear']})
+        self._race_control_messages = pd.DataFrame()
+
+    def _register_plotting_teams(self):
+        """Give fastf1.plotting the driver-team mapping of the generated grid."""
+        register_plotting_teams(self, [(abbreviation, full_name, team_name, colour)
+                                       for abbreviation, number, full_name, team_name, colour
+                                       in sorted(GRID, key=lambda row: int(row[1]))])
+
+    def load(self, *args, **kwargs):
+        """Generated sessions are loaded on creation."""
+
+    def get_circuit_info(self):
+        """
+        Get the generated circuit's corners.
+
+        Returns:
+            CircuitInfo: Corner markers with distances along the fastest lap
+        """
+        corners = pd.DataFrame({
+            'X': self.track.x[self.track.corner_points], 'Y': self.track.y[self.track.corner_points],
+            'Number': range(1, len(self.track.corner_points) + 1), 'Letter': '', 'Angle': 0.0,
+            'Distance': self.track.distance[self.track.corner_points]
+        })
+        empty = corners.iloc[0:0]
+        return CircuitInfo(corners=corners, marshal_lights=empty.copy(), marshal_sectors=empty.copy(),
+                           rotation=0.0)
+
+
+def load_synthetic_session(year, race, session_type):
+    """
+    Generate a session in place of loading it from FastF1.
+
+    Args:
+        year: The year of the session
+        race: The race name or round number
+        session_type: The session type
+
+    Returns:
+        SyntheticSession: The generated session
+    """
+    logger.info(f"Generating synthetic session for {year} {race} {session_type}")
+    return SyntheticSession(year, race, session_type)
@@ -3,13 +3,18 @@ Service for handling F1 telemetry data processing.
 """
 
 import logging
+import math
 import numpy as np
 import pandas as pd
 import fastf1
-from matplotlib import pyplot as plt
+import fastf1.plotting
+import matplotlib
 from matplotlib.collections import LineCollection
-import seaborn as sns
+from matplotlib.colors import Normalize
 from config import Config
+from utils.rendering import Renderer
+from services.session_repository import session_repository
+from services.speed_map import METRICS
 
 logger = logging.getLogger('f1bot')
 
@@ -68,23 +73,35 @@ class MiniSectorAnalyzer:
             
         return self.telemetry
         
-    def find_fastest_drivers(self, drivers_telemetry_list):
+    def find_fastest_drivers(self, drivers_telemetry_list=None):
         """
         Find the fastest driver in each mini-sector.
         
+        The time a driver spends in a mini-sector includes the step from their
+        last sample before it, so every driver's lap time is fully accounted for.
+        
         Args:
-            drivers_telemetry_list: List of telemetry data for different drivers
+            drivers_telemetry_list: List of telemetry data for different drivers, or
+                one DataFrame with a 'Driver' column (default: the analyzer's telemetry).
+                Telemetry without mini-sector labels is labelled with this analyzer's settings.
             
         Returns:
             pandas.DataFrame: DataFrame with the fastest driver for each mini-sector
         """
-        # Combine all drivers' telemetry
-        mini_sectors = pd.concat(drivers_telemetry_list)
+        if drivers_telemetry_list is None:
+            telemetry = self.telemetry
+        elif isinstance(drivers_telemetry_list, pd.DataFrame):
+            telemetry = drivers_telemetry_list
+        else:
+            telemetry = pd.concat(drivers_telemetry_list, ignore_index=True)
+        if 'MiniSector' not in telemetry:
+            telemetry = MiniSectorAnalyzer(telemetry.copy(), self.num_sectors, self.sector_type).create_mini_sectors()
         
         # Calculate the time spent in each mini-sector for each driver
-        time_spent = mini_sectors.groupby(['Driver', 'MiniSector']).apply(
-            lambda df: df['Time'].diff().sum()
-        ).reset_index().rename(columns={0: 'TimeSpent'})
+        elapsed = telemetry.groupby('Driver')['Time'].diff()
+        time_spent = elapsed.groupby(
+            [telemetry['Driver'], telemetry['MiniSector']]
+        ).sum().rename('TimeSpent').reset_index()
         
         # Find the fastest driver in each mini-sector
         fastest_per_mini_sector = time_spent.loc[
@@ -99,9 +116,16 @@ class TelemetryService:
     Service for processing and analyzing F1 telemetry data.
     """
     
-    def __init__(self):
-        """Initialize the telemetry service."""
-        pass
+    def __init__(self, renderer=None, repository=None):
+        """
+        Initialize the telemetry service.
+        
+        Args:
+            renderer: Optional Renderer to draw plots with (default: a new Renderer)
+            repository: Optional SessionRepository to get session data from (default: the shared repository)
+        """
+        self.renderer = renderer or Renderer()
+        self.repository = repository or session_repository
         
     def get_session(self, year, race, session_type):
         """
@@ -115,10 +139,19 @@ class TelemetryService:
         Returns:
             fastf1.core.Session: The loaded session
         """
-        logger.info(f"Loading session data for {year} {race} {session_type}")
-        session = fastf1.get_session(int(year), race, session_type)
-        session.load()
-        return session
+        return self.repository.get_session(year, race, session_type)
+        
+    def _session_key(self, session):
+        """
+        Identify a session for caching its static plot layers.
+        
+        Args:
+            session: The FastF1 session
+            
+        Returns:
+            tuple: (year, event name, session name)
+        """
+        return self.repository.session_id(session)
         
     def get_driver_fastest_lap(self, session, driver):
         """
@@ -131,9 +164,9 @@ class TelemetryService:
         Returns:
             fastf1.core.Lap: The fastest lap
         """
-        return session.laps.pick_driver(driver).pick_fastest()
+        return self.repository.fastest_lap(session, driver)
         
-    def create_speed_trace_plot(self, session, driver1, driver2):
+    def create_speed_trace_plot(self, session, driver1, driver2, profile=None):
         """
         Create a speed trace comparison plot for two drivers.
         
@@ -141,20 +174,18 @@ class TelemetryService:
             session: The FastF1 session
             driver1: The first driver code
             driver2: The second driver code
+            profile: Optional RenderProfile to encode with
             
         Returns:
-            tuple: (figure, filename) - The matplotlib figure and the saved filename
+            tuple: (image, filename) - The encoded image bytes and a filename for it
         """
+        info = self.repository.metadata(session)
         driver1_lap = self.get_driver_fastest_lap(session, driver1)
         driver2_lap = self.get_driver_fastest_lap(session, driver2)
         
         # Get telemetry data
-        driver1_tel = driver1_lap.get_car_data().add_distance()
-        driver2_tel = driver2_lap.get_car_data().add_distance()
-        
-        # Get driver colors
-        # Setup for plotting
-        fastf1.plotting.setup_mpl(mpl_timedelta_support=True, misc_mpl_mods=False, color_scheme='fastf1')
+        driver1_tel = self.repository.lap_telemetry(driver1_lap, 'car')
+        driver2_tel = self.repository.lap_telemetry(driver2_lap, 'car')
         
         # Get driver colors
         driver_colors = fastf1.plotting.get_driver_color_mapping(session=session)
@@ -166,67 +197,78 @@ class TelemetryService:
         driver2_time = str(driver2_lap["LapTime"])[11:19]
         
         # Get circuit info for corner markers
-        circuit_info = session.get_circuit_info()
-        v_min = min(driver1_tel['Speed'].min(), driver2_tel['Speed'].min())
-        v_max = max(driver1_tel['Speed'].max(), driver2_tel['Speed'].max())
-        
-        # Create plot with two subplots (speed and throttle)
-        fig, ax = plt.subplots(2, figsize=Config.DEFAULT_FIG_SIZE, 
-                              gridspec_kw={'height_ratios': [10, 3]})
-        
-        # Speed plot
-        ax[0].plot(driver1_tel['Distance'], driver1_tel['Speed'], 
-                  color=driver1_color, label=f"{driver1} - {driver1_time}")
-        ax[0].plot(driver2_tel['Distance'], driver2_tel['Speed'], 
-                  color=driver2_color, label=f"{driver2} - {driver2_time}")
-        
-        # Add corner markers
-        ax[0].vlines(x=circuit_info.corners['Distance'], 
-                    ymin=v_min - 20, ymax=v_max + 10,
-                    linestyles='dotted', colors='grey')
-        
-        # Add corner numbers
-        for _, corner in circuit_info.corners.iterrows():
-            txt = f"{corner['Number']}{corner['Letter']}"
-            ax[0].text(corner['Distance'], v_min - 30, txt,
-                      va='center_baseline', ha='center', size='small', rotation=-90)
-        
-        ax[0].set_xlabel('Distance (m)')
-        ax[0].set_ylabel('Speed (km/h)')
-        ax[0].set_ylim([v_min - 40, v_max + 5])
-        ax[0].legend()
-        
-        # Throttle plot
-        ax[1].plot(driver1_tel['Distance'], driver1_tel['Throttle'], 
-                  color=driver1_color, label=f"{driver1}")
-        ax[1].plot(driver2_tel['Distance'], driver2_tel['Throttle'], 
-                  color=driver2_color, label=f"{driver2}")
-        ax[1].set_ylabel('Throttle %')
-        ax[1].legend()
-        
-        # Title
-        plt.suptitle(f"Fastest Lap Comparison\n"
-                    f"{session.event['EventName']} {session.event.year}")
-        
-        # Save and return
-        filename = "plot.png"
-        plt.savefig(filename)
-        
-        return fig, filename
-        
-    def create_gear_shifts_plot(self, session, driver):
+        circuit_info = self.repository.circuit_info(session)
+        corners = circuit_info.corners
+        
+        # Round the axis ranges so requests for similar laps share a static layer
+        x_max = math.ceil(max(driver1_tel['Distance'].max(), driver2_tel['Distance'].max()) / 100) * 100
+        v_min = math.floor(min(driver1_tel['Speed'].min(), driver2_tel['Speed'].min()) / 10) * 10
+        v_max = math.ceil(max(driver1_tel['Speed'].max(), driver2_tel['Speed'].max()) / 10) * 10
+        
+        def setup(fig):
+            # Create plot with two subplots (speed and throttle)
+            ax = fig.subplots(2, gridspec_kw={'height_ratios': [10, 3]})
+            ax[0].set_xlim(0, x_max)
+            ax[0].set_ylim([v_min - 40, v_max + 5])
+            ax[1].set_xlim(0, x_max)
+            ax[1].set_ylim([-5, 105])
+            return ax
+        
+        def draw_static(fig, ax):
+            # Add corner markers
+            ax[0].vlines(x=corners['Distance'], 
+                        ymin=v_min - 20, ymax=v_max + 10,
+                        linestyles='dotted', colors='grey')
+            
+            # Add corner numbers
+            for _, corner in corners.iterrows():
+                txt = f"{corner['Number']}{corner['Letter']}"
+                ax[0].text(corner['Distance'], v_min - 30, txt,
+                          va='center_baseline', ha='center', size='small', rotation=-90)
+            
+            ax[0].set_xlabel('Distance (m)')
+            ax[0].set_ylabel('Speed (km/h)')
+            ax[1].set_ylabel('Throttle %')
+            
+            # Title
+            fig.suptitle(f"Fastest Lap Comparison\n"
+                         f"{info.event_name} {info.year}")
+        
+        def draw_dynamic(fig, ax):
+            # Speed plot
+            ax[0].plot(driver1_tel['Distance'], driver1_tel['Speed'], 
+                      color=driver1_color, label=f"{driver1} - {driver1_time}")
+            ax[0].plot(driver2_tel['Distance'], driver2_tel['Speed'], 
+                      color=driver2_color, label=f"{driver2} - {driver2_time}")
+            ax[0].legend()
+            
+            # Throttle plot
+            ax[1].plot(driver1_tel['Distance'], driver1_tel['Throttle'], 
+                      color=driver1_color, label=f"{driver1}")
+            ax[1].plot(driver2_tel['Distance'], driver2_tel['Throttle'], 
+                      color=driver2_color, label=f"{driver2}")
+            ax[1].legend()
+        
+        layer_key = ('speed_trace', *self._session_key(session), x_max, v_min, v_max)
+        image = self.renderer.render_layered(layer_key, setup, draw_static, draw_dynamic, profile=profile)
+        
+        return image, self.renderer.filename("plot", profile)
+        
+    def create_gear_shifts_plot(self, session, driver, profile=None):
         """
         Create a gear shift visualization plot.
         
         Args:
             session: The FastF1 session
             driver: The driver code
+            profile: Optional RenderProfile to encode with
             
         Returns:
-            tuple: (figure, filename) - The matplotlib figure and the saved filename
+            tuple: (image, filename) - The encoded image bytes and a filename for it
         """
+        info = self.repository.metadata(session)
         lap = self.get_driver_fastest_lap(session, driver)
-        tel = lap.get_telemetry()
+        tel = self.repository.lap_telemetry(lap)
         
         x = np.array(tel['X'].values)
         y = np.array(tel['Y'].values)
@@ -235,32 +277,71 @@ class TelemetryService:
         segments = np.concatenate([points[:-1], points[1:]], axis=1)
         gear = tel['nGear'].to_numpy().astype(float)
         
-        fig, ax = plt.subplots(figsize=Config.DEFAULT_FIG_SIZE)
+        def draw(fig):
+            ax = fig.subplots()
+            
+            cmap = matplotlib.colormaps['Paired']
+            lc_comp = LineCollection(segments, norm=Normalize(1, cmap.N + 1), cmap=cmap)
+            lc_comp.set_array(gear)
+            lc_comp.set_linewidth(4)
+            
+            ax.add_collection(lc_comp)
+            ax.axis('equal')
+            ax.tick_params(labelleft=False, left=False, labelbottom=False, bottom=False)
+            
+            fig.suptitle(
+                f"Fastest Lap Gear Shift Visualization\n"
+                f"{lap['Driver']} - {info.event_name} {info.year}"
+            )
+            
+            cbar = fig.colorbar(lc_comp, ax=ax, label="Gear", boundaries=np.arange(1, 10))
+            cbar.set_ticks(np.arange(1.5, 9.5))
+            cbar.set_ticklabels(np.arange(1, 9))
         
-        cmap = plt.get_cmap('Paired')
-        lc_comp = LineCollection(segments, norm=plt.Normalize(1, cmap.N + 1), cmap=cmap)
-        lc_comp.set_array(gear)
-        lc_comp.set_linewidth(4)
+        image = self.renderer.render(draw, profile=profile)
         
-        ax.add_collection(lc_comp)
-        ax.axis('equal')
-        ax.tick_params(labelleft=False, left=False, labelbottom=False, bottom=False)
+        return image, self.renderer.filename("plot", profile)
         
-        plt.suptitle(
-            f"Fastest Lap Gear Shift Visualization\n"
-            f"{lap['Driver']} - {session.event['EventName']} {session.event.year}"
-        )
+    def create_speed_map_plot(self, session, grid, metric='speed', profile=None):
+        """
+        Create a heatmap of a session's binned telemetry on the track map.
+        
+        Args:
+            session: The FastF1 session
+            grid: The session's SpeedGrid
+            metric: 'speed', 'braking' or 'variance'
+            profile: Optional RenderProfile to encode with
+            
+        Returns:
+            tuple: (image, filename) - The encoded image bytes and a filename for it
+            
+        Raises:
+            ValueError: If the metric is unknown
+        """
+        info = self.repository.metadata(session)
+        values = grid.values(metric)
+        cmaps = {'speed': 'plasma', 'braking': 'inferno', 'variance': 'viridis'}
         
-        cbar = plt.colorbar(mappable=lc_comp, label="Gear", boundaries=np.arange(1, 10))
-        cbar.set_ticks(np.arange(1.5, 9.5))
-        cbar.set_ticklabels(np.arange(1, 9))
+        def draw(fig):
+            ax = fig.subplots()
+            
+            heatmap = ax.imshow(np.ma.masked_invalid(values), origin='lower', extent=grid.extent(),
+                                cmap=cmaps[metric], interpolation='nearest')
+            ax.set_aspect('equal')
+            ax.tick_params(labelleft=False, left=False, labelbottom=False, bottom=False)
+            
+            fig.suptitle(
+                f"Session {metric.capitalize()} Map - {info.event_name} {info.year} {info.session_name}\n"
+                f"{grid.laps} laps from all drivers"
+            )
+            fig.colorbar(heatmap, ax=ax, label=METRICS[metric])
         
-        filename = "plot.png"
-        plt.savefig(filename)
+        image = self.renderer.render(draw, profile=profile)
         
-        return fig, filename
+        return image, self.renderer.filename("speedmap", profile)
         
-    def create_track_dominance_plot(self, session, drivers, num_mini_sectors=Config.DEFAULT_MINI_SECTORS):
+    def create_track_dominance_plot(self, session, drivers, num_mini_sectors=Config.DEFAULT_MINI_SECTORS,
+                                    profile=None):
         """
         Create a track dominance visualization showing which driver is fastest in each mini-sector.
         
@@ -268,16 +349,19 @@ class TelemetryService:
             session: The FastF1 session
             drivers: List of driver codes
             num_mini_sectors: Number of mini-sectors to create
+            profile: Optional RenderProfile to encode with
             
         Returns:
-            tuple: (figure, filename) - The matplotlib figure and the saved filename
+            tuple: (image, filename, driver_info) - The encoded image bytes, a filename
+                and per-driver lap details
         """
+        info = self.repository.metadata(session)
         mini_sectors_list = []
         driver_info = {}
         
         # If no drivers specified, use the top 3 fastest
         if not drivers:
-            laps = session.laps.pick_quicklaps()
+            laps = self.repository.laps(session, quick=True)
             fastest_laps = laps.groupby('Driver')['LapTime'].min().sort_values().index[:3]
             drivers = fastest_laps.tolist()
         
@@ -287,7 +371,7 @@ class TelemetryService:
         # Get telemetry data for each driver
         for driver in drivers:
             lap = self.get_driver_fastest_lap(session, driver)
-            telemetry = lap.get_telemetry()
+            telemetry = self.repository.lap_telemetry(lap)
             telemetry['Driver'] = driver
             mini_sectors_list.append(telemetry)
             
@@ -302,54 +386,60 @@ class TelemetryService:
             }
         
         # Create mini-sectors
-        analyzer = MiniSectorAnalyzer(pd.concat(mini_sectors_list), num_mini_sectors)
+        analyzer = MiniSectorAnalyzer(pd.concat(mini_sectors_list, ignore_index=True), num_mini_sectors)
         mini_sectors = analyzer.create_mini_sectors()
         
         # Find fastest driver per mini-sector
-        fastest_per_mini_sector = analyzer.find_fastest_drivers(mini_sectors_list)
-        
-        # Create the plot
-        fig, ax = plt.subplots(figsize=Config.DEFAULT_FIG_SIZE)
-        fig.patch.set_facecolor('black')
-        ax.set_facecolor('black')
+        fastest_per_mini_sector = analyzer.find_fastest_drivers()
+        fastest_driver = fastest_per_mini_sector.set_index('MiniSector')['Driver']
         
-        # Get track map from the first driver's lap
-        lap = session.laps.pick_driver(drivers[0]).pick_fastest()
-        x = lap.telemetry['X'].values
-        y = lap.telemetry['Y'].values
-        
-        # Plot the track outline
-        ax.plot(x, y, color='black', linestyle='-', linewidth=16, zorder=0)
+        driver_colors = fastf1.plotting.get_driver_color_mapping(session=session)
         
-        # Create points and segments for coloring
-        points = np.array([x, y]).T.reshape(-1, 1, 2)
+        # Color the first driver's lap by the fastest driver in each segment's mini-sector
+        reference = mini_sectors[mini_sectors['Driver'] == drivers[0]]
+        points = reference[['X', 'Y']].to_numpy().reshape(-1, 1, 2)
         segments = np.concatenate([points[:-1], points[1:]], axis=1)
+        segment_colors = reference['MiniSector'].iloc[:-1].map(fastest_driver).map(
+            lambda driver: driver_colors.get(driver, 'white')
+        ).tolist()
+        
+        # The track outline and limits come from the session's fastest lap, so
+        # they are the same for every driver combination
+        outline = self.repository.lap_telemetry(self.repository.fastest_lap(session), 'pos')
+        x = outline['X'].to_numpy()
+        y = outline['Y'].to_numpy()
+        x_margin = (x.max() - x.min()) * 0.05
+        y_margin = (y.max() - y.min()) * 0.05
+        
+        def setup(fig):
+            ax = fig.subplots()
+            ax.set_xlim(x.min() - x_margin, x.max() + x_margin)
+            ax.set_ylim(y.min() - y_margin, y.max() + y_margin)
+            ax.axis('off')
+            ax.set_aspect('equal')
+            return ax
+        
+        def draw_static(fig, ax):
+            fig.patch.set_facecolor('black')
+            ax.set_facecolor('black')
+            
+            # Plot the track outline
+            ax.plot(x, y, color='black', linestyle='-', linewidth=16, zorder=0)
+            
+            ax.set_title(f"{info.year} {info.event_name} - Track Dominance by Mini-Sectors", 
+                        color='white')
         
-        # Color each mini-sector by fastest driver
-        for minisector in range(num_mini_sectors):
-            sector_data = mini_sectors[mini_sectors['MiniSector'] == minisector]
-            if not sector_data.empty:
-                fastest_driver = fastest_per_mini_sector[
-                    fastest_per_mini_sector['MiniSector'] == minisector
-                ]['Driver'].values[0]
-                color = fastf1.plotting.get_driver_color_mapping(session=session).get(fastest_driver, 'white')
-                segment_indices = sector_data.index
-                segment_points = segments[segment_indices.min():segment_indices.max() + 1]
-                lc = LineCollection(segment_points, colors=[color], linewidth=5)
-                ax.add_collection(lc)
-        
-        # Add legend
-        for driver in drivers:
-            ax.plot([], [], color=fastf1.plotting.get_driver_color_mapping(session=session).get(driver, 'white'), label=driver)
-        
-        ax.legend()
-        ax.set_title(f"{session.event.year} {session.event['EventName']} - Track Dominance by Mini-Sectors", 
-                    color='white')
-        ax.axis('off')
-        ax.set_aspect('equal')
+        def draw_dynamic(fig, ax):
+            # Color each mini-sector by fastest driver
+            ax.add_collection(LineCollection(segments, colors=segment_colors, linewidth=5))
+            
+            # Add legend
+            for driver in drivers:
+                ax.plot([], [], color=driver_colors.get(driver, 'white'), label=driver)
+            
+            ax.legend()
         
-        # Save the plot
-        filename = "track_dominance_minisectors.png"
-        plt.savefig(filename, bbox_inches='tight', facecolor=fig.get_facecolor())
+        layer_key = ('track_dominance', *self._session_key(session))
+        image = self.renderer.render_layered(layer_key, setup, draw_static, draw_dynamic, profile=profile)
         
-        return fig, filename, driver_info
+        return image, self.renderer.filename("track_dominance_minisectors", profile), driver_info
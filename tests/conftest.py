@@ -0,0 +1,22 @@
+"""
+Shared fixtures for the F1 Discord Bot tests.
+"""
+
+import pytest
+from services.session_cache import SessionCache
+from services.session_repository import SessionRepository, SyntheticBackend
+from utils.layer_cache import LayerCache
+from utils.rendering import Renderer, init_render_worker
+
+
+@pytest.fixture(scope='session')
+def repository():
+    """Session repository generating deterministic synthetic sessions."""
+    return SessionRepository(backend=SyntheticBackend(), sessions=SessionCache(max_sessions=8))
+
+
+@pytest.fixture
+def renderer():
+    """Renderer with its own in-memory layer cache, so tests write nothing to disk."""
+    init_render_worker()
+    return Renderer(layers=LayerCache(cache_dir=None))
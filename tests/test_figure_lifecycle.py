@@ -0,0 +1,124 @@
+"""
+Soak tests for the figure lifecycle: memory stays flat across many renders.
+"""
+
+import gc
+import tracemalloc
+import weakref
+import matplotlib
+import numpy as np
+import pytest
+from matplotlib import pyplot as plt
+from tools.soak_figures import rss_mib
+from utils.figure_manager import FigureManager
+from utils.layer_cache import LayerCache
+from utils.rendering import Renderer, RenderStyle
+
+# Renders before measuring, which fill font, text and colormap caches
+WARMUP = 30
+RENDERS = 150
+TRACED_RENDERS = 20
+
+# Allowed growth; a figure that is never released costs far more than
+# MAX_TRACED_GROWTH / TRACED_RENDERS (see the pyplot control below)
+MAX_TRACED_GROWTH = 1024 ** 2
+MAX_RSS_GROWTH_MIB = 16
+
+STYLE = RenderStyle('soak', figsize=(4, 3), dpi=50)
+
+
+def draw(fig, x, y):
+    """Draw a small plot with a line, a legend and a title."""
+    ax = fig.subplots()
+    ax.plot(x, y, label='A')
+    ax.legend()
+    fig.suptitle('Soak test')
+
+
+@pytest.fixture
+def data():
+    """A trace to plot."""
+    x = np.linspace(0, 5000, 500)
+    return x, 200 + 100 * np.sin(x / 300)
+
+
+def traced_growth(render, count):
+    """Measure the bytes still allocated after rendering count plots."""
+    render()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(count):
+            render()
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize('reuse', [False, True], ids=['fresh', 'reused'])
+def test_memory_stays_flat_across_renders(data, reuse):
+    figures = FigureManager(reuse_canvases=reuse)
+    renderer = Renderer(figures=figures, style=STYLE, layers=LayerCache(cache_dir=None))
+
+    def render():
+        renderer.render(draw, *data)
+
+    for _ in range(WARMUP):
+        render()
+    gc.collect()
+    rss_before = rss_mib()
+    for _ in range(RENDERS):
+        render()
+    gc.collect()
+    rss_growth = rss_mib() - rss_before
+
+    assert traced_growth(render, TRACED_RENDERS) < MAX_TRACED_GROWTH
+    assert rss_growth < MAX_RSS_GROWTH_MIB
+    assert figures.live == 0
+    assert plt.get_fignums() == []
+    if reuse:
+        assert figures.created == 1
+    else:
+        assert figures.created == WARMUP + RENDERS + TRACED_RENDERS + 1
+
+
+def test_unclosed_pyplot_figures_exceed_the_bound(data):
+    # Control: the old behaviour (pyplot figures never closed) must fail the check
+    def render():
+        fig = plt.figure(figsize=STYLE.figsize, dpi=STYLE.dpi)
+        draw(fig, *data)
+        FigureManager.encode(fig)
+
+    try:
+        with matplotlib.rc_context({'figure.max_open_warning': 0}):
+            assert traced_growth(render, TRACED_RENDERS) > MAX_TRACED_GROWTH
+    finally:
+        plt.close('all')
+
+
+def test_released_figures_are_freed(data):
+    figures = FigureManager(reuse_canvases=False)
+    with figures.figure(STYLE.figsize, STYLE.dpi) as fig:
+        draw(fig, *data)
+        figures.encode(fig)
+        ref = weakref.ref(fig)
+    del fig
+    gc.collect()
+
+    assert ref() is None
+    assert figures.live == 0
+
+
+def test_figures_are_released_when_drawing_fails(data):
+    figures = FigureManager(reuse_canvases=False)
+    renderer = Renderer(figures=figures, style=STYLE, layers=LayerCache(cache_dir=None))
+
+    def broken(fig):
+        draw(fig, *data)
+        raise RuntimeError('draw failed')
+
+    with pytest.raises(RuntimeError):
+        renderer.render(broken)
+    assert figures.live == 0
@@ -0,0 +1,171 @@
+"""
+Tests for the pooled HTTP client against a local stub server.
+"""
+
+import asyncio
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from services.http_client import HttpClient
+from services.standings_service import StandingsService
+
+
+class StubServer:
+    """
+    Local HTTP server whose responses the tests script per path.
+    """
+    def __init__(self):
+        """Initialize the stub server."""
+        self.requests = []
+        self.failures = {}  # path -> number of 503 responses before succeeding
+        self.down = False
+        self.delay = 0
+        self.body = b'v1'
+        self.etag = '"v1"'
+        self.last_modified = 'Sun, 01 Sep 2024 13:00:00 GMT'
+
+        app = web.Application()
+        app.router.add_get('/{path}', self.handle)
+        self.server = TestServer(app)
+
+    async def handle(self, request):
+        """Answer a request as currently scripted."""
+        path = request.match_info['path']
+        self.requests.append((path, dict(request.headers)))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.down:
+            return web.Response(status=500)
+        if self.failures.get(path):
+            self.failures[path] -= 1
+            return web.Response(status=503)
+
+        if path == 'etag':
+            if request.headers.get('If-None-Match') == self.etag:
+                return web.Response(status=304)
+            return web.Response(body=self.body, headers={'ETag': self.etag})
+        if path == 'modified':
+            if request.headers.get('If-Modified-Since') == self.last_modified:
+                return web.Response(status=304)
+            return web.Response(body=self.body, headers={'Last-Modified': self.last_modified})
+        return web.Response(body=self.body)
+
+    def url(self, path):
+        """Get the URL of a path on the server."""
+        return str(self.server.make_url(f'/{path}'))
+
+    def count(self, path):
+        """Count the requests made for a path."""
+        return sum(1 for requested, _ in self.requests if requested == path)
+
+
+def run_with_server(test, **client_kwargs):
+    """Run an async test with a started stub server and a live-mode client."""
+    async def main():
+        stub = StubServer()
+        await stub.server.start_server()
+        client = HttpClient(mode='live', retries=2, backoff=0, **client_kwargs)
+        try:
+            await test(stub, client)
+        finally:
+            await client.close()
+            await stub.server.close()
+    asyncio.run(main())
+
+
+def test_retries_retryable_statuses():
+    async def test(stub, client):
+        stub.failures['page'] = 2
+        assert await client.get(stub.url('page')) == b'v1'
+        assert stub.count('page') == 3
+
+    run_with_server(test)
+
+
+def test_gives_up_after_retries():
+    async def test(stub, client):
+        stub.failures['page'] = 5
+        with pytest.raises(Exception, match='Failed to fetch'):
+            await client.get(stub.url('page'))
+        assert stub.count('page') == 3
+
+    run_with_server(test)
+
+
+def test_fresh_responses_are_served_from_cache():
+    async def test(stub, client):
+        await client.get(stub.url('page'))
+        stub.body = b'v2'
+        assert await client.get(stub.url('page')) == b'v1'
+        assert stub.count('page') == 1
+
+    run_with_server(test, cache_ttl=60)
+
+
+def test_revalidates_with_etag():
+    async def test(stub, client):
+        assert await client.get(stub.url('etag')) == b'v1'
+        assert await client.get(stub.url('etag')) == b'v1'
+        assert stub.count('etag') == 2
+        assert stub.requests[-1][1].get('If-None-Match') == '"v1"'
+
+        # A changed resource replaces the cached body
+        stub.body, stub.etag = b'v2', '"v2"'
+        assert await client.get(stub.url('etag')) == b'v2'
+
+    run_with_server(test, cache_ttl=0, stale_ttl=0)
+
+
+def test_revalidates_with_last_modified():
+    async def test(stub, client):
+        await client.get(stub.url('modified'))
+        assert await client.get(stub.url('modified')) == b'v1'
+        assert stub.requests[-1][1].get('If-Modified-Since') == stub.last_modified
+
+    run_with_server(test, cache_ttl=0, stale_ttl=0)
+
+
+def test_serves_stale_while_refreshing():
+    async def test(stub, client):
+        await client.get(stub.url('page'))
+        stub.body = b'v2'
+        # Expired but inside the stale window: the old body comes back at once
+        assert await client.get(stub.url('page')) == b'v1'
+        await asyncio.sleep(0.1)
+        assert stub.count('page') == 2
+        assert client._cache[stub.url('page')].body == b'v2'
+
+    run_with_server(test, cache_ttl=0, stale_ttl=60)
+
+
+def test_serves_stale_when_the_server_fails():
+    async def test(stub, client):
+        await client.get(stub.url('page'))
+        stub.down = True
+        assert await client.get(stub.url('page')) == b'v1'
+        assert stub.count('page') == 4
+
+    run_with_server(test, cache_ttl=0, stale_ttl=0)
+
+
+def test_concurrent_requests_share_one_fetch():
+    async def test(stub, client):
+        stub.delay = 0.1
+        bodies = await asyncio.gather(*(client.get(stub.url('page')) for _ in range(5)))
+        assert bodies == [b'v1'] * 5
+        assert stub.count('page') == 1
+
+    run_with_server(test)
+
+
+@pytest.mark.parametrize('year', ['abc', '19x', '1949', '3000'])
+def test_standings_reject_invalid_years(year):
+    service = StandingsService(http_client=HttpClient(mode='live'))
+    with pytest.raises(ValueError, match='Invalid year'):
+        asyncio.run(service.get_driver_standings(year))
+
+
+def test_standings_default_to_the_current_season():
+    service = StandingsService(http_client=HttpClient(mode='live'))
+    assert service.parse_year(None) == service.current_season()
+    assert service.parse_year('2019') == 2019
@@ -0,0 +1,221 @@
+"""
+Tests for the SQLite job broker, the broker executor and the render workers.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import stat
+import threading
+import time
+import pytest
+from services.job_broker import JobBroker, JobSpec, JobFailedError, EXPIRED_MESSAGE
+from services.job_executor import BrokerExecutor
+from tools.bench_job_broker import bench_sleep  # noqa: F401 (registers the 'bench_sleep' handler)
+from worker import run_worker
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Path of a fresh broker database."""
+    return str(tmp_path / 'jobs' / 'broker.sqlite3')
+
+
+@pytest.fixture
+def broker(db_path):
+    """A broker on a fresh database."""
+    broker = JobBroker(db_path)
+    yield broker
+    broker.close()
+
+
+def age_jobs(broker, seconds, column='created_at'):
+    """Move every job's timestamp into the past."""
+    broker._connect().execute(f"UPDATE jobs SET {column} = {column} - ?", (seconds,))
+
+
+def test_claims_by_priority_then_submission_order(broker):
+    low = broker.enqueue(JobSpec('a', priority=2))
+    first = broker.enqueue(JobSpec('b', priority=1))
+    second = broker.enqueue(JobSpec('c', priority=1))
+
+    claimed = [broker.claim('w')[0] for _ in range(3)]
+
+    assert claimed == [first, second, low]
+    assert broker.claim('w') is None
+
+
+def test_claimed_spec_round_trips(broker):
+    spec = JobSpec('speedtrace', {'year': 2024, 'drivers': ['VER', 'LEC']}, profile='hd', request_id='r1')
+    broker.enqueue(spec)
+
+    _, claimed = broker.claim('w')
+
+    assert claimed.key() == spec.key()
+    assert claimed.request_id == 'r1'
+
+
+def test_each_job_is_claimed_once_across_connections(db_path):
+    job_count = 60
+    setup = JobBroker(db_path)
+    for index in range(job_count):
+        setup.enqueue(JobSpec('job', {'index': index}))
+    setup.close()
+
+    claimed = []
+    lock = threading.Lock()
+
+    def work(worker_id):
+        broker = JobBroker(db_path)
+        while True:
+            job = broker.claim(worker_id)
+            if job is None:
+                break
+            with lock:
+                claimed.append(job[0])
+        broker.close()
+
+    threads = [threading.Thread(target=work, args=(f"w{index}",)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == list(range(1, job_count + 1))
+
+
+def test_results_are_collected_once(broker):
+    job_id = broker.enqueue(JobSpec('a'))
+    assert broker.pop_result(job_id) == (False, None)
+
+    broker.claim('w')
+    assert broker.pop_result(job_id) == (False, None)
+
+    broker.complete(job_id, (b'png', 'plot.png', {'VER': 1}))
+    assert broker.pop_result(job_id) == (True, (b'png', 'plot.png', {'VER': 1}))
+    with pytest.raises(KeyError):
+        broker.pop_result(job_id)
+
+
+def test_failures_reach_the_submitter(broker):
+    job_id = broker.enqueue(JobSpec('a'))
+    broker.claim('w')
+    broker.fail(job_id, ValueError('No laps'))
+
+    with pytest.raises(JobFailedError, match='No laps'):
+        broker.pop_result(job_id)
+
+
+def test_cancel_removes_a_queued_job(broker):
+    job_id = broker.enqueue(JobSpec('a'))
+
+    assert broker.cancel(job_id) is True
+    assert broker.claim('w') is None
+    with pytest.raises(KeyError):
+        broker.pop_result(job_id)
+
+
+def test_cancel_leaves_a_running_job(broker):
+    job_id = broker.enqueue(JobSpec('a'))
+    broker.claim('w')
+
+    assert broker.cancel(job_id) is False
+    assert broker.stats() == {'running': 1}
+
+
+def test_lost_jobs_are_requeued_then_failed(db_path):
+    broker = JobBroker(db_path, job_timeout=60, max_attempts=2)
+    job_id = broker.enqueue(JobSpec('a'))
+
+    broker.claim('w1')
+    assert broker.requeue_stale() == 0
+    age_jobs(broker, 61, 'started_at')
+    assert broker.requeue_stale() == 1
+    assert broker.claim('w2')[0] == job_id
+
+    age_jobs(broker, 61, 'started_at')
+    assert broker.requeue_stale() == 1
+    with pytest.raises(JobFailedError, match='timed out'):
+        broker.pop_result(job_id)
+    broker.close()
+
+
+def test_jobs_past_the_result_timeout_are_dropped(db_path):
+    broker = JobBroker(db_path, job_timeout=60, result_timeout=120)
+    queued = broker.enqueue(JobSpec('a'))
+    running = broker.enqueue(JobSpec('b'))
+    broker.claim('w')
+    age_jobs(broker, 121)
+    age_jobs(broker, 61, 'started_at')
+
+    # Nobody waits for these anymore: they are neither started nor requeued
+    assert broker.claim('w') is None
+    assert broker.requeue_stale() == 2
+    assert broker.claim('w') is None
+    for job_id in (queued, running):
+        with pytest.raises(JobFailedError, match=EXPIRED_MESSAGE):
+            broker.pop_result(job_id)
+    broker.close()
+
+
+def test_default_job_timeout_is_shorter_than_the_result_timeout(broker):
+    assert broker.job_timeout < broker.result_timeout
+
+
+def test_database_is_private(broker, db_path):
+    broker.enqueue(JobSpec('a'))
+
+    assert stat.S_IMODE(os.stat(db_path).st_mode) == 0o600
+
+
+def test_executor_cancels_jobs_it_stops_waiting_for(broker):
+    executor = BrokerExecutor(broker, poll_interval=0.01, timeout=0.05)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(executor.run(JobSpec('a')))
+    assert broker.stats() == {}
+
+
+def run_jobs(db_path, cache_dir, workers, jobs):
+    """Process sleep jobs with worker processes and return the elapsed seconds."""
+    # Forked workers inherit the 'bench_sleep' handler registered by this module
+    context = multiprocessing.get_context('fork')
+    processes = [
+        context.Process(target=run_worker, args=(f"test-{index}", db_path, 0.01),
+                        kwargs={'cache_dir': cache_dir}, daemon=True)
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    broker = JobBroker(db_path)
+    executor = BrokerExecutor(broker, poll_interval=0.01)
+
+    async def submit_all():
+        return await asyncio.gather(*(executor.run(JobSpec('bench_sleep', {'seconds': 0.2}))
+                                      for _ in range(jobs)))
+
+    try:
+        start = time.perf_counter()
+        results = asyncio.run(submit_all())
+        elapsed = time.perf_counter() - start
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+        broker.close()
+
+    assert results == [b''] * jobs
+    return elapsed
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='needs fork')
+def test_throughput_scales_with_workers(tmp_path):
+    cache_dir = str(tmp_path / 'fastf1_cache')
+    one = run_jobs(str(tmp_path / 'one.sqlite3'), cache_dir, 1, 16)
+    four = run_jobs(str(tmp_path / 'four.sqlite3'), cache_dir, 4, 16)
+
+    # Four workers share the queue without contention: close to 4x faster
+    assert one / four > 3
+    # Workers set up FastF1 themselves rather than relying on the parent process
+    assert os.path.isdir(cache_dir)
@@ -0,0 +1,108 @@
+"""
+Tests for the job scheduler's queue positions and shared jobs.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from config import Config
+from utils.job_scheduler import JobScheduler
+
+
+class Message:
+    """Loading message that records its edits."""
+
+    def __init__(self):
+        self.contents = [Config.LOADING_MESSAGE]
+
+    async def edit(self, content):
+        self.contents.append(content)
+
+
+class Context:
+    """Command context of a user in direct messages."""
+
+    def __init__(self, user_id):
+        self.author = SimpleNamespace(id=user_id)
+        self.guild = None
+        self.message = None
+
+    async def send(self, content):
+        self.message = Message()
+        return self.message
+
+
+def position_message(position):
+    """The loading message showing a queue position."""
+    return f"{Config.LOADING_MESSAGE}\n{Config.QUEUE_POSITION_MESSAGE.format(position=position)}"
+
+
+def test_every_request_sharing_a_job_gets_its_positions():
+    async def scenario():
+        scheduler = JobScheduler(max_running=1)
+        gates = {name: asyncio.Event() for name in ('blocker', 'other', 'shared')}
+        calls = []
+
+        def job(name):
+            async def run():
+                calls.append(name)
+                await gates[name].wait()
+                return name
+            return run
+
+        async def settle():
+            for _ in range(5):
+                await asyncio.sleep(0)
+
+        blocker = asyncio.ensure_future(scheduler.run_for_context(Context(1), job('blocker')))
+        await settle()
+        other = asyncio.ensure_future(scheduler.run_for_context(Context(2), job('other')))
+        await settle()
+        first, second = Context(3), Context(4)
+        owner = asyncio.ensure_future(scheduler.run_for_context(first, job('shared'), key='shared-key'))
+        await settle()
+        attached = asyncio.ensure_future(scheduler.run_for_context(second, job('shared'), key='shared-key'))
+        await settle()
+
+        # The duplicate sees where the shared job is as soon as it attaches
+        assert first.message.contents[-1] == position_message(2)
+        assert second.message.contents[-1] == position_message(2)
+
+        gates['blocker'].set()
+        await settle()
+        assert first.message.contents[-1] == second.message.contents[-1] == position_message(1)
+
+        gates['other'].set()
+        await settle()
+        assert first.message.contents[-1] == second.message.contents[-1] == Config.LOADING_MESSAGE
+
+        gates['shared'].set()
+        results = await asyncio.gather(blocker, other, owner, attached)
+
+        assert results == ['blocker', 'other', 'shared', 'shared']
+        # The duplicate never ran a job of its own, and nothing is left behind
+        assert calls == ['blocker', 'other', 'shared']
+        assert scheduler._watchers == {} and scheduler._positions == {}
+
+    asyncio.run(scenario())
+
+
+def test_unshared_requests_get_their_own_positions():
+    async def scenario():
+        scheduler = JobScheduler(max_running=1)
+        gate = asyncio.Event()
+
+        async def run():
+            await gate.wait()
+
+        contexts = [Context(user_id) for user_id in (1, 2, 3)]
+        tasks = [asyncio.ensure_future(scheduler.run_for_context(ctx, run)) for ctx in contexts]
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+        assert [ctx.message.contents[-1] for ctx in contexts] == [
+            Config.LOADING_MESSAGE, position_message(1), position_message(2)
+        ]
+        gate.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
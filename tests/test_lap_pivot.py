@@ -0,0 +1,114 @@
+"""
+Tests for the driver by lap grid.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from services.lap_pivot import LapPivot
+
+
+def laps_table(rows):
+    """Build a laps table from (driver, lap, position, stint, compound, pit_in, pit_out) tuples."""
+    return pd.DataFrame({
+        'Driver': [row[0] for row in rows],
+        'LapNumber': pd.Series([row[1] for row in rows], dtype=float),
+        'Position': pd.Series([row[2] for row in rows], dtype=float),
+        'LapTime': pd.to_timedelta([90.0 + (row[1] or 0) for row in rows], unit='s'),
+        'Stint': [float(row[3]) for row in rows],
+        'Compound': [row[4] for row in rows],
+        'PitInTime': [pd.Timedelta(minutes=row[1]) if row[5] else pd.NaT for row in rows],
+        'PitOutTime': [pd.Timedelta(minutes=row[1]) if row[6] else pd.NaT for row in rows]
+    })
+
+
+@pytest.fixture
+def pivot():
+    """
+    Three drivers over five laps.
+
+    LEC pits at the end of lap 2; VER has no lap 3 in the data; HAM
+    retires after lap 2.
+    """
+    return LapPivot.from_laps(laps_table([
+        ('VER', 1, 1.0, 1, 'MEDIUM', False, True),
+        ('LEC', 1, 2.0, 1, 'MEDIUM', False, True),
+        ('HAM', 1, 3.0, 1, 'SOFT', False, True),
+        ('VER', 2, 1.0, 1, 'MEDIUM', False, False),
+        ('LEC', 2, 2.0, 1, 'MEDIUM', True, False),
+        ('HAM', 2, 3.0, 1, 'SOFT', False, False),
+        ('LEC', 3, 3.0, 2, 'HARD', False, True),
+        ('VER', 4, 1.0, 1, 'MEDIUM', False, False),
+        ('LEC', 4, 2.0, 2, 'HARD', False, False),
+        ('VER', 5, 1.0, 1, 'MEDIUM', False, False),
+        ('LEC', 5, 2.0, 2, 'HARD', False, False),
+        ('LEC', None, None, 2, 'HARD', False, False),
+    ]))
+
+
+def test_grid_layout(pivot):
+    assert pivot.drivers == ['VER', 'LEC', 'HAM']
+    assert pivot.lap_numbers.tolist() == [1, 2, 3, 4, 5]
+    assert pivot.lap_time.shape == (3, 5)
+    assert pivot.lap_time[1].tolist() == [91.0, 92.0, 93.0, 94.0, 95.0]
+
+
+def test_missing_laps_are_empty_cells(pivot):
+    # VER's lap 3 and HAM's laps after retiring
+    assert np.isnan(pivot.lap_time[0, 2])
+    assert np.isnan(pivot.position[2, 2:]).all()
+    assert np.isnan(pivot.stint[2, 2:]).all()
+    assert (pivot.compound[2, 2:] == -1).all()
+    assert not pivot.pit_in[2, 2:].any()
+
+
+def test_pit_flags(pivot):
+    assert pivot.pit_in.nonzero() == (np.array([1]), np.array([1]))
+    assert pivot.pit_out[:, 0].all()
+    assert pivot.pit_out[1].tolist() == [True, False, True, False, False]
+
+
+def test_requested_driver_order_comes_first():
+    laps = laps_table([
+        ('VER', 1, 1.0, 1, 'SOFT', False, False),
+        ('LEC', 1, 2.0, 1, 'SOFT', False, False),
+    ])
+
+    pivot = LapPivot.from_laps(laps, drivers=['LEC', 'NOR'])
+
+    # NOR has no laps but keeps the row it was given; VER is added at the end
+    assert pivot.drivers == ['LEC', 'NOR', 'VER']
+    assert np.isnan(pivot.lap_time[1]).all()
+    assert pivot.lap_time[2, 0] == 91.0
+
+
+def test_final_positions(pivot):
+    # HAM's position carries over from their last completed lap
+    assert pivot.final_positions().tolist() == [1.0, 2.0, 3.0]
+
+
+def test_final_positions_without_laps():
+    pivot = LapPivot.from_laps(laps_table([]), drivers=['VER'])
+
+    assert pivot.lap_numbers.tolist() == []
+    assert np.isnan(pivot.final_positions()).all()
+
+
+def test_stints(pivot):
+    stints = pivot.stints()
+
+    assert stints[['Driver', 'Stint', 'Compound', 'FirstLap', 'Laps']].values.tolist() == [
+        # The missing lap 3 splits VER's stint into two runs
+        ['VER', 1.0, 'MEDIUM', 1, 2],
+        ['VER', 1.0, 'MEDIUM', 4, 2],
+        ['LEC', 1.0, 'MEDIUM', 1, 2],
+        ['LEC', 2.0, 'HARD', 3, 3],
+        ['HAM', 1.0, 'SOFT', 1, 2],
+    ]
+    assert stints['Row'].tolist() == [0, 0, 1, 1, 2]
+
+
+def test_unknown_compound():
+    laps = laps_table([('VER', 1, 1.0, 1, None, False, False)])
+
+    assert LapPivot.from_laps(laps).stints()['Compound'].tolist() == ['UNKNOWN']
@@ -0,0 +1,89 @@
+"""
+Tests for the qualifying segment analysis.
+"""
+
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+from services.qualifying_service import QualifyingService, is_qualifying, label_segments, segments_reached
+from services.synthetic_session import SyntheticSession
+
+
+@pytest.fixture
+def service(repository):
+    """Qualifying service on the synthetic repository."""
+    return QualifyingService(repository=repository)
+
+
+def test_qualifying_session_names():
+    def session(name, year):
+        return SimpleNamespace(name=name, date=pd.Timestamp(year, 5, 1))
+
+    assert is_qualifying(session('Qualifying', 2024))
+    assert is_qualifying(session('Sprint Shootout', 2023))
+    assert is_qualifying(session('Sprint Qualifying', 2024))
+    # The 2021 sprint race was called 'Sprint Qualifying'
+    assert not is_qualifying(session('Sprint Qualifying', 2021))
+    assert not is_qualifying(session('Race', 2024))
+
+
+def test_segments_follow_fastf1(repository):
+    session = repository.get_session(2024, 'Monza', 'Q')
+    laps = repository.laps(session)
+
+    segment = label_segments(session, laps)
+
+    for number, segment_laps in enumerate(laps.split_qualifying_sessions(), start=1):
+        assert sorted(laps.index[segment == number]) == sorted(segment_laps.index)
+    assert [laps['Driver'][segment == number].nunique() for number in (1, 2, 3)] == [20, 15, 10]
+
+
+def test_race_sessions_are_rejected(repository):
+    session = repository.get_session(2024, 'Monza', 'R')
+
+    with pytest.raises(ValueError):
+        label_segments(session, repository.laps(session))
+
+
+def test_segments_reached_from_positions_alone():
+    results = pd.DataFrame({
+        'Abbreviation': [f"D{index:02}" for index in range(1, 23)],
+        'Position': np.arange(1.0, 23.0),
+        'Q1': pd.NaT, 'Q2': pd.NaT, 'Q3': pd.NaT
+    })
+
+    reached = segments_reached(results, 3)
+
+    # 22 cars: six out in Q1 and six in Q2
+    assert reached.value_counts().to_dict() == {3: 10, 2: 6, 1: 6}
+    assert reached['D16'] == 2 and reached['D17'] == 1
+
+
+def test_drivers_without_a_lap_in_their_last_segment(service):
+    session = SyntheticSession(2024, 'Monza', 'Q')
+    q3_start = session.session_status['Time'].iloc[4]
+    laps = session.laps
+    q2_time = session.results.set_index('Abbreviation').at['STR', 'Q2'].total_seconds()
+    # STR went through to Q3 but never left the garage
+    session._laps = laps[~(laps['Driver'].eq('STR') & (laps['LapStartTime'] > q3_start))]
+    session.results.loc[session.results['Abbreviation'] == 'STR', 'Q3'] = pd.NaT
+
+    analysis = service.analyze(session)
+    table = analysis.table
+
+    assert table.at['STR', 'Reached'] == 3
+    assert table.at['STR', 'Position'] == 10
+    assert np.isnan(table.at['STR', 'Gap'])
+    assert analysis.cutoffs['Q2'] == pytest.approx(q2_time)
+    assert (table['Reached'].value_counts().sort_index() == [5, 5, 10]).all()
+
+
+def test_classification_matches_the_results(service, repository):
+    session = repository.get_session(2024, 'Monza', 'Q')
+    results = session.results.sort_values('Position')
+
+    table = service.analyze(session).table
+
+    assert table.index.tolist() == results['Abbreviation'].tolist()
+    assert table['Position'].tolist() == list(range(1, 21))
@@ -0,0 +1,77 @@
+"""
+Tests that the service plots render identically when run concurrently.
+"""
+
+import hashlib
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from services.lap_query import LapQuery, LapQueryEngine
+from services.qualifying_service import QualifyingService
+from services.race_analysis_service import RaceAnalysisService
+from services.speed_map import SpeedMapEngine
+from services.telemetry_service import TelemetryService
+from utils import rendering
+from utils.rendering import init_render_worker
+
+RACE = (2024, 'Monza', 'R')
+QUALIFYING = (2024, 'Monza', 'Q')
+
+
+@pytest.fixture
+def plots(repository, renderer):
+    """Every service plot as a zero-argument function returning its image bytes."""
+    telemetry = TelemetryService(renderer=renderer, repository=repository)
+    race_analysis = RaceAnalysisService(renderer=renderer, repository=repository)
+    qualifying = QualifyingService(renderer=renderer, repository=repository)
+    race = repository.get_session(*RACE)
+    quali = repository.get_session(*QUALIFYING)
+    grid = SpeedMapEngine(repository=repository, bins=60).get(race)
+    query = LapQuery.parse(['VER', 'LEC', '10-30'])
+    laps = LapQueryEngine(repository=repository).run(race, query)
+    analysis = qualifying.analyze(quali)
+
+    return {
+        'speedtrace': lambda: telemetry.create_speed_trace_plot(quali, 'VER', 'LEC')[0],
+        'gearshifts': lambda: telemetry.create_gear_shifts_plot(quali, 'NOR')[0],
+        'speedmap': lambda: telemetry.create_speed_map_plot(race, grid, 'braking')[0],
+        'trackdominance': lambda: telemetry.create_track_dominance_plot(quali, ['VER', 'LEC', 'NOR'])[0],
+        'racepace': lambda: race_analysis.create_race_pace_plot(race)[0],
+        'teampace': lambda: race_analysis.create_team_pace_plot(race)[0],
+        'positions': lambda: race_analysis.create_positions_plot(race)[0],
+        'strategy': lambda: race_analysis.create_strategy_plot(race)[0],
+        'lapsections': lambda: race_analysis.create_lap_sections_plot(quali, ['VER', 'HAM'])[0],
+        'laptimes': lambda: race_analysis.create_lap_times_plot(race, laps, query)[0],
+        'quali': lambda: qualifying.create_qualifying_plot(quali, analysis)[0],
+    }
+
+
+def digest(image):
+    """Hash an encoded image."""
+    return hashlib.sha256(image).hexdigest()
+
+
+def test_concurrent_renders_match_serial_renders(plots):
+    expected = {name: digest(plot()) for name, plot in plots.items()}
+
+    # Every plot three times, interleaved, so different plots overlap in the pool
+    jobs = list(plots.items()) * 3
+    with ThreadPoolExecutor(max_workers=8, initializer=init_render_worker) as pool:
+        actual = list(pool.map(lambda job: (job[0], digest(job[1]())), jobs))
+
+    mismatches = sorted({name for name, value in actual if value != expected[name]})
+    assert mismatches == []
+
+
+def test_serial_renders_are_deterministic(plots):
+    # A plot that differs between serial runs would make the concurrency check meaningless
+    for name, plot in plots.items():
+        assert digest(plot()) == digest(plot()), name
+
+
+def test_render_style_setup_raises_no_deprecation_warnings(monkeypatch):
+    monkeypatch.setattr(rendering, '_style_applied', False)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', FutureWarning)
+        warnings.simplefilter('error', DeprecationWarning)
+        init_render_worker()
@@ -0,0 +1,67 @@
+"""
+Tests for loading and searching the schedule.
+"""
+
+import os
+from datetime import datetime
+import pytest
+from services.schedule_service import ScheduleService
+
+ROWS = [
+    "Bahrain,Sakhir,Bahrain Grand Prix,Qualifying,2024-03-01 16:00:00,Race,2024-03-02 15:00:00",
+    "Saudi Arabia,Jeddah,Saudi Arabian Grand Prix,Qualifying,2024-03-08 17:00:00,Race,2024-03-09 17:00:00",
+]
+
+
+@pytest.fixture
+def schedule_file(tmp_path):
+    """Path of a schedule file with two race weekends."""
+    path = tmp_path / 'sched.csv'
+    path.write_text('\n'.join(ROWS) + '\n')
+    return path
+
+
+def test_events_are_sorted_and_indexed(schedule_file):
+    service = ScheduleService(schedule_file=str(schedule_file))
+
+    events = service.load_schedule()
+
+    assert [event.start_time for event in events] == sorted(event.start_time for event in events)
+    assert len(service.get_events_by_race('bahrain grand prix')) == 2
+    assert len(service.get_events_by_country('Saudi Arabia')) == 2
+
+
+def test_start_times_outside_the_schedule_format_are_skipped(schedule_file, caplog):
+    # Offsets would make start times timezone-aware, which can't be compared with the naive ones
+    with open(schedule_file, 'a') as f:
+        f.write("Australia,Melbourne,Australian Grand Prix,Qualifying,2024-03-23T05:00:00+00:00,"
+                "Race,2024-03-24\n")
+    service = ScheduleService(schedule_file=str(schedule_file))
+
+    events = service.load_schedule()
+
+    assert len(events) == 4
+    assert all(event.start_time.tzinfo is None for event in events)
+    assert 'Error parsing date 2024-03-23T05:00:00+00:00' in caplog.text
+    assert service.get_last_ended_event(now=datetime(2024, 3, 30)).race_name == 'Saudi Arabian Grand Prix'
+
+
+def test_last_ended_event_and_completed_rounds(schedule_file):
+    service = ScheduleService(schedule_file=str(schedule_file))
+    # The Saudi race has started but not ended
+    now = datetime(2024, 3, 9, 17, 30)
+
+    assert service.get_last_ended_event(now=now).event_type == 'Qualifying'
+    assert service.get_last_ended_event(event_types={'Race'}, now=now).race_name == 'Bahrain Grand Prix'
+    assert service.get_completed_rounds(2024, now=now) == 1
+
+
+def test_schedule_is_reloaded_when_the_file_changes(schedule_file):
+    service = ScheduleService(schedule_file=str(schedule_file))
+    assert len(service.get_events_by_race('Bahrain Grand Prix')) == 2
+
+    schedule_file.write_text(ROWS[1] + '\n')
+    stat = os.stat(schedule_file)
+    os.utime(schedule_file, (stat.st_atime, stat.st_mtime + 10))
+
+    assert service.get_events_by_race('Bahrain Grand Prix') == []
@@ -0,0 +1,144 @@
+"""
+Tests for the speed map grid and engine.
+"""
+
+import numpy as np
+import pytest
+from services.speed_map import MIN_SAMPLES, SpeedGrid, SpeedMapEngine
+
+
+def histogram(grid, x, y, weights=None):
+    """Bin samples onto a grid's cells in one shot, indexed [row, column] like SpeedGrid."""
+    counts, _, _ = np.histogram2d(y, x, bins=[grid.y_edges, grid.x_edges], weights=weights)
+    return counts
+
+
+@pytest.fixture
+def samples():
+    """Random samples over a 1000 x 600 area."""
+    rng = np.random.default_rng(7)
+    count = 20000
+    return (rng.uniform(0, 1000, count), rng.uniform(0, 600, count),
+            rng.uniform(80, 330, count), (rng.random(count) < 0.2).astype(float))
+
+
+def test_chunks_match_one_histogram(samples):
+    x, y, speed, brake = samples
+    grid = SpeedGrid.for_bounds(0, 1000, 0, 600, 50)
+
+    for chunk in np.array_split(np.arange(len(x)), 7):
+        grid.add(x[chunk], y[chunk], speed[chunk], brake[chunk])
+
+    assert np.array_equal(grid.count, histogram(grid, x, y))
+    assert np.allclose(grid.speed_sum, histogram(grid, x, y, speed))
+    assert np.allclose(grid.speed_squares, histogram(grid, x, y, speed * speed))
+    assert np.allclose(grid.braking, histogram(grid, x, y, brake))
+
+
+def test_grid_covers_the_bounds():
+    grid = SpeedGrid.for_bounds(-500, 1500, 0, 600, 40)
+
+    left, right, bottom, top = grid.extent()
+
+    assert left == -500 and right >= 1500
+    assert bottom == 0 and top >= 600
+    # Square cells, 40 along the longer side plus the one holding the upper bound
+    assert grid.count.shape[1] == 41
+    assert grid.x_edges[1] - grid.x_edges[0] == grid.y_edges[1] - grid.y_edges[0]
+
+
+def test_samples_without_a_position_are_skipped():
+    grid = SpeedGrid.for_bounds(0, 10, 0, 10, 2)
+
+    grid.add(np.array([1.0, np.nan, 1.0]), np.array([1.0, 1.0, np.inf]), np.array([100.0, 100.0, 100.0]),
+             np.zeros(3))
+
+    assert grid.count.sum() == 1
+
+
+def test_cells_below_min_samples_are_blank():
+    grid = SpeedGrid.for_bounds(0, 10, 0, 10, 2)
+    # MIN_SAMPLES samples in the lower left cell, one fewer in the upper right
+    grid.add(np.full(MIN_SAMPLES, 1.0), np.full(MIN_SAMPLES, 1.0), np.full(MIN_SAMPLES, 100.0),
+             np.zeros(MIN_SAMPLES))
+    grid.add(np.full(MIN_SAMPLES - 1, 9.0), np.full(MIN_SAMPLES - 1, 9.0), np.full(MIN_SAMPLES - 1, 200.0),
+             np.zeros(MIN_SAMPLES - 1))
+
+    for metric in ('speed', 'braking', 'variance'):
+        values = grid.values(metric)
+        assert np.isfinite(values[0, 0])
+        assert np.isnan(values[1, 1])
+        assert np.isnan(values[0, 1]) and np.isnan(values[1, 0])
+
+
+def test_metrics():
+    grid = SpeedGrid.for_bounds(0, 10, 0, 10, 1)
+    speed = np.array([100.0, 200.0, 300.0, 240.0])
+    brake = np.array([1.0, 0.0, 0.0, 0.5])
+
+    grid.add(np.ones(4), np.ones(4), speed, brake)
+
+    assert grid.values('speed')[0, 0] == pytest.approx(speed.mean())
+    assert grid.values('braking')[0, 0] == pytest.approx(brake.mean())
+    assert grid.values('variance')[0, 0] == pytest.approx(speed.var())
+
+
+def test_unknown_metric():
+    with pytest.raises(ValueError):
+        SpeedGrid.for_bounds(0, 10, 0, 10, 1).values('throttle')
+
+
+def lap_samples(engine, session):
+    """Collect every valid lap's samples at once, positioned on the track."""
+    laps = engine._valid_laps(session)
+    xs, ys, speeds, brakes = [], [], [], []
+    for number in laps['DriverNumber'].unique():
+        car = engine.repository.driver_telemetry(session, number, 'car')
+        pos = engine.repository.driver_telemetry(session, number, 'pos')
+        car_time = car['SessionTime']
+        driver_laps = laps[laps['DriverNumber'] == number]
+        on_lap = np.zeros(len(car), dtype=bool)
+        for start, end in zip(driver_laps['LapStartTime'], driver_laps['Time']):
+            on_lap |= ((car_time >= start) & (car_time <= end)).to_numpy()
+
+        times = car_time[on_lap].to_numpy().astype('int64')
+        pos_time = pos['SessionTime'].to_numpy().astype('int64')
+        xs.append(np.interp(times, pos_time, pos['X'].to_numpy(dtype=float)))
+        ys.append(np.interp(times, pos_time, pos['Y'].to_numpy(dtype=float)))
+        speeds.append(car['Speed'].to_numpy(dtype=float)[on_lap])
+        brakes.append(car['Brake'].to_numpy(dtype=float)[on_lap])
+    return tuple(np.concatenate(values) for values in (xs, ys, speeds, brakes))
+
+
+def on_edges(grid, x, y):
+    """Count samples on a cell edge, which rounding may put in either neighbouring cell."""
+    cell = grid.x_edges[1] - grid.x_edges[0]
+    near = [np.abs(values - origin - np.round((values - origin) / cell) * cell) < 1e-6
+            for values, origin in ((x, grid.x_edges[0]), (y, grid.y_edges[0]))]
+    return int((near[0] | near[1]).sum())
+
+
+@pytest.mark.parametrize('chunk_laps', [1, 4, 1000])
+def test_engine_matches_a_one_shot_build(repository, chunk_laps):
+    session = repository.get_session(2024, 'Monza', 'Q')
+    engine = SpeedMapEngine(repository=repository, bins=60, chunk_laps=chunk_laps)
+
+    grid = engine.get(session)
+    x, y, speed, brake = lap_samples(engine, session)
+    count = histogram(grid, x, y)
+
+    assert grid.laps == len(engine._valid_laps(session))
+    assert grid.count.sum() == count.sum() == len(x) > 0
+    moved = grid.count != count
+    assert np.abs(grid.count - count).sum() <= 2 * on_edges(grid, x, y)
+    assert np.allclose(grid.speed_sum[~moved], histogram(grid, x, y, speed)[~moved])
+    assert np.allclose(grid.braking[~moved], histogram(grid, x, y, brake)[~moved])
+
+
+def test_engine_caches_grids(repository):
+    session = repository.get_session(2024, 'Monza', 'Q')
+    engine = SpeedMapEngine(repository=repository, bins=30, max_sessions=1)
+
+    assert engine.get(session) is engine.get(session)
+    engine.clear()
+    assert engine.memory_usage() == {'speed_maps': 0}
@@ -0,0 +1,117 @@
+"""
+Tests for the table-only standings parser.
+"""
+
+import glob
+import os
+import pytest
+from services import standings_parser
+from services.standings_parser import ConstructorRow, DriverRow, parse_constructor_table, parse_driver_table
+from tools.bench_standings_parser import FIXTURES_DIR, legacy_constructor_parse, legacy_driver_parse
+from tools.capture_standings_pages import CAPTURED_DIR
+
+PARSERS = {'drivers': parse_driver_table, 'team': parse_constructor_table}
+LEGACY_PARSERS = {'drivers': legacy_driver_parse, 'team': legacy_constructor_parse}
+
+# Real pages saved with tools/capture_standings_pages.py
+CAPTURED_PAGES = sorted(glob.glob(os.path.join(CAPTURED_DIR, '*.html')))
+
+
+def read(path):
+    """Read a saved page."""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def page_kind(path):
+    """Get 'drivers' or 'team' from a saved page's file name."""
+    return os.path.basename(path).split('_')[0]
+
+
+@pytest.fixture(params=['lxml', 'tokenizer'])
+def backend(request, monkeypatch):
+    """Run a test with lxml and with the stdlib fallback tokenizer."""
+    if request.param == 'lxml':
+        if standings_parser.etree is None:
+            pytest.skip('lxml is not installed')
+    else:
+        monkeypatch.setattr(standings_parser, 'etree', None)
+    return request.param
+
+
+def as_legacy(kind, rows):
+    """Reduce parsed rows to the fields the original parser returned."""
+    if kind == 'drivers':
+        return [(row.name, row.team, int(row.points)) for row in rows]
+    return [(row.team, int(row.points)) for row in rows]
+
+
+def test_driver_table(backend):
+    rows = parse_driver_table(read(os.path.join(FIXTURES_DIR, 'drivers_2024.html')))
+
+    assert len(rows) == 23
+    assert rows[0] == DriverRow(1, 'Max Verstappen', 'VER', 'NED', 'Red Bull Racing Honda RBPT', 437.0)
+    assert [row.position for row in rows] == list(range(1, 24))
+
+
+def test_constructor_table(backend):
+    rows = parse_constructor_table(read(os.path.join(FIXTURES_DIR, 'team_2024.html')))
+
+    assert len(rows) == 10
+    assert rows[0] == ConstructorRow(1, 'McLaren Mercedes', 666.0)
+
+
+def test_only_the_first_table_is_read(backend):
+    html = """
+    <html><body><script>var row = "<tr><td>9</td></tr>";</script>
+    <table>
+      <thead><tr><th>Pos</th><th>Team</th><th>Pts</th></tr></thead>
+      <tr><td>1</td><td>McLaren <span>Mercedes</span></td><td>666</td></tr>
+      <tr><td>EX</td><td>Ferrari</td><td></td></tr>
+      <tr><td>broken</td></tr>
+    </table>
+    <table><tr><td>3</td><td>Red Bull</td><td>589</td></tr></table>
+    </body></html>
+    """
+
+    assert parse_constructor_table(html) == [
+        ConstructorRow(1, 'McLaren Mercedes', 666.0),
+        ConstructorRow(None, 'Ferrari', 0.0),
+    ]
+
+
+def test_driver_without_a_code(backend):
+    html = ("<table><tr><td>1</td><td>Max <span>Verstappen</span></td><td>NED</td>"
+            "<td>Red Bull Racing</td><td>437</td></tr></table>")
+
+    assert parse_driver_table(html)[0].code is None
+    assert parse_driver_table(html)[0].name == 'Max Verstappen'
+
+
+@pytest.mark.parametrize('kind', ['drivers', 'team'])
+def test_fixtures_match_the_original_parser(kind):
+    pytest.importorskip('bs4')
+    html = read(os.path.join(FIXTURES_DIR, f"{kind}_2024.html"))
+
+    legacy = [tuple(field.strip() if isinstance(field, str) else field for field in row)
+              for row in LEGACY_PARSERS[kind](html)]
+    assert as_legacy(kind, PARSERS[kind](html)) == legacy
+
+
+@pytest.mark.skipif(not CAPTURED_PAGES, reason='no captured pages; run python -m tools.capture_standings_pages')
+@pytest.mark.parametrize('path', CAPTURED_PAGES, ids=os.path.basename)
+def test_captured_pages(path, monkeypatch):
+    html = read(path)
+    kind = page_kind(path)
+    rows = PARSERS[kind](html)
+
+    positions = [row.position for row in rows if row.position is not None]
+    assert len(rows) >= 10
+    assert positions == list(range(1, len(positions) + 1))
+    points = [row.points for row in rows if row.position is not None]
+    assert points == sorted(points, reverse=True)
+    if kind == 'drivers':
+        assert all(row.code for row in rows)
+
+    monkeypatch.setattr(standings_parser, 'etree', None)
+    assert PARSERS[kind](html) == rows
@@ -0,0 +1,68 @@
+"""
+Tests for the mini-sector analysis and the track dominance plot.
+"""
+
+import io
+import numpy as np
+import pandas as pd
+import pytest
+import fastf1.plotting
+from PIL import Image
+from services.telemetry_service import MiniSectorAnalyzer, TelemetryService
+
+
+def lap(driver, speeds):
+    """Telemetry of a 4 km lap driven at a constant speed (m/s) in each kilometre."""
+    distance = np.arange(0, 4000, 10.0)
+    speed = np.repeat(speeds, len(distance) // len(speeds))
+    seconds = np.concatenate([[0], np.cumsum(np.diff(distance) / speed[1:])])
+    return pd.DataFrame({'Driver': driver, 'Distance': distance, 'Time': pd.to_timedelta(seconds, unit='s')})
+
+
+@pytest.fixture
+def laps():
+    """Two laps: AAA is faster in the first half, BBB in the second."""
+    return [lap('AAA', [80, 80, 60, 60]), lap('BBB', [70, 70, 75, 75])]
+
+
+def test_fastest_driver_per_mini_sector(laps):
+    analyzer = MiniSectorAnalyzer(pd.concat(laps, ignore_index=True), num_sectors=4)
+    analyzer.create_mini_sectors()
+
+    fastest = analyzer.find_fastest_drivers()
+
+    assert fastest['MiniSector'].tolist() == [0, 1, 2, 3]
+    assert fastest['Driver'].tolist() == ['AAA', 'AAA', 'BBB', 'BBB']
+
+
+def test_list_of_driver_telemetry_is_still_accepted(laps):
+    analyzer = MiniSectorAnalyzer(pd.concat(laps, ignore_index=True), num_sectors=4)
+    analyzer.create_mini_sectors()
+
+    from_list = analyzer.find_fastest_drivers(laps)
+
+    assert from_list.reset_index(drop=True).equals(analyzer.find_fastest_drivers().reset_index(drop=True))
+
+
+def test_time_spent_adds_up_to_the_lap_time(laps):
+    analyzer = MiniSectorAnalyzer(pd.concat(laps, ignore_index=True), num_sectors=4)
+    telemetry = analyzer.create_mini_sectors()
+    elapsed = telemetry.groupby('Driver')['Time'].diff()
+
+    per_driver = elapsed.groupby(telemetry['Driver']).sum()
+
+    assert per_driver['AAA'] == laps[0]['Time'].iloc[-1]
+
+
+def test_track_dominance_is_coloured_by_both_drivers(repository, renderer):
+    session = repository.get_session(2024, 'Monza', 'Q')
+    service = TelemetryService(renderer=renderer, repository=repository)
+    colors = fastf1.plotting.get_driver_color_mapping(session=session)
+
+    image, _, _ = service.create_track_dominance_plot(session, ['VER', 'LEC'], 20)
+
+    pixels = np.asarray(Image.open(io.BytesIO(image)).convert('RGB')).astype(int)
+    for driver in ('VER', 'LEC'):
+        rgb = np.array([int(colors[driver][index:index + 2], 16) for index in (1, 3, 5)])
+        # Far more than the legend: the driver owns part of the track
+        assert (np.abs(pixels - rgb).sum(axis=2) < 30).sum() > 1000
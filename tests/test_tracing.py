@@ -0,0 +1,78 @@
+"""
+Tests for request ID propagation into executor threads.
+"""
+
+import asyncio
+from services.standings_service import StandingsService
+from utils.tracing import bind_request, current_request_id, request_id_var, run_in_executor
+
+
+class StubHttpClient:
+    """HTTP client that returns the same page for every URL."""
+
+    async def get(self, url):
+        return b'<table></table>'
+
+
+class StubEngine:
+    """Standings engine that records the request ID its calls run under."""
+
+    def __init__(self):
+        self.request_ids = []
+
+    def update(self):
+        self.request_ids.append(current_request_id())
+        return 0
+
+    def pending_sessions(self):
+        self.request_ids.append(current_request_id())
+        return [(1, 'Race')]
+
+    def is_due(self, key):
+        return True
+
+
+def in_request(coroutine_function, request_id='req-1'):
+    """Run a coroutine function as part of a request."""
+    async def run():
+        with bind_request(request_id):
+            return await coroutine_function()
+    return asyncio.run(run())
+
+
+def test_executor_calls_keep_the_request_id():
+    def change_request():
+        seen = current_request_id()
+        request_id_var.set('changed')
+        return seen
+
+    async def call():
+        seen = await run_in_executor(change_request)
+        return seen, current_request_id()
+
+    # The call sees the caller's ID, and its changes stay in its own copy
+    assert in_request(call) == ('req-1', 'req-1')
+
+
+def test_standings_parsing_keeps_the_request_id():
+    service = StandingsService(http_client=StubHttpClient(), store=object(), schedule_service=object())
+
+    async def fetch():
+        return await service._fetch_and_parse('http://stub/drivers.html', lambda html: current_request_id())
+
+    assert in_request(fetch) == 'req-1'
+
+
+def test_standings_engine_calls_keep_the_request_id():
+    service = StandingsService(http_client=StubHttpClient(), store=object(), schedule_service=object())
+    engine = StubEngine()
+    service._engines[2024] = engine
+
+    async def fold():
+        # Finds a pending session and folds it in the background
+        assert await service._compute_locally(2024, 'drivers') == []
+        await service._backfills[2024]
+
+    in_request(fold)
+
+    assert engine.request_ids == ['req-1', 'req-1']
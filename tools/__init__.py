@@ -0,0 +1,5 @@
+"""
+Developer tools (benchmarks and diagnostics) for the F1 Discord Bot.
+
+Run them from the repository root, e.g. ``python -m tools.bench_standings_parser``.
+"""
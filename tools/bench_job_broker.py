@@ -0,0 +1,94 @@
+"""
+Measures job throughput through the SQLite job broker with 1..N worker processes.
+
+Usage:
+    python -m tools.bench_job_broker [--jobs N] [--workers 1,2,4] [--work render|sleep]
+
+'render' jobs draw a synthetic speed trace (CPU bound, scales with cores);
+'sleep' jobs stand in for waiting on FastF1 downloads (I/O bound).
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+from services.job_broker import JobBroker, JobSpec
+from services.job_executor import BrokerExecutor
+from services.job_handlers import job_handler
+from tools.render_concurrency_check import draw_trace
+from utils.rendering import Renderer
+from worker import run_worker
+
+
+@job_handler('bench_render')
+def bench_render(seed, profile=None):
+    """Render a synthetic plot."""
+    return Renderer().render(draw_trace, seed, profile=profile)
+
+
+@job_handler('bench_sleep')
+def bench_sleep(seconds, profile=None):
+    """Wait without using the CPU."""
+    time.sleep(seconds)
+    return b''
+
+
+async def submit_all(broker, specs):
+    """Submit every job at once and wait for all results."""
+    executor = BrokerExecutor(broker, poll_interval=0.02)
+    return await asyncio.gather(*(executor.run(spec) for spec in specs))
+
+
+def run(db_path, workers, specs):
+    """Run the jobs with a number of worker processes and return the elapsed time."""
+    # Workers fork from this process, so they inherit the benchmark handlers
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(f"bench-{index}", db_path, 0.02), daemon=True)
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    broker = JobBroker(db_path)
+    try:
+        start = time.perf_counter()
+        results = asyncio.run(submit_all(broker, specs))
+        elapsed = time.perf_counter() - start
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+        broker.close()
+
+    assert len(results) == len(specs)
+    return elapsed
+
+
+def main():
+    """Run the benchmark for each worker count."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--jobs', type=int, default=32, help='Jobs per run')
+    parser.add_argument('--workers', default='1,2,4', help='Comma-separated worker process counts')
+    parser.add_argument('--work', choices=('render', 'sleep'), default='render', help='Job type')
+    args = parser.parse_args()
+
+    if args.work == 'render':
+        specs = [JobSpec('bench_render', {'seed': index % 7}) for index in range(args.jobs)]
+    else:
+        specs = [JobSpec('bench_sleep', {'seconds': 0.2}) for _ in range(args.jobs)]
+
+    print(f"{args.jobs} {args.work} jobs, {os.cpu_count()} CPUs")
+    baseline = None
+    with tempfile.TemporaryDirectory() as directory:
+        for workers in (int(count) for count in args.workers.split(',')):
+            elapsed = run(os.path.join(directory, f"bench_{workers}.sqlite3"), workers, specs)
+            throughput = args.jobs / elapsed
+            baseline = baseline or throughput
+            print(f"{workers:>3} workers: {elapsed:6.2f}s  {throughput:6.1f} jobs/s  "
+                  f"({throughput / baseline:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
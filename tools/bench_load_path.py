@@ -0,0 +1,119 @@
+"""
+Measures the full load path of get_session and the standings commands
+against recorded HTTP responses.
+
+Usage:
+    python -m tools.bench_load_path record [--session 2024,Monza,Q] [--year 2024]
+    python -m tools.bench_load_path replay [--session 2024,Monza,Q] [--year 2024] [--repeat 5]
+
+'record' runs the loads once against the real servers (needs network
+access) and saves every response to the HTTP archive. 'replay' starts the
+stand-in server in this process and repeats the loads with an empty
+FastF1 cache each time, so every run downloads and parses the same data
+without touching the network. FastF1's own request rate limiting still
+applies, as it does in production.
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+import fastf1
+from config import Config
+from services.http_archive import HttpArchive, configure_fastf1_http, create_replay_app
+from services.http_client import HttpClient
+from services.standings_service import StandingsService
+from services.standings_store import StandingsStore
+
+
+def start_replay_server(archive, latency):
+    """Run the replay server on a background thread until the process exits."""
+    from aiohttp import web
+
+    address = urlsplit(Config.HTTP_REPLAY_URL)
+    started = threading.Event()
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        runner = web.AppRunner(create_replay_app(archive, latency))
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, address.hostname, address.port).start())
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    started.wait()
+
+
+def load_session(year, race, session_type):
+    """Load a session with an empty FastF1 cache."""
+    fastf1.get_session(year, race, session_type).load()
+
+
+async def load_standings(year, mode, archive, store_dir):
+    """Get both standings tables without stored copies."""
+    service = StandingsService(HttpClient(mode=mode, archive=archive), store=StandingsStore(store_dir))
+    try:
+        drivers = await service.get_driver_standings(year)
+        constructors = await service.get_constructor_standings(year)
+    finally:
+        await service.close()
+    return len(drivers), len(constructors)
+
+
+def run_once(args, mode, archive):
+    """Run every load once with fresh caches and return the timings."""
+    with tempfile.TemporaryDirectory() as cache_dir, tempfile.TemporaryDirectory() as store_dir:
+        fastf1.Cache.enable_cache(cache_dir)
+        configure_fastf1_http(mode, archive)
+
+        timings = {}
+        year, race, session_type = args.session.split(',')
+        start = time.perf_counter()
+        load_session(int(year), race, session_type)
+        timings['get_session'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        counts = asyncio.run(load_standings(args.year, mode, archive, store_dir))
+        timings['standings'] = time.perf_counter() - start
+        if not all(counts):
+            print(f"  warning: standings came back empty {counts}")
+        return timings
+
+
+def main():
+    """Record or replay the load path."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('mode', choices=('record', 'replay'))
+    parser.add_argument('--session', default='2024,Monza,Q', help='year,race,session to load')
+    parser.add_argument('--year', type=int, default=2024, help='Standings season')
+    parser.add_argument('--repeat', type=int, default=5, help='Replay runs')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Replay server delay per response')
+    parser.add_argument('--archive', default=Config.HTTP_ARCHIVE_DIR, help='Archive directory')
+    args = parser.parse_args()
+
+    archive = HttpArchive(args.archive)
+    if args.mode == 'record':
+        timings = run_once(args, 'record', archive)
+        print(f"Recorded {len(archive.entries())} responses to {args.archive}")
+        for name, seconds in timings.items():
+            print(f"  live {name}: {seconds:.2f}s")
+        return
+
+    if not archive.entries():
+        parser.error(f"No recordings in {args.archive}; run with 'record' first")
+    start_replay_server(archive, args.latency_ms / 1000)
+
+    runs = [run_once(args, 'replay', archive) for _ in range(args.repeat)]
+    print(f"{args.repeat} replay runs from {len(archive.entries())} recorded responses")
+    for name in runs[0]:
+        values = [run[name] for run in runs]
+        print(f"  {name:<12} min {min(values):6.2f}s  median {statistics.median(values):6.2f}s  "
+              f"max {max(values):6.2f}s")
+
+
+if __name__ == '__main__':
+    main()
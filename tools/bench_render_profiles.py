@@ -0,0 +1,44 @@
+"""
+Benchmark reporting encoded size and encode time for each render profile.
+
+Usage:
+    python -m tools.bench_render_profiles [--repeat N]
+"""
+
+import argparse
+import time
+from utils.figure_manager import FigureManager
+from utils.render_profiles import load_profiles
+from utils.rendering import init_render_worker
+from tools.render_concurrency_check import draw_trace, draw_map
+
+
+def main():
+    """Encode representative plots with every profile and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=5, help='Encodes per profile and plot')
+    args = parser.parse_args()
+
+    init_render_worker()
+    figures = FigureManager()
+    profiles = load_profiles()
+
+    print(f"{'plot':<8} {'profile':<10} {'format':<6} {'dpi':>4} {'KiB':>9} {'encode ms':>10}")
+    for plot_name, draw in (('trace', draw_trace), ('map', draw_map)):
+        with figures.figure() as fig:
+            draw(fig, 3)
+            fig.canvas.draw()  # Lay out once so only encoding is timed
+
+            for name, profile in profiles.items():
+                profile.encode(fig)  # Warm up
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    data = profile.encode(fig)
+                elapsed = (time.perf_counter() - start) / args.repeat
+
+                print(f"{plot_name:<8} {name:<10} {profile.fmt:<6} {profile.dpi:>4} "
+                      f"{len(data) / 1024:>9.1f} {elapsed * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
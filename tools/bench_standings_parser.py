@@ -0,0 +1,107 @@
+"""
+Micro-benchmark comparing the table-only standings parser with the
+original full-page BeautifulSoup approach.
+
+Usage:
+    python -m tools.bench_standings_parser [--repeat N]
+
+The legacy parser needs beautifulsoup4, from requirements-dev.txt.
+"""
+
+import argparse
+import os
+import timeit
+import tracemalloc
+from services.standings_parser import parse_driver_table, parse_constructor_table, etree
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def legacy_driver_parse(html):
+    """The original drivers' page parsing (full document, html.parser)."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    rows = soup.find("table").find_all("tr")[1:]
+    result = []
+    for row in rows:
+        columns = row.find_all("td")
+        result.append((
+            columns[1].get_text().strip()[:-3],
+            columns[3].get_text().strip(),
+            int(float(columns[4].get_text().strip()))
+        ))
+    return result
+
+
+def legacy_constructor_parse(html):
+    """The original constructors' page parsing (full document, html.parser)."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    rows = soup.find("table").find_all("tr")[1:]
+    result = []
+    for row in rows:
+        columns = row.find_all("td")
+        result.append((columns[1].get_text().strip(), int(float(columns[2].get_text().strip()))))
+    return result
+
+
+def measure(func, html, repeat):
+    """
+    Measure the mean run time and peak allocations of a parse function.
+
+    Args:
+        func: The parse function
+        html: The page body
+        repeat: Number of timed runs
+
+    Returns:
+        tuple: (mean milliseconds, peak KiB allocated)
+    """
+    func(html)  # Warm up imports and caches
+    seconds = timeit.timeit(lambda: func(html), number=repeat) / repeat
+
+    tracemalloc.start()
+    func(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return seconds * 1000, peak / 1024
+
+
+def main():
+    """Run the benchmark and print a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=200, help='Timed runs per parser')
+    args = parser.parse_args()
+
+    try:
+        import bs4  # noqa: F401
+        has_bs4 = True
+    except ImportError:
+        has_bs4 = False
+        print("beautifulsoup4 is not installed; skipping the legacy parser")
+
+    cases = [
+        ('drivers_2024.html', legacy_driver_parse, parse_driver_table),
+        ('team_2024.html', legacy_constructor_parse, parse_constructor_table),
+    ]
+
+    backend = 'lxml' if etree is not None else 'html.parser tokenizer'
+    print(f"Table-only backend: {backend}")
+    print(f"{'fixture':<20} {'parser':<12} {'mean ms':>10} {'peak KiB':>10}")
+
+    for fixture, legacy, fast in cases:
+        with open(os.path.join(FIXTURES_DIR, fixture), 'rb') as f:
+            html = f.read()
+
+        runs = [('table-only', fast)]
+        if has_bs4:
+            runs.insert(0, ('legacy', legacy))
+
+        for label, func in runs:
+            ms, kib = measure(func, html, args.repeat)
+            print(f"{fixture:<20} {label:<12} {ms:>10.3f} {kib:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
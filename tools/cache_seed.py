@@ -0,0 +1,51 @@
+"""
+Exports, imports and prunes the FastF1 cache.
+
+Usage:
+    python -m tools.cache_seed status
+    python -m tools.cache_seed export seed.tar.gz [--seasons 2024,2025]
+    python -m tools.cache_seed import seed.tar.gz
+    python -m tools.cache_seed prune
+
+Export a seed bundle on a node with a warm cache and import it on a new
+node before starting the bot, so the first commands don't have to
+download their sessions.
+"""
+
+import argparse
+from services.cache_manager import cache_manager
+
+
+def main():
+    """Run the requested action."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('action', choices=('status', 'export', 'import', 'prune'))
+    parser.add_argument('bundle', nargs='?', help='Seed bundle path (.tar.gz) for export and import')
+    parser.add_argument('--seasons', help='Comma-separated years to export (default: all)')
+    args = parser.parse_args()
+
+    if args.action in ('export', 'import') and not args.bundle:
+        parser.error(f"{args.action} needs a bundle path")
+
+    if args.action == 'export':
+        seasons = [int(season) for season in args.seasons.split(',')] if args.seasons else None
+        count = cache_manager.export_bundle(args.bundle, seasons)
+        print(f"Exported {count} sessions to {args.bundle}")
+    elif args.action == 'import':
+        count = cache_manager.import_bundle(args.bundle)
+        print(f"Imported {count} sessions into {cache_manager.cache_dir}")
+    elif args.action == 'prune':
+        evicted = cache_manager.enforce_budget()
+        print(f"Evicted {len(evicted)} sessions")
+        for path in evicted:
+            print(f"  {path}")
+
+    usage = cache_manager.usage()
+    print(f"{cache_manager.cache_dir}: {usage['total_bytes'] / 1024 ** 2:.1f} MB of "
+          f"{usage['max_bytes'] / 1024 ** 2:.0f} MB, {usage['sessions']} sessions, "
+          f"pinned seasons {', '.join(map(str, cache_manager.pinned()))} "
+          f"({usage['pinned_bytes'] / 1024 ** 2:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Saves the live formula1.com standings pages as parser test fixtures.
+
+Usage:
+    python -m tools.capture_standings_pages [--years 2023,2024]
+
+Pages are written to tools/fixtures/captured/ as drivers_<year>.html and
+team_<year>.html. tests/test_standings_parser.py checks the parser against
+every page found there, so commit new captures when the site's markup changes.
+"""
+
+import argparse
+import os
+import requests
+from config import Config
+
+CAPTURED_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'captured')
+
+PAGES = ('drivers', 'team')
+
+
+def main():
+    """Download and save the pages."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--years', default='2024', help='Comma-separated seasons to capture')
+    args = parser.parse_args()
+
+    os.makedirs(CAPTURED_DIR, exist_ok=True)
+    for year in args.years.split(','):
+        for page in PAGES:
+            url = f"{Config.F1_RESULTS_URL}/{year.strip()}/{page}.html"
+            response = requests.get(url, timeout=30)
+            response.raise_for_status()
+            path = os.path.join(CAPTURED_DIR, f"{page}_{year.strip()}.html")
+            with open(path, 'wb') as f:
+                f.write(response.content)
+            print(f"{url} -> {path} ({len(response.content) / 1024:.0f} KiB)")
+
+
+if __name__ == '__main__':
+    main()
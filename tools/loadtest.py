@@ -0,0 +1,343 @@
+"""
+Load test that drives the command cogs with simulated Discord traffic.
+
+Usage:
+    python -m tools.loadtest [--mix post-quali] [--rate 2] [--duration 60]
+                             [--data synthetic|live] [--event 2024,Monza]
+                             [--mix-file mixes.json] [--tracemalloc]
+
+TelemetryCog, RaceAnalysisCog and InfoCog are created with a stand-in bot
+and called with stand-in command contexts, so each command runs its normal
+path (scheduler, deduplication, executor, session cache, rendering) without
+a Discord connection. Commands arrive at random at the target rate whether
+or not earlier ones have finished, as users do, and the report gives
+throughput, latency percentiles per command, event loop lag and peak memory.
+
+With --data synthetic (the default), sessions come from
+services/synthetic_session.py instead of FastF1, so no session data is
+downloaded. Standings commands still go through HTTP and follow HTTP_MODE;
+pass --replay to serve them from the HTTP archive.
+
+A mix file is JSON mapping mix names to lists of [weight, command, args].
+In args, {year} and {race} are replaced with the --event values and each
+{driver} with a different driver.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import time
+import tracemalloc
+from collections import defaultdict
+from types import SimpleNamespace
+from commands.info import InfoCog
+from commands.race_analysis import RaceAnalysisCog
+from commands.telemetry import TelemetryCog
+from config import Config
+from services.job_executor import LocalExecutor, job_executor
+from services.session_repository import SyntheticBackend, session_repository
+from services.synthetic_session import GRID
+from utils.job_scheduler import job_scheduler
+from utils.loop_watchdog import loop_watchdog
+from utils.memory_profiler import format_bytes, memory_profiler
+from utils.metrics import metrics
+from utils.tracing import bind_request, event, new_request_id
+from tools.soak_figures import rss_mib
+from tools.trace_summary import percentile
+
+MIXES = {
+    # Everyone comparing laps in the hour after qualifying
+    'post-quali': [
+        (30, 'speedtrace', '{year} {race} Q {driver} {driver}'),
+        (20, 'trackdominance', '{year} {race} Q {driver} {driver} {driver}'),
+        (15, 'gearshifts', '{year} {race} Q {driver}'),
+        (15, 'lapsections', '{year} {race} Q {driver} {driver}'),
+        (10, 'f1', ''),
+        (10, 'drivers', '{year}')
+    ],
+    'post-race': [
+        (25, 'racepace', '{year} {race}'),
+        (20, 'teampace', '{year} {race}'),
+        (20, 'speedtrace', '{year} {race} R {driver} {driver}'),
+        (10, 'lapsections', '{year} {race} R {driver} {driver}'),
+        (15, 'drivers', '{year}'),
+        (10, 'constructors', '{year}')
+    ],
+    'info': [
+        (40, 'f1', ''),
+        (30, 'drivers', '{year}'),
+        (20, 'constructors', '{year}'),
+        (10, 'bhelp', '')
+    ]
+}
+
+
+class FakeBot:
+    """
+    Stand-in for the Discord bot, holding the cogs under test.
+    """
+    def __init__(self):
+        """Initialize the bot with the cogs under test."""
+        self.cogs = [TelemetryCog(self), RaceAnalysisCog(self), InfoCog(self)]
+        self.commands = {command.name: (cog, command)
+                         for cog in self.cogs for command in cog.get_commands()}
+
+    async def close(self):
+        """Unload the cogs."""
+        for cog in self.cogs:
+            unload = getattr(cog, 'cog_unload', None)
+            if unload is not None:
+                await unload()
+
+
+class FakeMessage:
+    """
+    Stand-in for a sent Discord message.
+    """
+    def __init__(self, ctx):
+        """
+        Initialize the message.
+
+        Args:
+            ctx: The FakeContext that sent it
+        """
+        self.ctx = ctx
+
+    async def edit(self, content=None, **kwargs):
+        """Record an edit, as the queue position updates do."""
+        self.ctx.edits += 1
+        await asyncio.sleep(self.ctx.send_latency)
+
+
+class FakeContext:
+    """
+    Stand-in for a command context that records what the command sends.
+    """
+    def __init__(self, command, text, user_id, guild_id, send_latency):
+        """
+        Initialize the context.
+
+        Args:
+            command: The discord.py Command being invoked
+            text: The message text that invoked it
+            user_id: ID of the simulated user
+            guild_id: ID of the simulated guild
+            send_latency: Seconds each send or edit takes, imitating the Discord API
+        """
+        self.command = command
+        self.author = SimpleNamespace(id=user_id)
+        self.guild = SimpleNamespace(id=guild_id, shard_id=0)
+        self.message = SimpleNamespace(content=text)
+        self.send_latency = send_latency
+        self.replies = 0
+        self.errors = 0
+        self.edits = 0
+
+    async def send(self, content=None, file=None, embed=None, **kwargs):
+        """
+        Record a sent message.
+
+        Returns:
+            FakeMessage: The sent message
+        """
+        if content and content.startswith(('An error occurred', 'Could not')):
+            self.errors += 1
+        elif content != Config.LOADING_MESSAGE or file is not None or embed is not None:
+            self.replies += 1
+        await asyncio.sleep(self.send_latency)
+        return FakeMessage(self)
+
+    def outcome(self):
+        """
+        Get how the command ended.
+
+        Returns:
+            str: 'ok', 'error' or 'rejected' (no reply, e.g. a full queue)
+        """
+        if self.errors:
+            return 'error'
+        return 'ok' if self.replies else 'rejected'
+
+
+def build_args(template, year, race, rng, drivers):
+    """
+    Fill in a mix entry's argument template.
+
+    Args:
+        template: Arguments with {year}, {race} and {driver} placeholders
+        year: Event year
+        race: Event name
+        rng: random.Random to pick drivers with
+        drivers: Driver codes, most popular first
+
+    Returns:
+        list: The command arguments
+    """
+    # Popular drivers are asked for far more often, as in the real channels
+    weights = [1 / (rank + 1) for rank in range(len(drivers))]
+    picked = []
+    args = []
+    for part in template.split():
+        if part == '{driver}':
+            choice = rng.choices([d for d in drivers if d not in picked],
+                                 [w for d, w in zip(drivers, weights) if d not in picked])[0]
+            picked.append(choice)
+            args.append(choice)
+        else:
+            args.append(part.format(year=year, race=race))
+    return args
+
+
+async def invoke(bot, name, args, arrival, index, send_latency, results):
+    """Run one simulated command and record its latency and outcome."""
+    cog, command = bot.commands[name]
+    text = f"{Config.COMMAND_PREFIX}{name} {' '.join(args)}".strip()
+    ctx = FakeContext(command, text, user_id=1000 + index % 500, guild_id=1 + index % 20,
+                      send_latency=send_latency)
+    with bind_request(new_request_id()):
+        try:
+            await command.callback(cog, ctx, *args)
+            status = ctx.outcome()
+        except Exception as e:
+            # Error handlers are not invoked for direct callback calls
+            ctx.errors += 1
+            status = f"error: {e}"
+        latency = time.perf_counter() - arrival
+        event('command', command=name, message=text[:200], status='ok' if status == 'ok' else 'error',
+              duration_ms=round(latency * 1000, 1))
+    results[name].append((latency, status.split(':')[0]))
+
+
+async def run(args, mix):
+    """Generate traffic for the test duration and wait for it to drain."""
+    bot = FakeBot()
+    for _, name, _ in mix:
+        if name not in bot.commands:
+            raise SystemExit(f"Unknown command '{name}' in mix")
+
+    year, race = args.event.split(',')
+    drivers = args.drivers.split(',')
+    rng = random.Random(args.seed)
+    weights = [weight for weight, _, _ in mix]
+    results = defaultdict(list)
+    loop_watchdog.interval = args.lag_interval
+    loop_watchdog.start()
+
+    tasks = []
+    start = time.perf_counter()
+    next_arrival = start
+    index = 0
+    while next_arrival - start < args.duration:
+        await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+        _, name, template = rng.choices(mix, weights)[0]
+        tasks.append(asyncio.ensure_future(invoke(
+            bot, name, build_args(template, year, race, rng, drivers),
+            next_arrival, index, args.send_latency_ms / 1000, results
+        )))
+        index += 1
+        next_arrival += rng.expovariate(args.rate)
+
+    done, pending = await asyncio.wait(tasks, timeout=args.drain) if tasks else (set(), set())
+    elapsed = time.perf_counter() - start
+    loop_watchdog.stop()
+    await bot.close()
+    return results, elapsed, len(pending)
+
+
+def report(results, elapsed, unfinished):
+    """Print the latency, throughput, loop lag and memory figures."""
+    print(f"\n{'command':<15} {'sent':>5} {'ok':>5} {'err':>5} {'rej':>5} "
+          f"{'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'max s':>7}")
+    everything = []
+    for name in sorted(results):
+        rows = results[name]
+        everything.extend(rows)
+        latencies = sorted(latency for latency, _ in rows)
+        counts = {status: sum(1 for _, s in rows if s == status) for status in ('ok', 'error', 'rejected')}
+        print(f"{name:<15} {len(rows):>5} {counts['ok']:>5} {counts['error']:>5} {counts['rejected']:>5} "
+              f"{percentile(latencies, 0.5):>7.2f} {percentile(latencies, 0.95):>7.2f} "
+              f"{percentile(latencies, 0.99):>7.2f} {latencies[-1]:>7.2f}")
+
+    latencies = sorted(latency for latency, _ in everything)
+    ok = sum(1 for _, status in everything if status == 'ok')
+    if latencies:
+        print(f"{'all':<15} {len(everything):>5} {ok:>5} {'':>5} {'':>5} "
+              f"{percentile(latencies, 0.5):>7.2f} {percentile(latencies, 0.95):>7.2f} "
+              f"{percentile(latencies, 0.99):>7.2f} {latencies[-1]:>7.2f}")
+    if unfinished:
+        print(f"{unfinished} commands still running when the drain timeout expired (not counted)")
+
+    lag = loop_watchdog.lag_percentiles()
+    print(f"\nthroughput: {ok / elapsed:.2f} replies/s over {elapsed:.1f}s")
+    print(f"event loop lag: p50 {lag.get('p50_ms', 0)}ms  p99 {lag.get('p99_ms', 0)}ms  "
+          f"max {lag.get('max_ms', 0)}ms, {metrics.get('loop.stalls')} stalls over "
+          f"{loop_watchdog.threshold * 1000:.0f}ms (stacks in the log)")
+    # ru_maxrss is in KiB on Linux
+    print(f"memory: rss now {rss_mib():.0f} MiB, peak {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB",
+          end='')
+    if tracemalloc.is_tracing():
+        print(f", python heap peak {tracemalloc.get_traced_memory()[1] / (1024 * 1024):.0f} MiB")
+    else:
+        print()
+    print("caches: " + ', '.join(f"{name} {format_bytes(size)}"
+                                 for name, size in sorted(memory_profiler.cache_footprints().items())))
+    print(f"scheduler: {job_scheduler.stats()}")
+
+
+def main():
+    """Run the load test."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--mix', default='post-quali', help='Command mix to replay')
+    parser.add_argument('--mix-file', help='JSON file with more mixes')
+    parser.add_argument('--rate', type=float, default=1.0, help='Commands per second')
+    parser.add_argument('--duration', type=float, default=60.0, help='Seconds of traffic to generate')
+    parser.add_argument('--drain', type=float, default=300.0, help='Seconds to wait for commands still running')
+    parser.add_argument('--data', choices=('synthetic', 'live'), default='synthetic', help='Session data source')
+    parser.add_argument('--event', default='2024,Monza', help='year,race the commands ask about')
+    parser.add_argument('--drivers', default=','.join(abbreviation for abbreviation, *_ in GRID),
+                        help='Driver codes to pick from, most popular first')
+    parser.add_argument('--send-latency-ms', type=float, default=50.0, help='Time each Discord send takes')
+    parser.add_argument('--lag-interval', type=float, default=0.05, help='Event loop lag sampling interval')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the traffic')
+    parser.add_argument('--replay', action='store_true', help='Serve HTTP requests from the archive')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='Also report the Python heap peak (slows the run down)')
+    args = parser.parse_args()
+
+    mixes = dict(MIXES)
+    if args.mix_file:
+        with open(args.mix_file, encoding='utf-8') as f:
+            mixes.update(json.load(f))
+    if args.mix not in mixes:
+        parser.error(f"Unknown mix '{args.mix}', expected one of {', '.join(sorted(mixes))}")
+
+    if args.replay:
+        from services.http_archive import HttpArchive
+        from tools.bench_load_path import start_replay_server
+        os.environ[Config.HTTP_MODE_ENV_VAR] = 'replay'
+        start_replay_server(HttpArchive(), 0.0)
+
+    if args.data == 'synthetic':
+        if not isinstance(job_executor, LocalExecutor):
+            parser.error("Synthetic data needs JOB_EXECUTOR = 'local'; workers load real sessions")
+        session_repository.backend = SyntheticBackend()
+    else:
+        import fastf1
+        from services.http_archive import configure_fastf1_http
+        os.makedirs(Config.CACHE_DIR, exist_ok=True)
+        fastf1.Cache.enable_cache(Config.CACHE_DIR)
+        configure_fastf1_http()
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    print(f"Replaying mix '{args.mix}' at {args.rate}/s for {args.duration:.0f}s with {args.data} data "
+          f"(rss {rss_mib():.0f} MiB)")
+    results, elapsed, unfinished = asyncio.run(run(args, mixes[args.mix]))
+    report(results, elapsed, unfinished)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Checks that plots render identically when run concurrently in the render
+thread pool, i.e. that no draw path depends on global pyplot state.
+
+Usage:
+    python -m tools.render_concurrency_check [--renders N] [--workers N]
+"""
+
+import argparse
+import hashlib
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from matplotlib.collections import LineCollection
+from utils.rendering import Renderer, init_render_worker
+
+
+def draw_trace(fig, seed):
+    """Draw a speed-trace-like plot that depends only on its seed."""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 5000, 1500)
+    y = 200 + 100 * np.sin(x / (250 + seed)) + rng.normal(0, 2, x.size)
+    ax = fig.subplots(2, gridspec_kw={'height_ratios': [10, 3]})
+    ax[0].plot(x, y, label=f"Driver {seed}")
+    ax[0].vlines(x=x[::150], ymin=y.min() - 20, ymax=y.max() + 10, linestyles='dotted', colors='grey')
+    ax[0].legend()
+    ax[1].plot(x, np.clip(y / 3, 0, 100))
+    fig.suptitle(f"Concurrency check {seed}")
+
+
+def draw_map(fig, seed):
+    """Draw a track-map-like plot that depends only on its seed."""
+    t = np.linspace(0, 2 * np.pi, 800)
+    x, y = np.cos(t) * (3 + seed % 3), np.sin(2 * t)
+    points = np.array([x, y]).T.reshape(-1, 1, 2)
+    segments = np.concatenate([points[:-1], points[1:]], axis=1)
+    ax = fig.subplots()
+    lc = LineCollection(segments, cmap='Paired', linewidth=4)
+    lc.set_array(np.floor(t * 8 / (2 * np.pi)))
+    ax.add_collection(lc)
+    ax.axis('equal')
+    fig.colorbar(lc, ax=ax, label='Gear')
+
+
+def render(renderer, index):
+    """Render job `index` and return its digest."""
+    draw = draw_trace if index % 2 else draw_map
+    return hashlib.sha256(renderer.render(draw, index % 7)).hexdigest()
+
+
+def main():
+    """Render serially, then concurrently, and compare digests."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--renders', type=int, default=64, help='Number of renders')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent render threads')
+    args = parser.parse_args()
+
+    init_render_worker()
+    renderer = Renderer()
+
+    start = time.perf_counter()
+    expected = [render(renderer, i) for i in range(args.renders)]
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers, initializer=init_render_worker) as pool:
+        actual = list(pool.map(lambda i: render(renderer, i), range(args.renders)))
+    concurrent = time.perf_counter() - start
+
+    mismatches = sum(a != e for a, e in zip(actual, expected))
+    print(f"serial {serial:.2f}s, concurrent ({args.workers} threads) {concurrent:.2f}s")
+    print(f"{args.renders - mismatches}/{args.renders} renders identical")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
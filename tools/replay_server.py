@@ -0,0 +1,36 @@
+"""
+Serves recorded HTTP responses for replay mode.
+
+Usage:
+    python -m tools.replay_server [--archive DIR] [--port 8765] [--latency-ms 0]
+
+Start it, then run the bot, a worker or a benchmark with HTTP_MODE=replay.
+Requests are answered from the archive written in record mode; requests
+that were never recorded get a 404.
+"""
+
+import argparse
+from urllib.parse import urlsplit
+from aiohttp import web
+from config import Config
+from services.http_archive import HttpArchive, create_replay_app
+
+
+def main():
+    """Run the replay server."""
+    default = urlsplit(Config.HTTP_REPLAY_URL)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--archive', default=Config.HTTP_ARCHIVE_DIR, help='Archive directory')
+    parser.add_argument('--host', default=default.hostname, help='Address to listen on')
+    parser.add_argument('--port', type=int, default=default.port, help='Port to listen on')
+    parser.add_argument('--latency-ms', type=float, default=0.0,
+                        help='Delay added to every response, to imitate the network')
+    args = parser.parse_args()
+
+    archive = HttpArchive(args.archive)
+    print(f"Replaying {len(archive.entries())} recorded responses from {args.archive}")
+    web.run_app(create_replay_app(archive, args.latency_ms / 1000), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Soak test for figure lifecycle: renders many plots through FigureManager
+and reports resident memory, which should stay flat.
+
+Usage:
+    python -m tools.soak_figures [--renders N] [--reuse] [--pyplot]
+
+--pyplot renders through pyplot without closing figures, reproducing the
+old behaviour for comparison. tests/test_figure_lifecycle.py runs a shorter
+version of this check, with tracemalloc, under pytest.
+"""
+
+import argparse
+import gc
+import numpy as np
+from utils.figure_manager import FigureManager
+
+
+def rss_mib():
+    """
+    Get the current resident set size of this process.
+
+    Returns:
+        float: RSS in MiB (0 if /proc is unavailable)
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return 0.0
+    import resource
+    return pages * resource.getpagesize() / (1024 * 1024)
+
+
+def draw(fig, x, y):
+    """Draw a representative two-axes plot."""
+    ax = fig.subplots(2, gridspec_kw={'height_ratios': [10, 3]})
+    ax[0].plot(x, y, label='A')
+    ax[0].plot(x, y * 0.98, label='B')
+    ax[0].vlines(x=x[::200], ymin=y.min(), ymax=y.max(), linestyles='dotted', colors='grey')
+    ax[0].legend()
+    ax[1].plot(x, np.clip(y / 3.5, 0, 100))
+    fig.suptitle('Soak test')
+
+
+def main():
+    """Run the soak test."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--renders', type=int, default=2000, help='Number of renders')
+    parser.add_argument('--reuse', action='store_true', help='Reuse pooled canvases')
+    parser.add_argument('--pyplot', action='store_true', help='Use pyplot without closing (old behaviour)')
+    args = parser.parse_args()
+
+    x = np.linspace(0, 5000, 2000)
+    y = 200 + 100 * np.sin(x / 300)
+    manager = FigureManager(reuse_canvases=args.reuse)
+    interval = max(args.renders // 10, 1)
+
+    if args.pyplot:
+        import matplotlib
+        matplotlib.use('Agg')
+        from matplotlib import pyplot as plt
+
+    print(f"{'renders':>8} {'rss MiB':>10}")
+    for i in range(1, args.renders + 1):
+        if args.pyplot:
+            fig = plt.figure(figsize=(12, 8))
+            draw(fig, x, y)
+            fig.savefig('/dev/null', format='png')
+        else:
+            with manager.figure() as fig:
+                draw(fig, x, y)
+                manager.encode(fig)
+
+        if i % interval == 0:
+            gc.collect()
+            print(f"{i:>8} {rss_mib():>10.1f}")
+
+    if not args.pyplot:
+        print(f"figures: {manager.stats()}")
+
+
+if __name__ == '__main__':
+    main()
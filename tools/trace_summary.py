@@ -0,0 +1,99 @@
+"""
+Summarizes the slowest requests from trace logs.
+
+Usage:
+    python -m tools.trace_summary [--top N] [--command NAME] [files ...]
+
+Reads the JSON lines written by utils/tracing.py (default: every
+logs/*.trace.jsonl* file, so bot shards, workers and rotated files are
+combined), groups events by request ID and prints per-command latency
+percentiles and the slowest requests with a breakdown of where their
+time went.
+"""
+
+import argparse
+import glob
+import json
+import os
+from collections import defaultdict
+from config import Config
+
+
+def read_events(paths):
+    """Read trace events, skipping lines that are not valid JSON."""
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def percentile(values, fraction):
+    """Get a percentile of a sorted list."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def describe(event):
+    """Format one event of a request's breakdown."""
+    details = []
+    for field in ('cache_hit', 'source', 'outcome', 'owner', 'bytes', 'worker', 'position', 'status', 'site'):
+        if event.get(field) not in (None, 'ok'):
+            details.append(f"{field}={event[field]}")
+    duration = f"{event['duration_ms']:9.1f} ms" if 'duration_ms' in event else ' ' * 12
+    return f"    {duration}  {event['event']:<16} {' '.join(details)}"
+
+
+def main():
+    """Print the summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('files', nargs='*', help='Trace files (default: all in the log directory)')
+    parser.add_argument('--top', type=int, default=10, help='Number of slow requests to show')
+    parser.add_argument('--command', help='Only show requests for this command')
+    args = parser.parse_args()
+
+    paths = args.files or sorted(glob.glob(os.path.join(Config.LOG_DIR, '*.trace.jsonl*')))
+    requests = {}
+    children = defaultdict(list)
+    for event in read_events(paths):
+        request_id = event.get('request_id')
+        if request_id is None:
+            continue
+        if event.get('event') == 'command':
+            requests[request_id] = event
+        else:
+            children[request_id].append(event)
+
+    if args.command:
+        requests = {key: value for key, value in requests.items() if value['command'] == args.command}
+    if not requests:
+        print(f"No requests found in {len(paths)} trace files")
+        return
+
+    by_command = defaultdict(list)
+    for request in requests.values():
+        by_command[request['command']].append(request['duration_ms'])
+
+    print(f"{len(requests)} requests from {len(paths)} trace files\n")
+    print(f"{'command':<16} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for command, durations in sorted(by_command.items(), key=lambda item: -max(item[1])):
+        durations.sort()
+        print(f"{command:<16} {len(durations):>6} {percentile(durations, 0.5):>9.1f} "
+              f"{percentile(durations, 0.95):>9.1f} {durations[-1]:>9.1f}")
+
+    print(f"\nSlowest {min(args.top, len(requests))} requests:")
+    slowest = sorted(requests.items(), key=lambda item: -item[1]['duration_ms'])[:args.top]
+    for request_id, request in slowest:
+        failed = request['status'] != 'ok' or any(
+            child.get('status') == 'error' for child in children[request_id])
+        print(f"\n{request['duration_ms']:9.1f} ms  {request_id}  {request['message']}"
+              f"{'  [error]' if failed else ''}")
+        for child in sorted(children[request_id], key=lambda child: child['ts']):
+            print(describe(child))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,23 @@ Utility modules for the F1 Discord Bot.
 
 from .logging_setup import setup_logging
 from .error_handler import ErrorHandler
-from .embed_builder import EmbedBuilder
+from .embed_builder import EmbedBuilder, format_lap_time
+from .figure_manager import FigureManager, figure_manager
+from .layer_cache import LayerCache, layer_cache
+from .rendering import Renderer, RenderStyle, RenderPool, render_pool
+from .render_profiles import RenderProfile, RenderProfileRegistry, render_profiles
+from .job_scheduler import JobScheduler, QueueFullError, job_scheduler
+from .metrics import Metrics, metrics
+from .request_dedup import RequestDeduplicator, request_dedup
+from .tracing import bind_request, current_request_id, event, span
+from .memory_profiler import MemoryProfiler, memory_profiler
+from .loop_watchdog import LoopWatchdog, loop_watchdog
 
-__all__ = ['setup_logging', 'ErrorHandler', 'EmbedBuilder']
+__all__ = ['setup_logging', 'ErrorHandler', 'EmbedBuilder', 'format_lap_time', 'FigureManager', 'figure_manager',
+           'LayerCache', 'layer_cache',
+           'Renderer', 'RenderStyle', 'RenderPool', 'render_pool',
+           'RenderProfile', 'RenderProfileRegistry', 'render_profiles',
+           'JobScheduler', 'QueueFullError', 'job_scheduler',
+           'Metrics', 'metrics', 'RequestDeduplicator', 'request_dedup',
+           'bind_request', 'current_request_id', 'event', 'span',
+           'MemoryProfiler', 'memory_profiler', 'LoopWatchdog', 'loop_watchdog']
@@ -5,6 +5,23 @@ Utilities for building Discord embeds for the F1 Discord Bot.
 import discord
 from datetime import datetime
 
+
+def format_lap_time(seconds):
+    """
+    Format a lap time for display.
+    
+    Args:
+        seconds: The lap time in seconds (NaN if there is none)
+        
+    Returns:
+        str: The time as M:SS.sss, or '-' if there is none
+    """
+    if seconds != seconds:  # NaN
+        return '-'
+    minutes, seconds = divmod(seconds, 60)
+    return f"{int(minutes)}:{seconds:06.3f}"
+
+
 class EmbedBuilder:
     """
     Utility class for building Discord embeds.
@@ -102,6 +119,48 @@ class EmbedBuilder:
         
         return embed
     
+    @staticmethod
+    def build_qualifying_embed(analysis):
+        """
+        Build an embed for a qualifying segment analysis.
+        
+        Args:
+            analysis: The QualifyingAnalysis
+            
+        Returns:
+            discord.Embed: The created embed
+        """
+        embed = discord.Embed(
+            title=f"{analysis.session_name} - {analysis.event_name} {analysis.year}",
+            description="Best time, ideal lap from best sectors and gap to the cut-off",
+            color=discord.Color.purple()
+        )
+        
+        table = analysis.table
+        segments = ['Q1', 'Q2', 'Q3']
+        for index in range(len(segments), 0, -1):
+            name = segments[index - 1]
+            rows = table[table['Reached'] == index]
+            if rows.empty:
+                continue
+            
+            lines = []
+            for driver, row in rows.iterrows():
+                line = f"{row['Position']}. {driver} {format_lap_time(row[name])}"
+                line += f" (ideal {format_lap_time(row['Ideal'])}"
+                if row['Gap'] == row['Gap']:
+                    line += f", {row['Gap']:+.3f}s to {'pole' if index == len(segments) else 'cut-off'}"
+                if index > 1:
+                    improvement = row[f"{segments[index - 2]}->{name}"]
+                    if improvement == improvement:
+                        line += f", {improvement:+.3f}s vs {segments[index - 2]}"
+                lines.append(line + ")")
+            
+            title = name if index == len(segments) else f"Out in {name}"
+            embed.add_field(name=title, value="\n".join(lines), inline=False)
+        
+        return embed
+    
     @staticmethod
     def build_help_embed(command_name, description, usage, examples):
         """
@@ -0,0 +1,177 @@
+"""
+Figure lifecycle management for the F1 Discord Bot.
+"""
+
+import io
+import logging
+import threading
+from contextlib import contextmanager
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from config import Config
+from utils.memory_profiler import memory_profiler
+
+logger = logging.getLogger('f1bot')
+
+SUBPLOT_PARAMS = ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')
+
+
+class FigureManager:
+    """
+    Creates Agg-backed figures without going through pyplot, so no global
+    figure registry keeps them alive, and guarantees they are released once
+    encoded.
+
+    When canvas reuse is enabled, released figures are cleared and kept in
+    a small pool per (size, dpi) so the next render skips canvas allocation.
+    """
+
+    def __init__(self, reuse_canvases=Config.REUSE_CANVASES, pool_size=Config.CANVAS_POOL_SIZE):
+        """
+        Initialize the figure manager.
+
+        Args:
+            reuse_canvases: Whether to keep released figures for reuse
+            pool_size: Maximum pooled figures per (size, dpi)
+        """
+        self.reuse_canvases = reuse_canvases
+        self.pool_size = pool_size
+        self._pool = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.live = 0
+
+    def acquire(self, figsize=Config.DEFAULT_FIG_SIZE, dpi=Config.DEFAULT_DPI):
+        """
+        Get a blank figure attached to an Agg canvas.
+
+        Args:
+            figsize: Figure size in inches
+            dpi: Figure resolution
+
+        Returns:
+            matplotlib.figure.Figure: The figure
+        """
+        key = (tuple(figsize), dpi)
+        with self._lock:
+            self.live += 1
+            pooled = self._pool.get(key)
+            if pooled:
+                self.reused += 1
+                return pooled.pop()
+            self.created += 1
+
+        fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(fig)
+        return fig
+
+    def release(self, fig):
+        """
+        Release a figure, clearing everything drawn on it.
+
+        Args:
+            fig: The figure to release
+        """
+        fig.clear()
+
+        with self._lock:
+            self.live -= 1
+            if not self.reuse_canvases:
+                return
+            key = (tuple(fig.get_size_inches()), fig.dpi)
+            pooled = self._pool.setdefault(key, [])
+            if len(pooled) >= self.pool_size:
+                return
+
+        self._reset(fig)
+        with self._lock:
+            pooled.append(fig)
+
+    @staticmethod
+    def _reset(fig):
+        """
+        Restore figure-level state that clear() leaves behind.
+
+        Args:
+            fig: The cleared figure
+        """
+        fig.set_layout_engine(None)
+        fig.patch.set_alpha(None)
+        fig.patch.set_facecolor(matplotlib.rcParams['figure.facecolor'])
+        fig.patch.set_edgecolor(matplotlib.rcParams['figure.edgecolor'])
+        fig.subplots_adjust(**{
+            name: matplotlib.rcParams[f'figure.subplot.{name}'] for name in SUBPLOT_PARAMS
+        })
+
+    @contextmanager
+    def figure(self, figsize=Config.DEFAULT_FIG_SIZE, dpi=Config.DEFAULT_DPI):
+        """
+        Context manager yielding a figure that is released on exit.
+
+        Args:
+            figsize: Figure size in inches
+            dpi: Figure resolution
+
+        Yields:
+            matplotlib.figure.Figure: The figure
+        """
+        fig = self.acquire(figsize, dpi)
+        try:
+            yield fig
+        finally:
+            self.release(fig)
+
+    @staticmethod
+    def encode(fig, fmt='png', **savefig_kwargs):
+        """
+        Encode a figure to image bytes.
+
+        Args:
+            fig: The figure to encode
+            fmt: Image format (default: 'png')
+            **savefig_kwargs: Extra arguments for Figure.savefig
+
+        Returns:
+            bytes: The encoded image
+        """
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, **savefig_kwargs)
+        return buffer.getvalue()
+
+    def size_bytes(self):
+        """
+        Get the memory held by the pooled canvases' pixel buffers.
+
+        Returns:
+            int: Approximate size in bytes
+        """
+        with self._lock:
+            figs = [fig for pooled in self._pool.values() for fig in pooled]
+        size = 0
+        for fig in figs:
+            renderer = getattr(fig.canvas, 'renderer', None)
+            if renderer is not None:
+                size += int(renderer.width * renderer.height * 4)
+        return size
+
+    def stats(self):
+        """
+        Get figure accounting counters.
+
+        Returns:
+            dict: Created, reused, live and pooled figure counts
+        """
+        with self._lock:
+            return {
+                'created': self.created,
+                'reused': self.reused,
+                'live': self.live,
+                'pooled': sum(len(figs) for figs in self._pool.values())
+            }
+
+
+# Shared instance used by the services
+figure_manager = FigureManager()
+memory_profiler.register_collector('figures', lambda: {'figure_pool': figure_manager.size_bytes()})
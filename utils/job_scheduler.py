@@ -0,0 +1,323 @@
+"""
+Admission control and fair scheduling for heavy commands.
+"""
+
+import asyncio
+import bisect
+import contextvars
+import functools
+import itertools
+import logging
+import time
+from collections import Counter
+from config import Config
+from utils.metrics import metrics
+from utils.request_dedup import request_dedup
+from utils.tracing import event
+
+logger = logging.getLogger('f1bot')
+
+# Lower values run first
+PRIORITY_CACHED = 0
+PRIORITY_NORMAL = 1
+
+
+class QueueFullError(Exception):
+    """Raised when a job is rejected by admission control."""
+
+
+class Job:
+    """
+    Class to store a queued or running job.
+    """
+    def __init__(self, func, user_id, guild_id, priority, seq, on_position=None):
+        """
+        Initialize a job.
+
+        Args:
+            func: Coroutine function doing the work, called without arguments
+            user_id: ID of the user who requested the job
+            guild_id: ID of the guild the job was requested in, or None
+            priority: Scheduling priority (lower runs first)
+            seq: Submission sequence number, breaking priority ties
+            on_position: Optional coroutine function called with the queue
+                position while waiting, and with 0 once the job starts
+        """
+        self.func = func
+        self.user_id = user_id
+        self.guild_id = guild_id
+        self.priority = priority
+        self.seq = seq
+        self.on_position = on_position
+        self.position = None
+        self.future = None
+        # Jobs are started from whichever job finished last, so keep the submitter's context
+        self.context = contextvars.copy_context()
+        self.submitted_at = time.monotonic()
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class JobScheduler:
+    """
+    Runs heavy commands through a bounded priority queue.
+
+    At most max_running jobs run at once, with separate caps per user and
+    per guild so one busy user or server cannot take every slot. Waiting
+    jobs start in priority order, skipping jobs whose user or guild is at
+    its cap. Jobs are rejected with QueueFullError when the queue is full
+    or the user already has too many jobs pending.
+    """
+
+    def __init__(self, max_running=Config.JOB_WORKERS, max_queued=Config.JOB_QUEUE_SIZE,
+                 user_concurrency=Config.JOB_USER_CONCURRENCY,
+                 guild_concurrency=Config.JOB_GUILD_CONCURRENCY,
+                 user_pending=Config.JOB_USER_PENDING):
+        """
+        Initialize the job scheduler.
+
+        Args:
+            max_running: Maximum jobs running at once
+            max_queued: Maximum jobs waiting to run
+            user_concurrency: Maximum running jobs per user
+            guild_concurrency: Maximum running jobs per guild
+            user_pending: Maximum queued plus running jobs per user
+        """
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.user_concurrency = user_concurrency
+        self.guild_concurrency = guild_concurrency
+        self.user_pending = user_pending
+        self._queue = []
+        self._seq = itertools.count()
+        self._tasks = set()
+        self._running_users = Counter()
+        self._running_guilds = Counter()
+        self._pending_users = Counter()
+        # Position callbacks of every request sharing a deduplicated job, and its last position
+        self._watchers = {}
+        self._positions = {}
+        self.running = 0
+        self.rejected = 0
+
+    @property
+    def queued(self):
+        """Number of jobs waiting to run."""
+        return len(self._queue)
+
+    async def submit(self, func, user_id=None, guild_id=None, priority=PRIORITY_NORMAL, on_position=None):
+        """
+        Queue a job and wait for its result.
+
+        Args:
+            func: Coroutine function doing the work, called without arguments
+            user_id: ID of the requesting user
+            guild_id: ID of the guild, or None for direct messages
+            priority: Scheduling priority (PRIORITY_CACHED or PRIORITY_NORMAL)
+            on_position: Optional coroutine function receiving queue position updates
+
+        Returns:
+            The return value of func
+
+        Raises:
+            QueueFullError: If the job is rejected
+        """
+        if len(self._queue) >= self.max_queued:
+            self.rejected += 1
+            metrics.increment('jobs.rejected')
+            raise QueueFullError(Config.QUEUE_FULL_MESSAGE)
+        if user_id is not None and self._pending_users[user_id] >= self.user_pending:
+            self.rejected += 1
+            metrics.increment('jobs.rejected')
+            raise QueueFullError(f"You already have {self.user_pending} requests in progress. "
+                                 f"Please wait for them to finish.")
+
+        metrics.increment('jobs.submitted')
+        job = Job(func, user_id, guild_id, priority, next(self._seq), on_position)
+        job.future = asyncio.get_running_loop().create_future()
+        self._pending_users[user_id] += 1
+        bisect.insort(self._queue, job)
+        self._dispatch()
+
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            # Drop the job if the caller gave up before it started
+            if job in self._queue:
+                self._queue.remove(job)
+                self._pending_users[user_id] -= 1
+                self._dispatch()
+            raise
+
+    def _can_start(self, job):
+        """Check the per-user and per-guild caps for a waiting job."""
+        if job.user_id is not None and self._running_users[job.user_id] >= self.user_concurrency:
+            return False
+        if job.guild_id is not None and self._running_guilds[job.guild_id] >= self.guild_concurrency:
+            return False
+        return True
+
+    def _dispatch(self):
+        """Start every waiting job that fits, then publish queue positions."""
+        for job in list(self._queue):
+            if self.running >= self.max_running:
+                break
+            if not self._can_start(job):
+                continue
+            self._queue.remove(job)
+            self._start(job)
+
+        for position, job in enumerate(self._queue, start=1):
+            if job.position != position:
+                job.position = position
+                self._notify(job, position)
+
+    def _start(self, job):
+        """Start a job."""
+        self.running += 1
+        self._running_users[job.user_id] += 1
+        self._running_guilds[job.guild_id] += 1
+        if job.position is not None:
+            self._notify(job, 0)
+        job.context.run(event, 'queue.wait', priority=job.priority, position=job.position,
+                        duration_ms=round((time.monotonic() - job.submitted_at) * 1000, 2))
+
+        task = job.context.run(asyncio.ensure_future, self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job):
+        """Run a job and release its slots."""
+        try:
+            result = await job.func()
+        except asyncio.CancelledError:
+            job.future.cancel()
+            raise
+        except Exception as e:
+            metrics.increment('jobs.failed')
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self.running -= 1
+            self._running_users[job.user_id] -= 1
+            self._running_guilds[job.guild_id] -= 1
+            self._pending_users[job.user_id] -= 1
+            self._dispatch()
+
+    def _notify(self, job, position):
+        """Send a position update without blocking the scheduler."""
+        if job.on_position is None:
+            return
+
+        async def notify():
+            try:
+                await job.on_position(position)
+            except Exception as e:
+                logger.debug(f"Could not send queue position update: {e}")
+
+        task = job.context.run(asyncio.ensure_future, notify())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def run_for_context(self, ctx, func, priority=PRIORITY_NORMAL, key=None):
+        """
+        Run a command's job, keeping the loading message updated with its queue position.
+
+        When a key is given, identical requests (from any guild) share one job:
+        duplicates arriving while it is queued or running, or shortly after it
+        finished, receive its result without taking a queue slot. Every request
+        sharing the job gets its position updates. If the shared job is
+        rejected, the duplicates submit their own job instead of sharing the
+        other user's rejection.
+
+        Args:
+            ctx: The command context
+            func: Coroutine function doing the work, called without arguments
+            priority: Scheduling priority
+            key: Optional key of the normalized request for deduplication
+
+        Returns:
+            The return value of func
+
+        Raises:
+            QueueFullError: If the job is rejected (the loading message says so)
+        """
+        message = await ctx.send(Config.LOADING_MESSAGE)
+
+        async def on_position(position):
+            if position == 0:
+                await message.edit(content=Config.LOADING_MESSAGE)
+            else:
+                await message.edit(content=f"{Config.LOADING_MESSAGE}\n"
+                                           f"{Config.QUEUE_POSITION_MESSAGE.format(position=position)}")
+
+        submit = functools.partial(
+            self.submit,
+            func,
+            user_id=ctx.author.id,
+            guild_id=ctx.guild.id if ctx.guild else None,
+            priority=priority
+        )
+
+        try:
+            if key is None:
+                return await submit(on_position=on_position)
+            return await self._run_shared(key, submit, on_position)
+        except QueueFullError as e:
+            await message.edit(content=str(e))
+            raise
+
+    async def _run_shared(self, key, submit, on_position):
+        """
+        Run a deduplicated request, sending the shared job's positions to every request waiting on it.
+
+        Args:
+            key: Key of the normalized request
+            submit: Coroutine function submitting the job, taking on_position
+            on_position: Coroutine function receiving this request's position updates
+
+        Returns:
+            The shared job's result
+        """
+        watchers = self._watchers.setdefault(key, [])
+        watchers.append(on_position)
+        # Joining a job that is already waiting: show where it is now
+        position = self._positions.get(key)
+        if position:
+            try:
+                await on_position(position)
+            except Exception as e:
+                logger.debug(f"Could not send queue position update: {e}")
+
+        async def on_shared_position(position):
+            self._positions[key] = position
+            # Looked up on every update, so requests attaching later are included
+            await asyncio.gather(*(watcher(position) for watcher in list(self._watchers.get(key, ()))),
+                                 return_exceptions=True)
+
+        try:
+            return await request_dedup.run(key, functools.partial(submit, on_position=on_shared_position),
+                                           retry_on=(QueueFullError,))
+        finally:
+            watchers.remove(on_position)
+            if not watchers and self._watchers.get(key) is watchers:
+                del self._watchers[key]
+                self._positions.pop(key, None)
+
+    def stats(self):
+        """
+        Get scheduler counters.
+
+        Returns:
+            dict: Running, queued and rejected job counts
+        """
+        return {'running': self.running, 'queued': self.queued, 'rejected': self.rejected}
+
+
+# Shared instance used by the cogs
+job_scheduler = JobScheduler()
+metrics.register_collector('jobs', lambda: {'running': job_scheduler.running, 'queued': job_scheduler.queued})
@@ -0,0 +1,225 @@
+"""
+Cache of pre-rendered static plot layers.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+import matplotlib
+from config import Config
+from utils.memory_profiler import memory_profiler
+from utils.metrics import metrics
+from utils.tracing import event
+
+logger = logging.getLogger('f1bot')
+
+# Bumped when the code drawing static layers changes, so stale layers on disk are not reused
+LAYER_VERSION = 1
+
+
+def render_fingerprint():
+    """
+    Identify the settings layers are rendered with.
+
+    Covers the layer code version, the matplotlib and FastF1 releases and
+    the active rcParams (the FastF1 plotting style), so a layer written
+    under other settings is never composited onto a new plot.
+
+    Returns:
+        str: Short hash of the settings
+    """
+    import fastf1
+
+    params = sorted((name, repr(value)) for name, value in matplotlib.rcParams.items()
+                    if name != 'backend')
+    settings = repr((LAYER_VERSION, matplotlib.__version__, fastf1.__version__, params))
+    return hashlib.sha1(settings.encode('utf-8')).hexdigest()[:12]
+
+
+class LayerCache:
+    """
+    LRU cache of rasterized static layers (track outlines, corner markers,
+    axes and titles) keyed by what they depend on: the plot type, the
+    session/circuit, the axis ranges, the figure size and the resolution.
+
+    Entries are RGBA Pillow images that dynamic layers are composited onto.
+    When a cache directory is set, layers are also written there as PNG
+    files, so bot processes running different shards share them. Files are
+    named after the key and the render fingerprint, and the directory is
+    kept under a size budget by pruning the least recently used files.
+    """
+
+    def __init__(self, max_entries=Config.LAYER_CACHE_SIZE, cache_dir=Config.LAYER_CACHE_DIR,
+                 max_bytes=Config.LAYER_CACHE_MAX_BYTES):
+        """
+        Initialize the layer cache.
+
+        Args:
+            max_entries: Maximum number of cached layers in memory
+            cache_dir: Directory for the shared on-disk copy, or None to keep layers in memory only
+            max_bytes: Size budget for the cache directory
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._fingerprint = None
+        self._layers = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key, render):
+        """
+        Get a cached layer, rendering and caching it on a miss.
+
+        Args:
+            key: Hashable key identifying the layer
+            render: Callable returning the layer as an RGBA PIL image
+
+        Returns:
+            PIL.Image.Image: The layer
+        """
+        with self._lock:
+            layer = self._layers.get(key)
+            if layer is not None:
+                self._layers.move_to_end(key)
+                self.hits += 1
+                event('layer', source='memory')
+                return layer
+            self.misses += 1
+
+        layer = self._load(key)
+        if layer is None:
+            layer = render()
+            self._save(key, layer)
+            event('layer', source='render')
+        else:
+            event('layer', source='disk')
+
+        with self._lock:
+            self._layers[key] = layer
+            self._layers.move_to_end(key)
+            while len(self._layers) > self.max_entries:
+                self._layers.popitem(last=False)
+
+        return layer
+
+    def _path(self, key):
+        """Get the file a layer is stored in."""
+        if self._fingerprint is None:
+            # Layers render after the style is applied, and it never changes afterwards
+            self._fingerprint = render_fingerprint()
+        digest = hashlib.sha1(repr((self._fingerprint, key)).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.png")
+
+    def _load(self, key):
+        """Load a layer from disk, if another process already rendered it."""
+        if not self.cache_dir:
+            return None
+        from PIL import Image
+
+        path = self._path(key)
+        try:
+            with Image.open(path) as image:
+                image.load()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not read cached layer for {key}: {e}")
+            return None
+
+        try:
+            # The modification time orders the files for pruning
+            os.utime(path)
+        except OSError:
+            pass
+        return image
+
+    def _save(self, key, layer):
+        """Write a layer to disk atomically."""
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                layer.save(f, format='PNG', compress_level=1)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            logger.warning(f"Could not write cached layer for {key}: {e}")
+            return
+        self.prune()
+
+    def prune(self):
+        """
+        Delete the least recently used layer files until the directory fits its budget.
+
+        Returns:
+            int: Number of files deleted
+        """
+        if not self.cache_dir:
+            return 0
+        files = []
+        try:
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and entry.name.endswith('.png'):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            return 0
+
+        total = sum(size for _, size, _ in files)
+        deleted = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Another process pruned it first
+                pass
+            total -= size
+            deleted += 1
+
+        if deleted:
+            metrics.increment('layers.pruned', deleted)
+            logger.info(f"Pruned {deleted} layers from {self.cache_dir}")
+        return deleted
+
+    def clear(self):
+        """Drop the layers held in memory."""
+        with self._lock:
+            self._layers.clear()
+
+    def size_bytes(self):
+        """
+        Get the memory held by cached layers.
+
+        Returns:
+            int: Approximate size in bytes
+        """
+        with self._lock:
+            return sum(layer.width * layer.height * 4 for layer in self._layers.values())
+
+    def stats(self):
+        """
+        Get cache counters.
+
+        Returns:
+            dict: Entries, hits, misses and size in bytes
+        """
+        return {
+            'entries': len(self._layers),
+            'hits': self.hits,
+            'misses': self.misses,
+            'bytes': self.size_bytes()
+        }
+
+
+# Shared instance used by the renderer
+layer_cache = LayerCache()
+metrics.register_collector('layers', layer_cache.stats)
+memory_profiler.register_collector('layers', lambda: {'layers': layer_cache.size_bytes()})
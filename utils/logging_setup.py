@@ -2,42 +2,164 @@
 Logging configuration for the F1 Discord Bot.
 """
 
+import atexit
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import queue
+import time
+from config import Config
+from utils.tracing import RequestIdFilter, TraceFilter
 
-def setup_logging(log_level=logging.INFO, log_to_file=True):
+_listener = None
+_queue_handler = None
+_configured_pid = None
+
+
+class RotatingLogHandler(logging.handlers.TimedRotatingFileHandler):
+    """
+    File handler that rotates at a time interval or when the file grows past
+    a size limit, and keeps a bounded number of recent rotated files.
+    """
+
+    def __init__(self, filename, max_bytes=Config.LOG_MAX_BYTES, when=Config.LOG_ROTATE_WHEN,
+                 backup_count=Config.LOG_BACKUP_COUNT, max_age_days=Config.LOG_MAX_AGE_DAYS):
+        """
+        Initialize the handler.
+
+        Args:
+            filename: Path of the active log file
+            max_bytes: Rotate once the file reaches this size (0 to disable)
+            when: Time interval to rotate at (see TimedRotatingFileHandler)
+            backup_count: Maximum rotated files kept
+            max_age_days: Delete rotated files older than this (0 to disable)
+        """
+        # Retention is handled by _prune, which also covers size rotations
+        super().__init__(filename, when=when, backupCount=0, encoding='utf-8', delay=True)
+        self.max_bytes = max_bytes
+        self.keep = backup_count
+        self.max_age = max_age_days * 86400
+
+    def shouldRollover(self, record):
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def rotation_filename(self, default_name):
+        # Several size rotations in one interval must not overwrite each other
+        name = default_name
+        index = 1
+        while os.path.exists(name):
+            name = f"{default_name}.{index}"
+            index += 1
+        return name
+
+    def doRollover(self):
+        super().doRollover()
+        self._prune()
+
+    def _prune(self):
+        """Delete rotated files beyond the count and age limits."""
+        directory, base = os.path.split(self.baseFilename)
+        rotated = sorted(
+            (os.path.join(directory, name) for name in os.listdir(directory or '.')
+             if name.startswith(base + '.')),
+            key=os.path.getmtime,
+            reverse=True
+        )
+        cutoff = time.time() - self.max_age
+        for index, path in enumerate(rotated):
+            if index >= self.keep or (self.max_age and os.path.getmtime(path) < cutoff):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def setup_logging(log_level=logging.INFO, log_to_file=True, log_name=Config.LOG_NAME):
     """
     Set up logging for the application.
-    
+
+    Records are put on a queue by the calling thread and written to the
+    console and log file by a background listener thread, so logging never
+    blocks the event loop on I/O. Calling this again in the same process
+    only updates the level; a forked child process gets its own listener.
+
+    Log lines carry the ID of the request that caused them. Trace events
+    from utils.tracing go to a separate JSON lines file next to the log.
+
     Args:
         log_level: The logging level (default: INFO)
         log_to_file: Whether to log to a file (default: True)
-        
+        log_name: Name of the log file in Config.LOG_DIR, without extension
+
     Returns:
         logger: Configured logger instance
     """
-    # Create logs directory if it doesn't exist
-    if log_to_file and not os.path.exists('logs'):
-        os.makedirs('logs')
-    
-    # Configure logger
+    global _listener, _queue_handler, _configured_pid
+
     logger = logging.getLogger('f1bot')
     logger.setLevel(log_level)
-    
+
+    if _configured_pid == os.getpid():
+        return logger
+
+    # A forked child inherits the queue handler but not the listener thread
+    if _queue_handler is not None:
+        logger.removeHandler(_queue_handler)
+
     # Create formatter
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s')
+
     # Add console handler
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
-    # Add file handler if enabled
+    console_handler.addFilter(TraceFilter(include=False))
+    handlers = [console_handler]
+
+    # Add file handlers if enabled
     if log_to_file:
-        log_filename = f"logs/f1bot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-        file_handler = logging.FileHandler(log_filename)
+        os.makedirs(Config.LOG_DIR, exist_ok=True)
+        file_handler = RotatingLogHandler(os.path.join(Config.LOG_DIR, f"{log_name}.log"))
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    
+        file_handler.addFilter(TraceFilter(include=False))
+        handlers.append(file_handler)
+
+        if Config.TRACE_ENABLED:
+            trace_handler = RotatingLogHandler(os.path.join(Config.LOG_DIR, f"{log_name}.trace.jsonl"))
+            trace_handler.setFormatter(logging.Formatter('%(message)s'))
+            trace_handler.addFilter(TraceFilter(include=True))
+            handlers.append(trace_handler)
+
+    logging.getLogger('f1bot.trace').disabled = not (log_to_file and Config.TRACE_ENABLED)
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    # The request ID must be read in the calling context, before the record is queued
+    _queue_handler.addFilter(RequestIdFilter())
+    logger.addHandler(_queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    _configured_pid = os.getpid()
+    atexit.register(stop_logging)
+
     return logger
+
+
+def stop_logging():
+    """
+    Flush queued records and stop the listener thread.
+    """
+    global _listener, _configured_pid
+
+    if _listener is not None and _configured_pid == os.getpid():
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    _listener = None
+    _configured_pid = None
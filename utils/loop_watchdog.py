@@ -0,0 +1,191 @@
+"""
+Event loop lag watchdog for the F1 Discord Bot.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from config import Config
+from utils.metrics import metrics
+from utils.tracing import bind_request, event
+
+logger = logging.getLogger('f1bot')
+
+# Blocking code is reported at its innermost frame inside this directory
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _call_site(frame):
+    """Get the innermost frame of a stack that belongs to the bot's own code."""
+    innermost = frame
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(PROJECT_ROOT) and 'site-packages' not in filename:
+            return f"{os.path.relpath(filename, PROJECT_ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return f"{innermost.f_code.co_filename}:{innermost.f_lineno} in {innermost.f_code.co_name}"
+
+
+def _owner(frame):
+    """
+    Find the command whose code is on a stack.
+
+    Command callbacks have the command context in a local named ctx, and
+    scheduled jobs have their JobSpec in a local named spec.
+
+    Returns:
+        tuple: (command name, request ID), or (None, None) if neither is found
+    """
+    while frame is not None:
+        local = frame.f_locals
+        ctx = local.get('ctx')
+        if ctx is not None and getattr(ctx, 'command', None) is not None:
+            return ctx.command.qualified_name, getattr(ctx, 'request_id', None)
+        spec = local.get('spec')
+        if spec is not None and hasattr(spec, 'request_id'):
+            return spec.command, spec.request_id
+        frame = frame.f_back
+    return None, None
+
+
+class LoopWatchdog:
+    """
+    Measures event loop lag continuously and reports what blocked the loop.
+
+    A heartbeat task on the loop sleeps for a fixed interval and records
+    how late it wakes up. A separate thread watches the heartbeat; when the
+    loop has not run it for longer than the threshold, the thread captures
+    the loop thread's stack, so the log names the blocking call while it is
+    still blocking.
+    """
+
+    def __init__(self, threshold=Config.LOOP_LAG_THRESHOLD, interval=Config.LOOP_LAG_INTERVAL,
+                 window=Config.LOOP_LAG_WINDOW, stack_depth=Config.LOOP_STACK_DEPTH):
+        """
+        Initialize the watchdog.
+
+        Args:
+            threshold: Seconds the loop may be blocked before the stack is captured
+            interval: Seconds between heartbeats
+            window: Number of recent lag samples kept for percentiles
+            stack_depth: Frames of the blocked stack written to the log
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.stack_depth = stack_depth
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._last_beat = None
+        self._stall = None
+        self._loop_thread_id = None
+        self._task = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        """bool: Whether the watchdog is running."""
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """
+        Start watching the running event loop.
+
+        Must be called from a coroutine or callback on the loop to watch.
+        """
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.ensure_future(self._heartbeat())
+        threading.Thread(target=self._watch, name='loop-watchdog', daemon=True).start()
+        logger.info(f"Event loop watchdog started (threshold {self.threshold * 1000:.0f} ms)")
+
+    def stop(self):
+        """Stop watching."""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self):
+        """Record how late the loop wakes this task after each interval."""
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            with self._lock:
+                self._samples.append(max(0.0, now - start - self.interval))
+                self._last_beat = now
+                stall, self._stall = self._stall, None
+            if stall is not None:
+                self._finish_stall(stall, now)
+
+    def _watch(self):
+        """Capture the loop thread's stack when the heartbeat is overdue."""
+        while not self._stop.wait(min(self.interval, self.threshold) / 2):
+            with self._lock:
+                blocked = time.monotonic() - self._last_beat - self.interval
+                if blocked < self.threshold or self._stall is not None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is None:
+                    continue
+                command, request_id = _owner(frame)
+                self._stall = {
+                    'started': self._last_beat + self.interval,
+                    'site': _call_site(frame),
+                    'command': command,
+                    'request_id': request_id
+                }
+                stack = ''.join(traceback.format_stack(frame, limit=self.stack_depth))
+                stall = dict(self._stall)
+            del frame
+
+            metrics.increment('loop.stalls')
+            logger.warning(
+                f"Event loop blocked for over {blocked * 1000:.0f} ms at {stall['site']}"
+                f" (command: {stall['command'] or 'none'}, request {stall['request_id'] or '-'})\n{stack}"
+            )
+
+    def _finish_stall(self, stall, resumed):
+        """Record how long a reported stall lasted once the loop runs again."""
+        duration = resumed - stall['started']
+        # Traced as part of the blocking request, so it shows in that request's breakdown
+        with bind_request(stall['request_id']):
+            event('loop.stall', duration_ms=round(duration * 1000, 1), site=stall['site'],
+                  command=stall['command'])
+        logger.info(f"Event loop resumed after {duration * 1000:.0f} ms (blocked at {stall['site']})")
+
+    def lag_percentiles(self):
+        """
+        Get lag percentiles over the recent samples.
+
+        Returns:
+            dict: p50, p95, p99 and max lag in milliseconds, plus the sample count
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {'samples': 0}
+
+        def at(fraction):
+            return round(samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1000, 1)
+
+        return {
+            'samples': len(samples),
+            'p50_ms': at(0.5),
+            'p95_ms': at(0.95),
+            'p99_ms': at(0.99),
+            'max_ms': round(samples[-1] * 1000, 1)
+        }
+
+
+# Shared instance started by the bot
+loop_watchdog = LoopWatchdog()
+metrics.register_collector('loop', loop_watchdog.lag_percentiles)
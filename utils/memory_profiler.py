@@ -0,0 +1,305 @@
+"""
+Memory profiling for the F1 Discord Bot: tracemalloc snapshots, memory
+retained per command and the footprint of the in-memory caches.
+"""
+
+import linecache
+import logging
+import os
+import sysconfig
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from config import Config
+
+logger = logging.getLogger('f1bot')
+
+# Allocations are attributed to the innermost frame inside this directory
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STDLIB_DIR = sysconfig.get_paths()['stdlib']
+
+# Allocations made by the profiler itself
+IGNORED_TRACES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>')
+)
+
+
+def rss_bytes():
+    """
+    Get the resident set size of this process.
+
+    Returns:
+        int: RSS in bytes (0 if /proc is unavailable)
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return 0
+    return pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def format_bytes(size):
+    """
+    Format a byte count for display.
+
+    Args:
+        size: Size in bytes (may be negative for differences)
+
+    Returns:
+        str: The size in KB or MB
+    """
+    if abs(size) >= 1024 ** 2:
+        return f"{size / 1024 ** 2:.1f} MB"
+    return f"{size / 1024:.0f} KB"
+
+
+def _location(traceback):
+    """Get the frame of a traceback to report an allocation under."""
+    # Tracebacks list the most recent frame last
+    for frame in reversed(traceback):
+        if frame.filename.startswith(PROJECT_ROOT) and 'site-packages' not in frame.filename:
+            return f"{os.path.relpath(frame.filename, PROJECT_ROOT)}:{frame.lineno}"
+    # Library paths are shortened to the package path
+    frame = traceback[-1]
+    filename = frame.filename.split('site-packages' + os.sep)[-1]
+    if filename.startswith(STDLIB_DIR):
+        filename = os.path.relpath(filename, STDLIB_DIR)
+    return f"{filename}:{frame.lineno}"
+
+
+class MemoryProfiler:
+    """
+    Keeps named tracemalloc snapshots, the memory each command left behind
+    and collectors reporting how much memory the caches hold.
+
+    tracemalloc is off unless Config.MEMORY_PROFILING is set or start() is
+    called, since tracing every allocation slows the bot down. Cache
+    footprints are available either way.
+    """
+
+    def __init__(self, frames=Config.MEMORY_TRACE_FRAMES, max_snapshots=Config.MEMORY_MAX_SNAPSHOTS):
+        """
+        Initialize the profiler.
+
+        Args:
+            frames: Stack frames stored per allocation when tracing
+            max_snapshots: Maximum number of snapshots kept
+        """
+        self.frames = frames
+        self.max_snapshots = max_snapshots
+        self._snapshots = OrderedDict()
+        self._taken = 0
+        self._commands = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self):
+        """bool: Whether allocations are being traced."""
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        """Start tracing allocations."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            logger.info(f"Memory tracing started ({self.frames} frames per allocation)")
+
+    def stop(self):
+        """Stop tracing allocations and drop the snapshots, which refer to the traces."""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info("Memory tracing stopped")
+        with self._lock:
+            self._snapshots.clear()
+            self._commands.clear()
+
+    def register_collector(self, name, collect):
+        """
+        Register a component's cache sizes.
+
+        Args:
+            name: Component name
+            collect: Callable returning a dict of cache name to size in bytes
+        """
+        self._collectors[name] = collect
+
+    def cache_footprints(self):
+        """
+        Get the memory held by each registered cache.
+
+        Returns:
+            dict: Mapping of cache name to size in bytes
+        """
+        footprints = {}
+        for name, collect in self._collectors.items():
+            try:
+                footprints.update(collect())
+            except Exception as e:
+                logger.error(f"Error measuring {name} memory: {e}")
+        return footprints
+
+    def begin_command(self):
+        """
+        Note the traced memory when a command starts.
+
+        Returns:
+            int: Traced bytes, or None when not tracing
+        """
+        if not tracemalloc.is_tracing():
+            return None
+        return tracemalloc.get_traced_memory()[0]
+
+    def end_command(self, name, started):
+        """
+        Record the traced memory a command left behind.
+
+        Commands running at the same time share the difference, so the
+        figures show trends over many runs rather than exact amounts.
+
+        Args:
+            name: Command name
+            started: The value returned by begin_command
+        """
+        if started is None or not tracemalloc.is_tracing():
+            return
+        retained = tracemalloc.get_traced_memory()[0] - started
+        with self._lock:
+            stats = self._commands.setdefault(name, {'runs': 0, 'retained': 0, 'max_retained': 0})
+            stats['runs'] += 1
+            stats['retained'] += retained
+            stats['max_retained'] = max(stats['max_retained'], retained)
+
+    def command_stats(self):
+        """
+        Get the memory retained per command.
+
+        Returns:
+            dict: Mapping of command name to runs, total and largest retained bytes
+        """
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._commands.items()}
+
+    @staticmethod
+    def _capture():
+        """Take a snapshot without keeping it."""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("Memory tracing is off")
+        return tracemalloc.take_snapshot().filter_traces(IGNORED_TRACES)
+
+    def take_snapshot(self, label=None):
+        """
+        Take and keep a snapshot of the traced allocations.
+
+        Args:
+            label: Optional name (default: a sequence number and the current time)
+
+        Returns:
+            str: The snapshot's label
+
+        Raises:
+            RuntimeError: If tracing is off
+        """
+        snapshot = self._capture()
+        with self._lock:
+            self._taken += 1
+            label = label or f"{self._taken}@{time.strftime('%H:%M:%S')}"
+            self._snapshots.pop(label, None)
+            self._snapshots[label] = snapshot
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return label
+
+    def snapshot_labels(self):
+        """
+        List the kept snapshots.
+
+        Returns:
+            list: Labels, oldest first
+        """
+        with self._lock:
+            return list(self._snapshots)
+
+    def _get_snapshot(self, label):
+        """Get a kept snapshot by label."""
+        with self._lock:
+            if label not in self._snapshots:
+                raise KeyError(label)
+            return self._snapshots[label]
+
+    def top_allocators(self, limit=10, label=None):
+        """
+        Get the code holding the most traced memory.
+
+        Allocations are grouped by the innermost frame in the bot's own
+        code, so memory allocated inside pandas or matplotlib is reported
+        under the bot line that called them.
+
+        Args:
+            limit: Number of locations to return
+            label: Snapshot to read (default: a new snapshot)
+
+        Returns:
+            list: (location, size in bytes, allocation count) tuples, largest first
+        """
+        snapshot = self._get_snapshot(label) if label else self._capture()
+        totals = {}
+        for stat in snapshot.statistics('traceback'):
+            location = _location(stat.traceback)
+            size, count = totals.get(location, (0, 0))
+            totals[location] = (size + stat.size, count + stat.count)
+        ranked = sorted(totals.items(), key=lambda item: -item[1][0])
+        return [(location, size, count) for location, (size, count) in ranked[:limit]]
+
+    def diff(self, old_label, new_label):
+        """
+        Compare two snapshots.
+
+        Args:
+            old_label: The earlier snapshot
+            new_label: The later snapshot
+
+        Returns:
+            list: (location, size difference, size, count difference) tuples,
+                largest growth first
+        """
+        old = self._get_snapshot(old_label)
+        new = self._get_snapshot(new_label)
+        totals = {}
+        for stat in new.compare_to(old, 'traceback'):
+            location = _location(stat.traceback)
+            size_diff, size, count_diff = totals.get(location, (0, 0, 0))
+            totals[location] = (size_diff + stat.size_diff, size + stat.size, count_diff + stat.count_diff)
+        ranked = sorted(totals.items(), key=lambda item: -item[1][0])
+        return [(location, *values) for location, values in ranked]
+
+    def dump_diff(self, old_label, new_label, directory=Config.LOG_DIR):
+        """
+        Write a full comparison of two snapshots to a file.
+
+        Args:
+            old_label: The earlier snapshot
+            new_label: The later snapshot
+            directory: Directory to write to
+
+        Returns:
+            str: Path of the written file
+        """
+        rows = self.diff(old_label, new_label)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"memdiff-{time.strftime('%Y%m%d-%H%M%S')}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"Traced memory from snapshot {old_label} to {new_label}\n")
+            f.write(f"{'growth':>12} {'size':>12} {'count':>8}  location\n")
+            for location, size_diff, size, count_diff in rows:
+                f.write(f"{format_bytes(size_diff):>12} {format_bytes(size):>12} {count_diff:>+8}  {location}\n")
+        return path
+
+
+# Shared instance used by the bot and the caches
+memory_profiler = MemoryProfiler()
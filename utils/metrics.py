@@ -0,0 +1,84 @@
+"""
+In-process counters and stats for the F1 Discord Bot.
+"""
+
+import logging
+import threading
+from collections import Counter
+
+logger = logging.getLogger('f1bot')
+
+
+class Metrics:
+    """
+    Registry of named counters plus collectors that report the stats of
+    other components (caches, queues) when a snapshot is taken.
+    """
+
+    def __init__(self):
+        """Initialize the registry."""
+        self._counters = Counter()
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1):
+        """
+        Increase a counter.
+
+        Args:
+            name: Counter name, dotted by component (e.g. 'dedup.attached')
+            value: Amount to add
+        """
+        with self._lock:
+            self._counters[name] += value
+
+    def get(self, name):
+        """
+        Get a counter's value.
+
+        Args:
+            name: Counter name
+
+        Returns:
+            int: The value (0 if never incremented)
+        """
+        with self._lock:
+            return self._counters[name]
+
+    def register_collector(self, name, collect):
+        """
+        Register a component's stats for snapshots.
+
+        Args:
+            name: Component name
+            collect: Callable returning a dict of stats
+        """
+        self._collectors[name] = collect
+
+    def snapshot(self):
+        """
+        Get all counters and collected stats.
+
+        Returns:
+            dict: Mapping of group name to a dict of values; counters are grouped
+                by the part of their name before the first dot
+        """
+        with self._lock:
+            counters = dict(self._counters)
+
+        groups = {}
+        for name, value in sorted(counters.items()):
+            group, _, key = name.partition('.')
+            groups.setdefault(group, {})[key or group] = value
+
+        for name, collect in self._collectors.items():
+            try:
+                groups.setdefault(name, {}).update(collect())
+            except Exception as e:
+                logger.error(f"Error collecting {name} metrics: {e}")
+
+        return groups
+
+
+# Shared instance
+metrics = Metrics()
@@ -0,0 +1,271 @@
+"""
+Output encoding profiles for rendered plots.
+"""
+
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+from config import Config
+
+logger = logging.getLogger('f1bot')
+
+# Key in a guild's overrides that applies to every command
+ALL_COMMANDS = '*'
+
+
+class RenderProfile:
+    """
+    Class to store how a plot is rasterized and encoded.
+    """
+    def __init__(self, name, fmt='png', dpi=Config.DEFAULT_DPI, compress_level=6,
+                 optimize=False, quality=None, palette_colors=None):
+        """
+        Initialize a render profile.
+
+        Args:
+            name: Name of the profile
+            fmt: Output format ('png' or 'webp')
+            dpi: Rasterization resolution
+            compress_level: zlib level for PNG output (0-9)
+            optimize: Whether to let Pillow search for a smaller PNG encoding
+            quality: WebP quality (1-100), lossless if None
+            palette_colors: Quantize PNG output to this many colors, if set
+        """
+        self.name = name
+        self.fmt = fmt
+        self.dpi = dpi
+        self.compress_level = compress_level
+        self.optimize = optimize
+        self.quality = quality
+        self.palette_colors = palette_colors
+
+    @property
+    def extension(self):
+        """File extension for images encoded with this profile."""
+        return self.fmt
+
+    def filename(self, stem):
+        """
+        Build a filename for an image encoded with this profile.
+
+        Args:
+            stem: Filename without extension
+
+        Returns:
+            str: The filename
+        """
+        return f"{stem}.{self.extension}"
+
+    def encode(self, fig, **savefig_kwargs):
+        """
+        Encode a figure with this profile.
+
+        Args:
+            fig: The matplotlib figure
+            **savefig_kwargs: Extra arguments for Figure.savefig (e.g. bbox_inches)
+
+        Returns:
+            bytes: The encoded image
+        """
+        buffer = io.BytesIO()
+
+        if self.fmt == 'webp':
+            pil_kwargs = {'lossless': True} if self.quality is None else {'quality': self.quality}
+            pil_kwargs['method'] = 4
+            fig.savefig(buffer, format='webp', dpi=self.dpi, pil_kwargs=pil_kwargs, **savefig_kwargs)
+            return buffer.getvalue()
+
+        if self.palette_colors:
+            # Rasterize losslessly and fast, then quantize with Pillow
+            from PIL import Image
+
+            fig.savefig(buffer, format='png', dpi=self.dpi,
+                        pil_kwargs={'compress_level': 0}, **savefig_kwargs)
+            buffer.seek(0)
+            with Image.open(buffer) as image:
+                return self.encode_image(image)
+
+        fig.savefig(buffer, format='png', dpi=self.dpi,
+                    pil_kwargs={'compress_level': self.compress_level, 'optimize': self.optimize},
+                    **savefig_kwargs)
+        return buffer.getvalue()
+
+    def encode_image(self, image):
+        """
+        Encode an already rasterized image with this profile.
+
+        Args:
+            image: The PIL image (e.g. a composited RGBA plot)
+
+        Returns:
+            bytes: The encoded image
+        """
+        output = io.BytesIO()
+
+        if self.fmt == 'webp':
+            pil_kwargs = {'lossless': True} if self.quality is None else {'quality': self.quality}
+            image.save(output, format='WEBP', method=4, **pil_kwargs)
+            return output.getvalue()
+
+        image = image.convert('RGB')
+        if self.palette_colors:
+            image = image.quantize(colors=self.palette_colors)
+        image.save(output, format='PNG', optimize=self.optimize,
+                   compress_level=self.compress_level)
+        return output.getvalue()
+
+
+def load_profiles(definitions=Config.RENDER_PROFILES):
+    """
+    Build render profiles from their configuration.
+
+    Args:
+        definitions: Mapping of profile name to RenderProfile keyword arguments
+
+    Returns:
+        dict: Mapping of profile name to RenderProfile
+    """
+    return {name: RenderProfile(name, **options) for name, options in definitions.items()}
+
+
+class RenderProfileRegistry:
+    """
+    Resolves which render profile a command uses.
+
+    Precedence: guild override for the command, guild override for all
+    commands, configured profile for the command, then the default profile.
+    Guild overrides are persisted as JSON.
+    """
+
+    def __init__(self, profiles=None, settings_file=Config.GUILD_PROFILES_FILE,
+                 command_profiles=Config.COMMAND_RENDER_PROFILES,
+                 default_profile=Config.DEFAULT_RENDER_PROFILE):
+        """
+        Initialize the registry.
+
+        Args:
+            profiles: Optional mapping of name to RenderProfile (default: from Config)
+            settings_file: JSON file holding per-guild overrides
+            command_profiles: Mapping of command name to profile name
+            default_profile: Name of the fallback profile
+        """
+        self.profiles = profiles or load_profiles()
+        self.settings_file = settings_file
+        self.command_profiles = dict(command_profiles)
+        self.default_profile = default_profile
+        self._guilds = None
+        self._lock = threading.Lock()
+
+    def _load_guilds(self):
+        """Load guild overrides on first use."""
+        if self._guilds is None:
+            try:
+                with open(self.settings_file, 'r') as f:
+                    self._guilds = json.load(f)
+            except FileNotFoundError:
+                self._guilds = {}
+            except Exception as e:
+                logger.error(f"Error loading guild render profiles: {e}")
+                self._guilds = {}
+        return self._guilds
+
+    def _save_guilds(self):
+        """Persist guild overrides atomically."""
+        directory = os.path.dirname(os.path.abspath(self.settings_file))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self._guilds, f, indent=2)
+        os.replace(tmp_path, self.settings_file)
+
+    def get(self, name):
+        """
+        Get a profile by name.
+
+        Args:
+            name: The profile name
+
+        Returns:
+            RenderProfile: The profile
+
+        Raises:
+            KeyError: If no profile has that name
+        """
+        return self.profiles[name]
+
+    def resolve(self, command_name=None, guild_id=None):
+        """
+        Resolve the profile for a command invocation.
+
+        Args:
+            command_name: The command name
+            guild_id: The guild ID, or None for direct messages
+
+        Returns:
+            RenderProfile: The profile to render with
+        """
+        with self._lock:
+            overrides = self._load_guilds().get(str(guild_id), {}) if guild_id else {}
+
+        for name in (overrides.get(command_name), overrides.get(ALL_COMMANDS),
+                     self.command_profiles.get(command_name), self.default_profile):
+            if name in self.profiles:
+                return self.profiles[name]
+
+        return RenderProfile(self.default_profile)
+
+    def get_guild_overrides(self, guild_id):
+        """
+        Get a guild's profile overrides.
+
+        Args:
+            guild_id: The guild ID
+
+        Returns:
+            dict: Mapping of command name (or '*' for all commands) to profile name
+        """
+        with self._lock:
+            return dict(self._load_guilds().get(str(guild_id), {}))
+
+    def resolve_for_context(self, ctx):
+        """
+        Resolve the profile for a command context.
+
+        Args:
+            ctx: The command context
+
+        Returns:
+            RenderProfile: The profile to render with
+        """
+        command_name = ctx.command.name if ctx.command else None
+        return self.resolve(command_name, ctx.guild.id if ctx.guild else None)
+
+    def set_guild_profile(self, guild_id, profile_name, command_name=None):
+        """
+        Set (or clear) a guild's profile override.
+
+        Args:
+            guild_id: The guild ID
+            profile_name: The profile name, or None to clear the override
+            command_name: Command to override (default: None, all commands)
+
+        Raises:
+            KeyError: If the profile does not exist
+        """
+        if profile_name is not None and profile_name not in self.profiles:
+            raise KeyError(profile_name)
+
+        key = command_name or ALL_COMMANDS
+        with self._lock:
+            overrides = self._load_guilds().setdefault(str(guild_id), {})
+            if profile_name is None:
+                overrides.pop(key, None)
+            else:
+                overrides[key] = profile_name
+            self._save_guilds()
+
+
+# Shared instance used by the cogs
+render_profiles = RenderProfileRegistry()
@@ -0,0 +1,238 @@
+"""
+Thread-safe plot rendering for the F1 Discord Bot.
+"""
+
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import matplotlib
+from config import Config
+from utils.figure_manager import figure_manager
+from utils.layer_cache import layer_cache
+from utils.render_profiles import render_profiles
+from utils.tracing import run_in_executor, span
+
+logger = logging.getLogger('f1bot')
+
+_style_lock = threading.Lock()
+_style_applied = False
+
+
+class RenderStyle:
+    """
+    Class to store the settings a plot is rendered with.
+    """
+    def __init__(self, name, figsize=Config.DEFAULT_FIG_SIZE, dpi=Config.DEFAULT_DPI):
+        """
+        Initialize a render style.
+
+        Args:
+            name: Name of the style
+            figsize: Default figure size in inches
+            dpi: Figure resolution
+        """
+        self.name = name
+        self.figsize = tuple(figsize)
+        self.dpi = dpi
+
+
+DEFAULT_STYLE = RenderStyle('default')
+
+
+def init_render_worker():
+    """
+    Apply process-wide matplotlib/FastF1 styling exactly once.
+
+    Used as the thread pool initializer. rcParams and the FastF1 timedelta
+    converters are global, so they are configured before the first render
+    and never touched again while renders run concurrently.
+    """
+    global _style_applied
+    with _style_lock:
+        if _style_applied:
+            return
+        import fastf1.plotting
+
+        matplotlib.use('Agg')
+        fastf1.plotting.setup_mpl(mpl_timedelta_support=True, color_scheme='fastf1')
+        _style_applied = True
+        logger.info("Render style initialized")
+
+
+class Renderer:
+    """
+    Renders plots onto explicit, managed figures.
+
+    Draw functions receive the figure to draw on and must not use pyplot;
+    the renderer owns figure creation, encoding and release.
+    """
+
+    def __init__(self, figures=None, style=DEFAULT_STYLE, profile=None, layers=None):
+        """
+        Initialize the renderer.
+
+        Args:
+            figures: Optional FigureManager (default: the shared manager)
+            style: The RenderStyle to render with
+            profile: Optional default RenderProfile (default: Config.DEFAULT_RENDER_PROFILE)
+            layers: Optional LayerCache for static layers (default: the shared cache)
+        """
+        self.figures = figures or figure_manager
+        self.layers = layers or layer_cache
+        self.style = style
+        self.profile = profile or render_profiles.get(Config.DEFAULT_RENDER_PROFILE)
+
+    def render(self, draw, *args, figsize=None, encode_kwargs=None, profile=None, **kwargs):
+        """
+        Render a plot to image bytes.
+
+        Args:
+            draw: Callable draw(fig, *args, **kwargs) that draws onto the figure
+            *args: Positional arguments for draw
+            figsize: Optional figure size overriding the style default
+            encode_kwargs: Optional extra arguments for Figure.savefig
+            profile: Optional RenderProfile to encode with (default: the renderer's profile)
+            **kwargs: Keyword arguments for draw
+
+        Returns:
+            bytes: The encoded image
+        """
+        init_render_worker()
+        profile = profile or self.profile
+        with span('render', profile=profile.name) as trace:
+            with self.figures.figure(figsize or self.style.figsize, self.style.dpi) as fig:
+                draw(fig, *args, **kwargs)
+                image = profile.encode(fig, **(encode_kwargs or {}))
+            trace['bytes'] = len(image)
+        return image
+
+    def _rasterize(self, setup, draw, figsize, dpi, transparent=False):
+        """
+        Draw a layer and rasterize it to an RGBA image.
+
+        Args:
+            setup: Callable setup(fig) that creates the axes and returns them
+            draw: Callable draw(fig, axes) that draws the layer
+            figsize: Figure size in inches
+            dpi: Figure resolution
+            transparent: Whether to leave the figure and axes backgrounds empty
+
+        Returns:
+            PIL.Image.Image: The rasterized layer
+        """
+        from PIL import Image
+
+        with self.figures.figure(figsize, dpi) as fig:
+            axes = setup(fig)
+            if transparent:
+                fig.patch.set_alpha(0)
+                for ax in fig.axes:
+                    ax.set_axis_off()
+            draw(fig, axes)
+            fig.canvas.draw()
+            return Image.frombuffer('RGBA', fig.canvas.get_width_height(),
+                                    bytes(fig.canvas.buffer_rgba()), 'raw', 'RGBA', 0, 1)
+
+    def render_layered(self, layer_key, setup, draw_static, draw_dynamic, figsize=None, profile=None):
+        """
+        Render a plot as a cached static layer with a dynamic layer composited on top.
+
+        Both layers are drawn on identically set up axes, so setup must fix the
+        axes positions and limits without depending on the plotted data (no
+        autoscaling, tight layout or tight bounding boxes). The dynamic layer is
+        drawn with the figure background, axes frames, ticks and labels hidden.
+
+        Args:
+            layer_key: Hashable key identifying everything the static layer depends on
+            setup: Callable setup(fig) that creates the axes and returns them
+            draw_static: Callable draw_static(fig, axes) drawing the shared background
+            draw_dynamic: Callable draw_dynamic(fig, axes) drawing request-specific data
+            figsize: Optional figure size overriding the style default
+            profile: Optional RenderProfile to encode with (default: the renderer's profile)
+
+        Returns:
+            bytes: The encoded image
+        """
+        from PIL import Image
+
+        init_render_worker()
+        profile = profile or self.profile
+        figsize = tuple(figsize or self.style.figsize)
+
+        with span('render', profile=profile.name, layered=True) as trace:
+            background = self.layers.get_or_render(
+                (*layer_key, figsize, profile.dpi),
+                lambda: self._rasterize(setup, draw_static, figsize, profile.dpi)
+            )
+            foreground = self._rasterize(setup, draw_dynamic, figsize, profile.dpi, transparent=True)
+
+            image = profile.encode_image(Image.alpha_composite(background, foreground))
+            trace['bytes'] = len(image)
+        return image
+
+    def filename(self, stem, profile=None):
+        """
+        Build the filename for an image rendered with a profile.
+
+        Args:
+            stem: Filename without extension
+            profile: Optional RenderProfile (default: the renderer's profile)
+
+        Returns:
+            str: The filename
+        """
+        return (profile or self.profile).filename(stem)
+
+
+class RenderPool:
+    """
+    Thread pool that runs session loading and rendering off the event loop.
+    """
+
+    def __init__(self, max_workers=Config.RENDER_WORKERS):
+        """
+        Initialize the render pool.
+
+        Args:
+            max_workers: Number of worker threads
+        """
+        self.max_workers = max_workers
+        self._executor = None
+
+    def _get_executor(self):
+        """Create the executor on first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix='render',
+                initializer=init_render_worker
+            )
+        return self._executor
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run a blocking function in the pool.
+
+        The function runs in a copy of the caller's context, so it keeps the
+        caller's request ID.
+
+        Args:
+            func: The function to run
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            The return value of func
+        """
+        return await run_in_executor(functools.partial(func, *args, **kwargs), executor=self._get_executor())
+
+    def shutdown(self):
+        """Shut down the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# Shared instance used by the cogs
+render_pool = RenderPool()
@@ -0,0 +1,140 @@
+"""
+Coalescing of identical concurrent requests.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from config import Config
+from utils.memory_profiler import memory_profiler
+from utils.metrics import metrics
+from utils.tracing import current_request_id, event
+
+logger = logging.getLogger('f1bot')
+
+
+class RequestDeduplicator:
+    """
+    Shares one computation between identical requests.
+
+    The first request for a key runs it; requests arriving while it runs
+    await the same task, and requests arriving shortly after it finished
+    get the recent result. Failures are shared with waiting requests but
+    never kept, except those the caller marks as its own to retry.
+    """
+
+    def __init__(self, result_ttl=Config.DEDUP_RESULT_TTL, max_results=Config.DEDUP_MAX_RESULTS):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            result_ttl: Seconds a finished result is reused
+            max_results: Maximum finished results kept
+        """
+        self.result_ttl = result_ttl
+        self.max_results = max_results
+        self._inflight = {}
+        self._owners = {}
+        self._results = OrderedDict()
+
+    def _recent(self, key):
+        """Get an unexpired result, dropping expired ones."""
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        finished_at = entry[0]
+        if time.monotonic() - finished_at > self.result_ttl:
+            del self._results[key]
+            return None
+        return entry
+
+    async def run(self, key, func, retry_on=()):
+        """
+        Run func, or attach to an identical request's result.
+
+        Shared results are traced with the ID of the request that computed them.
+        A request attached to a computation that fails with one of the
+        retry_on exceptions runs func itself, since that failure (such as a
+        rejection by a full queue) belonged to the other request.
+
+        Args:
+            key: Hashable key of the normalized request
+            func: Coroutine function computing the result, called without arguments
+            retry_on: Exception types that attached requests do not share
+
+        Returns:
+            The result
+        """
+        recent = self._recent(key)
+        if recent is not None:
+            metrics.increment('dedup.recent')
+            event('dedup', outcome='recent', owner=recent[2])
+            return recent[1]
+
+        while True:
+            task = self._inflight.get(key)
+            if task is None:
+                metrics.increment('dedup.computed')
+                task = asyncio.ensure_future(func())
+                self._inflight[key] = task
+                self._owners[key] = current_request_id()
+                task.add_done_callback(lambda done: self._finish(key, done))
+                # Shielded so one caller giving up does not cancel the others' result
+                return await asyncio.shield(task)
+
+            metrics.increment('dedup.attached')
+            event('dedup', outcome='attached', owner=self._owners.get(key))
+            logger.info(f"Attached to in-flight request {key}")
+            try:
+                return await asyncio.shield(task)
+            except retry_on as e:
+                # The failure was the other request's: submit again, or attach to another retry
+                metrics.increment('dedup.retried')
+                logger.info(f"In-flight request {key} failed ({e}), running it again")
+
+    def _finish(self, key, task):
+        """Record a finished computation."""
+        self._inflight.pop(key, None)
+        owner = self._owners.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._results[key] = (time.monotonic(), task.result(), owner)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+    def size_bytes(self):
+        """
+        Get the memory held by the kept results' images.
+
+        Returns:
+            int: Bytes of image data in recent results
+        """
+        size = 0
+        for _, result, _ in list(self._results.values()):
+            parts = result if isinstance(result, tuple) else (result,)
+            size += sum(len(part) for part in parts if isinstance(part, bytes))
+        return size
+
+    def stats(self):
+        """
+        Get current sizes and how often requests were shared.
+
+        Returns:
+            dict: In-flight and recent result counts, and the percentage of
+                requests served from another request's result
+        """
+        computed = metrics.get('dedup.computed')
+        shared = metrics.get('dedup.attached') + metrics.get('dedup.recent')
+        return {
+            'inflight': len(self._inflight),
+            'results_kept': len(self._results),
+            'shared_pct': round(100 * shared / (computed + shared), 1) if computed + shared else 0.0
+        }
+
+
+# Shared instance used by the job scheduler
+request_dedup = RequestDeduplicator()
+metrics.register_collector('dedup', request_dedup.stats)
+memory_profiler.register_collector('dedup', lambda: {'recent_images': request_dedup.size_bytes()})
@@ -0,0 +1,139 @@
+"""
+Per-request trace events for the F1 Discord Bot.
+
+Each command invocation gets a request ID kept in a context variable, so
+everything it causes (scheduling, session loads, rendering, worker jobs)
+can be tied back to it. Events and timed spans are written as JSON lines
+to a separate trace log; tools/trace_summary.py summarizes them.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import time
+import uuid
+
+# Trace records go through the 'f1bot' logger's queue, but only to the trace file
+trace_logger = logging.getLogger('f1bot.trace')
+
+request_id_var = contextvars.ContextVar('request_id', default=None)
+
+
+def new_request_id():
+    """
+    Create a request ID.
+
+    Returns:
+        str: A short random ID
+    """
+    return uuid.uuid4().hex[:12]
+
+
+def current_request_id():
+    """
+    Get the request ID of the current context.
+
+    Returns:
+        str: The request ID, or None outside a request
+    """
+    return request_id_var.get()
+
+
+async def run_in_executor(func, *args, executor=None):
+    """
+    Run a blocking call in an executor as part of the current request.
+
+    loop.run_in_executor does not carry context variables into the executor
+    thread, so the call runs in a copy of the caller's context instead.
+
+    Args:
+        func: The function to run
+        *args: Positional arguments for func
+        executor: Optional executor (default: the event loop's default executor)
+
+    Returns:
+        The return value of func
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(executor, functools.partial(context.run, func, *args))
+
+
+@contextlib.contextmanager
+def bind_request(request_id):
+    """
+    Run a block as part of a request.
+
+    Args:
+        request_id: The request ID (None leaves the block outside any request)
+    """
+    token = request_id_var.set(request_id)
+    try:
+        yield request_id
+    finally:
+        request_id_var.reset(token)
+
+
+def event(name, **fields):
+    """
+    Write a trace event for the current request.
+
+    Args:
+        name: Event name, dotted by component (e.g. 'dedup.attached')
+        **fields: JSON-serializable event fields
+    """
+    if trace_logger.disabled or not trace_logger.isEnabledFor(logging.INFO):
+        return
+    record = {'ts': round(time.time(), 3), 'request_id': current_request_id(), 'event': name}
+    record.update(fields)
+    trace_logger.info(json.dumps(record, default=str))
+
+
+@contextlib.contextmanager
+def span(name, **fields):
+    """
+    Time a block and write it as a trace event with its duration.
+
+    The yielded dict can be filled with more fields (cache hits, sizes)
+    before the block ends. Errors are recorded and re-raised.
+
+    Args:
+        name: Span name
+        **fields: JSON-serializable span fields
+    """
+    started = time.perf_counter()
+    fields['status'] = 'ok'
+    try:
+        yield fields
+    except BaseException as e:
+        fields['status'] = 'error'
+        fields['error'] = type(e).__name__
+        raise
+    finally:
+        event(name, duration_ms=round((time.perf_counter() - started) * 1000, 2), **fields)
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Adds the current request ID to log records as record.request_id.
+    """
+
+    def filter(self, record):
+        record.request_id = current_request_id() or '-'
+        return True
+
+
+class TraceFilter(logging.Filter):
+    """
+    Selects trace records (include=True) or everything else (include=False).
+    """
+
+    def __init__(self, include):
+        super().__init__()
+        self.include = include
+
+    def filter(self, record):
+        return record.name.startswith(trace_logger.name) == self.include
@@ -0,0 +1,137 @@
+"""
+Render worker for the F1 Discord Bot.
+
+Pulls jobs queued by the bot from the job broker, runs them and stores the
+results. Start workers alongside the bot when Config.JOB_EXECUTOR is 'broker':
+
+    python worker.py --processes 4
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import time
+import fastf1
+from config import Config
+from utils.logging_setup import setup_logging
+
+logger = logging.getLogger('f1bot')
+
+
+def setup_fastf1(cache_dir=Config.CACHE_DIR):
+    """
+    Enable the FastF1 cache and the configured HTTP mode in this process.
+
+    Args:
+        cache_dir: FastF1 cache directory
+    """
+    from services.http_archive import configure_fastf1_http
+
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+    fastf1.Cache.enable_cache(cache_dir)
+    configure_fastf1_http()
+
+
+def run_worker(worker_id, db_path=Config.BROKER_DB, poll_interval=Config.BROKER_POLL_INTERVAL, log_name=None,
+               cache_dir=Config.CACHE_DIR):
+    """
+    Process jobs from the broker until interrupted.
+
+    Sets up FastF1 itself, so it works as a process target with any start method.
+
+    Args:
+        worker_id: Name of this worker, recorded on claimed jobs
+        db_path: Path of the broker database
+        poll_interval: Seconds to wait when the queue is empty
+        log_name: Log file name for this worker, or None to log to the console only
+        cache_dir: FastF1 cache directory
+    """
+    setup_logging(log_to_file=log_name is not None, log_name=log_name)
+    setup_fastf1(cache_dir)
+
+    from services.job_broker import JobBroker
+    from services.job_handlers import run_job
+    from services.session_repository import RemoteBackend, session_repository
+    from utils.rendering import init_render_worker
+    from utils.tracing import bind_request, event
+
+    init_render_worker()
+    if isinstance(session_repository.backend, RemoteBackend):
+        session_repository.backend = session_repository.backend.worker_backend()
+    broker = JobBroker(db_path)
+    last_maintenance = 0
+    logger.info(f"Worker {worker_id} started")
+
+    try:
+        while True:
+            if time.monotonic() - last_maintenance > Config.BROKER_MAINTENANCE_INTERVAL:
+                broker.requeue_stale()
+                broker.purge()
+                last_maintenance = time.monotonic()
+
+            claimed = broker.claim(worker_id)
+            if claimed is None:
+                time.sleep(poll_interval)
+                continue
+
+            job_id, spec = claimed
+            started = time.perf_counter()
+            with bind_request(spec.request_id):
+                event('worker.claim', worker=worker_id, job_id=job_id)
+                try:
+                    result = run_job(spec)
+                except Exception as e:
+                    logger.error(f"Worker {worker_id} failed job {job_id} {spec}: {e}")
+                    broker.fail(job_id, e)
+                else:
+                    broker.complete(job_id, result)
+                    logger.info(f"Worker {worker_id} finished job {job_id} ({spec.command}) "
+                                f"in {time.perf_counter() - started:.2f}s")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        broker.close()
+
+
+def main():
+    """
+    Main function to start the workers.
+    """
+    parser = argparse.ArgumentParser(description="Run render workers for the F1 Discord Bot")
+    parser.add_argument('--processes', type=int, default=Config.WORKER_PROCESSES,
+                        help="Number of worker processes to start")
+    args = parser.parse_args()
+
+    setup_logging(log_name='worker')
+
+    prefix = f"{socket.gethostname()}-{os.getpid()}"
+    if args.processes <= 1:
+        run_worker(prefix, log_name='worker')
+        return
+
+    processes = [
+        multiprocessing.Process(
+            target=run_worker,
+            args=(f"{prefix}-{index}",),
+            kwargs={'log_name': f"worker_{index}"},
+            daemon=True
+        )
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        logger.info("Stopping workers")
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == '__main__':
+    main()